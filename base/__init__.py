@@ -2,6 +2,9 @@ import controlShapes
 import control
 import module
 import base
+import incrementalBuild
+import buildCheckpoints
+import rigRegistry
 
 
 
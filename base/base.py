@@ -9,6 +9,7 @@ import maya.cmds as mc
 from utils import attribute
 from utils import name
 from utils import anim
+from utils import buildProfiler
 
 
 import control
@@ -19,6 +20,7 @@ controlVisAt = 'controlVis'
 # TODO: add rig sets
 # TODO: add comment for build function
 
+@buildProfiler.profile()
 def build(
         headJnt,
         topHeadObj = '',
@@ -0,0 +1,210 @@
+"""
+module to save and resume rig builds from stage checkpoints
+@category: Rigging
+
+after each build stage scene is saved as checkpoint file together with small JSON state
+(e.g. baseRigData and module groups), each stage has fingerprint of its inputs (files, code, values)
+and checkpoint is valid only if fingerprints of its stage and all earlier stages did not change
+
+example:
+
+    stageFingerprints = {
+                        'import': buildCheckpoints.getFingerprint( files = [ modelPath, builderPath ] ),
+                        'control': buildCheckpoints.getFingerprint( functions = [ setupControlRig ] )
+                        }
+
+    checkpoints = buildCheckpoints.BuildCheckpoints( checkpointsFolder, assetName, ['import', 'control', 'deform'], stageFingerprints )
+    startStage, stateDt = checkpoints.resume( 'deform' )
+"""
+
+import os
+import json
+import inspect
+import hashlib
+
+import maya.cmds as mc
+
+from utils import buildSession
+
+import incrementalBuild
+
+checkpointFileFormat = '%s_%s_checkpoint.mb'
+checkpointStateFormat = '%s_%s_checkpoint.json'
+resumedSceneFormat = '%s_resumed.mb'
+
+# compiled files change when code is imported, not when it is edited
+compiledExts = ( '.pyc', '.pyo' )
+
+class BuildCheckpoints( object ):
+
+    '''
+    checkpoints of one asset build, stages are ordered as they are built
+    '''
+
+    def __init__( self, checkpointsFolder, assetName, stages, stageFingerprints ):
+
+        '''
+        :param checkpointsFolder: str, folder with checkpoint files
+        :param assetName: str, name of built asset
+        :param stages: list( str ), names of build stages in build order
+        :param stageFingerprints: dict, { stage name: fingerprint of stage inputs }, see getFingerprint()
+        '''
+
+        self.checkpointsFolder = checkpointsFolder
+        self.assetName = assetName
+        self.stages = stages
+        self.stageFingerprints = stageFingerprints
+
+    def _getPaths( self, stage ):
+
+        return [
+                os.path.join( self.checkpointsFolder, checkpointFileFormat % ( self.assetName, stage ) ),
+                os.path.join( self.checkpointsFolder, checkpointStateFormat % ( self.assetName, stage ) )
+                ]
+
+    def _getFingerprints( self, stage ):
+
+        # fingerprints of stage and all earlier stages
+        stages = self.stages[ :self.stages.index( stage ) + 1 ]
+
+        return [ self.stageFingerprints.get( s, '' ) for s in stages ]
+
+    def save( self, stage, stateDt ):
+
+        '''
+        save scene and state after finished stage, current scene name is not changed
+
+        :param stage: str, name of finished stage
+        :param stateDt: dict, build data needed by next stages, values can be Control or Module instances
+        :return: None
+        '''
+
+        scenePath, statePath = self._getPaths( stage )
+
+        if not os.path.exists( self.checkpointsFolder ):
+
+            os.makedirs( self.checkpointsFolder )
+
+        # checkpoint is saved with deformer envelopes deferred by build session turned on
+        deferredDeformers = buildSession.restoreEnvelopes()
+
+        mc.file( scenePath, ea = True, type = 'mayaBinary', f = True )
+
+        for deformer in deferredDeformers:
+
+            buildSession.deferEnvelope( deformer )
+
+        fileobj = open( statePath, 'w' )
+        json.dump( { 'stage': stage, 'fingerprints': self._getFingerprints( stage ), 'state': incrementalBuild.serialize( stateDt ) }, fileobj, indent = 1 )
+        fileobj.close()
+
+    def isValid( self, stage ):
+
+        '''
+        :param stage: str, name of stage
+        :return: bool, True if stage checkpoint exists and inputs of the stage and earlier stages did not change
+        '''
+
+        scenePath, statePath = self._getPaths( stage )
+
+        if not os.path.exists( scenePath ) or not os.path.exists( statePath ):
+
+            return False
+
+        fileobj = open( statePath, 'r' )
+        savedDt = json.load( fileobj )
+        fileobj.close()
+
+        return savedDt['fingerprints'] == self._getFingerprints( stage )
+
+    def load( self, stage ):
+
+        '''
+        open checkpoint scene of stage, opened scene is renamed so saving it doesn't overwrite checkpoint
+
+        :param stage: str, name of stage
+        :return: dict, build state saved with checkpoint
+        '''
+
+        scenePath, statePath = self._getPaths( stage )
+
+        mc.file( scenePath, o = True, f = True )
+        mc.file( rename = os.path.join( self.checkpointsFolder, resumedSceneFormat % self.assetName ) )
+
+        fileobj = open( statePath, 'r' )
+        stateDt = incrementalBuild.deserialize( json.load( fileobj )['state'] )
+        fileobj.close()
+
+        return stateDt
+
+    def resume( self, stage ):
+
+        '''
+        load last valid checkpoint before given stage
+
+        :param stage: str, name of stage to resume build from
+        :return: list( str, dict ), 0- first stage to build, 1- build state, first build stage and empty state if no checkpoint is valid
+        '''
+
+        for previousStage in reversed( self.stages[ :self.stages.index( stage ) ] ):
+
+            if self.isValid( previousStage ):
+
+                print '# buildCheckpoints: resuming build of %s after stage %s' % ( self.assetName, previousStage )
+
+                return [ self.stages[ self.stages.index( previousStage ) + 1 ], self.load( previousStage ) ]
+
+        print '# buildCheckpoints: no valid checkpoint found for %s, building from start' % self.assetName
+
+        return [ self.stages[0], {} ]
+
+def getFingerprint( files = [], functions = [], values = [] ):
+
+    '''
+    get fingerprint of stage inputs
+
+    :param files: list( str ), files or folders, their size and modification time are used, folders are listed recursively
+                  without compiled Python files, so code folders can be used
+    :param functions: list( function ), functions with code used by stage, code changes invalidate checkpoints
+    :param values: list, any values with stable repr(), e.g. build arguments
+    :return: str, hex digest
+    '''
+
+    fingerprint = hashlib.sha1()
+
+    for path in files:
+
+        filePaths = [ path ]
+
+        if os.path.isdir( path ):
+
+            filePaths = sorted( [ os.path.join( d, f ) for d, dirs, fileNames in os.walk( path ) for f in fileNames
+                                  if not f.endswith( compiledExts ) ] )
+
+        for filePath in filePaths:
+
+            if os.path.exists( filePath ):
+
+                fileStat = os.stat( filePath )
+                fingerprint.update( '%s %d %f' % ( filePath, fileStat.st_size, fileStat.st_mtime ) )
+
+            else:
+
+                fingerprint.update( '%s missing' % filePath )
+
+    for function in functions:
+
+        # decorated functions keep original function in __wrapped__
+        function = getattr( function, '__wrapped__', function )
+
+        try:
+
+            fingerprint.update( inspect.getsource( function ) )
+
+        except ( IOError, TypeError ):
+
+            fingerprint.update( function.__name__ )
+
+    fingerprint.update( repr( values ) )
+
+    return fingerprint.hexdigest()
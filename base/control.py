@@ -4,9 +4,12 @@ module for making rig controls
 #TODO: check colorIdx problem when is -1 by default, also was giving problem of reference before assignment on build function
 
 import maya.cmds as mc
+import maya.api.OpenMaya as om2
 
 from utils import name
+from utils import apiwrap
 import controlShapes
+import rigRegistry
 
 rigCtrlAt = 'animatedCtrl'
 rigInternalCtrlAt = 'internalCtrl'
@@ -30,7 +33,8 @@ class Control():
                  colorName = '',
                  rotOrd = 3,
                  animated = True,
-                 noOff = False
+                 noOff = False,
+                 build = True
                  ):
         """
         :param prefix: str, prefix to name new objects
@@ -47,6 +51,7 @@ class Control():
         :param rotOrd: int, integer from 1 to 5 options, this would be the default rotate order of the control
         :param animated: bool, by fault true , it means will be used for animation purposes , if false it will be with the suffix "_icl" with means internal control
         :param noOff: bool, if True the offset grp for the control won't be created
+        :param build: bool, if False the control is only defined and it is built later by ControlBatch
         :return None
         """
         # make the scope of all the local args to pass into another function
@@ -56,7 +61,10 @@ class Control():
         self.C = None
         self.Off = None
         
-        self._build( localArgs )
+        self._args = localArgs
+        
+        if build:
+            self._build( localArgs )
 
 
     def _build(self, args):
@@ -99,6 +107,8 @@ class Control():
         # update instance data
         self.C = control
         self.Off = offset
+        
+        rigRegistry.register( control, 'control', role = name.removeSide( prefix ) )
   
     def _makeNames(self, prefix, animated):
         
@@ -170,53 +180,18 @@ class Control():
 
     def _makeControl(self, ctrlName, shape, colorIdx, scale):
         
-        # make the curve shape 
-        
-        if shape == '' or shape == 'circle': control = controlShapes.circle( degree = 3 )
-        elif shape == 'circleX': control = controlShapes.circle( normal = 'x' )
-        elif shape == 'circleY': control = controlShapes.circle( normal = 'y' )
-        elif shape == 'circleZ': control = controlShapes.circle( normal = 'z' )
-        elif shape == 'star': control = controlShapes.star()
-        elif shape == 'cross': control = controlShapes.cross()
-        elif shape == 'foot': control = controlShapes.foot()
-        elif shape == 'fist': control = controlShapes.fist()
-        elif shape == 'arrow': control = controlShapes.arrow()
-        elif shape == 'crown': control = controlShapes.crown()
-        elif shape == 'cube': control = controlShapes.cube()
-        elif shape == 'cubeOnBase': control = controlShapes.cubeOnBase()
-        elif shape == 'cubeOnBaseX': control = controlShapes.cubeOnBaseX()
-        elif shape == 'diamond': control = controlShapes.diamond()
-        elif shape == 'move': control = controlShapes.move()
-        elif shape == 'rotation': control = controlShapes.rotation()
-        elif shape == 'singleRotation': control = controlShapes.singleRotation()
-        elif shape == 'sphere': control = controlShapes.sphere()
-        elif shape == 'spikeCross': control = controlShapes.spikeCross()
-        elif shape == 'starSimple': control = controlShapes.starSimple()
-        elif shape == 'vis': control = controlShapes.vis()
-        elif shape == 'inverseCrown': control = controlShapes.inverseCrown()
-        elif shape == 'square': control = controlShapes.square()
-        elif shape == 'squareX': control = controlShapes.square( normal = [1, 0, 0] )
-        elif shape == 'squareY': control = controlShapes.square()
-        elif shape == 'squareZ': control = controlShapes.square( normal = [0, 0, 1] )
-        elif shape == 't': control = controlShapes.t()
-        elif shape == 'moveSimple': control = controlShapes.moveSimple()
-        elif shape == 'triangle': control = controlShapes.triangle()
-        elif shape == 'inverseTriangle': control = controlShapes.triangle( normal = '-y' )
-        elif shape == 'triangleZ': control = controlShapes.triangle( normal = 'z' )
-        elif shape == 'inverseTriangleZ': control = controlShapes.triangle( normal = '-z' )
-        
-        else: raise( Exception( 'unregistered shape name "%s"' % shape ) )
-        
-        control = mc.rename( control, ctrlName )
+        # make the curve shape from registered shapes, see controlShapes.registerShape()
+        
+        if shape == '': shape = 'circle'
+        
+        control, controlShapeNames = controlShapes.makeShape( shape, ctrlName, scale )
+        
         #=======================================================================
-        # put the color in the control shape and adjust scale
+        # put the color in the control shape
         #=======================================================================
         
-        for s in mc.listRelatives( control, s = 1 ):
+        for s in controlShapeNames:
             
-            mc.setAttr( control + '.s', scale, scale, scale )
-            mc.makeIdentity( control, a = 1, s = 1 )
-                
             mc.setAttr( s + '.ove', 1 )
             mc.setAttr( s + '.ovc', colorIdx )
         
@@ -299,18 +274,146 @@ class Control():
         if moveTo: mc.delete( mc.parentConstraint( moveTo, offset ) )
 
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+class ControlBatch():
+    """
+    class for building many rig controls at once
+    
+    controls are defined with add() and made with build(), names are checked against
+    registry of running build (see base.rigRegistry), so scene is queried once per build, curves and offsets are made
+    directly with their parents and offsets are matched in one pass without temporary constraints
+    
+    example:
+    
+        batch = ControlBatch()
+        ctrl1 = batch.add( prefix = 'l_finger1', translateTo = 'l_finger1_jnt' )
+        ctrl2 = batch.add( prefix = 'l_finger2', translateTo = 'l_finger2_jnt', ctrlParent = ctrl1 )
+        batch.build()
+        print ctrl2.C, ctrl2.Off
+    """
+    
+    def __init__(self):
+        
+        # define public member
+        self.controls = []
+        
+        # batches of one build share registry of running build, batch used outside of build has its own
+        self._nameRegistry = rigRegistry.getActive() or rigRegistry.RigRegistry()
+    
+    def add(self, **kwargs):
+        """
+        define new control, arguments are the same as for Control class,
+        ctrlParent can be also Control instance added earlier to this batch
+        
+        :return: Control, instance without built objects, its C and Off members are set by build()
+        """
+        
+        ctrl = Control( build = False, **kwargs )
+        self.controls.append( ctrl )
+        
+        return ctrl
+    
+    def build(self):
+        """
+        make all added controls, controls are made in the order they were added
+        
+        :return: list( Control ), built controls in the same order as added
+        """
+        
+        newControls = [ c for c in self.controls if c.C is None ]
+        
+        namesList = [ c._makeNames( c._args['prefix'], c._args['animated'] ) for c in newControls ]
+        self._registerNames( [ n[0] for n in namesList ] )
+        
+        for ctrl, ( ctrlName, offsetName ) in zip( newControls, namesList ):
+            
+            args = ctrl._args
+            ctrlParent = self._getParentName( args['ctrlParent'] )
+            
+            side = name.getSide( args['prefix'] )
+            colorIdx = ctrl._getColorId( side, args['colorIdx'], args['colorName'] )
+            
+            # make offset directly under its parent and control curves under the offset
+            
+            if args['noOff']:
+                
+                offset = None
+                controlParent = ctrlParent
+            
+            else:
+                
+                offset = mc.createNode( 'transform', n = offsetName, p = ctrlParent ) if ctrlParent else mc.createNode( 'transform', n = offsetName )
+                controlParent = offset
+            
+            shapeName = args['shape'] if args['shape'] else 'circle'
+            control, controlShapeNames = controlShapes.makeShape( shapeName, ctrlName, args['scale'], parent = controlParent )
+            
+            for s in controlShapeNames:
+                
+                mc.setAttr( s + '.ove', 1 )
+                mc.setAttr( s + '.ovc', colorIdx )
+            
+            ctrl._fixAttributes( control, args['defLockHide'], args['lockHideChannels'], args['rotOrd'], args['animated'] )
+            
+            # update instance data
+            ctrl.C = control
+            ctrl.Off = offset
+            
+            rigRegistry.register( control, 'control', role = name.removeSide( args['prefix'] ) )
+        
+        # match offsets in the order of the controls, so parent offsets are placed before their children
+        
+        for ctrl in newControls:
+            
+            if ctrl.Off:
+                
+                self._matchOffset( ctrl.Off, ctrl._args['translateTo'], ctrl._args['rotateTo'], ctrl._args['moveTo'] )
+        
+        return self.controls
+    
+    def _registerNames(self, ctrlNames):
+        
+        duplicates = self._nameRegistry.reserveNames( ctrlNames )
+        
+        if duplicates:
+            raise Exception('# cannot create the controls %s because names are not unique in the build or in the scene' % duplicates )
+    
+    def _getParentName(self, ctrlParent):
+        
+        if isinstance( ctrlParent, Control ):
+            
+            return ctrlParent.C
+        
+        if not ctrlParent or not mc.objExists( ctrlParent ): return None
+        
+        return ctrlParent
+    
+    def _matchOffset(self, offset, translateTo, rotateTo, moveTo):
+        """
+        match offset world position to rotate pivot of target and world rotation to target rotation,
+        same as temporary point, orient or parent constraint
+        """
+        
+        if moveTo:
+            
+            translateTo = moveTo
+            rotateTo = moveTo
+        
+        if translateTo and not mc.objExists( translateTo ): translateTo = None
+        if rotateTo and not mc.objExists( rotateTo ): rotateTo = None
+        
+        if not translateTo and not rotateTo: return
+        
+        offsetPath = apiwrap.api2_getDagPath( offset )
+        offsetFn = om2.MFnTransform( offsetPath )
+        
+        if translateTo:
+            
+            targetPos = om2.MFnTransform( apiwrap.api2_getDagPath( translateTo ) ).rotatePivot( om2.MSpace.kWorld )
+            localPos = targetPos * offsetPath.exclusiveMatrixInverse()
+            offsetFn.setTranslation( om2.MVector( localPos ), om2.MSpace.kTransform )
+        
+        if rotateTo:
+            
+            targetRot = om2.MTransformationMatrix( apiwrap.api2_getDagPath( rotateTo ).inclusiveMatrix() ).rotation( asQuaternion = True )
+            parentRot = om2.MTransformationMatrix( offsetPath.exclusiveMatrix() ).rotation( asQuaternion = True )
+            offsetFn.setRotation( targetRot * parentRot.inverse(), om2.MSpace.kTransform )
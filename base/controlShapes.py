@@ -6,9 +6,14 @@ Controls shapes to make different styles of controls
 #TODO: add normal option to arrow and singleRotation control
 
 import maya.cmds as mc
-
+import maya.api.OpenMaya as om2
 
 from utils import shape
+from utils import apiwrap
+
+# registered shape builders and curve data of shapes built in this session
+_shapeBuilders = {}
+_shapeTemplates = {}
 
 def _printControlCVsPositionsForCreateControl( curveObj ):
     
@@ -420,4 +425,154 @@ def triangle( scale = [1, 1, 1], normal = 'y' ):
         
     shape.scale( new, scale )
     
-    return new
\ No newline at end of file
+    return new
+
+#===============================================================================
+# shapes registry
+#===============================================================================
+
+def registerShape( shapeName, builder, **kwargs ):
+    
+    """
+    register function building control shape, so it can be used by name in base.control.Control
+    
+    :param shapeName: str, name of shape used as Control shape argument
+    :param builder: function, makes transform with nurbs curve shapes and returns its name
+    :param kwargs: keyword arguments passed to builder
+    :return: None
+    """
+    
+    _shapeBuilders[ shapeName ] = ( builder, kwargs )
+    _shapeTemplates.pop( shapeName, None )
+
+def getRegisteredShapes():
+    
+    """
+    :return: list( str ), names of registered shapes
+    """
+    
+    return sorted( _shapeBuilders.keys() )
+
+def _getShapeTemplate( shapeName ):
+    
+    """
+    get curve data of registered shape, shape is built only first time in the session
+    and its curves are kept as CVs, knots, degree and form outside of the scene
+    
+    :return: list( tuple ), ( MPointArray cvs, MDoubleArray knots, int degree, int form ) of each curve
+    """
+    
+    if shapeName in _shapeTemplates:
+        
+        return _shapeTemplates[ shapeName ]
+    
+    if not shapeName in _shapeBuilders:
+        
+        raise( Exception( 'unregistered shape name "%s"' % shapeName ) )
+    
+    builder, kwargs = _shapeBuilders[ shapeName ]
+    templateObj = builder( **kwargs )
+    mc.makeIdentity( templateObj, a = 1, t = 1, r = 1, s = 1 )
+    
+    curvesData = []
+    
+    for s in mc.listRelatives( templateObj, s = 1, f = 1 ):
+        
+        curveFn = om2.MFnNurbsCurve( apiwrap.api2_getDagPath( s ) )
+        curvesData.append( ( curveFn.cvPositions(), curveFn.knots(), curveFn.degree, curveFn.form ) )
+    
+    mc.delete( templateObj )
+    _shapeTemplates[ shapeName ] = curvesData
+    
+    return curvesData
+
+def makeShape( shapeName, objectName, scale = 1.0, parent = None, undoable = None ):
+    
+    """
+    make new transform with curves of registered shape, curves are made directly from cached curve data,
+    with undo queue on curves are made with mc.curve so interactive tools can be undone,
+    otherwise with API calls, e.g. during rig builds where undo is suspended by utils.buildSession
+    
+    :param shapeName: str, name of registered shape
+    :param objectName: str, name of new transform, shapes get name with 'Shape' suffix
+    :param scale: float, uniform scale of shape CVs
+    :param parent: str, optional, parent of new transform
+    :param undoable: bool, optional, force mc.curve or API path, by default mc.curve when undo queue is on
+    :return: list( str, list( str ) ), 0- name of new transform, 1- names of its curve shapes
+    """
+    
+    curvesData = _getShapeTemplate( shapeName )
+    
+    if undoable is None:
+        
+        undoable = mc.undoInfo( q = True, state = True )
+    
+    if parent:
+        
+        newObj = mc.createNode( 'transform', n = objectName, p = parent )
+    
+    else:
+        
+        newObj = mc.createNode( 'transform', n = objectName )
+    
+    # transform can get other name if objectName is not unique under its parent
+    shapeBaseName = newObj.split( '|' )[-1] + 'Shape'
+    shapeNames = []
+    
+    parentObj = apiwrap.api2_getMObject( newObj )
+    curveFn = om2.MFnNurbsCurve()
+    
+    for i, ( cvs, knots, degree, form ) in enumerate( curvesData ):
+        
+        curveShapeName = shapeBaseName + ( str( i ) if i else '' )
+        scaledCvs = [ ( cv.x * scale, cv.y * scale, cv.z * scale ) for cv in cvs ]
+        
+        if undoable:
+            
+            curveObj = mc.curve( d = degree, p = scaledCvs, k = list( knots ), per = form == om2.MFnNurbsCurve.kPeriodic )
+            curveShape = mc.parent( mc.listRelatives( curveObj, s = 1, f = 1 )[0], newObj, r = 1, s = 1 )[0]
+            mc.delete( curveObj )
+            shapeNames.append( mc.rename( curveShape, curveShapeName ) )
+            
+            continue
+        
+        curveFn.create( om2.MPointArray( [ om2.MPoint( cv[0], cv[1], cv[2] ) for cv in scaledCvs ] ), knots, degree, form, False, True, parentObj )
+        curveFn.setName( curveShapeName )
+        
+        # Maya can give other name if shape name is not unique
+        shapeNames.append( curveFn.name() )
+    
+    return [ newObj, shapeNames ]
+
+registerShape( 'circle', circle, degree = 3 )
+registerShape( 'circleX', circle, normal = 'x' )
+registerShape( 'circleY', circle, normal = 'y' )
+registerShape( 'circleZ', circle, normal = 'z' )
+registerShape( 'star', star )
+registerShape( 'cross', cross )
+registerShape( 'foot', foot )
+registerShape( 'fist', fist )
+registerShape( 'arrow', arrow )
+registerShape( 'crown', crown )
+registerShape( 'cube', cube )
+registerShape( 'cubeOnBase', cubeOnBase )
+registerShape( 'cubeOnBaseX', cubeOnBaseX )
+registerShape( 'diamond', diamond )
+registerShape( 'move', move )
+registerShape( 'rotation', rotation )
+registerShape( 'singleRotation', singleRotation )
+registerShape( 'sphere', sphere )
+registerShape( 'spikeCross', spikeCross )
+registerShape( 'starSimple', starSimple )
+registerShape( 'vis', vis )
+registerShape( 'inverseCrown', inverseCrown )
+registerShape( 'square', square )
+registerShape( 'squareX', square, normal = [1, 0, 0] )
+registerShape( 'squareY', square )
+registerShape( 'squareZ', square, normal = [0, 0, 1] )
+registerShape( 't', t )
+registerShape( 'moveSimple', moveSimple )
+registerShape( 'triangle', triangle )
+registerShape( 'inverseTriangle', triangle, normal = '-y' )
+registerShape( 'triangleZ', triangle, normal = 'z' )
+registerShape( 'inverseTriangleZ', triangle, normal = '-z' )
@@ -0,0 +1,549 @@
+"""
+module to rebuild only rig modules with changed inputs
+@category: Rigging
+
+each module build declares its inputs (guide joints, curves, locators) and parameters,
+they are hashed into module fingerprint together with fingerprints of modules it depends on,
+module with the same fingerprint as in cache is restored by importing its exported fragment,
+other modules are built and their created nodes are exported as new fragments
+
+example:
+
+    modulesBuild = incrementalBuild.IncrementalBuild( cacheFolder )
+    modulesBuild.addModule( 'spine', spine.buildHybrid, inputs = spineJoints + [spineCrv], rootJnt = rootJnt, ... )
+    modulesBuild.addModule( 'l_arm', arm.build, inputs = l_armJoints, dependsOn = ['spine'],
+                            parentCtrl = modulesBuild.ref( 'spine', 'body2Ctrl' ), ... )
+    results = modulesBuild.run()
+
+NOTE: fragment keeps nodes made by module, their parents and their connections to other nodes,
+      changes of other nodes made by module (e.g. set attributes of skeleton joints) are not restored,
+      so modules with such changes should be added with cache = False
+"""
+
+import os
+import json
+import types
+import hashlib
+
+import maya.cmds as mc
+import maya.api.OpenMaya as om2
+
+from utils import buildProfiler
+from utils import shape
+from utils import shapeMirror
+
+import rigRegistry
+
+manifestFileName = 'buildCache.json'
+fragmentFileFormat = '%s_fragment.ma'
+fragmentNamespaceFormat = 'incrementalBuild_%s'
+fingerprintPrecision = 6
+
+class ResultRef( object ):
+
+    '''
+    reference to value in result of other module, resolved when module is built
+    '''
+
+    def __init__( self, moduleName, keys ):
+
+        self.moduleName = moduleName
+        self.keys = keys
+
+    def resolve( self, resultsDt ):
+
+        value = resultsDt[ self.moduleName ]
+
+        for key in self.keys:
+
+            value = value[ key ]
+
+        return value
+
+class ModuleSpec( object ):
+
+    '''
+    definition of one module build with its inputs and dependencies
+    '''
+
+    def __init__( self, name, buildFunction, kwargs, inputs, dependsOn, cache ):
+
+        self.name = name
+        self.buildFunction = buildFunction
+        self.kwargs = kwargs
+        self.inputs = inputs
+        self.dependsOn = dependsOn
+        self.cache = cache
+        self.fingerprint = None
+
+class IncrementalBuild( object ):
+
+    '''
+    list of module builds, modules are built in order they were added
+    '''
+
+    def __init__( self, cacheFolder, enabled = True ):
+
+        '''
+        :param cacheFolder: str, folder with cache manifest and module fragments
+        :param enabled: bool, if False all modules are built and cache is not used or updated
+        '''
+
+        self.cacheFolder = cacheFolder
+        self.enabled = enabled
+        self.modules = []
+
+        self._manifestDt = {}
+
+    def addModule( self, name, buildFunction, inputs = [], dependsOn = [], cache = True, **kwargs ):
+
+        '''
+        add module build
+
+        :param name: str, unique name of module build
+        :param buildFunction: function, module build function, e.g. rig.spine.buildHybrid
+        :param inputs: list( str ), scene objects used by module (guide joints, curves, locators), their transforms and shapes are fingerprinted
+        :param dependsOn: list( str ), names of modules added earlier, modules referenced with ref() are added automatically
+        :param cache: bool, if False module is always built
+        :param kwargs: arguments of build function, values can be ResultRef from ref()
+        :return: ModuleSpec
+        '''
+
+        dependsOn = list( dependsOn )
+
+        for value in kwargs.values():
+
+            if isinstance( value, ResultRef ) and not value.moduleName in dependsOn:
+
+                dependsOn.append( value.moduleName )
+
+        spec = ModuleSpec( name, buildFunction, kwargs, inputs, dependsOn, cache )
+        self.modules.append( spec )
+
+        return spec
+
+    def ref( self, moduleName, *keys ):
+
+        '''
+        reference value from result of other module, e.g. ref( 'spine', 'body2Ctrl' )
+
+        :return: ResultRef
+        '''
+
+        return ResultRef( moduleName, keys )
+
+    def run( self ):
+
+        '''
+        build or restore all modules
+
+        :return: dict, { module name: result of module build function }
+        '''
+
+        resultsDt = {}
+        fingerprintsDt = {}
+
+        if self.enabled and not self.modules:
+
+            # cache folder and manifest are not made for build without modules
+            print '# incrementalBuild: no modules were added with addModule(), nothing is cached'
+            return resultsDt
+
+        if self.enabled:
+
+            self._manifestDt = self._readManifest()
+
+        for spec in self.modules:
+
+            kwargs = dict( [ ( k, v.resolve( resultsDt ) if isinstance( v, ResultRef ) else v ) for k, v in spec.kwargs.items() ] )
+
+            if not self.enabled:
+
+                resultsDt[ spec.name ] = spec.buildFunction( **kwargs )
+                continue
+
+            spec.fingerprint = self._getFingerprint( spec, fingerprintsDt )
+            fingerprintsDt[ spec.name ] = spec.fingerprint
+
+            cachedDt = self._manifestDt.get( spec.name )
+
+            if spec.cache and cachedDt and cachedDt['fingerprint'] == spec.fingerprint and os.path.exists( self._getFragmentPath( spec.name ) ):
+
+                with buildProfiler.span( 'restore %s' % spec.name ):
+
+                    resultsDt[ spec.name ] = self._restoreFragment( spec.name, cachedDt )
+
+                print '# incrementalBuild: module %s restored from cache' % spec.name
+                continue
+
+            registry = rigRegistry.getActive()
+            registryStart = registry.getCount() if registry else 0
+
+            nodeHandles = []
+            callbackId = om2.MDGMessage.addNodeAddedCallback( lambda node, clientData: nodeHandles.append( om2.MObjectHandle( node ) ), 'dependNode' )
+
+            try:
+
+                resultsDt[ spec.name ] = spec.buildFunction( **kwargs )
+
+            finally:
+
+                om2.MMessage.removeCallback( callbackId )
+
+            if spec.cache:
+
+                self._manifestDt[ spec.name ] = self._saveFragment( spec.name, spec.fingerprint, nodeHandles, resultsDt[ spec.name ] )
+
+                # nodes registered by module are registered again when module is restored
+                self._manifestDt[ spec.name ]['registry'] = registry.getEntries( registryStart ) if registry else []
+
+            else:
+
+                self._manifestDt.pop( spec.name, None )
+
+            print '# incrementalBuild: module %s built' % spec.name
+
+        if self.enabled:
+
+            self._writeManifest()
+
+        return resultsDt
+
+    #===========================================================================
+    #  fingerprints
+    #===========================================================================
+
+    def _getFingerprint( self, spec, fingerprintsDt ):
+
+        fingerprint = hashlib.sha1()
+        fingerprint.update( '%s.%s' % ( spec.buildFunction.__module__, spec.buildFunction.__name__ ) )
+        fingerprint.update( json.dumps( serialize( spec.kwargs ), sort_keys = True ) )
+
+        for moduleName in spec.dependsOn:
+
+            fingerprint.update( moduleName + fingerprintsDt[ moduleName ] )
+
+        for obj in spec.inputs:
+
+            fingerprint.update( getObjectFingerprint( obj ) )
+
+        return fingerprint.hexdigest()
+
+    #===========================================================================
+    #  fragments
+    #===========================================================================
+
+    def _getFragmentPath( self, moduleName ):
+
+        return os.path.join( self.cacheFolder, fragmentFileFormat % moduleName )
+
+    def _saveFragment( self, moduleName, fingerprint, nodeHandles, result ):
+
+        nodes = _getNodeNames( nodeHandles )
+        nodesSet = set( nodes )
+
+        # parents and connections outside of fragment are kept in manifest and restored after import
+
+        externalParents = []
+
+        for node in nodes:
+
+            if not 'dagNode' in mc.nodeType( node, inherited = True ): continue
+
+            parents = mc.listRelatives( node, p = True, f = True )
+
+            if parents and not parents[0] in nodesSet:
+
+                externalParents.append( [ node.split( '|' )[-1], parents[0] ] )
+
+        externalConnections = []
+
+        for node in nodes:
+
+            connections = mc.listConnections( node, c = True, p = True, s = True, d = False ) or []
+
+            for destPlug, sourcePlug in zip( connections[::2], connections[1::2] ):
+
+                if not mc.ls( sourcePlug.split( '.' )[0], l = True )[0] in nodesSet:
+
+                    externalConnections.append( [ sourcePlug, destPlug.split( '|' )[-1] ] )
+
+            connections = mc.listConnections( node, c = True, p = True, s = False, d = True ) or []
+
+            for sourcePlug, destPlug in zip( connections[::2], connections[1::2] ):
+
+                if not mc.ls( destPlug.split( '.' )[0], l = True )[0] in nodesSet:
+
+                    externalConnections.append( [ sourcePlug.split( '|' )[-1], destPlug ] )
+
+        if not os.path.exists( self.cacheFolder ):
+
+            os.makedirs( self.cacheFolder )
+
+        if nodes:
+
+            selection = mc.ls( sl = True )
+            mc.select( nodes, r = True, ne = True )
+            mc.file( self._getFragmentPath( moduleName ), es = True, type = 'mayaAscii', f = True, ch = False, chn = False, con = False, exp = False, sh = False )
+            mc.select( selection, r = True )
+
+        return {
+                'fingerprint': fingerprint,
+                'nodes': len( nodes ),
+                'externalParents': externalParents,
+                'externalConnections': externalConnections,
+                'result': serialize( result )
+                }
+
+    def _importFragment( self, moduleName ):
+
+        '''
+        import fragment into its own namespace and move nodes to root namespace,
+        nodes with names already used in scene get new names like on import
+
+        :return: dict, { saved node name: new node name } of renamed nodes
+        '''
+
+        newNodes = mc.file( self._getFragmentPath( moduleName ), i = True, type = 'mayaAscii', namespace = fragmentNamespaceFormat % moduleName,
+                            returnNewNodes = True ) or []
+
+        namesDt = {}
+        importNamespaces = set()
+
+        # nodes are found by UUID as long names change while their parents are renamed
+        for uuid in mc.ls( newNodes, uuid = True ):
+
+            nodeName = mc.ls( uuid )[0]
+            shortName = nodeName.split( '|' )[-1]
+
+            if not ':' in shortName: continue
+
+            importNamespace, savedName = shortName.split( ':', 1 )
+            importNamespaces.add( importNamespace )
+
+            newName = mc.rename( nodeName, ':' + savedName, ignoreShape = True ).split( '|' )[-1]
+
+            if newName != savedName:
+
+                namesDt[ savedName ] = newName
+
+        for importNamespace in importNamespaces:
+
+            mc.namespace( rm = importNamespace, mergeNamespaceWithRoot = True )
+
+        return namesDt
+
+    def _restoreFragment( self, moduleName, cachedDt ):
+
+        namesDt = {}
+
+        if cachedDt['nodes']:
+
+            namesDt = self._importFragment( moduleName )
+
+            if namesDt:
+
+                print '# incrementalBuild: %d nodes of module %s were renamed on restore' % ( len( namesDt ), moduleName )
+
+        # names saved in manifest are replaced with names of restored nodes
+        for node, parent in _renameNodes( cachedDt['externalParents'], namesDt ):
+
+            mc.parent( node, parent, r = True )
+
+        for sourcePlug, destPlug in _renameNodes( cachedDt['externalConnections'], namesDt ):
+
+            if mc.isConnected( sourcePlug, destPlug ): continue
+
+            try:
+
+                mc.connectAttr( sourcePlug, destPlug, f = True )
+
+            except RuntimeError:
+
+                print '# incrementalBuild: cannot restore connection %s -> %s of module %s' % ( sourcePlug, destPlug, moduleName )
+
+        registry = rigRegistry.getActive()
+
+        if registry:
+
+            registry.addEntries( [ [ _renameNodes( e[0], namesDt ) ] + e[1:] for e in cachedDt.get( 'registry', [] ) ] )
+
+        return deserialize( _renameNodes( cachedDt['result'], namesDt ) )
+
+    #===========================================================================
+    #  manifest
+    #===========================================================================
+
+    def _readManifest( self ):
+
+        manifestPath = os.path.join( self.cacheFolder, manifestFileName )
+
+        if not os.path.exists( manifestPath ): return {}
+
+        fileobj = open( manifestPath, 'r' )
+        manifestDt = json.load( fileobj )
+        fileobj.close()
+
+        return manifestDt
+
+    def _writeManifest( self ):
+
+        if not os.path.exists( self.cacheFolder ):
+
+            os.makedirs( self.cacheFolder )
+
+        fileobj = open( os.path.join( self.cacheFolder, manifestFileName ), 'w' )
+        json.dump( self._manifestDt, fileobj, indent = 1, sort_keys = True )
+        fileobj.close()
+
+def getObjectFingerprint( obj ):
+
+    '''
+    get hash of object state used by module build: type, world matrix, rotate order and joint orient,
+    topology and point positions of shapes
+
+    :param obj: str, name of scene object
+    :return: str, hex digest
+    '''
+
+    fingerprint = hashlib.sha1( obj )
+
+    if not mc.objExists( obj ):
+
+        fingerprint.update( 'missing' )
+        return fingerprint.hexdigest()
+
+    fingerprint.update( mc.nodeType( obj ) )
+
+    if mc.objExists( obj + '.worldMatrix' ):
+
+        fingerprint.update( _formatValues( mc.xform( obj, q = True, ws = True, m = True ) ) )
+        fingerprint.update( str( mc.getAttr( obj + '.ro' ) ) )
+
+    if mc.objExists( obj + '.jointOrient' ):
+
+        fingerprint.update( _formatValues( mc.getAttr( obj + '.jointOrient' )[0] ) )
+
+    for objShape in shape.getShape( obj, useLongName = True ):
+
+        fingerprint.update( shape.getTopologyHash( objShape ) )
+        fingerprint.update( _formatValues( shapeMirror.getShapePositions( objShape ).ravel() ) )
+
+    return fingerprint.hexdigest()
+
+def _formatValues( values ):
+
+    # rounding makes fingerprint stable for tiny float differences
+    return ' '.join( [ '%.*f' % ( fingerprintPrecision, v ) for v in values ] )
+
+def _getNodeNames( nodeHandles ):
+
+    '''
+    get names of created nodes which still exist, DAG nodes have full path names
+    '''
+
+    nodes = []
+
+    for handle in nodeHandles:
+
+        if not handle.isValid(): continue
+
+        node = handle.object()
+
+        if node.hasFn( om2.MFn.kDagNode ):
+
+            nodes.append( om2.MDagPath.getAPathTo( node ).fullPathName() )
+
+        else:
+
+            nodes.append( om2.MFnDependencyNode( node ).name() )
+
+    return nodes
+
+def _renameNodes( value, namesDt ):
+
+    '''
+    replace node names in strings, plugs and paths of JSON data, class names of serialized instances are kept
+    '''
+
+    if not namesDt:
+
+        return value
+
+    if isinstance( value, basestring ):
+
+        nodePath, dot, attribute = value.partition( '.' )
+
+        return '|'.join( [ namesDt.get( n, n ) for n in nodePath.split( '|' ) ] ) + dot + attribute
+
+    if isinstance( value, list ):
+
+        return [ _renameNodes( v, namesDt ) for v in value ]
+
+    if isinstance( value, dict ):
+
+        return dict( [ ( k, v if k in [ '__instance__', '__ref__' ] else _renameNodes( v, namesDt ) ) for k, v in value.items() ] )
+
+    return value
+
+def serialize( value ):
+
+    '''
+    convert module build result or arguments into JSON data, instances like Control or Module are kept with their members
+    '''
+
+    if isinstance( value, ( list, tuple ) ):
+
+        return [ serialize( v ) for v in value ]
+
+    if isinstance( value, dict ):
+
+        return dict( [ ( str( k ), serialize( v ) ) for k, v in value.items() ] )
+
+    if isinstance( value, ResultRef ):
+
+        return { '__ref__': [ value.moduleName ] + list( value.keys ) }
+
+    if value is None or isinstance( value, ( basestring, int, long, float, bool ) ):
+
+        return value
+
+    if hasattr( value, '__dict__' ) and hasattr( value, '__class__' ):
+
+        membersDt = dict( [ ( k, serialize( v ) ) for k, v in value.__dict__.items() if not k.startswith( '_' ) ] )
+
+        return { '__instance__': [ value.__class__.__module__, value.__class__.__name__ ], 'members': membersDt }
+
+    return str( value )
+
+def deserialize( value ):
+
+    '''
+    convert JSON data back to module build result, instances are made without calling their __init__
+    '''
+
+    if isinstance( value, list ):
+
+        return [ deserialize( v ) for v in value ]
+
+    if not isinstance( value, dict ):
+
+        return value
+
+    if '__instance__' in value:
+
+        moduleName, className = value['__instance__']
+        instanceClass = getattr( __import__( moduleName, fromlist = [ className ] ), className )
+        membersDt = dict( [ ( k, deserialize( v ) ) for k, v in value['members'].items() ] )
+
+        # old style classes like Control and Module are made with InstanceType
+        if isinstance( instanceClass, types.ClassType ):
+
+            return types.InstanceType( instanceClass, membersDt )
+
+        instance = instanceClass.__new__( instanceClass )
+        instance.__dict__.update( membersDt )
+
+        return instance
+
+    return dict( [ ( k, deserialize( v ) ) for k, v in value.items() ] )
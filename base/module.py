@@ -8,6 +8,7 @@ import maya.cmds as mc
 sceneObjectType = 'rig'
 
 import control
+import rigRegistry
 
 from utils import attribute
 from utils import anim
@@ -89,6 +90,7 @@ class Module():
         self._addAttributes( prefix )
         self._sortGroups()
         self._setAndConnectAttrs()
+        self._register( prefix )
 
     #===========================================================================
     #  PUBLIC METHODS
@@ -403,6 +405,16 @@ class Module():
         mc.addAttr( self.Main, ln = 'skeletonVis', at = 'bool', k = 1, dv = False )
         mc.addAttr( self.Main, ln = 'partsVis', at = 'bool', k = 1, dv = False )
 
+    def _register(self, prefix):
+        
+        # nodes registered after this module belong to it, see base.rigRegistry
+        
+        rigRegistry.setCurrentModule( prefix )
+        
+        for modGrp, modGrpType in zip( self._moduleGrps, self._moduleGrpNames ):
+            
+            rigRegistry.register( modGrp, 'moduleGroup', module = prefix, role = modGrpType )
+    
     def _addModuleIDs(self, object, moduleID ):
         
         mc.addAttr( object, ln = Module.rigModulePartAt, dt = 'string' )
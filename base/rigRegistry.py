@@ -0,0 +1,373 @@
+"""
+rig registry indexing nodes made by rig modules
+@category Rigging
+
+controls, module groups, joints and other rig nodes are registered while rig is built with their
+node type, module, role and side, so post build steps and tools can find them without scanning the scene,
+registry is saved as JSON manifest on rig main group and read back with fromScene()
+
+example:
+
+    registry = rigRegistry.fromScene()
+    ikCtrl = registry.get( 'control', module = 'l_arm', role = 'armIk' )
+    oppositeCtrl = registry.getOpposite( ikCtrl )
+"""
+
+import json
+from contextlib import contextmanager
+
+import maya.cmds as mc
+
+from utils import name
+from utils import buildSession
+
+registryAt = 'rigRegistry'
+registryVersion = 1
+
+_indexKeys = [ 'node', 'type', 'module', 'role', 'side' ]
+
+# registry of running build
+_activeRegistry = None
+
+class RigRegistry( object ):
+
+    '''
+    registry of rig nodes, each entry is [ node, node type, module, role, side ], node can have more entries of different types
+    '''
+
+    def __init__( self, entries = [] ):
+
+        '''
+        :param entries: list( list ), entries to register, e.g. from getEntries()
+        '''
+
+        self.currentModule = ''
+        self.entries = []
+
+        self._indexes = dict( [ ( k, {} ) for k in _indexKeys ] )
+        self._keyIndex = {}
+
+        self._reservedNames = set()
+        self._sceneNames = None
+
+        self.addEntries( entries )
+
+    def register( self, node, nodeType, module = None, role = '', side = None ):
+
+        '''
+        register node
+
+        :param node: str, node name
+        :param nodeType: str, type of rig node, e.g. 'control', 'moduleGroup', 'joint'
+        :param module: str, name of rig module, module created last is used by default
+        :param role: str, role of node in module, e.g. 'armIk' for control, 'controls' for module group
+        :param side: str, 'l', 'r' or '', side from node name by default
+        :return: None
+        '''
+
+        if module is None: module = self.currentModule
+        if side is None: side = name.getSide( node )
+
+        entry = [ node, nodeType, module, role, side ]
+
+        self.entries.append( entry )
+
+        for key, value in zip( _indexKeys, entry ):
+
+            self._indexes[ key ].setdefault( value, [] ).append( entry )
+
+        self._keyIndex.setdefault( tuple( entry[1:] ), [] ).append( node )
+
+    def reserveNames( self, names ):
+
+        '''
+        reserve names of nodes which will be made, e.g. by control.ControlBatch, names are checked against
+        names reserved or registered in this registry and against scene nodes, scene is queried only once
+        per registry so names of nodes made later in the build are known only if they are registered or reserved
+
+        :param names: list( str ), node names
+        :return: list( str ), names which are not unique, no name is reserved if any is not unique
+        '''
+
+        if self._sceneNames is None:
+
+            self._sceneNames = set( [ n.split( '|' )[-1] for n in mc.ls() ] )
+
+        duplicates = set( [ n for n in names if names.count( n ) > 1 or n in self._reservedNames
+                            or n in self._sceneNames or n in self._indexes['node'] ] )
+
+        if duplicates:
+
+            return sorted( duplicates )
+
+        self._reservedNames.update( names )
+
+        return []
+
+    def addEntries( self, entries ):
+
+        '''
+        register entries from other registry, e.g. saved with cached module
+
+        :param entries: list( list ), [ node, node type, module, role, side ] entries
+        '''
+
+        for node, nodeType, module, role, side in entries:
+
+            self.register( node, nodeType, module, role, side )
+
+    def getEntries( self, start = 0 ):
+
+        '''
+        :param start: int, index of first entry, entries are kept in registration order, see getCount()
+        :return: list( list ), [ node, node type, module, role, side ] entries
+        '''
+
+        return [ list( e ) for e in self.entries[ start: ] ]
+
+    def getCount( self ):
+
+        '''
+        :return: int, number of entries
+        '''
+
+        return len( self.entries )
+
+    def has( self, node, nodeType = None ):
+
+        '''
+        :param node: str, node name
+        :param nodeType: str, optional, type of rig node
+        :return: bool, True if node is registered
+        '''
+
+        entries = self._indexes['node'].get( node, [] )
+
+        return bool( [ e for e in entries if nodeType is None or e[1] == nodeType ] )
+
+    def query( self, nodeType = None, module = None, role = None, side = None ):
+
+        '''
+        get registered nodes matching all given values, values left as None match anything
+
+        :param nodeType: str, type of rig node
+        :param module: str, name of rig module
+        :param role: str, role of node in module
+        :param side: str, 'l', 'r' or ''
+        :return: list( str ), nodes in registration order
+        '''
+
+        values = [ nodeType, module, role, side ]
+
+        if not None in values:
+
+            return list( self._keyIndex.get( tuple( values ), [] ) )
+
+        # entries are filtered from smallest index list of given values
+
+        candidates = self.entries
+
+        for key, value in zip( _indexKeys[1:], values ):
+
+            if value is None: continue
+
+            indexEntries = self._indexes[ key ].get( value, [] )
+
+            if len( indexEntries ) < len( candidates ):
+
+                candidates = indexEntries
+
+        nodes = []
+
+        for entry in candidates:
+
+            if [ v for v, e in zip( values, entry[1:] ) if v is not None and v != e ]: continue
+
+            if not entry[0] in nodes:
+
+                nodes.append( entry[0] )
+
+        return nodes
+
+    def get( self, nodeType, module = '', role = '', side = '' ):
+
+        '''
+        get one node by its node type, module, role and side
+
+        :return: str, node name, None if no node is registered
+        '''
+
+        nodes = self._keyIndex.get( ( nodeType, module, role, side ), [] )
+
+        return nodes[0] if nodes else None
+
+    def getOpposite( self, node ):
+
+        '''
+        get registered node with the same type and role on opposite side
+
+        :param node: str, node name
+        :return: str, node name, None if node has no side or opposite node is not registered
+        '''
+
+        for entry in self._indexes['node'].get( node, [] ):
+
+            nodeType, module, role, side = entry[1:]
+
+            if not side: continue
+
+            oppositeSide = { 'l': 'r', 'r': 'l' }[ side ]
+            oppositeModule = name.getMirrorName( module ) or module if module else module
+            oppositeNode = self.get( nodeType, oppositeModule, role, oppositeSide )
+
+            if oppositeNode:
+
+                return oppositeNode
+
+        return None
+
+    def save( self, mainGrp ):
+
+        '''
+        save registry as JSON manifest in string attribute of rig main group
+
+        :param mainGrp: str, rig main group
+        :return: None
+        '''
+
+        if not mc.objExists( mainGrp + '.' + registryAt ):
+
+            mc.addAttr( mainGrp, ln = registryAt, dt = 'string' )
+
+        manifest = json.dumps( { 'version': registryVersion, 'entries': self.entries } )
+
+        mc.setAttr( mainGrp + '.' + registryAt, l = False )
+        mc.setAttr( mainGrp + '.' + registryAt, manifest, type = 'string', l = True )
+
+def load( mainGrp ):
+
+    '''
+    read registry saved on rig main group
+
+    :param mainGrp: str, rig main group
+    :return: RigRegistry, None if main group has no registry
+    '''
+
+    if not mc.objExists( mainGrp + '.' + registryAt ):
+
+        return None
+
+    manifestDt = json.loads( mc.getAttr( mainGrp + '.' + registryAt ) )
+
+    return RigRegistry( [ [ str( v ) for v in e ] for e in manifestDt['entries'] ] )
+
+def loadAll():
+
+    '''
+    read registries of all rigs in scene
+
+    :return: list( RigRegistry ), registries in order of rig main groups
+    '''
+
+    return [ load( g ) for g in mc.ls( '*.' + registryAt, o = True ) ]
+
+def fromScene():
+
+    '''
+    get registry of running build or registry of first rig in scene,
+    registry started outside of build session (e.g. by failed build) is used only when no rig in scene has registry
+
+    :return: RigRegistry, None if no rig with registry is in scene
+    '''
+
+    if _activeRegistry and buildSession.isActive():
+
+        return _activeRegistry
+
+    mainGrps = mc.ls( '*.' + registryAt, o = True )
+
+    if not mainGrps:
+
+        return _activeRegistry
+
+    return load( mainGrps[0] )
+
+def start( entries = [] ):
+
+    '''
+    start registry of new build, rig modules and controls register their nodes into it until stop() is called
+
+    :param entries: list( list ), optional, entries of earlier build stages, e.g. from checkpoint
+    :return: RigRegistry
+    '''
+
+    global _activeRegistry
+
+    _activeRegistry = RigRegistry( entries )
+
+    return _activeRegistry
+
+def stop():
+
+    '''
+    stop registry of running build
+
+    :return: RigRegistry, stopped registry, None if registry was not started
+    '''
+
+    global _activeRegistry
+
+    registry = _activeRegistry
+    _activeRegistry = None
+
+    return registry
+
+@contextmanager
+def building( entries = [] ):
+
+    '''
+    context manager with registry of build, registry is stopped also when build fails
+
+    :param entries: list( list ), optional, entries of earlier build stages, see start()
+    '''
+
+    registry = start( entries )
+
+    try:
+
+        yield registry
+
+    finally:
+
+        stop()
+
+def getActive():
+
+    '''
+    :return: RigRegistry, registry of running build, None if no build is running
+    '''
+
+    return _activeRegistry
+
+def register( node, nodeType, module = None, role = '', side = None ):
+
+    '''
+    register node into registry of running build, does nothing if registry was not started,
+    see RigRegistry.register()
+    '''
+
+    if _activeRegistry:
+
+        _activeRegistry.register( node, nodeType, module, role, side )
+
+def setCurrentModule( moduleName ):
+
+    '''
+    set module of nodes registered without module, called by base.module.Module
+
+    :param moduleName: str, name of rig module
+    '''
+
+    if _activeRegistry:
+
+        _activeRegistry.currentModule = moduleName
@@ -14,6 +14,7 @@ from utils import constraint
 from utils import name
 from utils import transform
 from utils import connect
+from utils import buildProfiler
 
 def build_old( 
             clavicleJnt,
@@ -156,6 +157,7 @@ def build_old(
         'toggleCtrl':limbData['toggleCtrl']
         }
 
+@buildProfiler.profile()
 def build( 
             clavicleJnt,
             upperJnt,
@@ -11,6 +11,7 @@ from utils import transform
 from utils import attribute
 from utils import curve
 from utils import joint
+from utils import buildProfiler
 
 from base import control
 from base import module
@@ -132,6 +133,7 @@ def _simpleEyes_getTargetPosition( leftEyeJnt, rightEyeJnt ):
     
     return [ targetPosVec.x, targetPosVec.y, targetPosVec.z ]
 
+@buildProfiler.profile()
 def build( leftEyeJnt, rightEyeJnt, headJnt = None, prefix = 'eyes', baseRigData = None, sceneScale = 1.0, eyesChannelConnection = False, distanceMultiFactor = 10, keepControlsInEyeDirection = False ):
 
     '''
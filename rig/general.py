@@ -11,7 +11,9 @@ from base import module
 
 from utils import name
 from utils import shape
+from utils import buildProfiler
 
+@buildProfiler.profile()
 def makeFkControlChain( chain, 
                         prefix = '', 
                         scale = 1.0, 
@@ -72,6 +74,7 @@ def makeFkControlChain( chain,
     #===============================================================================
     
     controls = []
+    ctrlBatch = control.ControlBatch()
     
     for i in range( len( chain ) ):
         
@@ -79,7 +82,7 @@ def makeFkControlChain( chain,
         
         if i > 0:
             
-            ctrlParentObj = controls[i - 1].C
+            ctrlParentObj = controls[i - 1]
         
         elif ctrlParent:
             
@@ -109,7 +112,13 @@ def makeFkControlChain( chain,
         if worldOrient:
             rotateCtrl = ''
         
-        ctrl = control.Control( lockHideChannels = lockHideList, prefix = jntPrefix, shape = ctrlshape, colorName = ctrlColorName, translateTo = chain[i],  rotateTo = rotateCtrl, rotOrd = rotOrd, scale = scale, ctrlParent = ctrlParentObj )
+        ctrl = ctrlBatch.add( lockHideChannels = lockHideList, prefix = jntPrefix, shape = ctrlshape, colorName = ctrlColorName, translateTo = chain[i],  rotateTo = rotateCtrl, rotOrd = rotOrd, scale = scale, ctrlParent = ctrlParentObj )
+        controls.append( ctrl )
+    
+    # make all controls at once
+    ctrlBatch.build()
+    
+    for i, ctrl in enumerate( controls ):
         
         if connectR:
             
@@ -125,8 +134,6 @@ def makeFkControlChain( chain,
         if connectT:
             
             mc.pointConstraint( ctrl.C, chain[i] )
-        
-        controls.append( ctrl )
     
     return controls
 
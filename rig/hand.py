@@ -11,8 +11,10 @@ from base import module
 
 from utils import name
 from utils import joint
+from utils import buildProfiler
 
 
+@buildProfiler.profile()
 def build(
             baseRigData,
             handJnt,
@@ -11,12 +11,14 @@ from utils import shape
 from utils import transform
 from utils import joint
 from utils import connect
+from utils import buildProfiler
 
 from base import control
 from base import module
 
 from rig import general
 
+@buildProfiler.profile()
 def build( 
         headJnt,
         jawJnt,
@@ -247,6 +249,7 @@ def _makeVisGrp( controlGrp, parent ):
     
     return visGrp
     
+@buildProfiler.profile()
 def buildIclone(
                 baseRigData,
                 headJnt,
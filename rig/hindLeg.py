@@ -16,11 +16,13 @@ from utils import attribute
 from utils import shape
 from utils import constraint
 from utils import connect
+from utils import buildProfiler
 
 
 
 from . import limb
 
+@buildProfiler.profile()
 def build( 
             clavicleJnt,
             upperJnt,
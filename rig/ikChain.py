@@ -7,6 +7,9 @@ import maya.cmds as mc
 from base import module
 from base import control
 
+from utils import buildProfiler
+
+@buildProfiler.profile()
 def build(
         chainJoints,
         chainCurve,
@@ -17,6 +17,7 @@ from utils import transform
 from utils import attribute
 from utils import shape
 from utils import constraint
+from utils import buildProfiler
 
 from . import limb
 
@@ -249,6 +250,7 @@ def build_old(
             'toggleCtrl':limbData['toggleCtrl']
             }
 
+@buildProfiler.profile()
 def build( 
             upperJnt,
             lowerJnt,
@@ -10,6 +10,7 @@ import maya.cmds as mc
 
 from base import module
 from base import control
+from base import rigRegistry
 
 from utils import name
 from utils import shape
@@ -21,6 +22,7 @@ from utils import distanceBetween
 from utils import connect
 from utils import attribute
 from utils import vector
+from utils import buildProfiler
 
 straightLimitPercentAt = 'straightLimitPerc'
 currentLengthPercentAt = 'currentLengthPerc'
@@ -990,6 +992,7 @@ def _createMessageAttributesOld( prefix, toggleCtrl, upperJnt, midJnt, endJnt, u
     mc.addAttr( toggleCtrl, ln = 'snapLoc', at = 'message' )
     mc.connectAttr( snapRefLoc + '.message', toggleCtrl + '.snapLoc' )   
     
+@buildProfiler.profile()
 def build(
             upperJnt,
             midJnt,
@@ -1731,6 +1734,7 @@ def _createMessageAttributes( prefix, toggleCtrl, bindJnts, ikJoints, fkJoints,
     # add an attribute to make toggle control to make it valid for fk-ik snap
     mc.addAttr( toggleCtrl.C, ln = 'fkIkSnapable', dt = 'string' )
     mc.setAttr( toggleCtrl.C + '.fkIkSnapable', l = True )
+    rigRegistry.register( toggleCtrl.C, 'ikFkSnap', role = name.removeSide( prefix ) )
     
     #===========================================================================
     # add respective message attributes with connections
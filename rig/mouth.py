@@ -14,8 +14,10 @@ from utils import anim
 from utils import transform
 from utils import connect
 from utils import shape
+from utils import buildProfiler
 
 #TODO: commment builLips func 
+@buildProfiler.profile()
 def buildSimpleLips(
                     mouthBuilderGrp,
                     baseRigData,
@@ -132,6 +134,7 @@ def buildSimpleLips(
             }
 
 
+@buildProfiler.profile()
 def buildLips(
                 baseRigData,
                 jawJnt,
@@ -15,8 +15,10 @@ from utils import shape
 from utils import transform
 from utils import vector
 from utils import anim
+from utils import buildProfiler
 
 
+@buildProfiler.profile()
 def build( 
         neckJoints,
         ikCurve,
@@ -128,6 +130,7 @@ def build(
             'headIkAttachGrp':headIkAttachGrp,
             }    
     
+@buildProfiler.profile()
 def buildIclone(
                 spineRigData,
                 neckJnt,
@@ -164,6 +167,7 @@ def buildIclone(
             'control': neckCtrl
             }
     
+@buildProfiler.profile()
 def buildCC(
             neckJoints,
             prefix = 'neck',
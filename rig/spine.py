@@ -17,7 +17,9 @@ from utils import joint
 from utils import name
 from utils import attribute
 from utils import apiwrap
+from utils import buildProfiler
 
+@buildProfiler.profile()
 def buildSimpleFk(
         rootJnt,
         spineJoints = None,
@@ -139,6 +141,7 @@ def buildSimpleFk(
             'settingsGrp':rigmodule.Settings
             }
 
+@buildProfiler.profile()
 def buildHybrid(
         rootJnt,
         ikCurve,
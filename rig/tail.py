@@ -18,12 +18,14 @@ from utils import matrix
 from utils import anim
 from utils import connect
 from utils import shape
+from utils import buildProfiler
 
 from base import module
 from base import control
 
 import general
 
+@buildProfiler.profile()
 def buildSimpleIk(
                   chainJoints,
                   chainCurve,
@@ -91,18 +93,20 @@ def buildSimpleIk(
     
     # make controls
     chainControls = []
+    ctrlBatch = control.ControlBatch()
     
     for i in range( numChainCVs ):
         
         if i == 1 or i == numChainCVs -2:
             continue
         
-        chainCtrl = control.Control( prefix = prefix +'%d' % ( i + 1 ), shape = 'circleX', colorName = colorName, 
-                                     moveTo = chainCurveClusters[i], scale = ctrlScale * 2, ctrlParent = rigmodule.Controls )
-
+        chainCtrl = ctrlBatch.add( prefix = prefix +'%d' % ( i + 1 ), shape = 'circleX', colorName = colorName, 
+                                   moveTo = chainCurveClusters[i], scale = ctrlScale * 2, ctrlParent = rigmodule.Controls )
         
         chainControls.append( chainCtrl )
     
+    ctrlBatch.build()
+    
     # orient controls
     if not controlsWorldOrient:
         for i in range( len( chainControls ) ):
@@ -175,6 +179,7 @@ def buildSimpleIk(
         'stretchRes': chainStretchRes
         }
     
+@buildProfiler.profile()
 def build( 
             startJnt,
             endJnt,
@@ -1029,6 +1034,7 @@ def _ikSplineTwistSetup( prefix, rootCtrl, tailIkControls, chainIk, ikcurve, ikJ
     attribute.openAllTransformVis( tailIkControls[-1].C,  r = True )
     mc.parentConstraint( tailIkControls[-1].C, endTwistLoc, mo = True, sr = ['x', 'y', 'z'] )
 
+@buildProfiler.profile()
 def buildIkFk(
             startJnt,
             endJnt,
@@ -11,7 +11,9 @@ from base import module
 
 from utils import name
 from utils import joint
+from utils import buildProfiler
 
+@buildProfiler.profile()
 def buildFk(
             baseRigData,
             jawJnt,
@@ -12,7 +12,6 @@ description: <short description of the rig to work with>
 
 # import modules to work with
 import os.path
-import json
 
 import maya.cmds as mc
 import maya.mel as mm
@@ -21,6 +20,9 @@ import maya.OpenMaya as om
 from base import control
 from base import module
 from base import base
+from base import incrementalBuild
+from base import buildCheckpoints
+from base import rigRegistry
 
 from rig import spine
 from rig import neck
@@ -49,6 +51,9 @@ from utils import transform
 from utils import constraint
 from utils import vector
 from utils import anim
+from utils import skinWeightsFile
+from utils import buildProfiler
+from utils import buildSession
 
 
 # define the main asset folder of the asset after import the rig.py,  example: rig.mainAssetFolder = D:/TRABAJO/autoRig/assets/%s
@@ -59,6 +64,10 @@ assetModelFilePath = '%smodel/%s_model.ma'
 assetBuilderFilePath = '%sbuilder/%s_builder.ma'
 skinWeightsFilePath = '%sweights/skinCluster/'
 assetControlShapesPath = '%scontrolShapes/%s_controlShapes.xml'
+buildProfilePath = '%sbuildProfiles/%s_buildProfile.json'
+buildTimingsPath = '%sbuildProfiles/%s_buildTimes.json'
+buildCachePath = '%sbuildCache/'
+buildCheckpointsPath = '%sbuildCheckpoints/'
 skinBlendWeightsFilePath = '%sweights\\blendWeights\\'
 
 # define scene scale
@@ -74,7 +83,18 @@ deformSetupGrp = 'deformSetup_grp'
 
 
 
-def build ( assetName, loadControlShapes = True, loadSkinWeights = True ):
+buildStages = [ 'import', 'base', 'control', 'deform', 'post' ]
+
+def build ( assetName, loadControlShapes = True, loadSkinWeights = True, profile = False, incremental = False, resumeFrom = None, saveCheckpoints = None, suspendEvaluation = True ):
+    
+    '''
+    build rig of asset
+    
+    :param resumeFrom: str, name of stage from buildStages, build continues from last valid checkpoint before this stage
+    :param saveCheckpoints: bool, save scene checkpoint after each stage, see base.buildCheckpoints,
+                            by default checkpoints are saved only when build is resumed or incremental
+    :param suspendEvaluation: bool, suspend evaluation, undo and viewport refresh while building, see utils.buildSession
+    '''
     
     # check if main assset folder is define
     if not mainAssetFolder:
@@ -84,90 +104,190 @@ def build ( assetName, loadControlShapes = True, loadSkinWeights = True ):
     startTime = mc.timerX()
     print '# start build rig for asset %s' % assetName
     
-    #===========================================================================
-    # import files
-    #===========================================================================
-    assetFolder = mainAssetFolder % assetName
-    
-    # create a new scene    
-    mc.file( new = True, f = True )
-    
-    # import model 
-    mc.file(assetModelFilePath % (assetFolder, assetName), i = True)
-    
-    # import builder
-    mc.file(assetBuilderFilePath % ( assetFolder, assetName ), i = True )
-    
-    #fit camera
-    mc.viewFit()
-    
-    #==========================================================================
-    # create baseRigData
-    #==========================================================================
-    baseRigData = base.build(
-                        headJnt,
-                        topHeadObj = headEndJnt,
-                        assetName = assetName,
-                        offsetAboveHeadY = sceneScale * 7,
-                        scale = 1.0,
-                        doCheckClashingNames = True
-                        )
+    # profile build stages and rig modules, see utils.buildProfiler
+    if profile: buildProfiler.start( '%s build' % assetName )
     
-    # parent model under rig
-    modelAssetGrp = '%s_grp' % assetName
-    mc.parent( modelAssetGrp, baseRigData['modelGrp'] )
-    
-    # parent skeleton under rig
-    mc.parent( rootJnt, baseRigData['jointsGrp'] )
-    
-    # make deform group
-    deformSetupGroup = mc.group( n = deformSetupGrp, em = True, p = baseRigData['mainGrp'] )
-    mc.hide( deformSetupGroup )
+    assetFolder = mainAssetFolder % assetName
     
+    # stages before the last valid checkpoint are skipped, see base.buildCheckpoints
+    checkpoints = buildCheckpoints.BuildCheckpoints( buildCheckpointsPath % assetFolder, assetName, buildStages,
+                                                     getStageFingerprints( assetName, loadSkinWeights ) )
     
-    moduleMainGrps = []
+    startStage = buildStages[0]
+    stateDt = {}
     
-    #===========================================================================
-    # setup control rig
-    #===========================================================================
+    if resumeFrom:
+        
+        startStage, stateDt = checkpoints.resume( resumeFrom )
     
-    controlRigData = setupControlRig( assetName, baseRigData )
-    moduleMainGrps.extend( controlRigData[0] )
+    # saving checkpoints exports whole scene after each stage, normal builds skip it
+    if saveCheckpoints is None:
+        
+        saveCheckpoints = bool( resumeFrom or incremental )
     
-    # fix all the shapes names
-    fixAllShapesNames()
+    runStages = buildStages[ buildStages.index( startStage ): ]
     
-    #===========================================================================
-    # setup deform rig
-    #===========================================================================
+    # build time with and without suspended evaluation is stored to report saved time
+    session = buildSession.BuildSession( '%s build from %s' % ( assetName, startStage ), enabled = suspendEvaluation,
+                                         timingsPath = buildTimingsPath % ( assetFolder, assetName ) )
     
-    deformRigData = setupDeformRig( assetName, baseRigData, loadSkinWeights )
-    moduleMainGrps.extend( deformRigData[0] )
+    # controls, modules and joints are registered while building, see base.rigRegistry,
+    # registry is stopped also when build fails so tools don't get registry of unfinished rig
+    with session, rigRegistry.building( stateDt.get( 'registryEntries', [] ) ) as registry:
+        
+        #===========================================================================
+        # import files
+        #===========================================================================
+        
+        if 'import' in runStages:
+            
+            # names of imported shapes are fixed at the end of stage
+            with shape.ShapeNameTracker( 'import stage' ):
+                
+                with buildProfiler.span( 'import files' ):
+                    
+                    # create a new scene    
+                    mc.file( new = True, f = True )
+                    
+                    # import model 
+                    mc.file(assetModelFilePath % (assetFolder, assetName), i = True)
+                    
+                    # import builder
+                    mc.file(assetBuilderFilePath % ( assetFolder, assetName ), i = True )
+                
+                #fit camera
+                mc.viewFit()
+            
+            if saveCheckpoints: checkpoints.save( 'import', stateDt )
+        
+        #==========================================================================
+        # create baseRigData
+        #==========================================================================
+        
+        if 'base' in runStages:
+            
+            with shape.ShapeNameTracker( 'base stage' ):
+                
+                baseRigData = base.build(
+                                    headJnt,
+                                    topHeadObj = headEndJnt,
+                                    assetName = assetName,
+                                    offsetAboveHeadY = sceneScale * 7,
+                                    scale = 1.0,
+                                    doCheckClashingNames = True
+                                    )
+                
+                # parent model under rig
+                modelAssetGrp = '%s_grp' % assetName
+                mc.parent( modelAssetGrp, baseRigData['modelGrp'] )
+                
+                # parent skeleton under rig
+                mc.parent( rootJnt, baseRigData['jointsGrp'] )
+                
+                # make deform group
+                deformSetupGroup = mc.group( n = deformSetupGrp, em = True, p = baseRigData['mainGrp'] )
+                mc.hide( deformSetupGroup )
+            
+            # register skeleton joints
+            for j in [ rootJnt ] + ( mc.listRelatives( rootJnt, ad = True, type = 'joint' ) or [] ):
+                
+                registry.register( j, 'joint', module = '', role = name.removeSide( name.removeSuffix( j ) ) )
+            
+            stateDt = { 'baseRigData': baseRigData, 'moduleMainGrps': [], 'registryEntries': registry.entries }
+            
+            if saveCheckpoints: checkpoints.save( 'base', stateDt )
+        
+        baseRigData = stateDt['baseRigData']
+        moduleMainGrps = stateDt['moduleMainGrps']
+        stateDt['registryEntries'] = registry.entries
+        
+        #===========================================================================
+        # setup control rig
+        #===========================================================================
+        
+        if 'control' in runStages:
+            
+            # names of shapes made in this stage are fixed at its end
+            with shape.ShapeNameTracker( 'control stage' ):
+                
+                controlRigData = setupControlRig( assetName, baseRigData, incremental )
+                moduleMainGrps.extend( controlRigData[0] )
+            
+            if saveCheckpoints: checkpoints.save( 'control', stateDt )
+        
+        #===========================================================================
+        # setup deform rig
+        #===========================================================================
+        
+        if 'deform' in runStages:
+            
+            # names of shapes made in this stage are fixed at its end
+            with shape.ShapeNameTracker( 'deform stage' ):
+                
+                deformRigData = setupDeformRig( assetName, baseRigData, loadSkinWeights )
+                moduleMainGrps.extend( deformRigData[0] )
+            
+            if saveCheckpoints: checkpoints.save( 'deform', stateDt )
+        
+        elif loadSkinWeights:
+            
+            # deform rig is reused from checkpoint, only objects with changed weights files
+            # are skinned again, others are skipped by weights cache keys saved with the checkpoint
+            loadSkinClusterWeights( assetName )
+        
+        #===========================================================================
+        # post build
+        #===========================================================================
+        
+        # load rig settings
+        adjustRigSettings( assetName )
+        
+        if loadControlShapes:
+            
+            loadRigControlShapes( assetName )
+        
+        # label joints
+        joint.label( mc.ls( type = 'joint' ) )
+        
+        # clean builder grp
+        mc.delete('build_objects_grp')
+        
+        # save registry on rig for tools and later steps
+        registry.save( baseRigData['mainGrp'] )
     
-    # fix all the shapes names
-    fixAllShapesNames()    
+    # report time building setup    
+    totalTime = mc.timerX( st = startTime )    
+    print '# Total Time building %s rig: %f seconds' % ( assetName, totalTime )
     
-    #===========================================================================
-    # post build
-    #===========================================================================
+    if profile:
+        
+        profiler = buildProfiler.stop()
+        profiler.report()
+        profiler.exportChromeTrace( buildProfilePath % ( assetFolder, assetName ) )
+
+def getStageFingerprints( assetName, loadSkinWeights ):
     
-    # load rig settings
-    adjustRigSettings( assetName )
+    '''
+    get fingerprints of build stages inputs, stage checkpoint is valid while inputs of the stage and earlier stages do not change
     
-    if loadControlShapes:
-        
-        loadRigControlShapes( assetName )
+    :return: dict, { stage name: fingerprint }
+    '''
     
-    # label joints
-    joint.label( mc.ls( type = 'joint' ) )
+    assetFolder = mainAssetFolder % assetName
     
-    # clean builder grp
-    mc.delete('build_objects_grp')
+    # code of rig modules, controls, utils and tools used by base and later stages, changes invalidate their checkpoints
+    codeFolders = [ os.path.dirname( m.__file__ ) for m in [ spine, control, shape, bSkinSaver ] ]
     
-    # report time building setup    
-    totalTime = mc.timerX( st = startTime )    
-    print '# Total Time building %s rig: %f seconds' % ( assetName, totalTime )
+    return {
+            'import': buildCheckpoints.getFingerprint( files = [ assetModelFilePath % ( assetFolder, assetName ), assetBuilderFilePath % ( assetFolder, assetName ) ] ),
+            'base': buildCheckpoints.getFingerprint( files = codeFolders, functions = [ base.build ], values = [ headJnt, headEndJnt, rootJnt, sceneScale ] ),
+            'control': buildCheckpoints.getFingerprint( functions = [ setupControlRig, shape.ShapeNameTracker ] ),
+            # skinCluster weights files are left out, changed files are loaded on reused deform rig, see build()
+            'deform': buildCheckpoints.getFingerprint( files = [ skinBlendWeightsFilePath % assetFolder ],
+                                                       functions = [ setupDeformRig, loadSkinClusterWeights, shape.ShapeNameTracker ], values = [ loadSkinWeights ] )
+            }
 
+@buildProfiler.profile( 'adjustRigSettings' )
 def adjustRigSettings ( assetName ):
     
     visCtrl = 'vis_ctl'
@@ -176,10 +296,13 @@ def adjustRigSettings ( assetName ):
     
     # add rig settings here
 
-def setupControlRig( assetName, baseRigData ):
+@buildProfiler.profile( 'setupControlRig' )
+def setupControlRig( assetName, baseRigData, incremental = False ):
   
     '''
     build control rig
+    
+    :param incremental: bool, build only modules with changed inputs and restore other modules from build cache
     '''
     
     # ========================================================
@@ -277,10 +400,31 @@ def setupControlRig( assetName, baseRigData ):
     # modules setup 
     #===========================================================================
     
-    moduleMainGrps = []
+    # modules are added with their inputs (guides), with incremental build only modules with changed inputs
+    # or changed dependencies are built, other modules are restored from build cache, see base.incrementalBuild
+    modulesBuild = incrementalBuild.IncrementalBuild( buildCachePath % ( mainAssetFolder % assetName ), enabled = incremental )
+    
+    # spine and neck are built when their guide curves are in builder scene, asset presets add other modules the same way
+    if mc.objExists( spineCrv ):
+        
+        pivotRefs = [ r if mc.objExists( r ) else None for r in [ bodyPivotLoc, pelvisPivotLoc ] ]
+        
+        modulesBuild.addModule( 'spine', spine.buildHybrid, inputs = spineJoints + [ spineCrv ] + [ r for r in pivotRefs if r ],
+                                rootJnt = rootJnt, ikCurve = spineCrv, spineJoints = spineJoints, pelvisJnt = pelvisJnt,
+                                bodyPivotRef = pivotRefs[0], pelvisPivotRef = pivotRefs[1], ctrlScale = sceneScale, baseRigData = baseRigData )
+    
+    if mc.objExists( neckCrv ) and mc.objExists( headJnt ):
+        
+        modulesBuild.addModule( 'neck', neck.build, inputs = neckJoints + [ neckCrv ], dependsOn = [ s.name for s in modulesBuild.modules ],
+                                neckJoints = neckJoints, ikCurve = neckCrv, spineEndJnt = spineEndJnt, ctrlScale = sceneScale, baseRigData = baseRigData )
+    
+    modulesData = modulesBuild.run()
+    
+    moduleMainGrps = [ d['mainGrp'] for d in modulesData.values() if isinstance( d, dict ) and 'mainGrp' in d ]
     
     return [moduleMainGrps]
 
+@buildProfiler.profile( 'setupDeformRig' )
 def setupDeformRig( assetName, baseRigData, loadSkinWeights ):
     
     """
@@ -322,25 +466,23 @@ def setupDeformRig( assetName, baseRigData, loadSkinWeights ):
         weightsFolder = skinBlendWeightsFilePath % assetFolder
         
         try:
-            for file in os.listdir( weightsFolder ):
-                print 'file:', file
-                if file.endswith( '.wts' ):
+            for file in sorted( os.listdir( weightsFolder ) ):
+                fileName, fileExt = os.path.splitext( file )
+                
+                # binary file is used if blend weights were saved in both formats
+                if fileExt == '.wts' and os.path.exists( os.path.join( weightsFolder, fileName + skinWeightsFile.blendWeightsBinaryExt ) ):
+                    continue
+                
+                if fileExt in [ '.wts', skinWeightsFile.blendWeightsBinaryExt ]:
+                    print 'file:', file
                     filePath = os.path.join( weightsFolder, file )
                     
-                    # set skin to blend weights
-                    # read from file
-                    fileobj = open( filePath, mode = 'rb' )
-                    fileobjStr = fileobj.read()
-                    weightsDt = json.loads( fileobjStr )
-                    fileobj.close()
-                    
-                    deformerNode = weightsDt['deformerName']
+                    # load values and set skin to blend weights
+                    deformerNode = saveSkinWeights.loadBlendWeights( filePath )
                     
                     mc.setAttr( '{}.skinningMethod'.format( deformerNode ), 2 )
                     mc.setAttr( '{}.deformUserNormals'.format( deformerNode ), 0 )
                     
-                    saveSkinWeights.loadBlendWeights( filePath )
-                    
         except:
             
             print '# no Dual Quaternion weights found... moving to next step'
@@ -354,10 +496,14 @@ def setupDeformRig( assetName, baseRigData, loadSkinWeights ):
      
     return [moduleMainGrps]
     
+@buildProfiler.profile( 'fixAllShapesNames' )
 def fixAllShapesNames():
     
     """
     fix all the shapes names of transforms
+    
+    NOTE: build fixes only shapes made in each stage with shape.ShapeNameTracker,
+    use this for scenes built or edited without tracking
     """
     
     allTransforms = mc.ls( type = 'transform' )
@@ -371,10 +517,16 @@ def fixAllShapesNames():
             
             pass
 
-def saveSkinClusterWeights( assetName, skinnedObjs = None ):
+def saveSkinClusterWeights( assetName, skinnedObjs = None, binary = False, sparse = False, journal = False, quantizeBits = None, savePositions = False ):
     
     """
     save skinCluster weights for the rig
+    
+    :param binary: bool, save weights in binary format (.skinwb) instead of text format (.skinwt)
+    :param sparse: bool, save only non-zero weights, used with binary format
+    :param journal: bool, save weights in journal format (.skinwj), only vertices changed since last save are written
+    :param quantizeBits: int, optional, save weights as 8 or 16 bit fixed point values, used with binary format
+    :param savePositions: bool, save points positions with binary format so weights can be remapped if mesh topology changes
     """
     
     if not skinnedObjs:
@@ -389,18 +541,27 @@ def saveSkinClusterWeights( assetName, skinnedObjs = None ):
         
         mc.select(geo)
         
-        fullSkinPath = skinPath + geo + '.skinwt'
+        if journal:
+            
+            fullSkinPath = skinPath + geo + skinWeightsFile.journalExt
+            
+        else:
+            
+            fullSkinPath = skinPath + geo + ( skinWeightsFile.binaryExt if binary else skinWeightsFile.textExt )
         
-        bSkinSaver.bSaveSkinValues(fullSkinPath)
+        bSkinSaver.bSaveSkinValues(fullSkinPath, sparse = sparse, savePositions = savePositions, quantizeBits = quantizeBits)
         
         print "for: %s \n" % geo
     
     mc.select(cl = True)
 
+@buildProfiler.profile( 'loadSkinClusterWeights' )
 def loadSkinClusterWeights( assetName ):
     
     """
     load skinCluster weights for the rig
+    
+    :return: dict, skin weights cache report with 'hits' and 'misses' lists of object names
     """
     
     assetFolder = mainAssetFolder % assetName
@@ -408,17 +569,31 @@ def loadSkinClusterWeights( assetName ):
     
     if skinPath.endswith( '/' ) == 0: skinPath = skinPath + '/'
     
-    dirFiles = os.listdir( skinPath )
-    weightFiles = [ skinPath + f for f in dirFiles if f.count( '.skinwt' ) ]
-
-    for i, wtFile in enumerate( weightFiles ):
+    weightFiles = skinWeightsFile.listWeightFiles( skinPath )
+    
+    # scan scene joints once for all weight files
+    jointIndex = bSkinSaver.bBuildJointIndex()
+    
+    # objects with unchanged weights, topology and influences are not skinned again
+    cacheReport = { 'hits': [], 'misses': [] }
+    
+    # weight files are parsed in worker processes, skinning happens here as they arrive
+    for loadedGeo in bSkinSaver.bIterLoadSkinValues( weightFiles, jointIndex = jointIndex, cacheReport = cacheReport ):
+        
+        # skinCluster of object skipped by weights cache is already set up
+        if loadedGeo in cacheReport['hits']: continue
+        
         try:
-            loadedGeo = bSkinSaver.bLoadSkinValues(loadOnSelection = False, inputFile = wtFile)
             skinClusterName = mm.eval('findRelatedSkinCluster '+loadedGeo)
             
-            mc.rename( skinClusterName, loadedGeo + '_skc' )
+            if skinClusterName != loadedGeo + '_skc':
+                mc.rename( skinClusterName, loadedGeo + '_skc' )
         except:
-            '# not able to load {} ...skip'.format( wtFile )
+            print '# not able to rename skinCluster of {} ...skip'.format( loadedGeo )
+    
+    print '# skin weights cache: %d hits %s, %d misses %s' % ( len( cacheReport['hits'] ), cacheReport['hits'], len( cacheReport['misses'] ), cacheReport['misses'] )
+    
+    return cacheReport
 
 def saveRigControlShapes( assetName ):
 
@@ -429,11 +604,12 @@ def saveRigControlShapes( assetName ):
     saveControlShapesList = getSaveControlShapesNames( assetName )
     
     assetFolder = mainAssetFolder % assetName
-    controlShapesFilepath = assetControlShapesPath % ( assetFolder, assetName )
+    controlShapesFilepath = saveCvPositions.getCompactPath( assetControlShapesPath % ( assetFolder, assetName ) )
     
     print '# saving controls shapes to %s, listed shapes: %s' % ( controlShapesFilepath, saveControlShapesList )
     saveCvPositions.save( controlShapesFilepath, saveControlShapesList )
     
+@buildProfiler.profile( 'loadRigControlShapes' )
 def loadRigControlShapes( assetName ):
 
     '''
@@ -443,16 +619,17 @@ def loadRigControlShapes( assetName ):
     saveControlShapesList = getSaveControlShapesNames( assetName )
     
     assetFolder = mainAssetFolder % assetName
-    controlShapesFilepath = assetControlShapesPath % ( assetFolder, assetName )
+    # compact shapes file is loaded first, older XML file otherwise
+    controlShapesFilepath = saveCvPositions.findShapesFile( assetControlShapesPath % ( assetFolder, assetName ) )
     
-    if os.path.exists( controlShapesFilepath ):
+    if controlShapesFilepath:
         
         print '# loading controls shapes for %s' % saveControlShapesList
         saveCvPositions.load( path = controlShapesFilepath, objects = saveControlShapesList )
     
     else:
         
-        print '# loading controls shapes skipped, file not found:%s' % controlShapesFilepath
+        print '# loading controls shapes skipped, file not found:%s' % ( assetControlShapesPath % ( assetFolder, assetName ) )
         
 def getSaveControlShapesNames( assetName ):
     
@@ -460,7 +637,16 @@ def getSaveControlShapesNames( assetName ):
     get save control shapes names
     """
     
-    saveControlShapesList = mc.ls( '*_ctl', type = 'transform' )
+    # animated controls from rig registry, scene is scanned only for rigs built without registry
+    registry = rigRegistry.fromScene()
+    
+    if registry:
+        
+        saveControlShapesList = [ c for c in registry.query( nodeType = 'control' ) if c.endswith( '_ctl' ) ]
+    
+    else:
+        
+        saveControlShapesList = mc.ls( '*_ctl', type = 'transform' )
     
     # use this for temporary skipping control shapes
     # by default it should always load everything in the file
@@ -479,15 +665,18 @@ def getSaveControlShapesNames( assetName ):
             saveControlShapesList.remove( o )
     
     
-    controlshapeListExisting = [ o for o in saveControlShapesList if mc.objExists( o ) ]
+    # one scene query for all objects
+    controlshapeListExisting = mc.ls( saveControlShapesList ) if saveControlShapesList else []
     
     
     return controlshapeListExisting
 
-def saveDqWeights(dqObjects = [], assetName = ''):
+def saveDqWeights(dqObjects = [], assetName = '', binary = True):
     
     '''
     save dual quaternion weights
+    
+    :param binary: bool, save compact binary file (.wtsb) instead of JSON file (.wts)
     '''
     
     assetFolder = mainAssetFolder % assetName
@@ -498,7 +687,8 @@ def saveDqWeights(dqObjects = [], assetName = ''):
         skinClusterName = object + '_skc'
         
         objectNoSuffix = name.removeSuffix( object )
-        dqSavePath = dualQuaternionPath + '/%sSkinBlend.wts' % objectNoSuffix
+        dqSavePath = dualQuaternionPath + '/%sSkinBlend' % objectNoSuffix
+        dqSavePath += skinWeightsFile.blendWeightsBinaryExt if binary else '.wts'
         
             
         saveSkinWeights.saveBlendWeights( dqSavePath, skinClusterName )
@@ -0,0 +1,54 @@
+"""
+environment of rigLib tests, tests run without Maya using stand-in Maya modules (tools/benchmark/mayaStandIn.py)
+@category Rigging @subcategory Tests
+
+run with Python 2.7 (or mayapy) from rigLib folder:
+    python -m unittest discover -s tests
+
+NOTE: import this module before any rigLib module, tests are skipped in Python 3 as rigLib is Python 2 code
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+if sys.version_info[0] > 2:
+
+    raise unittest.SkipTest( 'rigLib tests need Python 2.7 or mayapy' )
+
+rigLibDir = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+toolsDir = os.path.join( rigLibDir, 'tools' )
+
+for _path in [ os.path.join( toolsDir, 'benchmark' ), toolsDir, rigLibDir ]:
+
+    if _path not in sys.path:
+
+        sys.path.insert( 0, _path )
+
+import mayaStandIn
+
+scene = mayaStandIn.install()
+
+# synthetic skinned mesh of weights benchmark, see skinWeightsBenchmark.makeSkinnedMesh()
+from skinWeightsBenchmark import makeSkinnedMesh
+
+class TempDirTestCase( unittest.TestCase ):
+
+    '''
+    test case with new temporary folder for each test and clear stand-in scene
+    '''
+
+    def setUp( self ):
+
+        self.tempDir = tempfile.mkdtemp( prefix = 'rigLibTest_' )
+        scene.clear()
+
+    def tearDown( self ):
+
+        shutil.rmtree( self.tempDir, ignore_errors = True )
+
+    def getPath( self, fileName ):
+
+        return os.path.join( self.tempDir, fileName )
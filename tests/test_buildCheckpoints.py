@@ -0,0 +1,144 @@
+"""
+tests of build checkpoints (base.buildCheckpoints) with stub of maya.cmds file command
+"""
+
+import os
+import unittest
+
+import testEnv
+
+from base import buildCheckpoints
+
+class StubFileCmds( object ):
+
+    '''
+    file command writing exported scenes and keeping name of current scene
+    '''
+
+    def __init__( self ):
+
+        self.sceneName = ''
+        self.exportCount = 0
+
+    def file( self, filePath = None, ea = False, o = False, rename = None, **kwargs ):
+
+        if ea:
+
+            self.exportCount += 1
+            fileobj = open( filePath, 'w' )
+            fileobj.write( 'scene export %d' % self.exportCount )
+            fileobj.close()
+
+        elif o:
+
+            self.sceneName = filePath
+
+        elif rename:
+
+            self.sceneName = rename
+
+def controlStage(): return 'control'
+
+def controlStageEdited(): return 'edited control'
+
+class FingerprintTest( testEnv.TempDirTestCase ):
+
+    def _writeFile( self, fileName, text ):
+
+        fileobj = open( self.getPath( fileName ), 'w' )
+        fileobj.write( text )
+        fileobj.close()
+
+    def test_fileChanges( self ):
+
+        self._writeFile( 'model.ma', 'model' )
+        fingerprint = buildCheckpoints.getFingerprint( files = [ self.getPath( 'model.ma' ) ] )
+
+        self.assertEqual( buildCheckpoints.getFingerprint( files = [ self.getPath( 'model.ma' ) ] ), fingerprint )
+
+        self._writeFile( 'model.ma', 'edited model' )
+        self.assertNotEqual( buildCheckpoints.getFingerprint( files = [ self.getPath( 'model.ma' ) ] ), fingerprint )
+
+    def test_codeFolder( self ):
+
+        os.makedirs( self.getPath( 'rig' ) )
+        self._writeFile( 'rig/arm.py', 'def build(): pass' )
+        fingerprint = buildCheckpoints.getFingerprint( files = [ self.getPath( 'rig' ) ] )
+
+        # compiled files are left out
+        self._writeFile( 'rig/arm.pyc', 'compiled' )
+        self.assertEqual( buildCheckpoints.getFingerprint( files = [ self.getPath( 'rig' ) ] ), fingerprint )
+
+        self._writeFile( 'rig/leg.py', 'def build(): pass' )
+        self.assertNotEqual( buildCheckpoints.getFingerprint( files = [ self.getPath( 'rig' ) ] ), fingerprint )
+
+    def test_functionsAndValues( self ):
+
+        fingerprint = buildCheckpoints.getFingerprint( functions = [ controlStage ], values = [ True ] )
+
+        self.assertNotEqual( buildCheckpoints.getFingerprint( functions = [ controlStageEdited ], values = [ True ] ), fingerprint )
+        self.assertNotEqual( buildCheckpoints.getFingerprint( functions = [ controlStage ], values = [ False ] ), fingerprint )
+
+class BuildCheckpointsTest( testEnv.TempDirTestCase ):
+
+    stages = [ 'import', 'base', 'control', 'deform' ]
+
+    def setUp( self ):
+
+        testEnv.TempDirTestCase.setUp( self )
+
+        self.addCleanup( setattr, buildCheckpoints, 'mc', buildCheckpoints.mc )
+        self.stubCmds = StubFileCmds()
+        buildCheckpoints.mc = self.stubCmds
+
+        self.fingerprints = dict( [ ( s, buildCheckpoints.getFingerprint( values = [ s ] ) ) for s in self.stages ] )
+        self.checkpointsFolder = self.getPath( 'buildCheckpoints' )
+
+        checkpoints = self._getCheckpoints()
+        checkpoints.save( 'import', {} )
+        checkpoints.save( 'base', { 'baseRigData': { 'mainGrp': 'rig_grp' }, 'moduleMainGrps': [] } )
+
+    def _getCheckpoints( self ):
+
+        return buildCheckpoints.BuildCheckpoints( self.checkpointsFolder, 'hero', self.stages, dict( self.fingerprints ) )
+
+    def test_resume( self ):
+
+        startStage, stateDt = self._getCheckpoints().resume( 'deform' )
+
+        self.assertEqual( startStage, 'control' )
+        self.assertEqual( stateDt, { 'baseRigData': { 'mainGrp': 'rig_grp' }, 'moduleMainGrps': [] } )
+
+    def test_changedStageInvalidatesLaterStages( self ):
+
+        self.fingerprints['base'] = buildCheckpoints.getFingerprint( values = [ 'edited base' ] )
+        checkpoints = self._getCheckpoints()
+
+        self.assertTrue( checkpoints.isValid( 'import' ) )
+        self.assertFalse( checkpoints.isValid( 'base' ) )
+        self.assertEqual( checkpoints.resume( 'deform' ), [ 'base', {} ] )
+
+        # new model invalidates all checkpoints
+        self.fingerprints['import'] = buildCheckpoints.getFingerprint( values = [ 'new model' ] )
+        checkpoints = self._getCheckpoints()
+
+        self.assertFalse( checkpoints.isValid( 'import' ) )
+        self.assertEqual( checkpoints.resume( 'deform' ), [ 'import', {} ] )
+
+    def test_loadedSceneIsRenamed( self ):
+
+        checkpoints = self._getCheckpoints()
+        checkpointScene = checkpoints._getPaths( 'base' )[0]
+        checkpointText = open( checkpointScene ).read()
+
+        checkpoints.load( 'base' )
+
+        # saving opened scene doesn't overwrite checkpoint
+        self.assertNotEqual( self.stubCmds.sceneName, checkpointScene )
+        self.assertEqual( os.path.dirname( self.stubCmds.sceneName ), self.checkpointsFolder )
+        self.assertTrue( checkpoints.isValid( 'base' ) )
+        self.assertEqual( open( checkpointScene ).read(), checkpointText )
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+tests of build farm scheduling (tools.buildFarm) with stub worker script instead of mayapy builds
+"""
+
+import json
+import os
+import sys
+import time
+import unittest
+
+import testEnv
+
+import buildFarm
+
+# stub worker behaves by 'mode' build argument of its job and counts its attempts next to result file
+stubWorkerCode = '''
+import json
+import os
+import sys
+import time
+
+fileobj = open( sys.argv[2], 'r' )
+jobDt = json.load( fileobj )
+fileobj.close()
+
+mode = jobDt['buildArgs']['mode']
+attemptsPath = jobDt['resultFile'] + '.attempts'
+attempts = int( open( attemptsPath ).read() ) + 1 if os.path.exists( attemptsPath ) else 1
+open( attemptsPath, 'w' ).write( str( attempts ) )
+
+print 'stub build of %s, attempt %d' % ( jobDt['name'], attempts )
+sys.stdout.flush()
+
+if mode == 'hang':
+    time.sleep( 60 )
+
+if mode == 'crash' or ( mode == 'crashOnce' and attempts == 1 ):
+    os._exit( 5 )
+
+failed = mode == 'fail'
+fileobj = open( jobDt['resultFile'], 'w' )
+json.dump( { 'status': 'failed' if failed else 'done', 'error': 'stub error' if failed else None, 'seconds': 0.01 }, fileobj )
+fileobj.close()
+
+sys.exit( 3 if failed else 0 )
+'''
+
+class BuildFarmTest( testEnv.TempDirTestCase ):
+
+    def setUp( self ):
+
+        testEnv.TempDirTestCase.setUp( self )
+
+        workerScript = self.getPath( 'stubWorker.py' )
+        fileobj = open( workerScript, 'w' )
+        fileobj.write( stubWorkerCode )
+        fileobj.close()
+
+        self.launcher = buildFarm.WorkerLauncher( interpreter = sys.executable, workerScript = workerScript )
+
+    def _readJobs( self, modesDt ):
+
+        manifestPath = self.getPath( 'assets.json' )
+        manifestDt = {
+                    'mainAssetFolder': self.getPath( '%s/' ),
+                    'buildArgs': { 'mode': 'done' },
+                    'assets': [ { 'name': n, 'buildArgs': { 'mode': m } } for n, m in sorted( modesDt.items() ) ]
+                    }
+
+        fileobj = open( manifestPath, 'w' )
+        json.dump( manifestDt, fileobj )
+        fileobj.close()
+
+        return buildFarm.readManifest( manifestPath )
+
+    def _run( self, modesDt, **kwargs ):
+
+        reportDir = self.getPath( 'report' )
+        reportDt = buildFarm.runBuilds( self._readJobs( modesDt ), reportDir, launcher = self.launcher, verbose = False, **kwargs )
+
+        # report file is the same as returned report
+        fileobj = open( os.path.join( reportDir, buildFarm.reportFileName ) )
+        self.assertEqual( json.load( fileobj )['assets'], json.loads( json.dumps( reportDt['assets'] ) ) )
+        fileobj.close()
+
+        return reportDt, dict( [ ( a['name'], a ) for a in reportDt['assets'] ] )
+
+    def test_readManifest( self ):
+
+        jobs = self._readJobs( { 'hero': 'done' } )
+
+        self.assertEqual( jobs[0]['preset'], buildFarm.defaultPreset )
+        self.assertEqual( jobs[0]['buildArgs'], { 'mode': 'done' } )
+        self.assertEqual( jobs[0]['rigScene'], buildFarm.rigSceneFilePath % ( self.getPath( 'hero/' ), 'hero' ) )
+
+    def test_crashedWorkerIsRetried( self ):
+
+        reportDt, assetsDt = self._run( { 'hero': 'done', 'dog': 'fail', 'cat': 'crashOnce' }, workers = 2, retries = 1 )
+
+        self.assertEqual( ( reportDt['done'], reportDt['failed'], reportDt['crashed'] ), ( 2, 1, 0 ) )
+        self.assertEqual( assetsDt['cat']['attempts'], 2 )
+
+        # failed build is not repeated
+        self.assertEqual( assetsDt['dog']['attempts'], 1 )
+        self.assertEqual( assetsDt['dog']['error'], 'stub error' )
+
+        # log keeps output of all attempts
+        logText = open( assetsDt['cat']['log'] ).read()
+        self.assertTrue( 'attempt 1' in logText and 'attempt 2' in logText )
+
+    def test_retriesRunOut( self ):
+
+        reportDt, assetsDt = self._run( { 'hero': 'crash' }, retries = 2 )
+
+        self.assertEqual( reportDt['crashed'], 1 )
+        self.assertEqual( assetsDt['hero']['attempts'], 3 )
+        self.assertEqual( assetsDt['hero']['error'], 'worker exited with code 5' )
+
+    def test_timeoutKillsWorker( self ):
+
+        startTime = time.time()
+        reportDt, assetsDt = self._run( { 'hero': 'hang', 'dog': 'done' }, workers = 2, retries = 1, timeout = 1.0 )
+
+        self.assertTrue( time.time() - startTime < 30 )
+        self.assertEqual( assetsDt['hero']['status'], 'crashed' )
+        self.assertEqual( assetsDt['hero']['attempts'], 2 )
+        self.assertTrue( assetsDt['hero']['error'].startswith( 'timed out' ) )
+        self.assertEqual( assetsDt['dog']['status'], 'done' )
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+tests of build profiler spans (utils.buildProfiler) with stub of API 2.0 callbacks
+"""
+
+import json
+import unittest
+
+import testEnv
+
+from utils import buildProfiler
+
+class StubMessages( object ):
+
+    '''
+    API messages keeping callbacks, test calls them instead of Maya
+    '''
+
+    def __init__( self ):
+
+        self.nodeCallbacks = []
+        self.commandCallbacks = []
+
+    def addNodeAddedCallback( self, callback, nodeType ):
+
+        self.nodeCallbacks.append( callback )
+
+        return callback
+
+    def addCommandCallback( self, callback ):
+
+        self.commandCallbacks.append( callback )
+
+        return callback
+
+    def removeCallback( self, callbackId ):
+
+        for callbacks in [ self.nodeCallbacks, self.commandCallbacks ]:
+
+            if callbackId in callbacks: callbacks.remove( callbackId )
+
+    def makeNodes( self, count ):
+
+        for i in range( count ):
+
+            for callback in self.nodeCallbacks: callback( None, None )
+
+class StubOm2( object ):
+
+    def __init__( self, messages ):
+
+        self.MDGMessage = messages
+        self.MCommandMessage = messages
+        self.MMessage = messages
+
+class BuildProfilerTest( testEnv.TempDirTestCase ):
+
+    def setUp( self ):
+
+        testEnv.TempDirTestCase.setUp( self )
+
+        self.messages = StubMessages()
+        self.addCleanup( setattr, buildProfiler, 'om2', buildProfiler.om2 )
+        self.addCleanup( buildProfiler.stop )
+        buildProfiler.om2 = StubOm2( self.messages )
+
+    def _build( self, limbCount ):
+
+        @buildProfiler.profile( 'limb' )
+        def buildLimb():
+
+            self.messages.makeNodes( 3 )
+
+        buildProfiler.start( 'hero build' )
+
+        with buildProfiler.span( 'control' ):
+
+            self.messages.makeNodes( 1 )
+
+            for i in range( limbCount ):
+
+                buildLimb()
+
+        return buildProfiler.stop()
+
+    def test_nestedSpans( self ):
+
+        profiler = self._build( 2 )
+
+        self.assertEqual( [ s.getPath() for s in profiler.getSpans() ], [ 'hero build', 'hero build/control', 'hero build/control/limb', 'hero build/control/limb' ] )
+        self.assertEqual( [ s.nodes for s in profiler.getSpans() ], [ 7, 7, 3, 3 ] )
+
+        # callbacks are removed when profiler stops
+        self.assertEqual( self.messages.nodeCallbacks, [] )
+
+    def test_spansDoNothingWithoutProfiler( self ):
+
+        with buildProfiler.span( 'control' ):
+
+            pass
+
+        self.assertEqual( buildProfiler.stop(), None )
+
+    def test_chromeTrace( self ):
+
+        oldPath = self.getPath( 'old.json' )
+        newPath = self.getPath( 'new.json' )
+
+        self._build( 1 ).exportChromeTrace( oldPath )
+        self._build( 2 ).exportChromeTrace( newPath )
+
+        events = json.load( open( newPath ) )['traceEvents']
+
+        self.assertEqual( [ e['args']['path'] for e in events ], [ 'hero build', 'hero build/control', 'hero build/control/limb', 'hero build/control/limb' ] )
+
+        changes = buildProfiler.compareTraces( oldPath, newPath )
+
+        self.assertEqual( sorted( c[0] for c in changes ), [ 'hero build', 'hero build/control', 'hero build/control/limb' ] )
+
+if __name__ == '__main__':
+
+    unittest.main()
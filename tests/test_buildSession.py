@@ -0,0 +1,197 @@
+"""
+tests of build session (utils.buildSession) with stub of maya.cmds recording scene settings
+"""
+
+import unittest
+
+import testEnv
+
+from utils import buildSession
+
+class StubCmds( object ):
+
+    '''
+    keeps undo, cycle check, evaluation manager, refresh and envelope settings like Maya,
+    call named in failOn raises RuntimeError
+    '''
+
+    def __init__( self, failOn = None ):
+
+        self.failOn = failOn
+        self.undo = True
+        self.cycleCheckOn = True
+        self.evaluationMode = 'parallel'
+        self.refreshSuspended = False
+        self.envelopes = { 'body_skc': 1.0, 'head_skc': 0.5 }
+        self.uuids = { 'body_skc': 'UUID-1', 'head_skc': 'UUID-2' }
+
+    def _check( self, callName ):
+
+        if callName == self.failOn:
+
+            raise RuntimeError( 'stub failure of %s' % callName )
+
+    def undoInfo( self, q = False, state = False, stateWithoutFlush = None ):
+
+        if q: return self.undo
+
+        self._check( 'undoInfo' )
+        self.undo = stateWithoutFlush
+
+    def cycleCheck( self, q = False, evaluation = None ):
+
+        if q: return self.cycleCheckOn
+
+        self._check( 'cycleCheck' )
+        self.cycleCheckOn = evaluation
+
+    def evaluationManager( self, q = False, mode = None ):
+
+        if q: return [ self.evaluationMode ]
+
+        self._check( 'evaluationManager' )
+        self.evaluationMode = mode
+
+    def about( self, batch = False ):
+
+        return False
+
+    def refresh( self, suspend = False ):
+
+        self._check( 'refresh' )
+        self.refreshSuspended = suspend
+
+    def ls( self, *args, **kwargs ):
+
+        self._check( 'ls' )
+
+        if not args:
+
+            return sorted( self.envelopes.keys() )
+
+        # node name or UUID
+        nodeNames = [ n for n in self.envelopes if args[0] in [ n, self.uuids[ n ] ] ]
+
+        if kwargs.get( 'uuid' ):
+
+            return [ self.uuids[ n ] for n in nodeNames ]
+
+        return nodeNames
+
+    def rename( self, nodeName, newName ):
+
+        self.envelopes[ newName ] = self.envelopes.pop( nodeName )
+        self.uuids[ newName ] = self.uuids.pop( nodeName )
+
+    def delete( self, nodeName ):
+
+        del self.envelopes[ nodeName ]
+        del self.uuids[ nodeName ]
+
+    def getAttr( self, attrPath ):
+
+        return self.envelopes[ attrPath.split( '.' )[0] ]
+
+    def setAttr( self, attrPath, value ):
+
+        self._check( 'setAttr' )
+        self.envelopes[ attrPath.split( '.' )[0] ] = value
+
+    def getState( self ):
+
+        return ( self.undo, self.cycleCheckOn, self.evaluationMode, self.refreshSuspended, dict( self.envelopes ) )
+
+class BuildSessionTest( unittest.TestCase ):
+
+    def setUp( self ):
+
+        self.addCleanup( setattr, buildSession, 'mc', buildSession.mc )
+        self.addCleanup( setattr, buildSession, '_activeSession', None )
+
+    def _install( self, failOn = None ):
+
+        stubCmds = StubCmds( failOn )
+        buildSession.mc = stubCmds
+
+        return stubCmds
+
+    def test_settingsAreSuspendedAndRestored( self ):
+
+        stubCmds = self._install()
+        startState = stubCmds.getState()
+
+        with buildSession.BuildSession( verbose = False ):
+
+            self.assertTrue( buildSession.isActive() )
+            self.assertEqual( stubCmds.getState(), ( False, False, 'off', True, { 'body_skc': 0, 'head_skc': 0 } ) )
+
+        self.assertFalse( buildSession.isActive() )
+        self.assertEqual( stubCmds.getState(), startState )
+
+    def test_failedBuildRestores( self ):
+
+        stubCmds = self._install()
+        startState = stubCmds.getState()
+
+        def build():
+
+            with buildSession.BuildSession( verbose = False ):
+
+                raise ValueError( 'build failed' )
+
+        self.assertRaises( ValueError, build )
+        self.assertFalse( buildSession.isActive() )
+        self.assertEqual( stubCmds.getState(), startState )
+
+    def test_renamedDeformerIsRestored( self ):
+
+        stubCmds = self._install()
+
+        with buildSession.BuildSession( verbose = False ):
+
+            # skinCluster renamed after its envelope was deferred, e.g. skinCluster1 to body_geo_skc
+            stubCmds.rename( 'body_skc', 'body_geo_skc' )
+            stubCmds.delete( 'head_skc' )
+
+            self.assertEqual( buildSession.restoreEnvelopes(), [ 'body_geo_skc' ] )
+            self.assertEqual( stubCmds.envelopes, { 'body_geo_skc': 1.0 } )
+
+            # deferred again, e.g. after checkpoint is saved
+            buildSession.deferEnvelope( 'body_geo_skc' )
+            self.assertEqual( stubCmds.envelopes, { 'body_geo_skc': 0 } )
+
+        self.assertEqual( stubCmds.envelopes, { 'body_geo_skc': 1.0 } )
+
+    def test_failedSuspendRestores( self ):
+
+        for failOn in [ 'undoInfo', 'cycleCheck', 'refresh', 'ls' ]:
+
+            stubCmds = self._install( failOn )
+            startState = stubCmds.getState()
+            session = buildSession.BuildSession( verbose = False )
+
+            try:
+
+                session.__enter__()
+
+            except RuntimeError as e:
+
+                # error of suspend is raised, not error of restore
+                self.assertEqual( str( e ), 'stub failure of %s' % failOn )
+
+            else:
+
+                self.fail( 'suspend failure of %s was not raised' % failOn )
+
+            # settings changed before failure are restored and next session can start
+            stubCmds.failOn = None
+            self.assertEqual( stubCmds.getState(), startState, failOn )
+            self.assertFalse( buildSession.isActive() )
+
+            with buildSession.BuildSession( verbose = False ):
+
+                self.assertTrue( buildSession.isActive() )
+
+if __name__ == '__main__':
+
+    unittest.main()
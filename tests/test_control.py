@@ -0,0 +1,267 @@
+"""
+tests of building many controls with control.ControlBatch, with stubs of maya.cmds and API 2.0 transforms
+"""
+
+import math
+import unittest
+
+import testEnv
+
+import numpy as np
+
+from base import control
+from base import rigRegistry
+
+def rotationZ( degrees ):
+
+    angle = math.radians( degrees )
+
+    # row vectors like Maya matrices
+    return np.array( [ [ math.cos( angle ), math.sin( angle ), 0 ], [ -math.sin( angle ), math.cos( angle ), 0 ], [ 0, 0, 1 ] ] )
+
+class StubScene( object ):
+
+    '''
+    transforms with parent, translation and rotation matrix, used by stub cmds and stub API
+    '''
+
+    def __init__( self ):
+
+        self.nodes = {}
+
+    def add( self, nodeName, parent = None, translate = ( 0, 0, 0 ), rotate = None ):
+
+        self.nodes[ nodeName ] = { 'parent': parent, 't': np.array( translate, dtype = np.float64 ), 'r': np.identity( 3 ) if rotate is None else rotate }
+
+    def getWorldMatrix( self, nodeName ):
+
+        if not nodeName:
+
+            return np.identity( 4 )
+
+        node = self.nodes[ nodeName ]
+        localMatrix = np.identity( 4 )
+        localMatrix[:3, :3] = node['r']
+        localMatrix[3, :3] = node['t']
+
+        return localMatrix.dot( self.getWorldMatrix( node['parent'] ) )
+
+class StubCmds( object ):
+
+    def __init__( self, scene ):
+
+        self.scene = scene
+
+    def ls( self, *args, **kwargs ):
+
+        return sorted( self.scene.nodes.keys() )
+
+    def objExists( self, nodeName ):
+
+        return nodeName in self.scene.nodes
+
+    def createNode( self, nodeType, n = None, p = None ):
+
+        self.scene.add( n, parent = p )
+
+        return n
+
+    def addAttr( self, *args, **kwargs ): pass
+
+    def setAttr( self, *args, **kwargs ): pass
+
+class StubControlShapes( object ):
+
+    def __init__( self, scene ):
+
+        self.scene = scene
+
+    def makeShape( self, shapeName, objectName, scale = 1.0, parent = None ):
+
+        self.scene.add( objectName, parent = parent )
+
+        return [ objectName, [ objectName + 'Shape' ] ]
+
+class StubOm2( object ):
+
+    '''
+    API 2.0 transform calls used to match offsets, matrices are numpy arrays
+    '''
+
+    class MSpace( object ):
+
+        kWorld = 4
+        kTransform = 1
+
+    class Point( object ):
+
+        def __init__( self, values ):
+
+            self.values = np.asarray( values, dtype = np.float64 )
+
+        def __mul__( self, matrix ):
+
+            return StubOm2.Point( np.append( self.values, 1.0 ).dot( matrix.values )[:3] )
+
+    class Matrix( object ):
+
+        def __init__( self, values ):
+
+            self.values = values
+
+    class Rotation( object ):
+
+        def __init__( self, values ):
+
+            self.values = values
+
+        def __mul__( self, other ):
+
+            return StubOm2.Rotation( self.values.dot( other.values ) )
+
+        def inverse( self ):
+
+            return StubOm2.Rotation( self.values.T )
+
+    class DagPath( object ):
+
+        def __init__( self, scene, nodeName ):
+
+            self.scene = scene
+            self.nodeName = nodeName
+
+        def inclusiveMatrix( self ):
+
+            return StubOm2.Matrix( self.scene.getWorldMatrix( self.nodeName ) )
+
+        def exclusiveMatrix( self ):
+
+            return StubOm2.Matrix( self.scene.getWorldMatrix( self.scene.nodes[ self.nodeName ]['parent'] ) )
+
+        def exclusiveMatrixInverse( self ):
+
+            return StubOm2.Matrix( np.linalg.inv( self.exclusiveMatrix().values ) )
+
+    class MFnTransform( object ):
+
+        def __init__( self, dagPath ):
+
+            self.dagPath = dagPath
+            self.node = dagPath.scene.nodes[ dagPath.nodeName ]
+
+        def rotatePivot( self, space ):
+
+            return StubOm2.Point( self.dagPath.inclusiveMatrix().values[3, :3] )
+
+        def setTranslation( self, vector, space ):
+
+            self.node['t'] = vector
+
+        def setRotation( self, rotation, space ):
+
+            self.node['r'] = rotation.values
+
+    @staticmethod
+    def MVector( point ):
+
+        return point.values
+
+    class MTransformationMatrix( object ):
+
+        def __init__( self, matrix ):
+
+            self.matrix = matrix
+
+        def rotation( self, asQuaternion = False ):
+
+            return StubOm2.Rotation( self.matrix.values[:3, :3] )
+
+class StubApiwrap( object ):
+
+    def __init__( self, scene ):
+
+        self.scene = scene
+
+    def api2_getDagPath( self, nodeName ):
+
+        return StubOm2.DagPath( self.scene, nodeName )
+
+class ControlBatchTest( testEnv.TempDirTestCase ):
+
+    def setUp( self ):
+
+        testEnv.TempDirTestCase.setUp( self )
+
+        self.scene = StubScene()
+        self.scene.add( 'rig_grp', translate = ( 0, 0, 5 ) )
+        self.scene.add( 'hand1_jnt', translate = ( 10, 2, 0 ), rotate = rotationZ( 90 ) )
+        self.scene.add( 'finger1_jnt', parent = 'hand1_jnt', translate = ( 3, 0, 0 ), rotate = rotationZ( 30 ) )
+        self.scene.add( 'l_used_ctl' )
+
+        stubCmds = StubCmds( self.scene )
+
+        for module, attrName, stub in [ ( control, 'mc', stubCmds ), ( rigRegistry, 'mc', stubCmds ), ( control, 'om2', StubOm2 ),
+                                        ( control, 'apiwrap', StubApiwrap( self.scene ) ), ( control, 'controlShapes', StubControlShapes( self.scene ) ) ]:
+
+            self.addCleanup( setattr, module, attrName, getattr( module, attrName ) )
+            setattr( module, attrName, stub )
+
+        self.addCleanup( rigRegistry.stop )
+
+    def test_offsetsMatchTargets( self ):
+
+        batch = control.ControlBatch()
+        handCtrl = batch.add( prefix = 'l_hand', moveTo = 'hand1_jnt', ctrlParent = 'rig_grp' )
+        fingerCtrl = batch.add( prefix = 'l_finger', translateTo = 'finger1_jnt', rotateTo = 'finger1_jnt', ctrlParent = handCtrl )
+        posCtrl = batch.add( prefix = 'l_pos', translateTo = 'finger1_jnt', ctrlParent = 'rig_grp' )
+        batch.build()
+
+        self.assertEqual( ( handCtrl.C, handCtrl.Off ), ( 'l_hand_ctl', 'l_handCtlOffset_grp' ) )
+        self.assertEqual( self.scene.nodes[ fingerCtrl.Off ]['parent'], 'l_hand_ctl' )
+
+        # offsets and controls under them are placed like targets in world space
+        for ctrl, target in [ ( handCtrl, 'hand1_jnt' ), ( fingerCtrl, 'finger1_jnt' ) ]:
+
+            np.testing.assert_allclose( self.scene.getWorldMatrix( ctrl.C ), self.scene.getWorldMatrix( target ), atol = 1e-9 )
+
+        # only position is matched
+        posMatrix = self.scene.getWorldMatrix( posCtrl.C )
+
+        np.testing.assert_allclose( posMatrix[3, :3], self.scene.getWorldMatrix( 'finger1_jnt' )[3, :3], atol = 1e-9 )
+        np.testing.assert_allclose( posMatrix[:3, :3], np.identity( 3 ), atol = 1e-9 )
+
+    def test_namesAreChecked( self ):
+
+        batch = control.ControlBatch()
+        batch.add( prefix = 'l_finger1' )
+        batch.add( prefix = 'l_finger1' )
+
+        self.assertRaises( Exception, batch.build )
+
+        # name used in scene
+        batch = control.ControlBatch()
+        batch.add( prefix = 'l_used' )
+
+        self.assertRaises( Exception, batch.build )
+
+    def test_batchesOfBuildShareNames( self ):
+
+        registry = rigRegistry.start()
+
+        batch = control.ControlBatch()
+        batch.add( prefix = 'l_finger1' )
+        batch.build()
+
+        self.assertEqual( registry.query( nodeType = 'control' ), [ 'l_finger1_ctl' ] )
+
+        # name reserved by other batch of the same build, scene is not queried again
+        del self.scene.nodes[ 'l_finger1_ctl' ]
+
+        batch = control.ControlBatch()
+        batch.add( prefix = 'l_finger1' )
+
+        self.assertRaises( Exception, batch.build )
+
+if __name__ == '__main__':
+
+    unittest.main()
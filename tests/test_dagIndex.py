@@ -0,0 +1,68 @@
+"""
+tests of cached DAG index (utils.dagIndex) with stub of maya.cmds listing hierarchy with clashing names
+"""
+
+import unittest
+
+import testEnv
+
+from utils import dagIndex
+
+# long names and types like from ls( dag = True, l = True, st = True )
+sceneNodes = [
+            '|rig_grp', 'transform',
+            '|rig_grp|l_arm_grp', 'transform',
+            '|rig_grp|l_arm_grp|arm1_jnt', 'joint',
+            '|rig_grp|l_arm_grp|arm1_jnt|arm2_jnt', 'joint',
+            '|rig_grp|r_arm_grp', 'transform',
+            '|rig_grp|r_arm_grp|arm1_jnt', 'joint',
+            '|rig_grp|r_arm_grp|arm1_jnt|arm2_jnt', 'joint',
+            '|arm1_jnt', 'joint',
+            '|spine_jnt', 'joint'
+            ]
+
+class StubCmds( object ):
+
+    def ls( self, **kwargs ):
+
+        return list( sceneNodes )
+
+class DagIndexTest( unittest.TestCase ):
+
+    def setUp( self ):
+
+        self.addCleanup( setattr, dagIndex, 'mc', dagIndex.mc )
+        dagIndex.mc = StubCmds()
+
+        self.index = dagIndex.DagIndex()
+        self.index.refresh()
+
+    def test_getLongName( self ):
+
+        self.assertEqual( self.index.getLongName( 'spine_jnt' ), '|spine_jnt' )
+        self.assertEqual( self.index.getLongName( 'l_arm_grp|arm1_jnt' ), '|rig_grp|l_arm_grp|arm1_jnt' )
+        self.assertEqual( self.index.getLongName( '|arm1_jnt' ), '|arm1_jnt' )
+        self.assertEqual( self.index.getLongName( 'missing_jnt' ), None )
+        self.assertEqual( self.index.getLongName( None ), None )
+
+    def test_ambiguousNameRaises( self ):
+
+        self.assertRaises( ValueError, self.index.getLongName, 'arm1_jnt' )
+        self.assertRaises( ValueError, self.index.getLongName, 'arm1_jnt|arm2_jnt' )
+        self.assertRaises( ValueError, self.index.getParent, 'arm2_jnt' )
+
+    def test_shortNamesAreUnique( self ):
+
+        self.assertEqual( self.index.getShortName( '|spine_jnt' ), 'spine_jnt' )
+        self.assertEqual( self.index.getShortName( '|arm1_jnt' ), '|arm1_jnt' )
+        self.assertEqual( self.index.getShortName( '|rig_grp|l_arm_grp|arm1_jnt|arm2_jnt' ), 'l_arm_grp|arm1_jnt|arm2_jnt' )
+
+        # returned names can be used in next queries
+        descendants = self.index.getDescendants( 'rig_grp', nodeType = 'joint' )
+
+        self.assertEqual( descendants, [ 'l_arm_grp|arm1_jnt', 'l_arm_grp|arm1_jnt|arm2_jnt', 'r_arm_grp|arm1_jnt', 'r_arm_grp|arm1_jnt|arm2_jnt' ] )
+        self.assertEqual( [ self.index.getParent( n ) for n in descendants ], [ 'l_arm_grp', 'l_arm_grp|arm1_jnt', 'r_arm_grp', 'r_arm_grp|arm1_jnt' ] )
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+tests of incremental module build (base.incrementalBuild) restoring cached modules with stub of maya.cmds
+"""
+
+import json
+import os
+import unittest
+
+import testEnv
+
+from base import incrementalBuild
+from base import rigRegistry
+
+class StubImportCmds( object ):
+
+    '''
+    scene with node names, imported fragment nodes get names with number suffix when their names are used,
+    records parenting and connections
+    '''
+
+    def __init__( self, sceneNodes, fragmentNodes ):
+
+        self.nodes = set( sceneNodes )
+        self.fragmentNodes = fragmentNodes
+        self.uuids = {}
+        self.parents = []
+        self.connections = []
+        self.removedNamespaces = []
+
+    def file( self, filePath, i = False, namespace = None, returnNewNodes = False, **kwargs ):
+
+        newNodes = [ '%s:%s' % ( namespace, n ) for n in self.fragmentNodes ]
+
+        for node in newNodes:
+
+            self.nodes.add( node )
+            self.uuids[ node ] = 'UUID-' + node
+
+        return newNodes
+
+    def ls( self, nodes, uuid = False ):
+
+        if uuid:
+
+            return [ self.uuids[ n ] for n in nodes ]
+
+        return [ n for n, u in self.uuids.items() if u == nodes ]
+
+    def rename( self, node, newName, ignoreShape = False ):
+
+        newName = newName.lstrip( ':' )
+        baseName = newName
+        suffix = 0
+
+        while newName in self.nodes:
+
+            suffix += 1
+            newName = baseName + str( suffix )
+
+        self.nodes.remove( node )
+        self.nodes.add( newName )
+        self.uuids[ newName ] = self.uuids.pop( node )
+
+        return newName
+
+    def namespace( self, rm = None, mergeNamespaceWithRoot = False ):
+
+        self.removedNamespaces.append( rm )
+
+    def parent( self, node, parent, r = False ):
+
+        self.parents.append( ( node, parent ) )
+
+    def isConnected( self, sourcePlug, destPlug ):
+
+        return False
+
+    def connectAttr( self, sourcePlug, destPlug, f = False ):
+
+        self.connections.append( ( sourcePlug, destPlug ) )
+
+class Result( object ):
+
+    pass
+
+def buildArm( prefix, ctrlScale = 1.0 ):
+
+    raise AssertionError( 'cached module should not be built' )
+
+class RestoreModuleTest( testEnv.TempDirTestCase ):
+
+    def setUp( self ):
+
+        testEnv.TempDirTestCase.setUp( self )
+
+        self.addCleanup( setattr, incrementalBuild, 'mc', incrementalBuild.mc )
+        self.addCleanup( rigRegistry.stop )
+
+        # other module of this build already uses names of cached module
+        self.stubCmds = StubImportCmds( [ 'l_arm_ctl', 'spine_grp' ], [ 'l_arm_grp', 'l_arm_ctl', 'l_arm_ctlShape' ] )
+        incrementalBuild.mc = self.stubCmds
+
+        self.cacheFolder = self.getPath( 'buildCache' )
+        self.modulesBuild = incrementalBuild.IncrementalBuild( self.cacheFolder )
+        spec = self.modulesBuild.addModule( 'l_arm', buildArm, prefix = 'l_arm' )
+
+        result = Result()
+        result.mainGrp = 'l_arm_grp'
+        result.ctrl = 'l_arm_ctl'
+
+        manifestDt = {
+                    'l_arm': {
+                            'fingerprint': self.modulesBuild._getFingerprint( spec, {} ),
+                            'nodes': 3,
+                            'externalParents': [ [ 'l_arm_grp', '|rig_grp' ] ],
+                            'externalConnections': [ [ 'l_arm_ctl.rotate', 'l_arm1_jnt.rotate' ], [ 'spine_grp.worldMatrix[0]', 'l_arm_grp.offsetParentMatrix' ] ],
+                            'registry': [ [ 'l_arm_ctl', 'control', 'l_arm', 'fk', 'l' ] ],
+                            'result': incrementalBuild.serialize( { 'module': result, 'ctrls': [ 'l_arm_ctl' ] } )
+                            }
+                    }
+
+        os.makedirs( self.cacheFolder )
+        open( os.path.join( self.cacheFolder, incrementalBuild.fragmentFileFormat % 'l_arm' ), 'w' ).close()
+
+        fileobj = open( os.path.join( self.cacheFolder, incrementalBuild.manifestFileName ), 'w' )
+        json.dump( manifestDt, fileobj )
+        fileobj.close()
+
+    def test_renamedNodesAreResolved( self ):
+
+        registry = rigRegistry.start()
+        resultsDt = self.modulesBuild.run()
+
+        # clashing name got suffix on import, other nodes keep their names
+        self.assertEqual( self.stubCmds.nodes, set( [ 'l_arm_ctl', 'spine_grp', 'l_arm_grp', 'l_arm_ctl1', 'l_arm_ctlShape' ] ) )
+        self.assertEqual( self.stubCmds.removedNamespaces, [ incrementalBuild.fragmentNamespaceFormat % 'l_arm' ] )
+
+        self.assertEqual( self.stubCmds.parents, [ ( 'l_arm_grp', '|rig_grp' ) ] )
+        self.assertEqual( self.stubCmds.connections, [ ( 'l_arm_ctl1.rotate', 'l_arm1_jnt.rotate' ), ( 'spine_grp.worldMatrix[0]', 'l_arm_grp.offsetParentMatrix' ) ] )
+
+        self.assertEqual( registry.query( nodeType = 'control' ), [ 'l_arm_ctl1' ] )
+
+        result = resultsDt['l_arm']
+        self.assertEqual( result['ctrls'], [ 'l_arm_ctl1' ] )
+        self.assertTrue( isinstance( result['module'], Result ) )
+        self.assertEqual( ( result['module'].mainGrp, result['module'].ctrl ), ( 'l_arm_grp', 'l_arm_ctl1' ) )
+
+    def test_changedArgumentsBuildModule( self ):
+
+        modulesBuild = incrementalBuild.IncrementalBuild( self.cacheFolder )
+        modulesBuild.addModule( 'l_arm', buildArm, prefix = 'l_arm', ctrlScale = 2.0 )
+
+        self.assertRaises( AssertionError, modulesBuild.run )
+
+if __name__ == '__main__':
+
+    unittest.main()
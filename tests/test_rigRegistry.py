@@ -0,0 +1,94 @@
+"""
+tests of rig registry (base.rigRegistry)
+"""
+
+import unittest
+
+import testEnv
+
+from base import rigRegistry
+from utils import buildSession
+
+class ReserveNamesTest( testEnv.TempDirTestCase ):
+
+    def setUp( self ):
+
+        testEnv.TempDirTestCase.setUp( self )
+
+        testEnv.scene.addJoint( 'l_arm1_ctl' )
+        self.registry = rigRegistry.RigRegistry( [ [ 'spine_ctl', 'control', 'spine', 'spine', '' ] ] )
+
+    def test_namesAreUniqueInBuild( self ):
+
+        self.assertEqual( self.registry.reserveNames( [ 'l_finger1_ctl', 'l_finger2_ctl' ] ), [] )
+
+        # second batch of the same build
+        self.assertEqual( self.registry.reserveNames( [ 'l_finger2_ctl', 'l_finger3_ctl' ] ), [ 'l_finger2_ctl' ] )
+        self.assertEqual( self.registry.reserveNames( [ 'l_finger3_ctl' ] ), [] )
+
+    def test_sceneAndRegisteredNames( self ):
+
+        self.assertEqual( self.registry.reserveNames( [ 'l_arm1_ctl', 'spine_ctl', 'a_ctl', 'a_ctl' ] ), [ 'a_ctl', 'l_arm1_ctl', 'spine_ctl' ] )
+
+        # nothing is reserved when some name is not unique
+        self.assertEqual( self.registry.reserveNames( [ 'a_ctl' ] ), [] )
+
+    def test_sceneIsQueriedOnce( self ):
+
+        self.registry.reserveNames( [ 'a_ctl' ] )
+        testEnv.scene.addJoint( 'b_ctl' )
+
+        # nodes made later in build are known only when registered
+        self.assertEqual( self.registry.reserveNames( [ 'b_ctl' ] ), [] )
+
+        self.registry.register( 'c_ctl', 'control' )
+        self.assertEqual( self.registry.reserveNames( [ 'c_ctl' ] ), [ 'c_ctl' ] )
+
+class ActiveRegistryTest( testEnv.TempDirTestCase ):
+
+    def setUp( self ):
+
+        testEnv.TempDirTestCase.setUp( self )
+
+        self.addCleanup( rigRegistry.stop )
+
+        # rig of earlier build saved in scene
+        testEnv.scene.addNode( 'rig_grp', 'transform' )
+        rigRegistry.RigRegistry( [ [ 'l_ikFk_ctl', 'ikFkSnap', 'l_arm', 'toggle', 'l' ] ] ).save( 'rig_grp' )
+
+    def test_failedBuildStopsRegistry( self ):
+
+        def build():
+
+            with rigRegistry.building() as registry:
+
+                registry.register( 'spine_ctl', 'control' )
+                raise ValueError( 'build failed' )
+
+        self.assertRaises( ValueError, build )
+        self.assertEqual( rigRegistry.getActive(), None )
+        self.assertEqual( rigRegistry.fromScene().query( nodeType = 'ikFkSnap' ), [ 'l_ikFk_ctl' ] )
+
+    def test_sceneRegistryIsPreferredOutsideBuild( self ):
+
+        # registry left by build which didn't stop it
+        rigRegistry.start( [ [ 'spine_ctl', 'control', 'spine', 'spine', '' ] ] )
+
+        self.assertEqual( rigRegistry.fromScene().query( nodeType = 'ikFkSnap' ), [ 'l_ikFk_ctl' ] )
+
+        # registry of running build
+        self.addCleanup( setattr, buildSession, '_activeSession', None )
+        buildSession._activeSession = object()
+
+        self.assertTrue( rigRegistry.fromScene() is rigRegistry.getActive() )
+
+    def test_loadAll( self ):
+
+        testEnv.scene.addNode( 'dog_rig_grp', 'transform' )
+        rigRegistry.RigRegistry( [ [ 'r_ikFk_ctl', 'ikFkSnap', 'r_leg', 'toggle', 'r' ] ] ).save( 'dog_rig_grp' )
+
+        self.assertEqual( [ r.query( nodeType = 'ikFkSnap' ) for r in rigRegistry.loadAll() ], [ [ 'l_ikFk_ctl' ], [ 'r_ikFk_ctl' ] ] )
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+tests of setting shape points (utils.shape.setPointPositions) with stub of maya.cmds for undoable path
+"""
+
+import unittest
+
+import testEnv
+
+import numpy as np
+
+from utils import shape
+
+class StubPointCmds( object ):
+
+    '''
+    shape moved by 10 in X with object space points and mesh tweaks, records setAttr calls
+    '''
+
+    def __init__( self, shapeType, localPositions, tweaks = None ):
+
+        self.shapeType = shapeType
+        self.localPositions = np.array( localPositions, dtype = np.float64 )
+        self.tweaks = np.zeros_like( self.localPositions ) if tweaks is None else np.array( tweaks, dtype = np.float64 )
+        self.setAttrCalls = []
+
+    def nodeType( self, node, inherited = False, **kwargs ):
+
+        return [ 'shape', self.shapeType ] if inherited else self.shapeType
+
+    def ls( self, node, **kwargs ):
+
+        return [ '|' + node ]
+
+    def undoInfo( self, q = False, state = False ):
+
+        return True
+
+    def getAttr( self, attrPath ):
+
+        if attrPath.endswith( '.worldInverseMatrix[0]' ):
+
+            return [ 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, -10, 0, 0, 1 ]
+
+        return [ tuple( t ) for t in self.tweaks ]
+
+    def xform( self, components, q = False, os = False, t = False ):
+
+        return self.localPositions.ravel().tolist()
+
+    def setAttr( self, attrPath, *values, **kwargs ):
+
+        self.setAttrCalls.append( ( attrPath, values, kwargs ) )
+
+class SetPointPositionsTest( unittest.TestCase ):
+
+    def setUp( self ):
+
+        self.addCleanup( setattr, shape, 'mc', shape.mc )
+
+    def test_curveIsSetWithOneCall( self ):
+
+        stubCmds = StubPointCmds( 'nurbsCurve', [ [ 0, 0, 0 ], [ 1, 0, 0 ], [ 2, 0, 0 ] ] )
+        shape.mc = stubCmds
+
+        shape.setPointPositions( 'curveShape', [ [ 15, 1, 0 ] ], indices = [ 1 ] )
+
+        # world position is set in object space, other points keep their positions
+        self.assertEqual( len( stubCmds.setAttrCalls ), 1 )
+        attrPath, values, kwargs = stubCmds.setAttrCalls[0]
+
+        self.assertEqual( attrPath, 'curveShape.controlPoints[0:2]' )
+        self.assertEqual( kwargs, { 'size': 3 } )
+        np.testing.assert_allclose( values, [ 0, 0, 0, 5, 1, 0, 2, 0, 0 ] )
+
+    def test_meshTweaks( self ):
+
+        stubCmds = StubPointCmds( 'mesh', [ [ 0, 0, 0 ], [ 1, 0, 0 ] ], tweaks = [ [ 0, 0, 0 ], [ 0, 0, 2 ] ] )
+        shape.mc = stubCmds
+
+        shape.setPointPositions( 'bodyShape', [ [ 10, 3, 0 ], [ 11, 0, 0 ] ] )
+
+        # mesh tweaks get offsets of vertices from their current positions
+        attrPath, values, kwargs = stubCmds.setAttrCalls[0]
+
+        self.assertEqual( attrPath, 'bodyShape.pnts[0:1]' )
+        np.testing.assert_allclose( values, [ 0, 3, 0, 0, 0, 2 ] )
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+tests of skin weights cache: objects with unchanged weights file, topology and influences are not skinned again
+"""
+
+import os
+import unittest
+
+import testEnv
+
+import numpy as np
+
+import bSkinSaver
+from utils import skinWeightsFile
+from rigpresets.generic import rigBuild
+
+class WeightsCacheTest( testEnv.TempDirTestCase ):
+
+    def setUp( self ):
+
+        testEnv.TempDirTestCase.setUp( self )
+
+        self.influences, self.weights = testEnv.makeSkinnedMesh( 300, 6 )
+        self.filePath = self.getPath( 'bench_geo' + skinWeightsFile.binaryExt )
+
+        testEnv.scene.selection = [ 'bench_geo' ]
+        bSkinSaver.bSaveSkinValues( self.filePath )
+        testEnv.scene.deleteNode( testEnv.scene.findSkinCluster( 'bench_geo' )['name'] )
+
+    def _load( self ):
+
+        cacheReport = {}
+        loadedObjects = list( bSkinSaver.bIterLoadSkinValues( [ self.filePath ], processes = 1, cacheReport = cacheReport ) )
+
+        self.assertEqual( loadedObjects, [ 'bench_geo' ] )
+
+        return cacheReport
+
+    def test_secondLoadIsHit( self ):
+
+        self.assertEqual( self._load(), { 'misses': [ 'bench_geo' ] } )
+
+        skinClusterNode = testEnv.scene.findSkinCluster( 'bench_geo' )
+
+        # weights changed in scene are kept when cache hits, so skinCluster was not made again
+        skinClusterNode['weights'][0] = 0.0
+
+        self.assertEqual( self._load(), { 'hits': [ 'bench_geo' ] } )
+        self.assertTrue( testEnv.scene.findSkinCluster( 'bench_geo' ) is skinClusterNode )
+        self.assertEqual( skinClusterNode['weights'][0].sum(), 0.0 )
+
+    def test_changedFileIsMiss( self ):
+
+        self._load()
+
+        skinWeights = skinWeightsFile.readBinary( self.filePath )[0]
+        changedWeights = np.array( skinWeights.weights )
+        changedWeights[0] = changedWeights[1]
+        skinWeightsFile.writeBinary( self.filePath, [ skinWeightsFile.SkinWeights( 'bench_geo', skinWeights.influences, changedWeights ) ] )
+
+        self.assertEqual( self._load(), { 'misses': [ 'bench_geo' ] } )
+
+        skinClusterNode = testEnv.scene.findSkinCluster( 'bench_geo' )
+        columns = [ skinClusterNode['influences'].index( i ) for i in skinWeights.influences ]
+
+        np.testing.assert_allclose( skinClusterNode['weights'][0, columns], changedWeights[0], atol = 1e-6 )
+
+    def test_changedInfluencesIsMiss( self ):
+
+        self._load()
+
+        skinWeights = skinWeightsFile.readBinary( self.filePath )[0]
+        testEnv.scene.addJoint( 'extra_jnt' )
+        skinWeightsFile.writeBinary( self.filePath, [ skinWeightsFile.SkinWeights( 'bench_geo', skinWeights.influences + [ 'extra_jnt' ],
+                                                                                   np.hstack( [ skinWeights.weights, np.zeros( ( skinWeights.vertexCount, 1 ) ) ] ) ) ] )
+
+        self.assertEqual( self._load(), { 'misses': [ 'bench_geo' ] } )
+
+class BuildWeightsCacheTest( testEnv.TempDirTestCase ):
+
+    def test_reusedDeformRigLoadsOnlyChangedFiles( self ):
+
+        # asset folder with weights files of two objects
+        self.addCleanup( setattr, rigBuild, 'mainAssetFolder', getattr( rigBuild, 'mainAssetFolder', None ) )
+        rigBuild.mainAssetFolder = self.getPath( '%s/' )
+        skinPath = rigBuild.skinWeightsFilePath % ( rigBuild.mainAssetFolder % 'hero' )
+        os.makedirs( skinPath )
+
+        testEnv.makeSkinnedMesh( 100, 4 )
+        testEnv.scene.renameNode( 'bench_geoShape', 'body_geoShape' )
+        testEnv.scene.renameNode( 'bench_geo', 'body_geo' )
+
+        for objectName in [ 'body_geo', 'head_geo' ]:
+
+            if objectName == 'head_geo':
+
+                testEnv.scene.addMesh( 'head_geo', np.random.RandomState( 0 ).rand( 50, 3 ), np.array( [ 3 ] ), np.array( [ 0, 1, 2 ] ) )
+                testEnv.scene.addSkinCluster( 'head_geo_skc', 'head_geo', [ 'bench_000_jnt', 'bench_001_jnt' ] )['weights'][:, 0] = 1.0
+
+            testEnv.scene.selection = [ objectName ]
+            bSkinSaver.bSaveSkinValues( skinPath + objectName + skinWeightsFile.binaryExt )
+            testEnv.scene.deleteNode( testEnv.scene.findSkinCluster( objectName )['name'] )
+
+        # deform stage of full build
+        cacheReport = rigBuild.loadSkinClusterWeights( 'hero' )
+
+        self.assertEqual( sorted( cacheReport['misses'] ), [ 'body_geo', 'head_geo' ] )
+        self.assertEqual( testEnv.scene.findSkinCluster( 'head_geo' )['name'], 'head_geo_skc' )
+
+        # build resumed on deform checkpoint after head weights were saved again
+        headWeights = skinWeightsFile.readBinary( skinPath + 'head_geo' + skinWeightsFile.binaryExt )[0]
+        headWeights = skinWeightsFile.SkinWeights( 'head_geo', headWeights.influences, headWeights.weights[:, ::-1] )
+        skinWeightsFile.writeBinary( skinPath + 'head_geo' + skinWeightsFile.binaryExt, [ headWeights ] )
+
+        cacheReport = rigBuild.loadSkinClusterWeights( 'hero' )
+
+        self.assertEqual( cacheReport, { 'hits': [ 'body_geo' ], 'misses': [ 'head_geo' ] } )
+        self.assertEqual( testEnv.scene.findSkinCluster( 'head_geo' )['name'], 'head_geo_skc' )
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,378 @@
+"""
+tests of skin weights files (utils.skinWeightsFile) and saving and loading them with tools.bSkinSaver
+"""
+
+import os
+import sys
+import unittest
+
+import testEnv
+
+import numpy as np
+
+import bSkinSaver
+from utils import skinWeightsFile
+
+# float32 precision of binary weights
+binaryTolerance = 1e-6
+
+def makeWeights( vertexCount, influenceCount, nonZeroCount = 4, seed = 0 ):
+
+    '''
+    make normalized weights with nonZeroCount random influences per vertex
+
+    :return: numpy.ndarray, (vertices x influences) weights
+    '''
+
+    rng = np.random.RandomState( seed )
+    nonZeroCount = min( nonZeroCount, influenceCount )
+    weights = np.zeros( ( vertexCount, influenceCount ) )
+    rows = np.arange( vertexCount )[:, np.newaxis]
+    columns = np.argsort( rng.rand( vertexCount, influenceCount ), axis = 1 )[:, :nonZeroCount]
+
+    weights[ rows, columns ] = rng.rand( vertexCount, nonZeroCount ) + 0.01
+    weights /= weights.sum( axis = 1 )[:, np.newaxis]
+
+    return weights
+
+def makeSkinWeights( objectName = 'body_geo', vertexCount = 200, influenceCount = 12, seed = 0 ):
+
+    influences = [ '%s_%02d_jnt' % ( objectName, i ) for i in range( influenceCount ) ]
+
+    return skinWeightsFile.SkinWeights( objectName, influences, makeWeights( vertexCount, influenceCount, seed = seed ) )
+
+class BinaryFileTest( testEnv.TempDirTestCase ):
+
+    def test_denseRoundTrip( self ):
+
+        skinWeights = makeSkinWeights()
+        skinWeights.positions = np.random.RandomState( 1 ).rand( skinWeights.vertexCount, 3 )
+        skinWeights.topologyHash = 'abc'
+        skinWeights.deformerName = 'body_geo_skc'
+        filePath = self.getPath( 'body_geo' + skinWeightsFile.binaryExt )
+
+        skinWeightsFile.writeBinary( filePath, [ skinWeights ] )
+        loadedWeights = skinWeightsFile.read( filePath )[0]
+
+        self.assertEqual( loadedWeights.objectName, 'body_geo' )
+        self.assertEqual( loadedWeights.influences, skinWeights.influences )
+        self.assertEqual( loadedWeights.topologyHash, 'abc' )
+        self.assertEqual( loadedWeights.deformerName, 'body_geo_skc' )
+        np.testing.assert_allclose( loadedWeights.weights, skinWeights.weights, atol = binaryTolerance )
+        np.testing.assert_allclose( loadedWeights.positions, skinWeights.positions, atol = binaryTolerance )
+
+    def test_recordsKeepOrder( self ):
+
+        skinWeightsList = [ makeSkinWeights( 'body_geo', 50, 6, seed = 0 ), makeSkinWeights( 'head_geo', 30, 3, seed = 1 ) ]
+        filePath = self.getPath( 'objects' + skinWeightsFile.binaryExt )
+
+        skinWeightsFile.writeBinary( filePath, skinWeightsList )
+        loadedList = skinWeightsFile.readBinary( filePath )
+
+        self.assertEqual( [ w.objectName for w in loadedList ], [ 'body_geo', 'head_geo' ] )
+
+        for skinWeights, loadedWeights in zip( skinWeightsList, loadedList ):
+
+            np.testing.assert_allclose( loadedWeights.weights, skinWeights.weights, atol = binaryTolerance )
+
+    def test_fileHashChangesWithContent( self ):
+
+        filePath = self.getPath( 'body_geo' + skinWeightsFile.binaryExt )
+
+        skinWeightsFile.writeBinary( filePath, [ makeSkinWeights( seed = 0 ) ] )
+        firstHash = skinWeightsFile.readBinary( filePath )[0].fileHash
+
+        skinWeightsFile.writeBinary( filePath, [ makeSkinWeights( seed = 0 ) ] )
+        self.assertEqual( skinWeightsFile.readBinary( filePath )[0].fileHash, firstHash )
+
+        skinWeightsFile.writeBinary( filePath, [ makeSkinWeights( seed = 1 ) ] )
+        self.assertNotEqual( skinWeightsFile.readBinary( filePath )[0].fileHash, firstHash )
+
+    def test_wrongMagicRaises( self ):
+
+        filePath = self.getPath( 'broken' + skinWeightsFile.binaryExt )
+
+        fileobj = open( filePath, 'wb' )
+        fileobj.write( b'XXXX' + b'\0' * 16 )
+        fileobj.close()
+
+        self.assertRaises( Exception, skinWeightsFile.readBinary, filePath )
+
+    def test_textAndBinaryReadTheSame( self ):
+
+        skinWeights = makeSkinWeights( vertexCount = 20, influenceCount = 3 )
+        textPath = self.getPath( 'body_geo' + skinWeightsFile.textExt )
+        binaryPath = self.getPath( 'body_geo' + skinWeightsFile.binaryExt )
+
+        lines = [ skinWeights.objectName ] + skinWeights.influences + [ '============' ]
+        lines += [ ' '.join( [ repr( v ) for v in row ] ) for row in skinWeights.weights ]
+
+        fileobj = open( textPath, 'w' )
+        fileobj.write( '\n'.join( lines ) + '\n\n' )
+        fileobj.close()
+
+        skinWeightsFile.writeBinary( binaryPath, [ skinWeights ] )
+
+        textWeights = skinWeightsFile.read( textPath )[0]
+        binaryWeights = skinWeightsFile.read( binaryPath )[0]
+
+        self.assertEqual( textWeights.influences, binaryWeights.influences )
+        np.testing.assert_allclose( textWeights.weights, binaryWeights.weights, atol = binaryTolerance )
+
+    def test_listWeightFilesPrefersBinary( self ):
+
+        for fileName in [ 'body_geo.skinwt', 'body_geo.skinwb', 'head_geo.skinwt', 'notes.txt' ]:
+
+            open( self.getPath( fileName ), 'w' ).close()
+            os.utime( self.getPath( fileName ), ( 1000, 1000 ) )
+
+        fileNames = [ os.path.basename( p ) for p in skinWeightsFile.listWeightFiles( self.tempDir ) ]
+
+        self.assertEqual( fileNames, [ 'body_geo.skinwb', 'head_geo.skinwt' ] )
+
+    def test_listWeightFilesPrefersNewer( self ):
+
+        for fileName in [ 'body_geo.skinwj', 'body_geo.skinwb', 'body_geo.skinwt' ]:
+
+            open( self.getPath( fileName ), 'w' ).close()
+
+        # text file saved later by artist is used instead of older binary and journal files
+        os.utime( self.getPath( 'body_geo.skinwj' ), ( 1000, 1000 ) )
+        os.utime( self.getPath( 'body_geo.skinwb' ), ( 2000, 2000 ) )
+        os.utime( self.getPath( 'body_geo.skinwt' ), ( 3000, 3000 ) )
+
+        self.assertEqual( skinWeightsFile.listWeightFiles( self.tempDir ), [ self.getPath( 'body_geo.skinwt' ) ] )
+
+        # files of the same time are used by format
+        os.utime( self.getPath( 'body_geo.skinwt' ), ( 2000, 2000 ) )
+
+        self.assertEqual( skinWeightsFile.listWeightFiles( self.tempDir ), [ self.getPath( 'body_geo.skinwb' ) ] )
+
+class QuantizedFileTest( testEnv.TempDirTestCase ):
+
+    def test_errorBound( self ):
+
+        skinWeights = makeSkinWeights( vertexCount = 500, influenceCount = 20 )
+        filePath = self.getPath( 'body_geo' + skinWeightsFile.binaryExt )
+
+        for quantizeBits in [ 8, 16 ]:
+
+            deviationReport = {}
+            skinWeightsFile.writeBinary( filePath, [ skinWeights ], sparse = True, quantizeBits = quantizeBits, deviationReport = deviationReport )
+            loadedWeights = skinWeightsFile.read( filePath )[0]
+
+            errors = np.abs( loadedWeights.weights - skinWeights.weights )
+            step = 1.0 / ( 2 ** quantizeBits - 1 )
+
+            self.assertTrue( errors.max() < step )
+            self.assertTrue( deviationReport['body_geo'] < step )
+            self.assertTrue( errors.max() <= deviationReport['body_geo'] + binaryTolerance )
+            np.testing.assert_allclose( loadedWeights.weights.sum( axis = 1 ), 1.0, atol = binaryTolerance )
+
+            # zero weights stay zero so influences per vertex don't grow
+            np.testing.assert_array_equal( loadedWeights.weights[ skinWeights.weights == 0.0 ], 0.0 )
+
+    def test_quantizedSumsAreWholeSteps( self ):
+
+        offsets, indices, values = makeSkinWeights( vertexCount = 300 ).sparse
+        quantized = skinWeightsFile.quantizeSparseWeights( ( offsets, indices, values ), 8 )
+        rowSums = np.bincount( np.repeat( np.arange( offsets.size - 1 ), np.diff( offsets ) ), weights = quantized )
+
+        self.assertEqual( quantized.dtype, np.uint8 )
+        np.testing.assert_array_equal( rowSums, 255 )
+
+    def test_wrongBitsRaise( self ):
+
+        self.assertRaises( Exception, skinWeightsFile.writeBinary, self.getPath( 'body_geo' + skinWeightsFile.binaryExt ),
+                           [ makeSkinWeights() ], True, 12 )
+
+class BSkinSaverBinaryTest( testEnv.TempDirTestCase ):
+
+    def test_saveAndLoadOnNewSkinCluster( self ):
+
+        influences, weights = testEnv.makeSkinnedMesh( 400, 8 )
+        filePath = self.getPath( 'bench_geo' + skinWeightsFile.binaryExt )
+
+        testEnv.scene.selection = [ 'bench_geo' ]
+        bSkinSaver.bSaveSkinValues( filePath )
+
+        # weights are loaded on mesh without skinCluster
+        testEnv.scene.deleteNode( testEnv.scene.findSkinCluster( 'bench_geo' )['name'] )
+        self.assertEqual( bSkinSaver.bLoadSkinValues( False, filePath ), 'bench_geo' )
+
+        skinClusterNode = testEnv.scene.findSkinCluster( 'bench_geo' )
+        columns = [ skinClusterNode['influences'].index( i ) for i in influences ]
+
+        np.testing.assert_allclose( skinClusterNode['weights'][:, columns], weights, atol = binaryTolerance )
+
+    def test_positionsAreOptIn( self ):
+
+        testEnv.makeSkinnedMesh( 400, 8 )
+        filePath = self.getPath( 'bench_geo' + skinWeightsFile.binaryExt )
+        positionsFilePath = self.getPath( 'bench_geo_positions' + skinWeightsFile.binaryExt )
+
+        testEnv.scene.selection = [ 'bench_geo' ]
+        bSkinSaver.bSaveSkinValues( filePath, sparse = True, quantizeBits = 8 )
+        bSkinSaver.bSaveSkinValues( positionsFilePath, sparse = True, quantizeBits = 8, savePositions = True )
+
+        self.assertTrue( skinWeightsFile.read( filePath )[0].positions is None )
+        np.testing.assert_allclose( skinWeightsFile.read( positionsFilePath )[0].positions, testEnv.scene.getNode( 'bench_geoShape' )['positions'],
+                                    atol = 1e-5 )
+
+        # float32 positions take 12 bytes per point
+        self.assertTrue( os.path.getsize( positionsFilePath ) - os.path.getsize( filePath ) >= 400 * 12 )
+
+class JournalFileTest( testEnv.TempDirTestCase ):
+
+    def _changeRows( self, skinWeights, rows, seed ):
+
+        weights = np.array( skinWeights.weights )
+        weights[ rows ] = makeWeights( len( rows ), skinWeights.influenceCount, seed = seed )
+
+        return skinWeightsFile.SkinWeights( skinWeights.objectName, skinWeights.influences, weights )
+
+    def test_deltasAreAppendedAndReplayed( self ):
+
+        filePath = self.getPath( 'body_geo' + skinWeightsFile.journalExt )
+        base = makeSkinWeights( vertexCount = 1000 )
+
+        self.assertEqual( skinWeightsFile.writeJournal( filePath, [ base ] ), { 'body_geo': 1000 } )
+        baseSize = os.path.getsize( filePath )
+
+        first = self._changeRows( base, [ 3, 10, 500 ], seed = 1 )
+        self.assertEqual( skinWeightsFile.writeJournal( filePath, [ first ] ), { 'body_geo': 3 } )
+
+        second = self._changeRows( first, [ 10, 999 ], seed = 2 )
+        self.assertEqual( skinWeightsFile.writeJournal( filePath, [ second ] ), { 'body_geo': 2 } )
+
+        # only changed rows are written
+        self.assertTrue( os.path.getsize( filePath ) - baseSize < baseSize * 0.1 )
+
+        np.testing.assert_allclose( skinWeightsFile.readJournal( filePath )[0].weights, second.weights, atol = binaryTolerance )
+        np.testing.assert_allclose( skinWeightsFile.readJournal( filePath, lastSave = 1 )[0].weights, first.weights, atol = binaryTolerance )
+        np.testing.assert_allclose( skinWeightsFile.readJournal( filePath, lastSave = 0 )[0].weights, base.weights, atol = binaryTolerance )
+
+    def test_unchangedWeightsWriteNothing( self ):
+
+        filePath = self.getPath( 'body_geo' + skinWeightsFile.journalExt )
+        base = makeSkinWeights()
+
+        skinWeightsFile.writeJournal( filePath, [ base ] )
+        fileSize = os.path.getsize( filePath )
+
+        self.assertEqual( skinWeightsFile.writeJournal( filePath, [ base ] ), { 'body_geo': 0 } )
+        self.assertEqual( os.path.getsize( filePath ), fileSize )
+
+    def test_replayAfterCompaction( self ):
+
+        filePath = self.getPath( 'body_geo' + skinWeightsFile.journalExt )
+        skinWeights = makeSkinWeights( vertexCount = 400 )
+
+        skinWeightsFile.writeJournal( filePath, [ skinWeights ] )
+        baseSize = os.path.getsize( filePath )
+
+        # deltas grow over compact ratio of base size
+        for i in range( 8 ):
+
+            skinWeights = self._changeRows( skinWeights, range( i * 40, i * 40 + 40 ), seed = i + 1 )
+            skinWeightsFile.writeJournal( filePath, [ skinWeights ] )
+
+            np.testing.assert_allclose( skinWeightsFile.readJournal( filePath )[0].weights, skinWeights.weights, atol = binaryTolerance )
+
+        self.assertTrue( os.path.getsize( filePath ) < baseSize * ( 1.0 + skinWeightsFile.journalCompactRatio ) + 1000 )
+
+        skinWeightsFile.compactJournal( filePath )
+        self.assertEqual( skinWeightsFile.readJournal( filePath, lastSave = 0 )[0].objectName, 'body_geo' )
+        np.testing.assert_allclose( skinWeightsFile.readJournal( filePath, lastSave = 0 )[0].weights, skinWeights.weights, atol = binaryTolerance )
+
+    def test_changedInfluencesWriteNewBase( self ):
+
+        filePath = self.getPath( 'body_geo' + skinWeightsFile.journalExt )
+        base = makeSkinWeights( influenceCount = 6 )
+
+        skinWeightsFile.writeJournal( filePath, [ base ] )
+
+        changed = makeSkinWeights( influenceCount = 7, seed = 5 )
+        self.assertEqual( skinWeightsFile.writeJournal( filePath, [ changed ] ), { 'body_geo': changed.vertexCount } )
+
+        loadedWeights = skinWeightsFile.readJournal( filePath )[0]
+
+        self.assertEqual( loadedWeights.influences, changed.influences )
+        np.testing.assert_allclose( loadedWeights.weights, changed.weights, atol = binaryTolerance )
+
+class ParallelReadTest( testEnv.TempDirTestCase ):
+
+    def _writeFiles( self ):
+
+        filePaths = []
+
+        for i in range( 5 ):
+
+            filePath = self.getPath( 'geo%d%s' % ( i, skinWeightsFile.binaryExt ) )
+            skinWeightsFile.writeBinary( filePath, [ makeSkinWeights( 'geo%d' % i, 100, 6, seed = i ) ], sparse = bool( i % 2 ) )
+            filePaths.append( filePath )
+
+        brokenPath = self.getPath( 'broken' + skinWeightsFile.binaryExt )
+        fileobj = open( brokenPath, 'wb' )
+        fileobj.write( b'XXXX' + b'\0' * 16 )
+        fileobj.close()
+
+        return filePaths, brokenPath
+
+    def _checkResults( self, results, filePaths, brokenPath ):
+
+        resultsDt = dict( [ ( r[0], r ) for r in results ] )
+
+        self.assertEqual( sorted( resultsDt ), sorted( filePaths + [ brokenPath ] ) )
+        self.assertEqual( resultsDt[ brokenPath ][1], None )
+        self.assertTrue( resultsDt[ brokenPath ][2] )
+
+        for i, filePath in enumerate( filePaths ):
+
+            filePath, skinWeightsList, error = resultsDt[ filePath ]
+
+            self.assertEqual( error, None )
+            self.assertEqual( skinWeightsList[0].objectName, 'geo%d' % i )
+            np.testing.assert_allclose( skinWeightsList[0].weights, makeSkinWeights( 'geo%d' % i, 100, 6, seed = i ).weights, atol = binaryTolerance )
+
+    def test_inProcess( self ):
+
+        filePaths, brokenPath = self._writeFiles()
+        results = list( skinWeightsFile.readFilesParallel( filePaths + [ brokenPath ], processes = 1 ) )
+
+        self._checkResults( results, filePaths, brokenPath )
+
+    def test_workerProcesses( self ):
+
+        filePaths, brokenPath = self._writeFiles()
+        results = list( skinWeightsFile.readFilesParallel( filePaths + [ brokenPath ], processes = 3, interpreter = sys.executable ) )
+
+        self._checkResults( results, filePaths, brokenPath )
+
+        # file hash of weights read in worker is kept for weights cache
+        for filePath, skinWeightsList, error in results:
+
+            if skinWeightsList:
+
+                self.assertEqual( skinWeightsList[0].fileHash, skinWeightsFile.readBinary( filePath )[0].fileHash )
+
+    def test_mayaGuiIsNotForked( self ):
+
+        executable = sys.executable
+
+        try:
+
+            sys.executable = '/usr/autodesk/maya/bin/maya.bin'
+            self.assertTrue( skinWeightsFile._isMayaGui() )
+            self.assertEqual( skinWeightsFile._getPythonExecutable(), '/usr/autodesk/maya/bin/mayapy' )
+
+            sys.executable = '/usr/autodesk/maya/bin/mayapy'
+            self.assertFalse( skinWeightsFile._isMayaGui() )
+
+        finally:
+
+            sys.executable = executable
+
+if __name__ == '__main__':
+
+    unittest.main()
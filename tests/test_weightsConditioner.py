@@ -0,0 +1,104 @@
+"""
+tests of skin weights conditioning for game engines (utils.weightsConditioner) and conditioned weights save
+"""
+
+import unittest
+
+import testEnv
+
+import numpy as np
+
+import bSkinSaver
+from utils import skinWeightsFile
+from utils import weightsConditioner
+
+class ConditionSkinWeightsTest( unittest.TestCase ):
+
+    def setUp( self ):
+
+        weights = np.random.RandomState( 0 ).rand( 200, 8 )
+
+        # last influence has only tiny weights, it's removed after pruning
+        weights[:, 7] = 0.0001
+        weights /= weights.sum( axis = 1 )[:, np.newaxis]
+
+        # vertex with all weights below epsilon
+        weights[0] = [ 0.0005, 0.0002, 0, 0, 0, 0, 0, 0.0001 ]
+
+        self.weights = weights
+        self.skinWeights = skinWeightsFile.SkinWeights( 'body_geo', [ 'jnt%d' % i for i in range( 8 ) ], self.weights )
+
+    def test_capAndNormalize( self ):
+
+        conditionedWeights, statsDt = weightsConditioner.conditionSkinWeights( self.skinWeights, 4, 0.001, removeUnused = False )
+        weights = conditionedWeights.weights
+
+        self.assertEqual( weights.shape, self.weights.shape )
+        self.assertTrue( ( np.count_nonzero( weights, axis = 1 ) <= 4 ).all() )
+        np.testing.assert_allclose( weights.sum( axis = 1 ), 1.0, atol = 1e-12 )
+
+        # kept weights are the biggest ones of each vertex
+        for vertex in [ 1, 50, 199 ]:
+
+            self.assertEqual( set( np.nonzero( weights[ vertex ] )[0] ), set( np.argsort( -self.weights[ vertex ] )[:4] ) )
+
+        self.assertEqual( statsDt['maxInfluencesBefore'], 8 )
+        self.assertEqual( statsDt['maxInfluencesAfter'], 4 )
+
+    def test_prunedVertexKeepsBiggestWeight( self ):
+
+        conditionedWeights, statsDt = weightsConditioner.conditionSkinWeights( self.skinWeights, 4, 0.001, removeUnused = False )
+
+        np.testing.assert_array_equal( conditionedWeights.weights[0], [ 1, 0, 0, 0, 0, 0, 0, 0 ] )
+
+    def test_removedInfluences( self ):
+
+        conditionedWeights, statsDt = weightsConditioner.conditionSkinWeights( self.skinWeights, 4, 0.001 )
+
+        self.assertEqual( statsDt['removedInfluences'], [ 'jnt7' ] )
+        self.assertEqual( conditionedWeights.influences, [ 'jnt%d' % i for i in range( 7 ) ] )
+        self.assertEqual( ( statsDt['influencesBefore'], statsDt['influencesAfter'] ), ( 8, 7 ) )
+
+        keptWeights, statsDt = weightsConditioner.conditionSkinWeights( self.skinWeights, 4, 0.001, removeUnused = False )
+
+        np.testing.assert_allclose( conditionedWeights.weights, keptWeights.weights[:, :7] )
+
+    def test_badArgumentsRaise( self ):
+
+        for maxInfluences in [ 0, -1, 2.5 ]:
+
+            self.assertRaises( Exception, weightsConditioner.conditionSkinWeights, self.skinWeights, maxInfluences )
+
+        self.assertRaises( Exception, weightsConditioner.conditionSkinWeights, self.skinWeights, 4, -0.1 )
+
+class ConditionedSaveTest( testEnv.TempDirTestCase ):
+
+    def test_saveKeepsSceneWeights( self ):
+
+        influences, weights = testEnv.makeSkinnedMesh( 300, 10 )
+        skinClusterNode = testEnv.scene.findSkinCluster( 'bench_geo' )
+        sceneWeights = np.array( skinClusterNode['weights'] )
+        sceneInfluences = list( skinClusterNode['influences'] )
+
+        for ext in [ skinWeightsFile.textExt, skinWeightsFile.binaryExt ]:
+
+            filePath = self.getPath( 'bench_geo' + ext )
+            conditionStats = {}
+
+            testEnv.scene.selection = [ 'bench_geo' ]
+            bSkinSaver.bSaveSkinValues( filePath, maxInfluences = 2, conditionStats = conditionStats )
+
+            # skinCluster in scene is not changed by save
+            self.assertTrue( testEnv.scene.findSkinCluster( 'bench_geo' ) is skinClusterNode )
+            self.assertEqual( skinClusterNode['influences'], sceneInfluences )
+            np.testing.assert_array_equal( skinClusterNode['weights'], sceneWeights )
+
+            savedWeights = skinWeightsFile.read( filePath )[0]
+
+            self.assertEqual( conditionStats['bench_geo']['maxInfluencesAfter'], 2 )
+            self.assertTrue( ( np.count_nonzero( savedWeights.weights, axis = 1 ) <= 2 ).all() )
+            np.testing.assert_allclose( savedWeights.weights.sum( axis = 1 ), 1.0, atol = 1e-6 )
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+tests of weights remapping between shapes with different topology (utils.weightsRemap)
+"""
+
+import unittest
+
+import testEnv
+
+import numpy as np
+
+from utils import weightsRemap
+
+def bruteForceNearest( points, queryPoints, count ):
+
+    distances = np.sqrt( ( ( queryPoints[:, np.newaxis, :] - points[np.newaxis, :, :] ) ** 2 ).sum( axis = 2 ) )
+
+    return np.sort( distances, axis = 1 )[:, :count]
+
+def makeSpherePoints( pointCount, seed = 0 ):
+
+    # points on surface like mesh points, not filling the volume
+    directions = np.random.RandomState( seed ).normal( size = ( pointCount, 3 ) )
+
+    return directions / np.sqrt( ( directions ** 2 ).sum( axis = 1 ) )[:, np.newaxis] * 5.0
+
+class PointGridTest( unittest.TestCase ):
+
+    def test_nearestPointsMatchBruteForce( self ):
+
+        points = makeSpherePoints( 2000 )
+        queryPoints = makeSpherePoints( 500, seed = 1 ) * 1.02
+
+        for count in [ 1, 4 ]:
+
+            indices, distances = weightsRemap.PointGrid( points ).query( queryPoints, count )
+
+            np.testing.assert_allclose( distances, bruteForceNearest( points, queryPoints, count ), atol = 1e-9 )
+            np.testing.assert_allclose( np.sqrt( ( ( points[ indices ] - queryPoints[:, np.newaxis, :] ) ** 2 ).sum( axis = 2 ) ), distances, atol = 1e-9 )
+
+    def test_queryPointsOutsideGrid( self ):
+
+        points = makeSpherePoints( 300 )
+        queryPoints = np.array( [ [ 100.0, 0.0, 0.0 ], [ 0.0, -50.0, 3.0 ], [ 0.0, 0.0, 0.0 ] ] )
+
+        indices, distances = weightsRemap.PointGrid( points ).query( queryPoints, 2 )
+
+        np.testing.assert_allclose( distances, bruteForceNearest( points, queryPoints, 2 ), atol = 1e-9 )
+
+    def test_planarPoints( self ):
+
+        gridX, gridZ = np.meshgrid( np.arange( 40.0 ), np.arange( 40.0 ) )
+        points = np.column_stack( [ gridX.ravel(), np.zeros( gridX.size ), gridZ.ravel() ] )
+        queryPoints = points[::7] + [ 0.3, 0.1, -0.2 ]
+
+        indices, distances = weightsRemap.PointGrid( points ).query( queryPoints, 1 )
+
+        np.testing.assert_array_equal( indices[:, 0], np.arange( points.shape[0] )[::7] )
+
+class RemapWeightsTest( unittest.TestCase ):
+
+    def setUp( self ):
+
+        self.points = makeSpherePoints( 1500 )
+
+        # smooth weights of 3 influences along Y axis, like skin weights of limb
+        heights = ( self.points[:, 1] + 5.0 ) / 10.0
+        self.weights = np.column_stack( [ ( 1.0 - heights ) ** 2, 2.0 * heights * ( 1.0 - heights ), heights ** 2 ] )
+
+    def test_samePointsKeepWeights( self ):
+
+        remapped = weightsRemap.remapWeights( self.points, self.weights, self.points )
+
+        np.testing.assert_allclose( remapped, self.weights, atol = 1e-9 )
+
+    def test_perturbedMesh( self ):
+
+        # new topology: other points on the same surface, slightly moved
+        targetPoints = makeSpherePoints( 2500, seed = 2 ) * ( 1.0 + np.random.RandomState( 3 ).uniform( -0.002, 0.002, ( 2500, 1 ) ) )
+        targetHeights = ( targetPoints[:, 1] + 5.0 ) / 10.0
+        expectedWeights = np.column_stack( [ ( 1.0 - targetHeights ) ** 2, 2.0 * targetHeights * ( 1.0 - targetHeights ), targetHeights ** 2 ] )
+
+        remapped = weightsRemap.remapWeights( self.points, self.weights, targetPoints )
+
+        self.assertEqual( remapped.shape, ( 2500, 3 ) )
+        np.testing.assert_allclose( remapped.sum( axis = 1 ), 1.0, atol = 1e-9 )
+
+        # error of interpolation from about 0.5 units apart source points
+        errors = np.abs( remapped - expectedWeights )
+        self.assertTrue( errors.max() < 0.1 )
+        self.assertTrue( errors.mean() < 0.02 )
+
+    def test_sparseInfluencesStayLocal( self ):
+
+        # influence used only on top cap gets no weight far from it
+        weights = np.zeros( ( self.points.shape[0], 2 ) )
+        top = self.points[:, 1] > 4.0
+        weights[ top, 1 ] = 1.0
+        weights[ ~top, 0 ] = 1.0
+
+        targetPoints = makeSpherePoints( 800, seed = 4 )
+        remapped = weightsRemap.remapWeights( self.points, weights, targetPoints )
+
+        self.assertEqual( remapped[ targetPoints[:, 1] < 3.0, 1 ].max(), 0.0 )
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -13,4 +13,5 @@ import vectorTrigger
 import gameTools
 import dhs_modelCheck
 import strechyJoint
-import volumeJoints
\ No newline at end of file
+import volumeJoints
+import buildFarm
@@ -24,6 +24,11 @@ import maya.cmds as cmds
 import maya.OpenMayaUI as mui
 from PySide2 import QtCore, QtWidgets
 import shiboken2
+import numpy
+
+from utils import skinWeightsFile
+from utils import skinCluster as skinClusterUtils
+from utils import weightsConditioner
 
 
 
@@ -150,6 +155,18 @@ def bFindSkinCluster(objectName):
     return False
 
 
+def bGetSkinWeightsArray(skinCluster):
+    # all weights of the skinCluster with a single getWeights call
+    return skinClusterUtils.getWeightsArray(OpenMaya.MFnDependencyNode(skinCluster).name())
+
+
+def bSetSkinWeightsArray(skinCluster, influenceIndices, weightsArray, positions=None, topologyHash=None):
+    # all weights of the skinCluster with a single setWeights call,
+    # with saved positions the weights are remapped if topology changed
+    return skinClusterUtils.setWeightsArray(OpenMaya.MFnDependencyNode(skinCluster).name(), influenceIndices, weightsArray,
+                                            positions, topologyHash)
+
+
 
 def bLoadVertexSkinValues(inputFile):
 
@@ -352,7 +369,96 @@ def bSaveVertexSkinValues(inputFile):
 
 
 
-def bSaveSkinValues(inputFile):
+def bGetSelectedSkinWeights(savePositions=False):
+
+    skinWeightsList = []
+
+    selection = OpenMaya.MSelectionList()
+    OpenMaya.MGlobal.getActiveSelectionList(selection)
+
+    iterate = OpenMaya.MItSelectionList(selection)
+
+    while not iterate.isDone():
+        node = OpenMaya.MDagPath()
+        component = OpenMaya.MObject()
+        iterate.getDagPath (node, component)
+        if not node.hasFn(OpenMaya.MFn.kTransform):
+            print OpenMaya.MFnDagNode(node).name() + ' is not a Transform node (need to select transform node of polyMesh)'
+        else:
+            objectName = OpenMaya.MFnDagNode(node).name()
+            newTransform = OpenMaya.MFnTransform(node)
+            for childIndex in range(newTransform.childCount()):
+                childObject = newTransform.child(childIndex)
+                if childObject.hasFn(OpenMaya.MFn.kMesh) or childObject.hasFn(OpenMaya.MFn.kNurbsSurface) or childObject.hasFn(OpenMaya.MFn.kCurve):
+                    skinCluster = bFindSkinCluster(OpenMaya.MFnDagNode(childObject).partialPathName())
+                    if skinCluster is not False:
+                        influences, weightsArray = bGetSkinWeightsArray(skinCluster)
+                        skinWeights = skinWeightsFile.SkinWeights(objectName, influences, weightsArray)
+                        if savePositions:
+                            skinWeights.positions, skinWeights.topologyHash = skinClusterUtils.getRestInfo(OpenMaya.MFnDependencyNode(skinCluster).name())
+                        skinWeightsList.append(skinWeights)
+
+        iterate.next()
+
+    return skinWeightsList
+
+
+def bConditionSkinWeights(skinWeightsList, maxInfluences, pruneEpsilon=0.001, conditionStats=None):
+
+    # only copies of weights are pruned and capped, skinClusters in scene keep all their weights and influences
+    conditionedList = []
+
+    for skinWeights in skinWeightsList:
+        conditionedWeights, statsDt = weightsConditioner.conditionSkinWeights(skinWeights, maxInfluences, pruneEpsilon)
+        print weightsConditioner.formatStats(skinWeights.objectName, statsDt)
+        if conditionStats is not None:
+            conditionStats[skinWeights.objectName] = statsDt
+        conditionedList.append(conditionedWeights)
+
+    return conditionedList
+
+
+def bSaveBinarySkinValues(inputFile, sparse=False, savePositions=False, quantizeBits=None, maxInfluences=None, pruneEpsilon=0.001, conditionStats=None):
+
+    skinWeightsList = bGetSelectedSkinWeights(savePositions)
+
+    if maxInfluences:
+        skinWeightsList = bConditionSkinWeights(skinWeightsList, maxInfluences, pruneEpsilon, conditionStats)
+
+    if skinWeightsFile.isJournalFile(inputFile):
+        # journal appends only vertices changed since last save
+        changesDt = skinWeightsFile.writeJournal(inputFile, skinWeightsList)
+        print "changed vertices: %s" % changesDt
+    else:
+        deviationReport = {}
+        skinWeightsFile.writeBinary(inputFile, skinWeightsList, sparse=sparse, quantizeBits=quantizeBits, deviationReport=deviationReport)
+        if quantizeBits:
+            print "%d bit quantized weights, max deviation: %s" % (quantizeBits, deviationReport)
+    print "done saving weights"
+
+
+def bSaveSkinValues(inputFile, sparse=False, savePositions=False, quantizeBits=None, maxInfluences=None, pruneEpsilon=0.001, conditionStats=None):
+
+    # options of binary and journal files:
+    # sparse - only non-zero weights are stored
+    # savePositions - points positions are stored to remap weights when topology changes, as float32 values they can take more space than the weights
+    # quantizeBits - weights are stored quantized to 8 or 16 bits
+    # option of all files:
+    # maxInfluences - saved weights are pruned and capped to this number of influences per vertex, see bConditionSkinWeights()
+    if skinWeightsFile.isBinaryFile(inputFile) or skinWeightsFile.isJournalFile(inputFile):
+        bSaveBinarySkinValues(inputFile, sparse, savePositions, quantizeBits, maxInfluences, pruneEpsilon, conditionStats)
+        return
+
+    if sparse:
+        print "sparse weights need binary file (%s), saving all weights in %s" % (skinWeightsFile.binaryExt, inputFile)
+
+    if quantizeBits:
+        print "quantized weights need binary file (%s), saving full precision weights in %s" % (skinWeightsFile.binaryExt, inputFile)
+
+    if maxInfluences:
+        skinWeightsFile.writeText(inputFile, bConditionSkinWeights(bGetSelectedSkinWeights(), maxInfluences, pruneEpsilon, conditionStats))
+        print "done saving weights"
+        return
 
     output = open(inputFile, 'w')
 
@@ -427,51 +533,64 @@ def bSaveSkinValues(inputFile):
 
 
 
-def bSkinObject(objectName, joints, weights):
+def bBuildJointIndex():
+    # one pass over scene joints, maps short name and name without namespace to full path
+    # build it once and pass it to bSkinObject for every object of the load session
+    jointIndex = {}
+    it = OpenMaya.MItDependencyNodes(OpenMaya.MFn.kJoint)
+    while not it.isDone():
+        fullPathName = str(OpenMaya.MFnDagNode(it.item()).fullPathName())
+        shortName = fullPathName.split('|')[-1]
+        jointIndex.setdefault(shortName, fullPathName)
+        jointIndex.setdefault(shortName.split(':')[-1], fullPathName)
+        it.next()
+
+    return jointIndex
+
+
+def bSkinObject(objectName, joints, weights, jointIndex=None, weightsHash=None, cacheReport=None, positions=None, topologyHash=None):
+    # with weightsHash, objects which already have the same weights, topology and influences are skipped,
+    # cacheReport dictionary collects 'hits' and 'misses' object names
 
     if not cmds.objExists(objectName):
         print objectName, " doesn't exist - skipping. "
         return
-    
-    allInfluencesInScene = True;
-    jointsCheck = [] 
-    for i in range(len(joints)):
-        jointsCheck = joints[i]
 
-    sceneJointTokens = []
-    fileJointTokens = []
+    if jointIndex is None:
+        jointIndex = bBuildJointIndex()
 
-    it = OpenMaya.MItDependencyNodes ( OpenMaya.MFn.kJoint);
     # quick check:
-    for jointIndex in range(len(joints)):
-        jointHere = False;
-        it = OpenMaya.MItDependencyNodes ( OpenMaya.MFn.kJoint)
-        while not it.isDone():                
-            sceneJointTokens = str(OpenMaya.MFnDagNode(it.item()).fullPathName()).split('|')
-            if str(joints[jointIndex]) == str(sceneJointTokens[len(sceneJointTokens) - 1]):
-                jointHere = True;
-
-            it.next()
-
-        if not jointHere:
-            allInfluencesInScene = False;
-            print 'missing influence: ', joints[jointIndex]
-
+    missingJoints = set(joints) - set(jointIndex)
+    for missingJoint in sorted(missingJoints):
+        print 'missing influence: ', missingJoint
 
-
-    if not allInfluencesInScene:
+    if missingJoints:
         print objectName, " can't be skinned because of missing influences."
         return
 
     #maya.mel.eval("undoInfo -st 0")
 
+    cacheKey = None
+    if weightsHash is not None:
+        cacheKey = skinClusterUtils.getWeightsCacheKey(objectName, weightsHash, joints)
+        cacheResult = 'misses'
+        skinCluster = bFindSkinCluster(objectName)
+        if skinCluster is not False and skinClusterUtils.getStoredCacheKey(OpenMaya.MFnDependencyNode(skinCluster).name()) == cacheKey:
+            cacheResult = 'hits'
+
+        if cacheReport is not None:
+            cacheReport.setdefault(cacheResult, []).append(objectName)
+
+        if cacheResult == 'hits':
+            print "weights unchanged, skipping: %s" % objectName
+            return objectName
     
     if type(bFindSkinCluster(objectName)) != type(True):
         maya.mel.eval("DetachSkin " + objectName)
 
     cmd = "select "
     for i in range(len(joints)):
-        cmd += " " + joints[i]
+        cmd += " " + jointIndex[joints[i]]
 
     cmd += " " + objectName
     maya.mel.eval(cmd)
@@ -486,93 +605,28 @@ def bSkinObject(objectName, joints, weights):
     InfluentsArray = OpenMaya.MDagPathArray()
     fnSkinCluster.influenceObjects(InfluentsArray)
 
-    bSkinPath = OpenMaya.MDagPath()
-    fnSkinCluster.getPathAtIndex(fnSkinCluster.indexForOutputConnection(0),bSkinPath)
-
-    weightStrings = []
-    vertexIter = OpenMaya.MItGeometry (bSkinPath)
-
-    weightDoubles = OpenMaya.MDoubleArray()
-
-
-    singleIndexed = True;
-    vtxComponents = OpenMaya.MObject()
-    fnVtxComp = OpenMaya.MFnSingleIndexedComponent()
-    fnVtxCompDouble = OpenMaya.MFnDoubleIndexedComponent()
-
-    
-    if bSkinPath.node().apiType() == OpenMaya.MFn.kMesh:
-        vtxComponents = fnVtxComp.create( OpenMaya.MFn.kMeshVertComponent )
-    elif bSkinPath.node().apiType() == OpenMaya.MFn.kNurbsSurface:
-        singleIndexed = False
-        vtxComponents = fnVtxCompDouble.create( OpenMaya.MFn.kSurfaceCVComponent )
-    elif bSkinPath.node().apiType() == OpenMaya.MFn.kNurbsCurve:
-        vtxComponents = fnVtxComp.create( OpenMaya.MFn.kCurveCVComponent )
-   
     #mapping joint-indices
-    influenceIndices = OpenMaya.MIntArray()
-    checkInfluences = []
-
+    influenceIndexDt = {}
     for k in range(InfluentsArray.length()):
-        checkInfluences.append(0)
-    for i in range(len(joints)):
-        influenceIndices.append(-1)
+        sceneJointName = str(OpenMaya.MFnDagNode(InfluentsArray[k]).fullPathName()).split('|')[-1]
+        influenceIndexDt.setdefault(sceneJointName, k)
+        influenceIndexDt.setdefault(sceneJointName.split(':')[-1], k)
 
-    for i in range(len(joints)):
-        fileJointTokens = joints[i].split('|')
-
-        for k in range(InfluentsArray.length()):
-
-            sceneJointTokens = str(OpenMaya.MFnDagNode(InfluentsArray[k]).fullPathName()).split('|')
-            if fileJointTokens[len(fileJointTokens) - 1] == sceneJointTokens[len(sceneJointTokens) - 1]:  # changed from joints
-                influenceIndices[i] = k
-                checkInfluences[k] = 1        
-
-    counterValue = 0;
-    if not singleIndexed:
-        currentU = 0
-        currentV = 0
-
-        cvsU = OpenMaya.MFnNurbsSurface(bSkinPath.node()).numCVsInU()
-        cvsV = OpenMaya.MFnNurbsSurface(bSkinPath.node()).numCVsInV()
-        formU = OpenMaya.MFnNurbsSurface(bSkinPath.node()).formInU()
-        formV = OpenMaya.MFnNurbsSurface(bSkinPath.node()).formInV()
-	
-        if formU == 3:
-            cvsU -= 3
-        if formV == 3:
-            cvsV -= 3
-    
-    
-    vertexIter = OpenMaya.MItGeometry (bSkinPath)
-    while not vertexIter.isDone():
-        weightStrings = []
-        if singleIndexed:
-            fnVtxComp.addElement(counterValue)
-        else:
-            fnVtxCompDouble.addElement(currentU, currentV)
-            currentV += 1;
-            if currentV >= cvsV:
-                currentV = 0
-                currentU += 1
-
-        weightStrings = weights[counterValue].split(' ');
-        for i in range(len(weightStrings)):
-            weightDoubles.append(float(weightStrings[i]))
-        counterValue += 1
-        vertexIter.next()
+    influenceIndices = [influenceIndexDt.get(joints[i].split('|')[-1], -1) for i in range(len(joints))]
+
+    # text files give weight lines, binary files give the weights array
+    if not isinstance(weights, numpy.ndarray):
+        weights = skinWeightsFile.parseTextWeights(weights, len(joints))
 
     #SET WEIGHTS 
     print "setting weights for: %s" % objectName
-    fnSkinCluster.setWeights(bSkinPath, vtxComponents, influenceIndices,weightDoubles, 0)
+    if bSetSkinWeightsArray(skinCluster, influenceIndices, weights, positions, topologyHash) and cacheKey:
+        skinClusterUtils.storeCacheKey(fnSkinCluster.name(), cacheKey)
     #Maya.mel.eval("skinPercent -normalize true " + fnSkinCluster.name() + " " + objectName)
-
-    influenceIndices.clear();
-    weightDoubles.clear();
     
     return objectName
 
-def bLoadSkinValues(loadOnSelection, inputFile):
+def bLoadSkinValues(loadOnSelection, inputFile, jointIndex=None):
     joints = []
     weights = []
     PolygonObject = ""
@@ -597,6 +651,22 @@ def bLoadSkinValues(loadOnSelection, inputFile):
         print "You need to select a polygon object"
         return
 
+    # scene joints are scanned once for all objects in the file
+    if jointIndex is None:
+        jointIndex = bBuildJointIndex()
+
+    if skinWeightsFile.isBinaryFile(inputFile) or skinWeightsFile.isJournalFile(inputFile):
+        objName = None
+        for skinWeights in skinWeightsFile.read(inputFile):
+            if not loadOnSelection:
+                PolygonObject = skinWeights.objectName
+            objName = bSkinObject(PolygonObject, skinWeights.influences, skinWeights.weights, jointIndex,
+                                  positions=skinWeights.positions, topologyHash=skinWeights.topologyHash)
+            if loadOnSelection == True:
+                break
+
+        return objName
+
     input = open(inputFile, 'r')
 
     FilePosition = 0
@@ -615,7 +685,7 @@ def bLoadSkinValues(loadOnSelection, inputFile):
                     if len(line) > 0:
                         weights.append(line)
                     else:
-                        objName = bSkinObject(PolygonObject, joints, weights)
+                        objName = bSkinObject(PolygonObject, joints, weights, jointIndex)
                         PolygonObject = ""
                         joints = []
                         weights = []
@@ -638,5 +708,24 @@ def bLoadSkinValues(loadOnSelection, inputFile):
     return objName
 
 
+def bIterLoadSkinValues(inputFiles, jointIndex=None, processes=None, cacheReport=None):
+    # weights files are parsed and validated in parallel processes,
+    # objects are skinned here in the main thread as soon as their file is parsed
+    if jointIndex is None:
+        jointIndex = bBuildJointIndex()
+
+    for inputFile, skinWeightsList, error in skinWeightsFile.readFilesParallel(inputFiles, processes):
+        if error:
+            print 'not able to load ', inputFile, ': ', error
+            continue
 
+        for skinWeights in skinWeightsList:
+            try:
+                objName = bSkinObject(skinWeights.objectName, skinWeights.influences, skinWeights.weights, jointIndex,
+                                      skinWeights.fileHash, cacheReport, skinWeights.positions, skinWeights.topologyHash)
+            except Exception as e:
+                print 'not able to skin ', skinWeights.objectName, ': ', e
+                continue
 
+            if objName:
+                yield objName
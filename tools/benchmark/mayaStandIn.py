@@ -0,0 +1,865 @@
+"""
+lightweight stand-in for Maya modules used by skin weights tools, to run them outside of Maya
+@category Rigging @subcategory Tools
+@tags benchmark maya stand-in headless skinCluster
+
+stand-in keeps simple scene with mesh transforms, joints and skinClusters in StandInScene,
+only calls used by tools.bSkinSaver, tools.saveSkinWeights and utils.skinCluster weights functions are implemented,
+any other attribute of stand-in modules is placeholder so other rigLib modules can be imported
+
+NOTE: call install() before importing any rigLib module
+"""
+
+import sys
+import types
+
+import numpy as np
+
+class StandInObject( object ):
+
+    '''
+    placeholder for any Maya class or object which is not implemented by stand-in
+    '''
+
+    def __init__( self, *args, **kwargs ):
+
+        pass
+
+    def __call__( self, *args, **kwargs ):
+
+        return StandInObject()
+
+    def __getattr__( self, attrName ):
+
+        if attrName.startswith( '__' ):
+
+            raise AttributeError( attrName )
+
+        return StandInObject()
+
+    def __int__( self ):
+
+        return 0
+
+    __long__ = __int__
+    __index__ = __int__
+
+class _StandInClassMeta( type ):
+
+    def __getattr__( cls, attrName ):
+
+        if attrName.startswith( '__' ):
+
+            raise AttributeError( attrName )
+
+        return StandInObject()
+
+class StandInModule( types.ModuleType ):
+
+    '''
+    module returning placeholder class for any missing attribute
+    '''
+
+    def __getattr__( self, attrName ):
+
+        if attrName.startswith( '__' ):
+
+            raise AttributeError( attrName )
+
+        placeholderClass = _StandInClassMeta( attrName, ( StandInObject, ), {} )
+        setattr( self, attrName, placeholderClass )
+
+        return placeholderClass
+
+#===============================================================================
+# scene
+#===============================================================================
+
+class StandInScene( object ):
+
+    '''
+    scene with mesh transforms, joints and skinClusters, nodes are found by short or long name
+    '''
+
+    def __init__( self ):
+
+        self.clear()
+
+    def clear( self ):
+
+        self.nodes = {}
+        self.selection = []
+        self._nodeOrder = []
+        self._uuidCount = 0
+
+    def addNode( self, nodeName, nodeType, parent = None, **data ):
+
+        # node keeps its UUID when it is renamed
+        self._uuidCount += 1
+        data.update( { 'name': nodeName, 'type': nodeType, 'parent': parent, 'children': [], 'attrs': {}, 'uuid': 'STANDIN-UUID-%06d' % self._uuidCount } )
+        self.nodes[ nodeName ] = data
+        self._nodeOrder.append( nodeName )
+
+        if parent:
+
+            self.nodes[ parent ]['children'].append( nodeName )
+
+        return data
+
+    def deleteNode( self, nodeName ):
+
+        node = self.nodes.pop( nodeName )
+        self._nodeOrder.remove( nodeName )
+
+        if node['parent'] and node['parent'] in self.nodes:
+
+            self.nodes[ node['parent'] ]['children'].remove( nodeName )
+
+    def renameNode( self, nodeName, newName ):
+
+        node = self.nodes.pop( nodeName )
+        node['name'] = newName
+        self.nodes[ newName ] = node
+        self._nodeOrder[ self._nodeOrder.index( nodeName ) ] = newName
+
+        for otherNode in self.nodes.values():
+
+            otherNode['children'] = [ newName if c == nodeName else c for c in otherNode['children'] ]
+
+            if otherNode['parent'] == nodeName: otherNode['parent'] = newName
+            if otherNode.get( 'shape' ) == nodeName: otherNode['shape'] = newName
+
+        self.selection = [ newName if n == nodeName else n for n in self.selection ]
+
+    def getNode( self, nodeName ):
+
+        return self.nodes.get( str( nodeName ).split( '|' )[-1] )
+
+    def getNodeByUuid( self, uuid ):
+
+        for node in self.nodes.values():
+
+            if node['uuid'] == uuid:
+
+                return node
+
+        return None
+
+    def listNodes( self, nodeType ):
+
+        return [ self.nodes[ n ] for n in self._nodeOrder if self.nodes[ n ]['type'] == nodeType ]
+
+    def getLongName( self, nodeName ):
+
+        node = self.getNode( nodeName )
+        longName = ''
+
+        while node:
+
+            longName = '|' + node['name'] + longName
+            node = self.nodes.get( node['parent'] )
+
+        return longName
+
+    def addJoint( self, jointName ):
+
+        return self.addNode( jointName, 'joint' )
+
+    def addMesh( self, meshName, positions, polyCounts, polyVertices ):
+
+        '''
+        add mesh transform with mesh shape named meshName + 'Shape'
+
+        :param positions: numpy.ndarray, (points x 3) positions
+        :param polyCounts: numpy.ndarray, vertices count of each polygon
+        :param polyVertices: numpy.ndarray, vertex indices of polygons
+        '''
+
+        self.addNode( meshName, 'transform' )
+
+        return self.addNode( meshName + 'Shape', 'mesh', meshName, positions = np.asarray( positions, dtype = np.float64 ),
+                             polyCounts = polyCounts, polyVertices = polyVertices )
+
+    def addSkinCluster( self, skinClusterName, shapeName, influences ):
+
+        '''
+        add skinCluster with zero weights, weights are kept as (points x influences) array
+        '''
+
+        shapeNode = self.getNode( shapeName )
+
+        if shapeNode['type'] == 'transform':
+
+            shapeNode = self.nodes[ shapeNode['children'][0] ]
+
+        while skinClusterName in self.nodes:
+
+            skinClusterName = _incrementName( skinClusterName )
+
+        weights = np.zeros( ( shapeNode['positions'].shape[0], len( influences ) ) )
+
+        return self.addNode( skinClusterName, 'skinCluster', shape = shapeNode['name'], influences = [ self.getNode( i )['name'] for i in influences ], weights = weights )
+
+    def findSkinCluster( self, objectName ):
+
+        node = self.getNode( objectName )
+
+        if not node:
+
+            return None
+
+        shapeNames = node['children'] if node['type'] == 'transform' else [ node['name'] ]
+
+        for skinClusterNode in self.listNodes( 'skinCluster' ):
+
+            if skinClusterNode['shape'] in shapeNames:
+
+                return skinClusterNode
+
+        return None
+
+def _incrementName( nodeName ):
+
+    baseName = nodeName.rstrip( '0123456789' )
+    number = nodeName[ len( baseName ): ]
+
+    return baseName + str( int( number ) + 1 if number else 1 )
+
+scene = StandInScene()
+
+#===============================================================================
+# maya.cmds and maya.mel
+#===============================================================================
+
+def _cmds_objExists( nodeName ):
+
+    nodeName, _, attrName = nodeName.partition( '.' )
+    node = scene.getNode( nodeName )
+
+    if node and attrName:
+
+        return attrName in node['attrs']
+
+    return node is not None
+
+def _cmds_nodeType( nodeName, inherited = False, i = False ):
+
+    nodeType = scene.getNode( nodeName )['type']
+
+    if inherited or i:
+
+        return [ 'shape', nodeType ] if nodeType == 'mesh' else [ nodeType ]
+
+    return nodeType
+
+def _cmds_ls( *args, **kwargs ):
+
+    names = []
+
+    for arg in args:
+
+        names.extend( arg if isinstance( arg, ( list, tuple ) ) else [ arg ] )
+
+    nodeType = kwargs.get( 'type' )
+
+    if not args:
+
+        # all nodes like ls without arguments
+        names = list( scene._nodeOrder )
+
+    elif len( names ) == 1 and names[0].startswith( '*.' ):
+
+        # nodes with attribute, like ls( '*.attr', o = True )
+        names = [ n for n in scene._nodeOrder if names[0][2:] in scene.nodes[ n ]['attrs'] ]
+
+    # names are resolved also as UUIDs like in ls( uuid )
+    nodes = [ scene.getNode( n ) or scene.getNodeByUuid( n ) for n in names ]
+    nodes = [ n for n in nodes if n and ( not nodeType or n['type'] == nodeType ) ]
+
+    if kwargs.get( 'uuid' ):
+
+        return [ n['uuid'] for n in nodes ]
+
+    if kwargs.get( 'l' ) or kwargs.get( 'long' ):
+
+        return [ scene.getLongName( n['name'] ) for n in nodes ]
+
+    return [ n['name'] for n in nodes ]
+
+def _cmds_listRelatives( nodeName, s = False, p = False, f = False, **kwargs ):
+
+    node = scene.getNode( nodeName )
+
+    if p:
+
+        relatives = [ node['parent'] ] if node['parent'] else []
+
+    else:
+
+        relatives = [ c for c in node['children'] if not s or scene.nodes[ c ]['type'] == 'mesh' ]
+
+    if not relatives:
+
+        return None
+
+    return [ scene.getLongName( r ) for r in relatives ] if f else relatives
+
+def _cmds_listHistory( nodeNames, **kwargs ):
+
+    if not isinstance( nodeNames, ( list, tuple ) ):
+
+        nodeNames = [ nodeNames ]
+
+    history = []
+
+    for nodeName in nodeNames:
+
+        skinClusterNode = scene.findSkinCluster( nodeName )
+
+        if skinClusterNode:
+
+            history.append( skinClusterNode['name'] )
+
+    return history
+
+def _cmds_skinCluster( *args, **kwargs ):
+
+    if kwargs.get( 'e' ) or kwargs.get( 'edit' ):
+
+        skinClusterNode = scene.getNode( args[0] )
+        addInfluences = kwargs.get( 'addInfluence' ) or kwargs.get( 'ai' ) or []
+        removeInfluences = kwargs.get( 'removeInfluence' ) or kwargs.get( 'ri' ) or []
+
+        for influence in _asList( addInfluences ):
+
+            skinClusterNode['influences'].append( scene.getNode( influence )['name'] )
+            skinClusterNode['weights'] = np.hstack( [ skinClusterNode['weights'], np.zeros( ( skinClusterNode['weights'].shape[0], 1 ) ) ] )
+
+        for influence in _asList( removeInfluences ):
+
+            column = skinClusterNode['influences'].index( scene.getNode( influence )['name'] )
+            skinClusterNode['influences'].pop( column )
+            skinClusterNode['weights'] = np.delete( skinClusterNode['weights'], column, axis = 1 )
+
+        return None
+
+    names = []
+
+    for arg in args:
+
+        names.extend( _asList( arg ) )
+
+    if not names:
+
+        names = list( scene.selection )
+
+    influences = [ n for n in names if scene.getNode( n )['type'] == 'joint' ]
+    shapeName = [ n for n in names if scene.getNode( n )['type'] != 'joint' ][0]
+    skinClusterName = kwargs.get( 'n' ) or kwargs.get( 'name' ) or 'skinCluster1'
+
+    return [ scene.addSkinCluster( skinClusterName, shapeName, influences )['name'] ]
+
+def _asList( value ):
+
+    return list( value ) if isinstance( value, ( list, tuple ) ) else [ value ]
+
+def _cmds_select( *args, **kwargs ):
+
+    if kwargs.get( 'cl' ) or kwargs.get( 'clear' ):
+
+        scene.selection = []
+        return
+
+    names = []
+
+    for arg in args:
+
+        names.extend( _asList( arg ) )
+
+    scene.selection = [ scene.getNode( n )['name'] for n in names if scene.getNode( n ) ]
+
+def _cmds_attributeQuery( attrName, n = None, node = None, exists = False, **kwargs ):
+
+    return attrName in scene.getNode( n or node )['attrs']
+
+def _cmds_addAttr( nodeName, ln = None, longName = None, **kwargs ):
+
+    scene.getNode( nodeName )['attrs'][ ln or longName ] = None
+
+def _cmds_setAttr( attrPath, *values, **kwargs ):
+
+    nodeName, attrName = attrPath.split( '.', 1 )
+    scene.getNode( nodeName )['attrs'][ attrName ] = values[0] if len( values ) == 1 else values
+
+def _cmds_getAttr( attrPath, **kwargs ):
+
+    nodeName, attrName = attrPath.split( '.', 1 )
+
+    return scene.getNode( nodeName )['attrs'].get( attrName )
+
+def _cmds_rename( nodeName, newName, **kwargs ):
+
+    scene.renameNode( scene.getNode( nodeName )['name'], newName )
+
+    return newName
+
+def _cmds_delete( *args, **kwargs ):
+
+    for arg in args:
+
+        for nodeName in _asList( arg ):
+
+            node = scene.getNode( nodeName )
+
+            if node:
+
+                scene.deleteNode( node['name'] )
+
+def _mel_eval( command ):
+
+    '''
+    evaluate few MEL commands used by bSkinSaver: select, skinCluster, DetachSkin, findRelatedSkinCluster and refresh
+    '''
+
+    tokens = command.split()
+
+    if not tokens or tokens[0] == 'refresh':
+
+        return None
+
+    if tokens[0] == 'select':
+
+        # selection of parent made with backticks is not needed by stand-in
+        _cmds_select( [ t for t in tokens[1:] if not t.startswith( '-' ) and '`' not in t ] )
+        return None
+
+    if tokens[0] == 'skinCluster':
+
+        return _cmds_skinCluster()
+
+    if tokens[0] == 'DetachSkin':
+
+        skinClusterNode = scene.findSkinCluster( tokens[1] )
+
+        if skinClusterNode:
+
+            scene.deleteNode( skinClusterNode['name'] )
+
+        return None
+
+    if tokens[0] == 'findRelatedSkinCluster':
+
+        skinClusterNode = scene.findSkinCluster( tokens[1] )
+
+        return skinClusterNode['name'] if skinClusterNode else ''
+
+    raise NotImplementedError( '# MEL command is not supported by Maya stand-in: %s' % command )
+
+#===============================================================================
+# maya.OpenMaya and maya.OpenMayaAnim (API 1.0)
+#===============================================================================
+
+class _MFn( object ):
+
+    kTransform = 'transform'
+    kMesh = 'mesh'
+    kNurbsSurface = 'nurbsSurface'
+    kCurve = 'nurbsCurve'
+    kNurbsCurve = 'nurbsCurve'
+    kJoint = 'joint'
+    kSkinClusterFilter = 'skinCluster'
+    kMeshVertComponent = 'meshVertComponent'
+    kCurveCVComponent = 'curveCVComponent'
+    kSurfaceCVComponent = 'surfaceCVComponent'
+
+class MObject( object ):
+
+    def __init__( self, nodeName = None, componentIndex = None ):
+
+        self.nodeName = nodeName
+        self.componentIndex = componentIndex
+
+    def hasFn( self, fnType ):
+
+        node = scene.getNode( self.nodeName )
+
+        return node is not None and ( node['type'] == fnType or ( fnType == _MFn.kTransform and node['type'] == 'joint' ) )
+
+    def apiType( self ):
+
+        return scene.getNode( self.nodeName )['type']
+
+    def isNull( self ):
+
+        return self.nodeName is None
+
+class MDagPath( MObject ):
+
+    def node( self ):
+
+        return MObject( self.nodeName )
+
+    def fullPathName( self ):
+
+        return scene.getLongName( self.nodeName )
+
+    def partialPathName( self ):
+
+        return self.nodeName
+
+    def _set( self, nodeName ):
+
+        self.nodeName = nodeName
+
+class MDagPathArray( list ):
+
+    def length( self ):
+
+        return len( self )
+
+class MDoubleArray( list ):
+
+    def length( self ):
+
+        return len( self )
+
+class MIntArray( MDoubleArray ):
+
+    pass
+
+class MSelectionList( object ):
+
+    def __init__( self ):
+
+        self._names = []
+
+    def add( self, nodeName ):
+
+        self._names.append( scene.getNode( nodeName )['name'] )
+
+    def length( self ):
+
+        return len( self._names )
+
+    def getDagPath( self, index, dagPath = None, component = None ):
+
+        if dagPath is None:
+
+            return MDagPath_api2( self._names[ index ] )
+
+        dagPath._set( self._names[ index ] )
+
+    def getDependNode( self, index, mobject = None ):
+
+        if mobject is None:
+
+            return MObject( self._names[ index ] )
+
+        mobject.nodeName = self._names[ index ]
+
+class MGlobal( object ):
+
+    @staticmethod
+    def getActiveSelectionList( selection ):
+
+        for nodeName in scene.selection:
+
+            selection.add( nodeName )
+
+class MItSelectionList( object ):
+
+    def __init__( self, selection ):
+
+        self._selection = selection
+        self._index = 0
+
+    def isDone( self ):
+
+        return self._index >= self._selection.length()
+
+    def next( self ):
+
+        self._index += 1
+
+    def getDagPath( self, dagPath, component ):
+
+        self._selection.getDagPath( self._index, dagPath, component )
+
+class MItDependencyNodes( object ):
+
+    def __init__( self, fnType ):
+
+        self._nodeNames = [ n['name'] for n in scene.listNodes( fnType ) ]
+        self._index = 0
+
+    def isDone( self ):
+
+        return self._index >= len( self._nodeNames )
+
+    def next( self ):
+
+        self._index += 1
+
+    def item( self ):
+
+        return MObject( self._nodeNames[ self._index ] )
+
+class MFnDependencyNode( object ):
+
+    def __init__( self, mobject ):
+
+        self._nodeName = mobject.nodeName
+
+    def name( self ):
+
+        return self._nodeName
+
+class MFnDagNode( MFnDependencyNode ):
+
+    def partialPathName( self ):
+
+        return self._nodeName
+
+    def fullPathName( self ):
+
+        return scene.getLongName( self._nodeName )
+
+    def parent( self, index ):
+
+        return MObject( scene.getNode( self._nodeName )['parent'] )
+
+class MFnTransform( MFnDagNode ):
+
+    def childCount( self ):
+
+        return len( scene.getNode( self._nodeName )['children'] )
+
+    def child( self, index ):
+
+        return MObject( scene.getNode( self._nodeName )['children'][ index ] )
+
+class _UintPtr( object ):
+
+    value = 0
+
+class MScriptUtil( object ):
+
+    def asUintPtr( self ):
+
+        return _UintPtr()
+
+    @staticmethod
+    def getUint( uintPtr ):
+
+        return uintPtr.value
+
+class MItGeometry( object ):
+
+    def __init__( self, dagPath ):
+
+        self._positions = scene.getNode( dagPath.nodeName )['positions']
+        self._index = 0
+
+    def isDone( self ):
+
+        return self._index >= self._positions.shape[0]
+
+    def next( self ):
+
+        self._index += 1
+
+    def index( self ):
+
+        return self._index
+
+    def component( self ):
+
+        return MObject( None, self._index )
+
+    def count( self ):
+
+        return self._positions.shape[0]
+
+    def allPositions( self ):
+
+        return [ MPoint( *p ) for p in self._positions.tolist() ]
+
+class MFnSkinCluster( MFnDependencyNode ):
+
+    '''
+    skinCluster function set with API 1.0 (output arguments) and API 2.0 (return values) calls
+    '''
+
+    def __init__( self, mobject ):
+
+        MFnDependencyNode.__init__( self, mobject )
+        self._node = scene.getNode( self._nodeName )
+
+    def getPathAtIndex( self, index, dagPath = None ):
+
+        if dagPath is None:
+
+            return MDagPath_api2( self._node['shape'] )
+
+        dagPath._set( self._node['shape'] )
+
+    def indexForOutputConnection( self, index ):
+
+        return 0
+
+    def influenceObjects( self, pathArray = None ):
+
+        paths = [ MDagPath_api2( i ) for i in self._node['influences'] ]
+
+        if pathArray is None:
+
+            return paths
+
+        pathArray.extend( paths )
+
+        return len( paths )
+
+    def getWeights( self, shapePath, components, weightArray = None, infCountPtr = None ):
+
+        weights = self._node['weights']
+
+        if weightArray is None:
+
+            # API 2.0, all points, array copy is returned instead of MDoubleArray so stand-in doesn't add its own cost
+            return weights.ravel().copy(), weights.shape[1]
+
+        # API 1.0, one point component from MItGeometry
+        weightArray.extend( weights[ components.componentIndex ].tolist() )
+        infCountPtr.value = weights.shape[1]
+
+    def setWeights( self, shapePath, components, influenceIndices, values, normalize = True, oldValues = False ):
+
+        columns = list( influenceIndices )
+        self._node['weights'][:, columns] = np.asarray( values, dtype = np.float64 ).reshape( -1, len( columns ) )
+
+#===============================================================================
+# maya.api.OpenMaya and maya.api.OpenMayaAnim (API 2.0)
+#===============================================================================
+
+class MPoint( object ):
+
+    __slots__ = [ 'x', 'y', 'z' ]
+
+    def __init__( self, x = 0.0, y = 0.0, z = 0.0 ):
+
+        self.x, self.y, self.z = x, y, z
+
+class MDagPath_api2( MDagPath ):
+
+    def __init__( self, nodeName = None ):
+
+        MDagPath.__init__( self, scene.getNode( nodeName )['name'] if nodeName else None )
+
+class MFnSingleIndexedComponent( object ):
+
+    def create( self, componentType ):
+
+        self._component = MObject( None )
+
+        return self._component
+
+    def setCompleteData( self, count ):
+
+        self._component.componentIndex = slice( 0, count )
+
+class MFnMesh( object ):
+
+    def __init__( self, dagPath ):
+
+        self._node = scene.getNode( dagPath.nodeName )
+
+    def getVertices( self ):
+
+        return self._node['polyCounts'], self._node['polyVertices']
+
+#===============================================================================
+# install
+#===============================================================================
+
+def _makeModule( moduleName, attrsDt ):
+
+    module = StandInModule( moduleName )
+    module.__dict__.update( attrsDt )
+    sys.modules[ moduleName ] = module
+
+    return module
+
+def install():
+
+    '''
+    put stand-in Maya, PyMel, PySide2 and ngSkinTools modules into sys.modules
+
+    :return: StandInScene, scene used by stand-in modules
+    '''
+
+    cmdsAttrs = {
+                'objExists': _cmds_objExists,
+                'nodeType': _cmds_nodeType,
+                'ls': _cmds_ls,
+                'listRelatives': _cmds_listRelatives,
+                'listHistory': _cmds_listHistory,
+                'skinCluster': _cmds_skinCluster,
+                'select': _cmds_select,
+                'attributeQuery': _cmds_attributeQuery,
+                'addAttr': _cmds_addAttr,
+                'setAttr': _cmds_setAttr,
+                'getAttr': _cmds_getAttr,
+                'delete': _cmds_delete,
+                'rename': _cmds_rename
+                }
+
+    api1Attrs = {
+                'MFn': _MFn,
+                'MObject': MObject,
+                'MDagPath': MDagPath,
+                'MDagPathArray': MDagPathArray,
+                'MDoubleArray': MDoubleArray,
+                'MIntArray': MIntArray,
+                'MSelectionList': MSelectionList,
+                'MGlobal': MGlobal,
+                'MItSelectionList': MItSelectionList,
+                'MItDependencyNodes': MItDependencyNodes,
+                'MItGeometry': MItGeometry,
+                'MFnDependencyNode': MFnDependencyNode,
+                'MFnDagNode': MFnDagNode,
+                'MFnTransform': MFnTransform,
+                'MScriptUtil': MScriptUtil
+                }
+
+    api2Attrs = dict( api1Attrs )
+    api2Attrs.update( {
+                        'MDagPath': MDagPath_api2,
+                        'MPoint': MPoint,
+                        'MFnSingleIndexedComponent': MFnSingleIndexedComponent,
+                        'MFnMesh': MFnMesh
+                        } )
+
+    maya = _makeModule( 'maya', {} )
+    maya.cmds = _makeModule( 'maya.cmds', cmdsAttrs )
+    maya.mel = _makeModule( 'maya.mel', { 'eval': _mel_eval } )
+    maya.OpenMaya = _makeModule( 'maya.OpenMaya', api1Attrs )
+    maya.OpenMayaAnim = _makeModule( 'maya.OpenMayaAnim', { 'MFnSkinCluster': MFnSkinCluster } )
+    maya.OpenMayaMPx = _makeModule( 'maya.OpenMayaMPx', {} )
+    maya.OpenMayaUI = _makeModule( 'maya.OpenMayaUI', {} )
+    maya.api = _makeModule( 'maya.api', {} )
+    maya.api.OpenMaya = _makeModule( 'maya.api.OpenMaya', api2Attrs )
+    maya.api.OpenMayaAnim = _makeModule( 'maya.api.OpenMayaAnim', { 'MFnSkinCluster': MFnSkinCluster } )
+
+    pymel = _makeModule( 'pymel', {} )
+    pymel.core = _makeModule( 'pymel.core', {} )
+
+    pyside = _makeModule( 'PySide2', {} )
+    pyside.QtCore = _makeModule( 'PySide2.QtCore', {} )
+    pyside.QtWidgets = _makeModule( 'PySide2.QtWidgets', {} )
+    pyside.QtGui = _makeModule( 'PySide2.QtGui', {} )
+    _makeModule( 'shiboken2', {} )
+
+    ngSkinTools = _makeModule( 'ngSkinTools', {} )
+    ngSkinTools.importExport = _makeModule( 'ngSkinTools.importExport', {} )
+
+    return scene
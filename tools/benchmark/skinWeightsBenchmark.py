@@ -0,0 +1,417 @@
+"""
+benchmark of skin weights save and load without Maya
+@category Rigging @subcategory Tools
+@tags benchmark skinCluster skin save load weights formats
+
+synthetic meshes with skinClusters are made in Maya stand-in scene (mayaStandIn module),
+weights are saved and loaded with tools.bSkinSaver and tools.saveSkinWeights in every weights format
+and save time, load time, peak memory, file size and biggest weight error are written into JSON file
+
+run from command line, not from Maya:
+    python tools/benchmark/skinWeightsBenchmark.py --vertices 10000 100000 --influences 10 100 --output new.json
+    python tools/benchmark/skinWeightsBenchmark.py --compare old.json new.json
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import mayaStandIn
+
+scene = mayaStandIn.install()
+
+_toolsDir = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+sys.path.insert( 0, os.path.dirname( _toolsDir ) )
+sys.path.insert( 0, _toolsDir )
+
+import bSkinSaver
+import saveSkinWeights
+from utils import skinWeightsFile
+
+defaultVertexCounts = [ 10000, 100000, 1000000 ]
+defaultInfluenceCounts = [ 10, 100, 300 ]
+defaultMaxValues = 30000000
+defaultMaxTextValues = 3000000
+nonZeroInfluences = 4
+
+# format name: ( file extension, save keyword arguments )
+formatsDt = {
+            'text': ( skinWeightsFile.textExt, {} ),
+            'binaryDense': ( skinWeightsFile.binaryExt, { 'sparse': False } ),
+            'binarySparse': ( skinWeightsFile.binaryExt, { 'sparse': True } ),
+            'quantized16': ( skinWeightsFile.binaryExt, { 'sparse': True, 'quantizeBits': 16 } ),
+            'quantized8': ( skinWeightsFile.binaryExt, { 'sparse': True, 'quantizeBits': 8 } ),
+            'journal': ( skinWeightsFile.journalExt, {} ),
+            # file size with float32 rest positions for weights remap, compare with formats above
+            'binarySparsePositions': ( skinWeightsFile.binaryExt, { 'sparse': True, 'savePositions': True } ),
+            'quantized8Positions': ( skinWeightsFile.binaryExt, { 'sparse': True, 'quantizeBits': 8, 'savePositions': True } )
+            }
+
+formatOrder = [ 'text', 'binaryDense', 'binarySparse', 'quantized16', 'quantized8', 'journal', 'binarySparsePositions', 'quantized8Positions' ]
+toolOrder = [ 'bSkinSaver', 'saveSkinWeights' ]
+
+_meshName = 'bench_geo'
+
+class _NullOutput( object ):
+
+    def write( self, text ):
+
+        pass
+
+    def flush( self ):
+
+        pass
+
+class MemorySampler( object ):
+
+    '''
+    sample resident memory of this process in background thread to find peak memory of one operation
+    '''
+
+    def __init__( self, interval = 0.002 ):
+
+        self.interval = interval
+        self.peak = 0
+        self._running = False
+        self._thread = None
+
+    def __enter__( self ):
+
+        self.start = getResidentMemory()
+        self.peak = self.start
+        self._running = True
+        self._thread = threading.Thread( target = self._sample )
+        self._thread.daemon = True
+        self._thread.start()
+
+        return self
+
+    def __exit__( self, *args ):
+
+        self._running = False
+        self._thread.join()
+        self.peak = max( self.peak, getResidentMemory() )
+
+    def _sample( self ):
+
+        while self._running:
+
+            self.peak = max( self.peak, getResidentMemory() )
+            time.sleep( self.interval )
+
+    @property
+    def peakMegabytes( self ):
+
+        return ( self.peak - self.start ) / float( 1024 ** 2 )
+
+def getResidentMemory():
+
+    '''
+    get current resident memory of this process in bytes, Linux only
+
+    :return: int
+    '''
+
+    fileobj = open( '/proc/self/statm' )
+    residentPages = int( fileobj.read().split()[1] )
+    fileobj.close()
+
+    return residentPages * os.sysconf( 'SC_PAGE_SIZE' )
+
+def makeSkinnedMesh( vertexCount, influenceCount ):
+
+    '''
+    make stand-in grid mesh with quads, joints and skinCluster with 4 non-zero weights per vertex,
+    influences change along the grid so neighbour vertices share influences like on real meshes
+
+    :param vertexCount: int, minimum number of vertices, grid can have few more
+    :param influenceCount: int, number of skinCluster influences
+    :return: list( list( str ), numpy.ndarray ), 0- influence names, 1- (vertices x influences) weights
+    '''
+
+    scene.clear()
+
+    columns = int( np.sqrt( vertexCount ) )
+    rows = int( np.ceil( vertexCount / float( columns ) ) )
+    gridX, gridZ = np.meshgrid( np.arange( columns, dtype = np.float64 ), np.arange( rows, dtype = np.float64 ) )
+    positions = np.column_stack( [ gridX.ravel(), np.sin( gridX.ravel() * 0.1 ), gridZ.ravel() ] )
+
+    quadCorners = ( np.arange( rows - 1 )[:, np.newaxis] * columns + np.arange( columns - 1 ) ).ravel()
+    polyVertices = np.column_stack( [ quadCorners, quadCorners + 1, quadCorners + columns + 1, quadCorners + columns ] ).ravel()
+    polyCounts = np.full( quadCorners.size, 4, dtype = np.int32 )
+
+    scene.addMesh( _meshName, positions, polyCounts, polyVertices )
+
+    influences = [ 'bench_%03d_jnt' % i for i in range( influenceCount ) ]
+
+    for influence in influences:
+
+        scene.addJoint( influence )
+
+    skinClusterNode = scene.addSkinCluster( _meshName + '_skc', _meshName, influences )
+
+    pointCount = positions.shape[0]
+    rng = np.random.RandomState( pointCount + influenceCount )
+    usedCount = min( nonZeroInfluences, influenceCount )
+    baseInfluences = ( gridX.ravel() * influenceCount / columns ).astype( np.int64 )
+    columnsUsed = ( baseInfluences[:, np.newaxis] + np.arange( usedCount ) ) % influenceCount
+
+    values = rng.rand( pointCount, usedCount ) + 0.01
+    values /= values.sum( axis = 1 )[:, np.newaxis]
+
+    skinClusterNode['weights'][ np.arange( pointCount )[:, np.newaxis], columnsUsed ] = values
+
+    return [ influences, skinClusterNode['weights'].copy() ]
+
+def _save( toolName, filePath, saveKwargs ):
+
+    if toolName == 'bSkinSaver':
+
+        scene.selection = [ _meshName ]
+        bSkinSaver.bSaveSkinValues( filePath, **saveKwargs )
+
+    else:
+
+        saveSkinWeights.saveSkinClusterWeights( filePath, _meshName, **saveKwargs )
+
+def _load( toolName, filePath ):
+
+    if toolName == 'bSkinSaver':
+
+        bSkinSaver.bLoadSkinValues( False, filePath )
+
+    else:
+
+        saveSkinWeights.loadSkinClusterWeights( filePath )
+
+def _getLoadError( influences, weights ):
+
+    skinClusterNode = scene.findSkinCluster( _meshName )
+
+    if not skinClusterNode:
+
+        return None
+
+    columns = [ skinClusterNode['influences'].index( inf ) for inf in influences ]
+
+    return float( np.abs( skinClusterNode['weights'][:, columns] - weights ).max() )
+
+def runCase( toolName, formatName, vertexCount, influenceCount, workDir ):
+
+    '''
+    save and load weights of one synthetic mesh
+
+    :return: dict, results with 'saveSeconds', 'loadSeconds', 'savePeakMemoryMB', 'loadPeakMemoryMB', 'fileBytes' and 'maxError'
+    '''
+
+    fileExt, saveKwargs = formatsDt[ formatName ]
+    filePath = os.path.join( workDir, '%s_%s_%d_%d%s' % ( toolName, formatName, vertexCount, influenceCount, fileExt ) )
+
+    influences, weights = makeSkinnedMesh( vertexCount, influenceCount )
+    resultDt = { 'tool': toolName, 'format': formatName, 'vertices': weights.shape[0], 'influences': influenceCount }
+
+    stdout = sys.stdout
+    sys.stdout = _NullOutput()
+
+    try:
+
+        gc.collect()
+
+        with MemorySampler() as sampler:
+
+            startTime = time.time()
+            _save( toolName, filePath, saveKwargs )
+            resultDt['saveSeconds'] = time.time() - startTime
+
+        resultDt['savePeakMemoryMB'] = sampler.peakMegabytes
+        resultDt['fileBytes'] = os.path.getsize( filePath )
+
+        # weights are loaded on mesh without skinCluster
+        scene.deleteNode( scene.findSkinCluster( _meshName )['name'] )
+        gc.collect()
+
+        with MemorySampler() as sampler:
+
+            startTime = time.time()
+            _load( toolName, filePath )
+            resultDt['loadSeconds'] = time.time() - startTime
+
+        resultDt['loadPeakMemoryMB'] = sampler.peakMegabytes
+
+    finally:
+
+        sys.stdout = stdout
+
+    resultDt['maxError'] = _getLoadError( influences, weights )
+
+    os.remove( filePath )
+
+    return resultDt
+
+def runBenchmark( vertexCounts = defaultVertexCounts, influenceCounts = defaultInfluenceCounts, formats = formatOrder, tools = toolOrder,
+                  maxValues = defaultMaxValues, maxTextValues = defaultMaxTextValues, workDir = None, verbose = True ):
+
+    '''
+    run all benchmark cases, cases with more weight values than limits are skipped
+
+    :param vertexCounts: list( int ), vertices of synthetic meshes
+    :param influenceCounts: list( int ), influences of synthetic skinClusters
+    :param formats: list( str ), weights formats, see formatsDt
+    :param tools: list( str ), tools to save and load weights with, 'bSkinSaver' and 'saveSkinWeights'
+    :param maxValues: int, cases with more weight values (vertices x influences) are skipped
+    :param maxTextValues: int, text format cases with more weight values are skipped, text save is done vertex by vertex
+    :param workDir: str, optional, folder for weights files, temporary folder is used by default
+    :param verbose: bool, print result of each case
+    :return: dict, benchmark run with environment info and 'results' list
+    '''
+
+    removeWorkDir = workDir is None
+    workDir = workDir or tempfile.mkdtemp( prefix = 'skinWeightsBenchmark_' )
+
+    runDt = {
+            'date': datetime.datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'mayaStandIn': True,
+            'results': []
+            }
+
+    try:
+
+        for toolName in tools:
+
+            for formatName in formats:
+
+                # saveSkinWeights writes only binary and journal files
+                if toolName == 'saveSkinWeights' and formatName == 'text':
+
+                    continue
+
+                for vertexCount in vertexCounts:
+
+                    for influenceCount in influenceCounts:
+
+                        valuesLimit = maxTextValues if formatName == 'text' else maxValues
+
+                        if vertexCount * influenceCount > valuesLimit:
+
+                            resultDt = { 'tool': toolName, 'format': formatName, 'vertices': vertexCount, 'influences': influenceCount,
+                                        'skipped': 'more than %d weight values' % valuesLimit }
+
+                        else:
+
+                            resultDt = runCase( toolName, formatName, vertexCount, influenceCount, workDir )
+
+                        runDt['results'].append( resultDt )
+
+                        if verbose:
+
+                            print formatResult( resultDt )
+
+    finally:
+
+        scene.clear()
+
+        if removeWorkDir:
+
+            shutil.rmtree( workDir, ignore_errors = True )
+
+    return runDt
+
+def formatResult( resultDt ):
+
+    '''
+    get one line description of benchmark case result
+    '''
+
+    caseStr = '%-16s %-21s %8d vtx %4d inf' % ( resultDt['tool'], resultDt['format'], resultDt['vertices'], resultDt['influences'] )
+
+    if 'skipped' in resultDt:
+
+        return caseStr + '  skipped: ' + resultDt['skipped']
+
+    return caseStr + '  save %8.3fs  load %8.3fs  mem %8.1f/%8.1f MB  file %10d B  error %.2e' % (
+            resultDt['saveSeconds'], resultDt['loadSeconds'], resultDt['savePeakMemoryMB'], resultDt['loadPeakMemoryMB'],
+            resultDt['fileBytes'], resultDt['maxError'] if resultDt['maxError'] is not None else float( 'nan' ) )
+
+def compareResults( oldFilePath, newFilePath ):
+
+    '''
+    compare two benchmark JSON files, ratios are new / old so values below 1.0 are improvements
+
+    :param oldFilePath: str, earlier benchmark results
+    :param newFilePath: str, later benchmark results
+    :return: list( dict ), case keys with 'saveRatio', 'loadRatio' and 'fileRatio'
+    '''
+
+    def getCaseKey( resultDt ):
+
+        return ( resultDt['tool'], resultDt['format'], resultDt['vertices'], resultDt['influences'] )
+
+    oldResultsDt = dict( [ ( getCaseKey( r ), r ) for r in json.load( open( oldFilePath ) )['results'] if 'skipped' not in r ] )
+    comparison = []
+
+    for newResult in json.load( open( newFilePath ) )['results']:
+
+        oldResult = oldResultsDt.get( getCaseKey( newResult ) )
+
+        if not oldResult or 'skipped' in newResult:
+
+            continue
+
+        compareDt = dict( zip( [ 'tool', 'format', 'vertices', 'influences' ], getCaseKey( newResult ) ) )
+
+        for ratioKey, valueKey in [ ( 'saveRatio', 'saveSeconds' ), ( 'loadRatio', 'loadSeconds' ), ( 'fileRatio', 'fileBytes' ) ]:
+
+            compareDt[ ratioKey ] = newResult[ valueKey ] / float( max( oldResult[ valueKey ], 1e-9 ) )
+
+        comparison.append( compareDt )
+
+        print '%-16s %-21s %8d vtx %4d inf  save x%.2f  load x%.2f  file x%.2f' % (
+                compareDt['tool'], compareDt['format'], compareDt['vertices'], compareDt['influences'],
+                compareDt['saveRatio'], compareDt['loadRatio'], compareDt['fileRatio'] )
+
+    return comparison
+
+def main( args = None ):
+
+    parser = argparse.ArgumentParser( description = 'skin weights save and load benchmark with Maya stand-in' )
+    parser.add_argument( '--vertices', type = int, nargs = '+', default = defaultVertexCounts )
+    parser.add_argument( '--influences', type = int, nargs = '+', default = defaultInfluenceCounts )
+    parser.add_argument( '--formats', nargs = '+', choices = formatOrder, default = formatOrder )
+    parser.add_argument( '--tools', nargs = '+', choices = toolOrder, default = toolOrder )
+    parser.add_argument( '--max-values', type = int, default = defaultMaxValues, help = 'skip cases with more weight values' )
+    parser.add_argument( '--max-text-values', type = int, default = defaultMaxTextValues, help = 'skip text format cases with more weight values' )
+    parser.add_argument( '--work-dir', help = 'folder for weights files, temporary folder by default' )
+    parser.add_argument( '--output', default = 'skinWeightsBenchmark.json', help = 'JSON results file' )
+    parser.add_argument( '--compare', nargs = 2, metavar = ( 'OLD', 'NEW' ), help = 'compare two JSON results files and exit' )
+    options = parser.parse_args( args )
+
+    if options.compare:
+
+        compareResults( *options.compare )
+        return
+
+    runDt = runBenchmark( options.vertices, options.influences, options.formats, options.tools,
+                          options.max_values, options.max_text_values, options.work_dir )
+
+    fileobj = open( options.output, 'w' )
+    json.dump( runDt, fileobj, indent = 2 )
+    fileobj.close()
+
+    print '# benchmark results saved in: %s' % options.output
+
+if __name__ == '__main__':
+
+    main()
@@ -0,0 +1,382 @@
+"""
+headless build farm running rig builds of many assets in parallel worker processes
+@category Rigging @subcategory Tools
+@tags build farm batch headless mayapy parallel nightly
+
+assets are read from JSON manifest and each asset is built in its own worker process (mayapy by default),
+number of running workers is limited by number of cores, so total time scales with cores and not with assets,
+output of each worker is saved in asset log file, crashed or timed out workers are started again
+and results of all assets are written into summary report
+
+manifest example, values of asset override defaults:
+
+    {
+    "preset": "rigpresets.generic.rigBuild",
+    "mainAssetFolder": "D:/assets/%s/",
+    "buildArgs": { "loadSkinWeights": true },
+    "assets": [ "hero", { "name": "dog", "preset": "rigpresets.generic.rig_game", "buildArgs": { "createGameJoints": true } } ]
+    }
+
+run from command line, not from Maya:
+    python tools/buildFarm.py assets.json --report-dir D:/buildFarm/nightly --workers 8
+    python tools/buildFarm.py assets.json --mayapy "C:/Program Files/Autodesk/Maya2018/bin/mayapy.exe"
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import traceback
+
+_rigLibDir = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+
+defaultPreset = 'rigpresets.generic.rigBuild'
+rigSceneFilePath = '%srig/%s_rig.mb'
+reportFileName = 'buildFarmReport.json'
+
+# exit code of worker when build raised exception, any other non zero code is crash
+buildFailedExitCode = 3
+
+class WorkerLauncher( object ):
+
+    '''
+    starts worker process for one build job, interpreter can be any Python with maya.standalone,
+    tests can use stand-in interpreter or subclass and override getCommand()
+    '''
+
+    def __init__( self, interpreter = None, workerScript = None, environment = None ):
+
+        '''
+        :param interpreter: str, path of interpreter, mayapy from MAYAPY environment variable or PATH by default
+        :param workerScript: str, script running job file given as last argument, this module by default
+        :param environment: dict, optional, extra environment variables of workers
+        '''
+
+        self.interpreter = interpreter or findMayapy()
+        self.workerScript = workerScript or os.path.splitext( os.path.abspath( __file__ ) )[0] + '.py'
+        self.environment = environment or {}
+
+    def getCommand( self, jobFilePath ):
+
+        return [ self.interpreter, self.workerScript, '--worker', jobFilePath ]
+
+    def launch( self, jobFilePath, logFile ):
+
+        '''
+        :param jobFilePath: str, path of job JSON file
+        :param logFile: file, open file for worker output
+        :return: subprocess.Popen
+        '''
+
+        environment = dict( os.environ )
+        environment.update( self.environment )
+
+        return subprocess.Popen( self.getCommand( jobFilePath ), stdout = logFile, stderr = subprocess.STDOUT, env = environment )
+
+def findMayapy():
+
+    '''
+    :return: str, path of mayapy from MAYAPY environment variable, otherwise 'mayapy' from PATH
+    '''
+
+    return os.environ.get( 'MAYAPY', 'mayapy' )
+
+def readManifest( manifestPath ):
+
+    '''
+    read assets from manifest file, values of each asset are merged with manifest defaults
+
+    :param manifestPath: str, path of JSON manifest, see module docs
+    :return: list( dict ), jobs with 'name', 'preset', 'mainAssetFolder', 'buildArgs' and 'rigScene' keys
+    '''
+
+    fileobj = open( manifestPath, 'r' )
+    manifestDt = json.load( fileobj )
+    fileobj.close()
+
+    jobs = []
+
+    for asset in manifestDt['assets']:
+
+        if isinstance( asset, basestring ):
+
+            asset = { 'name': asset }
+
+        jobDt = {
+                'name': asset['name'],
+                'preset': asset.get( 'preset', manifestDt.get( 'preset', defaultPreset ) ),
+                'mainAssetFolder': asset.get( 'mainAssetFolder', manifestDt.get( 'mainAssetFolder' ) ),
+                'buildArgs': dict( manifestDt.get( 'buildArgs', {} ) )
+                }
+
+        jobDt['buildArgs'].update( asset.get( 'buildArgs', {} ) )
+
+        if not jobDt['mainAssetFolder']:
+
+            raise Exception( '# buildFarm: mainAssetFolder is not defined for asset %s' % jobDt['name'] )
+
+        assetFolder = jobDt['mainAssetFolder'] % jobDt['name']
+        jobDt['rigScene'] = asset.get( 'rigScene', manifestDt.get( 'rigScene', rigSceneFilePath ) ) % ( assetFolder, jobDt['name'] )
+
+        jobs.append( jobDt )
+
+    return jobs
+
+class _Job( object ):
+
+    def __init__( self, jobDt, reportDir ):
+
+        self.jobDt = jobDt
+        self.name = jobDt['name']
+        self.jobFilePath = os.path.join( reportDir, 'jobs', '%s_job.json' % self.name )
+        self.resultFilePath = os.path.join( reportDir, 'jobs', '%s_result.json' % self.name )
+        self.logFilePath = os.path.join( reportDir, 'logs', '%s.log' % self.name )
+
+        self.attempts = 0
+        self.process = None
+        self.logFile = None
+        self.startTime = 0.0
+        self.resultDt = None
+
+def runBuilds( jobs, reportDir, workers = None, launcher = None, retries = 1, timeout = None, verbose = True ):
+
+    '''
+    build assets in parallel worker processes and write summary report
+
+    :param jobs: list( dict ), jobs from readManifest()
+    :param reportDir: str, folder for report, job files and asset logs
+    :param workers: int, number of parallel workers, number of cores by default
+    :param launcher: WorkerLauncher, starts worker processes, mayapy launcher by default
+    :param retries: int, how many times crashed or timed out worker is started again, failed builds are not repeated
+    :param timeout: float, optional, seconds after which worker is killed and counted as crashed
+    :param verbose: bool, print progress
+    :return: dict, report with 'assets' results and totals
+    '''
+
+    workers = workers or multiprocessing.cpu_count()
+    launcher = launcher or WorkerLauncher()
+
+    for folder in [ os.path.join( reportDir, 'jobs' ), os.path.join( reportDir, 'logs' ) ]:
+
+        if not os.path.exists( folder ):
+
+            os.makedirs( folder )
+
+    waiting = [ _Job( j, reportDir ) for j in jobs ]
+    running = []
+    finished = []
+
+    for job in waiting:
+
+        _writeJson( job.jobFilePath, dict( job.jobDt, rigLibDir = _rigLibDir, resultFile = job.resultFilePath ) )
+
+        if os.path.exists( job.logFilePath ):
+
+            os.remove( job.logFilePath )
+
+    startTime = time.time()
+
+    if verbose:
+
+        print '# buildFarm: building %d assets with %d workers' % ( len( waiting ), workers )
+
+    while waiting or running:
+
+        while waiting and len( running ) < workers:
+
+            job = waiting.pop( 0 )
+            _startJob( job, launcher )
+            running.append( job )
+
+        time.sleep( 0.05 )
+
+        for job in running[:]:
+
+            returnCode = job.process.poll()
+            timedOut = timeout and time.time() - job.startTime > timeout
+
+            if returnCode is None and not timedOut:
+
+                continue
+
+            if returnCode is None:
+
+                job.process.kill()
+                job.process.wait()
+
+            running.remove( job )
+            job.logFile.close()
+            job.resultDt = _getJobResult( job, returnCode, timedOut )
+
+            if job.resultDt['status'] == 'crashed' and job.attempts <= retries:
+
+                if verbose:
+
+                    print '# buildFarm: %s crashed (%s), starting again' % ( job.name, job.resultDt['error'] )
+
+                waiting.append( job )
+                continue
+
+            finished.append( job )
+
+            if verbose:
+
+                print '# buildFarm: %-30s %-8s %9.2f s  %d/%d' % ( job.name, job.resultDt['status'], job.resultDt['seconds'], len( finished ), len( jobs ) )
+
+    reportDt = {
+                'date': datetime.datetime.now().isoformat(),
+                'workers': workers,
+                'wallSeconds': time.time() - startTime,
+                'buildSeconds': sum( [ j.resultDt['seconds'] for j in finished ] ),
+                'assets': [ dict( j.resultDt, name = j.name, attempts = j.attempts, log = j.logFilePath ) for j in finished ]
+                }
+
+    for status in [ 'done', 'failed', 'crashed' ]:
+
+        reportDt[ status ] = len( [ a for a in reportDt['assets'] if a['status'] == status ] )
+
+    _writeJson( os.path.join( reportDir, reportFileName ), reportDt )
+
+    if verbose:
+
+        printReport( reportDt )
+
+    return reportDt
+
+def _startJob( job, launcher ):
+
+    if os.path.exists( job.resultFilePath ):
+
+        os.remove( job.resultFilePath )
+
+    job.attempts += 1
+    job.logFile = open( job.logFilePath, 'a' )
+    job.logFile.write( '# buildFarm: %s attempt %d\n' % ( job.name, job.attempts ) )
+    job.logFile.flush()
+    job.startTime = time.time()
+    job.process = launcher.launch( job.jobFilePath, job.logFile )
+
+def _getJobResult( job, returnCode, timedOut ):
+
+    seconds = time.time() - job.startTime
+
+    if os.path.exists( job.resultFilePath ):
+
+        fileobj = open( job.resultFilePath, 'r' )
+        resultDt = json.load( fileobj )
+        fileobj.close()
+
+        # worker can crash after writing result, e.g. on Maya exit
+        if resultDt['status'] == 'done' or returnCode == buildFailedExitCode:
+
+            return resultDt
+
+    if timedOut:
+
+        return { 'status': 'crashed', 'seconds': seconds, 'error': 'timed out after %.0f s' % seconds }
+
+    return { 'status': 'crashed', 'seconds': seconds, 'error': 'worker exited with code %s' % returnCode }
+
+def printReport( reportDt ):
+
+    for assetDt in reportDt['assets']:
+
+        if assetDt['status'] != 'done':
+
+            print '# buildFarm: %s %s: %s, see %s' % ( assetDt['name'], assetDt['status'], assetDt['error'], assetDt['log'] )
+
+    print '# buildFarm: %d done, %d failed, %d crashed, wall time %.2f s, build time %.2f s' % (
+            reportDt['done'], reportDt['failed'], reportDt['crashed'], reportDt['wallSeconds'], reportDt['buildSeconds'] )
+
+def _writeJson( filePath, data ):
+
+    fileobj = open( filePath, 'w' )
+    json.dump( data, fileobj, indent = 1 )
+    fileobj.close()
+
+#===============================================================================
+# worker
+#===============================================================================
+
+def runWorker( jobFilePath ):
+
+    '''
+    build one asset in headless Maya, runs inside worker process
+
+    :param jobFilePath: str, path of job JSON file written by runBuilds()
+    :return: int, exit code
+    '''
+
+    fileobj = open( jobFilePath, 'r' )
+    jobDt = json.load( fileobj )
+    fileobj.close()
+
+    startTime = time.time()
+    resultDt = { 'status': 'done', 'error': None, 'rigScene': jobDt['rigScene'] }
+
+    import maya.standalone
+    maya.standalone.initialize( name = 'python' )
+
+    import maya.cmds as mc
+
+    sys.path.insert( 0, jobDt['rigLibDir'] )
+
+    try:
+
+        preset = __import__( jobDt['preset'], fromlist = [ 'build' ] )
+        preset.mainAssetFolder = jobDt['mainAssetFolder']
+        preset.build( jobDt['name'], **dict( [ ( str( k ), v ) for k, v in jobDt['buildArgs'].items() ] ) )
+
+        rigSceneDir = os.path.dirname( jobDt['rigScene'] )
+
+        if rigSceneDir and not os.path.exists( rigSceneDir ):
+
+            os.makedirs( rigSceneDir )
+
+        mc.file( rename = jobDt['rigScene'] )
+        mc.file( save = True, type = 'mayaBinary', f = True )
+
+    except Exception, e:
+
+        traceback.print_exc()
+        resultDt.update( { 'status': 'failed', 'error': '%s: %s' % ( e.__class__.__name__, e ), 'traceback': traceback.format_exc() } )
+
+    resultDt['seconds'] = time.time() - startTime
+    _writeJson( jobDt['resultFile'], resultDt )
+    sys.stdout.flush()
+
+    return 0 if resultDt['status'] == 'done' else buildFailedExitCode
+
+def main( args = None ):
+
+    parser = argparse.ArgumentParser( description = 'build rigs of many assets in parallel headless Maya workers' )
+    parser.add_argument( 'manifest', nargs = '?', help = 'JSON manifest with assets to build' )
+    parser.add_argument( '--report-dir', default = 'buildFarm', help = 'folder for report, job files and asset logs' )
+    parser.add_argument( '--workers', type = int, help = 'number of parallel workers, number of cores by default' )
+    parser.add_argument( '--mayapy', help = 'worker interpreter, MAYAPY environment variable or mayapy from PATH by default' )
+    parser.add_argument( '--retries', type = int, default = 1, help = 'how many times crashed worker is started again' )
+    parser.add_argument( '--timeout', type = float, help = 'seconds after which worker is killed' )
+    parser.add_argument( '--worker', metavar = 'JOB', help = 'run one build job, used by worker processes' )
+    options = parser.parse_args( args )
+
+    if options.worker:
+
+        # skip Maya exit cleanup, it can crash after successful build
+        os._exit( runWorker( options.worker ) )
+
+    if not options.manifest:
+
+        parser.error( 'manifest is required' )
+
+    reportDt = runBuilds( readManifest( options.manifest ), options.report_dir, options.workers,
+                          WorkerLauncher( options.mayapy ), options.retries, options.timeout )
+
+    sys.exit( 0 if reportDt['done'] == len( reportDt['assets'] ) else 1 )
+
+if __name__ == '__main__':
+
+    main()
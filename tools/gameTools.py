@@ -13,9 +13,13 @@ import maya.mel as mm
 from utils import joint
 from utils import name
 from utils import skinCluster
+from utils import weightsConditioner
+from utils import dagIndex
 
 import bSkinSaver
 
+from base import rigRegistry
+
 def createGameJoints( skinnedObjects = [], gamePrefix = 'game_', baseRigData = None ):
     
     '''
@@ -84,11 +88,16 @@ def getSkinnedJoints( skinnedObjects ):
 
 def _gameJointsSetup( scJoints, gamePrefix, parentGrp ):
     
+    # parents are read from DAG index before any joint is made
+    index = dagIndex.get()
+    scJntParents = {}
+    
     for scJnt in scJoints:
         
         # check if parent if already in the list (need this to be able to reconstruct the hierarchy)
-        scJntParent = mc.listRelatives( scJnt, p = True )[0]
-        if not scJntParent in scJoints and mc.nodeType( scJntParent ) == 'joint':
+        scJntParent = index.getParent( scJnt )
+        scJntParents[ scJnt ] = scJntParent
+        if not scJntParent in scJoints and index.getType( scJntParent ) == 'joint':
             scJoints.append( scJntParent )
     
     gameParentList = []
@@ -96,7 +105,7 @@ def _gameJointsSetup( scJoints, gamePrefix, parentGrp ):
     
     # create the game joint , get their parent and his driver joint
     for scJnt in scJoints:
-        scJntParent = mc.listRelatives( scJnt, p = True )[0]
+        scJntParent = scJntParents[ scJnt ]
         gameJntParent = gamePrefix + scJntParent
         
         gameJnt = mc.duplicate( scJnt, n = gamePrefix + scJnt, po = True )[0]
@@ -106,6 +115,7 @@ def _gameJointsSetup( scJoints, gamePrefix, parentGrp ):
             gameParentList.append( [ gameJnt, gameJntParent, scJnt ] )
         
         fullGamejoints.append( gameJnt )
+        rigRegistry.register( gameJnt, 'joint', module = 'game', role = name.removeSide( name.removeSuffix( scJnt ) ), side = name.getSide( scJnt ) )
         
     #  parent game joint in proper hierarchy and constraint from driver joint
     for gameParent in gameParentList:
@@ -130,19 +140,24 @@ def _gameJointsSetup( scJoints, gamePrefix, parentGrp ):
     # clean extra transforms under parent group
     parentGrpChilds = mc.listRelatives( parentGrp, c = True )
 
-def saveGameSkinClusterWeights( weightsPath, skinnedObjs = None ):
+def saveGameSkinClusterWeights( weightsPath, skinnedObjs = None, maxInfluences = 4, pruneEpsilon = 0.001 ):
     
     """
     save skinCluster weights for game rig in custom folder
     this fuction is for non-procedurally rigs or bought rigs
     :param weightsPath: str, path to save out the weights
     :param skinnedObjs: list( str ), list of skinned objects to save weights from
-    :retun None
+    :param maxInfluences: int, saved weights are pruned and capped to this number of influences per vertex, None to skip,
+                          skinClusters in scene are not changed
+    :param pruneEpsilon: float, weights below this value are not saved
+    :retun dict, conditioning statistics for each skinned object
     """
     
+    conditionStats = {}
+    
     if not skinnedObjs:
         
-        return
+        return conditionStats
     
     skinPath = weightsPath+ '\\'
     
@@ -156,18 +171,22 @@ def saveGameSkinClusterWeights( weightsPath, skinnedObjs = None ):
         
         fullSkinPath = skinPath + geo + '.skinwt'
         
-        bSkinSaver.bSaveSkinValues(fullSkinPath)
+        bSkinSaver.bSaveSkinValues( fullSkinPath, maxInfluences = maxInfluences, pruneEpsilon = pruneEpsilon, conditionStats = conditionStats )
         
         print "for: %s \n" % geo
     
     mc.select(cl = True)       
     
-def loadGameSkinClusterWeights( weightsPath ):
+    return conditionStats
+    
+def loadGameSkinClusterWeights( weightsPath, maxInfluences = 4, pruneEpsilon = 0.001 ):
     
     """
     load skinCluster weights for the game rig
     this fuction is for non-procedurally rigs or bought rigs
     :param weightsPath: str, path to load up the weights
+    :param maxInfluences: int, loaded weights are pruned and capped to this number of influences per vertex, None to skip
+    :param pruneEpsilon: float, weights below this value are removed after load
     """
     
     skinPath = weightsPath
@@ -187,6 +206,18 @@ def loadGameSkinClusterWeights( weightsPath ):
             
             mc.rename( skinClusterName, loadedGeo + '_skc' )
         
-        except:
-            '# not able to load {} .skip'.format( wtFile )
+        except ( IOError, RuntimeError ), e:
+            print '# not able to load {} .skip: {}'.format( wtFile, str( e ).strip() )
+            continue
+        
+        # game asset is not saved with unconditioned weights
+        if maxInfluences:
+            
+            try:
+                statsDt = skinCluster.conditionWeights( loadedGeo + '_skc', maxInfluences, pruneEpsilon )
+            
+            except Exception, e:
+                raise Exception( '# not able to condition skin weights of {}: {}'.format( loadedGeo, str( e ).strip() ) )
+            
+            print weightsConditioner.formatStats( loadedGeo, statsDt )
 
@@ -11,24 +11,35 @@ from PySide2 import QtWidgets
 
 from shiboken2 import wrapInstance
 
+from base import rigRegistry
+
 
 widthSize = 150
 heightSize = 80
 
 
-def switch( pvOffset = 0.8 ):
+def switch( pvOffset = 0.8, items = None ):
+    
+    '''
+    :param items: list( str ), toggle controls to switch, selected transforms by default, see getSnapControls()
+    '''
     
     # define items
     ikFkAttr = 'fkIkSnapable'
     fkControls = []
     
+    # snapable controls are taken from registries of all rigs in scene,
+    # controls of rigs without registry or with other names (e.g. referenced rigs) are checked by attribute
+    snapControls = set( getSnapControls() )
+    
     # list all the selected items
-    itemsSelection = mc.ls( sl = True, type = 'transform' )
+    itemsSelection = items or mc.ls( sl = True, type = 'transform' )
     for item in itemsSelection:
         
         # check if selection is a snapable control
-        userAttrs = mc.listAttr( item, ud = True )
-        if not ikFkAttr in userAttrs:
+        isSnapable = item in snapControls or ikFkAttr in ( mc.listAttr( item, ud = True ) or [] )
+        
+        if not isSnapable:
             print '# No {} attribute found in {} ... skipping '.format( ikFkAttr, item )
             continue
         
@@ -118,6 +129,21 @@ def switch( pvOffset = 0.8 ):
             '''
             mc.setAttr( item + '.fkIk', 0 )
             
+def getSnapControls( side = None ):
+    
+    """
+    get ik fk snapable toggle controls from registries of all rigs in scene
+    :param side: str, optional, 'l', 'r' or ''
+    :return list( str ), toggle controls, empty list if no rig has registry
+    """
+    
+    snapControls = []
+    
+    for registry in rigRegistry.loadAll():
+        snapControls.extend( registry.query( nodeType = 'ikFkSnap', side = side ) )
+    
+    return snapControls
+
 def _findPoleVectorPosition( topJnt, midJnt, endJnt, posOffset = 2 ):
     
     """
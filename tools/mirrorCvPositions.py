@@ -2,36 +2,31 @@
 Module to mirror Cvs position ... useful to mirror controls
 '''
 
-import maya.cmds as mc
-import maya.OpenMaya as om
+from utils import shapeMirror
 
 
 def mirrorCvPositions( cvs, mode = 'x' ):
     
     '''
     mirror positions of CVs based on their names: flipping left to right and right to left
+    positions of all CVs are taken first and set with one call per shape, see utils.shapeMirror
     
     :param cvs: list(str), list of CVs (usually taken using mc.ls( sl=1, fl=1 )
     :param mode: str, flip axis, "x" by default as PF creatures are facing Z+
-    :return: None
+    :return: dict, report from shapeMirror.mirrorComponents()
     '''
     
-    for cv in cvs:
-        
-        cvShortLeft = str( cv ).split( '|' )[-1]
-        cvShortRight = ''
-        
-        if cvShortLeft.startswith( 'l_' ): cvShortRight = 'r_' + cvShortLeft[2:]
-        elif cvShortLeft.startswith( 'r_' ): cvShortRight = 'l_' + cvShortLeft[2:]
-        
-        else:
-            
-            om.MGlobal_displayWarning( 'utils.mirrorCvPositions: cannot find mirror for ' + cvShortLeft + ', doesn`t start with L_ or R_, idle...' )
-            continue
-        
-        pos = mc.xform( cvShortLeft, q = 1, ws = 1, t = 1 )
-        
-        
-        if mode == 'x': mc.xform( cvShortRight, ws = 1, t = [ pos[0] * ( -1 ), pos[1], pos[2] ] )
-        if mode == 'z': mc.xform( cvShortRight, ws = 1, t = [ pos[0], pos[1], pos[2] * ( -1 ) ] )
+    return shapeMirror.mirrorComponents( cvs, axis = mode )
 
+def mirrorControlShapes( objects = [], sourceSide = 'l', mode = 'x' ):
+    
+    '''
+    mirror whole shapes of controls from one side to the other, e.g. all left control shapes of rig to right side
+    
+    :param objects: list(str), controls to mirror, if empty, all curve objects in scene are used
+    :param sourceSide: str, 'l' or 'r', side of controls with shapes to mirror
+    :param mode: str, flip axis, "x" by default as PF creatures are facing Z+
+    :return: dict, report with 'mirrored', 'unmatched' and 'cvMismatch' lists
+    '''
+    
+    return shapeMirror.mirrorShapes( objects, sourceSide = sourceSide, axis = mode )
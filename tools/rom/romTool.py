@@ -17,6 +17,8 @@ from collections import OrderedDict
 import pymel.core as pm
 import maya.cmds as cmds
 
+from base import rigRegistry
+
 ROM_PATH = r'C:\Users\juanp\OneDrive\Documents\maya\pdb_rigLib\tools\rom\templates'
 TEMPLATE_NAME = 'biped'
 NAME_CONVENTION = 'mgear'
@@ -29,6 +31,7 @@ class RomFragment():
                  val_list=[[90], [90], [90]],
                  special_attr=[],
                  special_val=[],
+                 registry=None,
                  ):
 
         # --- args
@@ -37,6 +40,7 @@ class RomFragment():
         self.val_list = val_list
         self.special_attrs = special_attr
         self.special_vals = special_val
+        self.registry = registry
 
         # --- vars
         self.control_opposite = None
@@ -65,6 +69,13 @@ class RomFragment():
 
     def _get_control_opposite(self):
 
+        # --- rigs with registry have their opposite controls indexed, see base.rigRegistry
+        if self.registry and self.registry.has(self.control.name()):
+            opp_control = self.registry.getOpposite(self.control.name())
+            if opp_control:
+                self.control_opposite = pm.PyNode(opp_control)
+            return
+
         side = self._get_side(self.control)
         if side == 'C': return
         opp_side = 'R' if side == 'L' else 'L'
@@ -245,6 +256,7 @@ class RomTool():
         self.rom_dir = None
         self.json_ext = '.json'
         self.components_sorted = list()
+        self.registry = rigRegistry.fromScene()  # registry of rig in scene, None for rigs without registry
 
         # hardcoded components list to read components in a custom order
         self.components_order = ['leg', 'spine', 'arm', 'hand', 'neck']
@@ -337,7 +349,7 @@ class RomTool():
 
             self.components_dic[component][frag]['val_list'] = fixed_list
 
-            fragment = RomFragment(**self.components_dic[component][frag])
+            fragment = RomFragment(registry=self.registry, **self.components_dic[component][frag])
             fragment.set_mirror_anim(mirror_anim)
             fragment.set_anim(current_frame=self.current_frame, step_frame=self.step_frame, clean_keys=False)
 
@@ -364,7 +376,7 @@ class RomTool():
 
             for i, frag in enumerate(self.components_dic[component].keys()):
                 print('--->', frag)
-                fragment = RomFragment(**self.components_dic[component][frag])
+                fragment = RomFragment(registry=self.registry, **self.components_dic[component][frag])
                 fragment.set_mirror_anim(mirror_anim)
                 fragment.set_anim(current_frame=self.current_frame, step_frame=self.step_frame)
                 self.current_frame = fragment.current_frame
@@ -1,28 +1,184 @@
 '''
 save / load position for Cvs
 @category Rigging
-@tags cv position save load xml
+@tags cv position save load xml json
 
-Saving and loading CV positions using XML files
+Saving and loading CV positions using compact JSON lines files (.cvpos) or XML files,
+positions of each shape are taken with one API call and set with one API call when undo is off (rig builds)
 '''
 
 import os.path
+import json
 import string
-from xml.dom import minidom
 from xml.dom.minidom import Document
+from xml.etree import cElementTree
+
+import numpy as np
 
 import maya.cmds as mc
 import maya.mel as mel
+import maya.api.OpenMaya as om2
 
 from utils import name
+from utils import shape
+from utils import apiwrap
+
+compactExt = '.cvpos'
+xmlExt = '.xml'
+compactFormatVersion = 1
+positionsPrecision = 6
+
+def getCompactPath( path ):
+    
+    '''
+    get path of compact shapes file for given shapes file path
+    
+    :param path: str, shapes file path, e.g. '/u/jbk/shapedata/nicecurves.xml'
+    :return: str, path with compact file extension, e.g. '/u/jbk/shapedata/nicecurves.cvpos'
+    '''
+    
+    return os.path.splitext( path )[0] + compactExt
+
+def findShapesFile( path ):
+    
+    '''
+    find existing shapes file, compact file is used first and then given path (e.g. older XML file)
+    
+    :param path: str, shapes file path with any extension
+    :return: str, existing file path, None if no file was found
+    '''
+    
+    for filePath in [ getCompactPath( path ), path ]:
+        
+        if os.path.exists( filePath ):
+            
+            return filePath
+    
+    return None
+
+def _getObjectList( objects ):
+    
+    # objects with more shapes are saved as separate shapes
+    objectList = []
+    
+    for obj in objects:
+        shapesList = mc.listRelatives( obj, s = 1 )
+        
+        if shapesList and len( shapesList ) > 1:
+            
+            objectList.extend( shapesList )
+        else:
+            
+            objectList.extend( [ obj ] )
+    
+    return objectList
+
+def _getShapeName( obj ):
+    
+    shapesList = mc.listRelatives( obj, s = 1, f = 1 )
+    
+    if not shapesList:
+        
+        return obj
+    
+    return shapesList[0]
+
+def getPositions( obj ):
+    
+    '''
+    get world positions of all CVs (points) of object shape with single API call,
+    points are in the same order as components listed with mc.ls( obj + '.cv[*]', fl = 1 )
+    
+    :param obj: str, transform or shape
+    :return: list( list( float ) ), [x, y, z] position of each point
+    '''
+    
+    shapePath = apiwrap.api2_getDagPath( _getShapeName( obj ) )
+    points = om2.MItGeometry( shapePath ).allPositions( om2.MSpace.kWorld )
+    
+    return [ [ p.x, p.y, p.z ] for p in points ]
+
+def resamplePositions( positions, count, closed = False ):
+    
+    '''
+    resample positions of points to different number of points with linear interpolation along points,
+    used when saved shape has different number of CVs than current shape
+    
+    :param positions: list( list( float ) ), [x, y, z] position of each point
+    :param count: int, number of points to get
+    :param closed: bool, if True, points are interpolated around including segment from last point to first
+    :return: list( list( float ) ), [x, y, z] position of each resampled point
+    '''
+    
+    points = np.asarray( positions, dtype = np.float64 ).reshape( -1, 3 )
+    
+    if points.shape[0] == count or not points.shape[0]:
+        
+        return points.tolist()
+    
+    if closed:
+        
+        points = np.vstack( [ points, points[:1] ] )
+        targetParams = np.arange( count ) / float( count )
+    
+    else:
+        
+        targetParams = np.linspace( 0.0, 1.0, count )
+    
+    sourceParams = np.linspace( 0.0, 1.0, points.shape[0] )
+    resampled = np.column_stack( [ np.interp( targetParams, sourceParams, points[:, axis] ) for axis in range( 3 ) ] )
+    
+    return resampled.tolist()
+
+def setPositions( obj, positions, resample = True, undoable = None ):
+    
+    '''
+    set world positions of CVs (points) of object shape, see utils.shape.setPointPositions()
+    
+    NOTE: with undo queue on positions are set with one undoable setAttr, otherwise with single API call
+    
+    :param obj: str, transform or shape
+    :param positions: list( list( float ) ), [x, y, z] position of each point, None for points which should keep position
+    :param resample: bool, if number of positions is different from number of points, positions are resampled,
+                    otherwise only first points get positions and other points keep their positions
+    :param undoable: bool, optional, force undoable or API path, by default undoable when undo queue is on
+    :return: None
+    '''
+    
+    shapeName = _getShapeName( obj )
+    pointsCount = om2.MItGeometry( apiwrap.api2_getDagPath( shapeName ) ).count()
+    
+    if resample and len( positions ) != pointsCount:
+        
+        closed = mc.nodeType( shapeName ) == 'nurbsCurve' and mc.getAttr( shapeName + '.form' ) != 0
+        positions = resamplePositions( [ pos for pos in positions if pos is not None ], pointsCount, closed )
+    
+    indices = [ i for i in range( min( pointsCount, len( positions ) ) ) if positions[i] is not None ]
+    
+    if not indices:
+        
+        return
+    
+    shape.setPointPositions( shapeName, [ positions[i] for i in indices ], indices, undoable )
 
+def _getDisplayValues( obj ):
+    
+    shapes = mc.listRelatives( obj, s = 1 )
+    
+    if not shapes: shapes = [obj]
+    
+    ove = 1 if mc.getAttr( shapes[0] + '.ove' ) == 1 else 0
+    
+    return ove, mc.getAttr( shapes[0] + '.ovc' )
 
 def save( path, objects ):
     
     '''
     Save positions of CVs of nurbs curve shapes, later could support other types
+    positions of each shape are taken with one API call and files are written object by object,
+    XML file is written if path has .xml extension, otherwise compact JSON lines file
     
-    :param path:str, file path, e.g. '/u/jbk/shapedata/nicecurves.xml'
+    :param path:str, file path, e.g. '/u/jbk/shapedata/nicecurves.cvpos'
     :param objects: list( str ) names of objects (curves) to save CV positions
     :return: None
     '''
@@ -35,22 +191,42 @@ def save( path, objects ):
         
         raise Exception( 'directory doesnt exist, cannot save shapes, path: %s' % pathDir )
     
+    if path.lower().endswith( xmlExt ):
+        
+        _saveXml( path, objects )
+        return
+    
+    fileobj = open( path, 'w' )
+    fileobj.write( json.dumps( { 'format': 'cvPositions', 'version': compactFormatVersion } ) + '\n' )
+    
+    # one line per object, so file can be read object by object too
+    for o in _getObjectList( objects ):
+        
+        ove, ovc = _getDisplayValues( o )
+        
+        objectDt = {
+                    'name': name.short( o ),
+                    'type': mc.nodeType( _getShapeName( o ) ),
+                    'points': [ round( v, positionsPrecision ) for pos in getPositions( o ) for v in pos ],
+                    'ove': ove,
+                    'ovc': ovc
+                    }
+        
+        fileobj.write( json.dumps( objectDt, separators = ( ',', ':' ) ) + '\n' )
+    
+    fileobj.close()
+
+def _saveXml( path, objects ):
+    
+    '''
+    Save positions of CVs into XML file
+    '''
+    
     doc = Document()
     xml = doc.createElement( 'SHAPE_CV_POSITIONS' )
     doc.appendChild( xml )
     
-    objectList = []
-    
-    for obj in objects:
-        shapesList = mc.listRelatives( obj, s = 1 )
-        
-        if len( shapesList ) > 1:
-            
-            objectList.extend( shapesList )
-        else:
-            
-            objectList.extend( [ obj ] )
-            
+    objectList = _getObjectList( objects )
     
     for o in objectList:
         
@@ -81,10 +257,7 @@ def save( path, objects ):
         
         
         
-        cvs = mc.ls( ( o + '.cv[*]' ), l = 1, fl = 1 )
-        
-        for i in range( len( cvs ) ):
-            pos = mc.xform( cvs[i], q = 1, ws = 1, t = 1 )
+        for i, pos in enumerate( getPositions( o ) ):
             cvdoc.setAttribute( ( 'cv' + str( i ) ), ( str( pos[0] ) + ' ' + str( pos[1] ) + ' ' + str( pos[2] ) ) )
         
         # override color
@@ -92,26 +265,14 @@ def save( path, objects ):
         displayDoc = doc.createElement( 'display' )
         objdoc.appendChild( displayDoc )
         
-        shapes = mc.listRelatives( o, s = 1 )
-        
-        if not shapes: shapes = [o]
-        
-        if isinstance( shapes, list ) and mc.getAttr( shapes[0] + '.ove' ) == 1:
-            
-            displayDoc.setAttribute( 'ove', '1' )
-            displayDoc.setAttribute( 'ovc', str( mc.getAttr( shapes[0] + '.ovc' ) ) )
-        
-        else:
-            
-            displayDoc.setAttribute( 'ove', '0' )
-            displayDoc.setAttribute( 'ovc', str( mc.getAttr( shapes[0] + '.ovc' ) ) )
-            
-            
+        ove, ovc = _getDisplayValues( o )
+        displayDoc.setAttribute( 'ove', str( ove ) )
+        displayDoc.setAttribute( 'ovc', str( ovc ) )
     
     file = open( path, 'w' )
     pretty = doc.toprettyxml( indent = '     ' )
     file.write( pretty )
-    file.close
+    file.close()
 
 
 
@@ -119,8 +280,10 @@ def load( path, objects = [], loadColor = False, verbose = True ):
     
     '''
     Load positions of CVs of nurbs curve shapes, later could support other types
+    compact JSON lines files and older XML files are supported, file is read once into index by object name,
+    positions of each shape are set with setPositions() and resampled if shape has different number of CVs
     
-    :param path: str, file path, e.g. '/u/jbk/shapedata/nicecurves.xml'
+    :param path: str, file path, e.g. '/u/jbk/shapedata/nicecurves.cvpos'
     :param objects: list( str ), names of objects (curves) to load CV positions, if None is passed, all objects will be loaded 
     :return: None
     '''
@@ -131,42 +294,25 @@ def load( path, objects = [], loadColor = False, verbose = True ):
         
         raise Exception( 'path doesnt exist, cannot load shapes, path: %s' % path )
     
-    # check if should be passed only object or it relative shapes
+    shapesIndex = readShapesIndex( path )
     
-    objectList = []
+    # check if should be passed only object or it relative shapes
     
-    for obj in objects:
-        shapesList = mc.listRelatives( obj, s = 1 )
+    if objects:
         
-        if len( shapesList ) > 1:
-            
-            objectList.extend( shapesList )
-        else:
-            
-            objectList.extend( [ obj ] )
-            
-    objects = objectList
-    
-    # open xml file using minidom module
-    
-    doc = minidom.parse( path )
-    
-    objectEs = doc.getElementsByTagName( 'OBJECT' )
+        loadNames = [ name.short( o ) for o in _getObjectList( objects ) ]
     
-    objectShorts = []
-    
-    if objects:
+    else:
         
-        for o in objects:
-            
-            objectShorts.append( name.short( o ) )
+        loadNames = shapesIndex.keys()
     
-    for e in objectEs:
+    for objname in loadNames:
         
-        objname = e.getAttribute( 'name' )
+        objectDt = shapesIndex.get( objname )
         
-        if objects and not objname in objectShorts:
+        if not objectDt:
             
+            if verbose: print '# loading shapes. Object %s is not in shapes file, skipping' % objname
             continue
         
         if not mc.objExists( objname ):
@@ -174,47 +320,123 @@ def load( path, objects = [], loadColor = False, verbose = True ):
             if verbose: print '# loading shapes. Object %s doesn`t exist, skipping' % objname
             continue
         
-        compTyp = ''
-        
-        if( e.getAttribute( 'type' ) == 'nurbsCurve' ):
+        if objectDt['type'] != 'nurbsCurve' or not mc.objExists( objname + '.cv[*]' ):
             
-            compTyp = 'cv'
+            continue
+        
+        setPositions( objname, objectDt['positions'] )
         
-        if not mc.objExists( objname + '.' + compTyp + '[*]' ):
+        if loadColor and objectDt['ove'] == 1:
             
-            continue
+            shapes = mc.listRelatives( objname, s = 1 )
+            if not shapes: shapes = [objname]
+            
+            mc.setAttr( shapes[0] + '.ovc', objectDt['ovc'] )
+
+def readShapesIndex( path ):
+    
+    '''
+    read shapes file in one streaming pass into index of objects by name,
+    compact JSON lines files and older XML files are supported
+    
+    :param path: str, file path, e.g. '/u/jbk/shapedata/nicecurves.cvpos'
+    :return: dict, { object name: dict with 'name', 'type', 'positions', 'ove' and 'ovc' }
+    '''
+    
+    if path.lower().endswith( xmlExt ):
+        
+        objectRecords = _readXml( path )
+    
+    else:
+        
+        objectRecords = _readCompact( path )
+    
+    shapesIndex = {}
+    
+    for objectDt in objectRecords:
+        
+        shapesIndex[ objectDt['name'] ] = objectDt
+    
+    return shapesIndex
+
+def _readCompact( path ):
+    
+    '''
+    read compact JSON lines shapes file object by object
+    
+    :return: generator of dict, object info with 'name', 'type', 'positions', 'ove' and 'ovc'
+    '''
+    
+    fileobj = open( path, 'r' )
+    
+    try:
         
-        cvs = mc.ls( ( objname + '.' + compTyp + '[*]' ), l = 1, fl = 1 )
-        cvsE = e.getElementsByTagName( 'controlPoints' )[0]
+        headerDt = json.loads( fileobj.readline() )
         
-        for i in range( len( cvs ) ):
+        if headerDt.get( 'version', 0 ) > compactFormatVersion:
             
-            posStr = cvsE.getAttribute( 'cv' + str( i ) )
-            posList = string.split( posStr )
+            raise Exception( 'shapes file was saved with newer format version %s, path: %s' % ( headerDt['version'], path ) )
+        
+        for line in fileobj:
             
-            if not posList or len( posList ) < 3:
+            if not line.strip():
                 
                 continue
             
-            px = string.atof( posList[0] )
-            py = string.atof( posList[1] )
-            pz = string.atof( posList[2] )
+            objectDt = json.loads( line )
+            points = objectDt.pop( 'points' )
+            objectDt['positions'] = [ points[ i:i + 3 ] for i in range( 0, len( points ), 3 ) ]
             
-            mc.xform( objname + '.cv[' + str( i ) + ']', ws = 1, t = [px, py, pz] )
+            yield objectDt
+    
+    finally:
         
-        if loadColor:
+        fileobj.close()
+
+def _readXml( path ):
+    
+    '''
+    read older XML shapes file object by object with streaming parser
+    
+    :return: generator of dict, object info with 'name', 'type', 'positions', 'ove' and 'ovc'
+    '''
+    
+    for event, e in cElementTree.iterparse( path, events = ( 'end', ) ):
+        
+        if e.tag != 'OBJECT':
             
-            shapes = mc.listRelatives( objname, s = 1 )
-            if not shapes: shapes = [objname]
-            if isinstance( shapes, list ):
-                
-                displayE = e.getElementsByTagName( 'display' )[0]
-                oveVal = displayE.getAttribute( 'ove' )
-                ovcVal = displayE.getAttribute( 'ovc' )
-                ovcValI = string.atoi( ovcVal )
-                
-                if oveVal == '1': mc.setAttr( shapes[0] + '.ovc', ovcValI )
+            continue
+        
+        cvAttrs = e.find( 'controlPoints' ).attrib
+        
+        # missing or broken positions are None so their CVs keep positions
+        positions = [ None ] * len( cvAttrs )
+        
+        for attrName, attrValue in cvAttrs.items():
             
+            posList = string.split( attrValue )
             
+            if not attrName.startswith( 'cv' ) or not posList or len( posList ) < 3:
+                
+                continue
             
+            cvIndex = string.atoi( attrName[2:] )
             
+            if cvIndex < len( positions ):
+                
+                positions[ cvIndex ] = [ string.atof( posList[0] ), string.atof( posList[1] ), string.atof( posList[2] ) ]
+        
+        displayE = e.find( 'display' )
+        
+        objectDt = {
+                    'name': e.get( 'name' ),
+                    'type': e.get( 'type' ),
+                    'positions': positions,
+                    'ove': string.atoi( displayE.get( 'ove' ) or '0' ),
+                    'ovc': string.atoi( displayE.get( 'ovc' ) or '0' )
+                    }
+        
+        # finished elements are cleared so whole document is not kept in memory
+        e.clear()
+        
+        yield objectDt
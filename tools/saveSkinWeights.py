@@ -24,6 +24,7 @@ from utils import skinCluster
 from utils import shape
 from utils import apiwrap
 from utils import surface
+from utils import skinWeightsFile
 
 
 deformedSuffix = 'Deformed'  # this refers to suffix which Maya adds to deformed shapes of referenced transforms
@@ -45,7 +46,10 @@ def printMissingInfs_printonly( missingInfs ):
 def saveBlendWeights( filePath, deformerNode ):
     
     '''
-    save skinCluster blend weights array attribute values
+    save skinCluster blend weights array attribute values, all values are read with single call
+    
+    NOTE: with binary extension (.wtsb) only non-zero values are stored in compact binary file,
+    otherwise JSON file with value per vertex index is written
     
     @param filePath: name of file path made of folder and filename, extension is optional ('/dir1/dir2/dir3/muscleA_wire')
     @type filePath: str
@@ -62,28 +66,19 @@ def saveBlendWeights( filePath, deformerNode ):
     # read weights from deformer node
     
     deformerType = mc.nodeType( deformerNode )
+    blendValues = skinCluster.getBlendWeightsArray( deformerNode )
     
-    weightsDt = { 'deformerName': deformerNode, 'deformerType':deformerType }
-    wlistIndeces = mc.getAttr( deformerNode + '.blendWeights', multiIndices = 1 )
-    
-    if not wlistIndeces:
+    if fileextension == skinWeightsFile.blendWeightsBinaryExt:
         
-        wlistIndeces = []
-    
-    weightsListDt = {}
-    valuesDt = {}
+        return skinWeightsFile.writeBlendWeights( filePath, deformerNode, blendValues, deformerType )
     
-    for idx in wlistIndeces:
-        
-        wvalue = mc.getAttr( deformerNode + '.blendWeights[%d]' % idx )
-        valuesDt[ idx ] = wvalue
-    
-    weightsDt['weights'] = valuesDt
+    weightsDt = { 'deformerName': deformerNode, 'deformerType':deformerType }
+    weightsDt['weights'] = dict( enumerate( blendValues.tolist() ) )
     
     # write file    
     
-    fileobj = open( filePath, mode = 'w' )    
-    json.dump( weightsDt, fileobj, sort_keys = True, indent = 4, separators = ( ',', ': ' ) )
+    fileobj = open( filePath, mode = 'w' )
+    json.dump( weightsDt, fileobj, sort_keys = True )
     fileobj.close()
     
     return filePath
@@ -91,13 +86,14 @@ def saveBlendWeights( filePath, deformerNode ):
 def loadBlendWeights( filePath, deformerNode = '', verbose = True ):
     
     '''
-    save deformer Weights array attribute values, deformer node needs to be provided
+    load skinCluster blend weights array attribute values from JSON or binary (.wtsb) file,
+    all values are set with single call
     
     @param filePath: name of file path made of folder and filename, if no extension, default one will be used ('/dir1/dir2/dir3/muscleA_wire')
     @type filePath: str
     @param deformerNode: optional, name of deformer node (name is written in the file, but this can work as override)
     @type deformerNode: str
-    @return: None
+    @return: str, name of deformer node with loaded values
     '''
     
     # check file
@@ -106,10 +102,21 @@ def loadBlendWeights( filePath, deformerNode = '', verbose = True ):
     
     # read from file
     
-    fileobj = open( filePath, mode = 'rb' )
-    fileobjStr = fileobj.read()
-    weightsDt = json.loads( fileobjStr )
-    fileobj.close()
+    if fileextension == skinWeightsFile.blendWeightsBinaryExt:
+        
+        weightsDt, blendValues = skinWeightsFile.readBlendWeights( filePath )
+        blendIndices = None
+    
+    else:
+        
+        fileobj = open( filePath, mode = 'rb' )
+        fileobjStr = fileobj.read()
+        weightsDt = json.loads( fileobjStr )
+        fileobj.close()
+        
+        valuesDt = weightsDt['weights']
+        blendIndices = [ int( idx ) for idx in valuesDt.keys() ]
+        blendValues = valuesDt.values()
     
     # check info from file
     
@@ -126,13 +133,128 @@ def loadBlendWeights( filePath, deformerNode = '', verbose = True ):
     
     # set values to deformer node
     
-    valuesDt = weightsDt['weights']
+    skinCluster.setBlendWeightsArray( deformerNode, blendValues, blendIndices )
+    
+    return deformerNode
+        
+def saveSkinClusterWeights( filePath, skinMesh, sparse = True, savePositions = False, quantizeBits = None ):
+    
+    '''
+    save skinCluster weights of skinned object into binary weights file,
+    with journal extension (.skinwj) only vertices changed since last save are appended to the file
+    
+    :param filePath: str, name of file path made of folder and filename, extension is optional ('/dir1/dir2/dir3/body_geo')
+    :param skinMesh: str, skinned object
+    :param sparse: bool, save only non-zero weights with their influence indices (CSR), otherwise save full weights array
+    :param savePositions: bool, save points positions and topology hash so weights can be remapped to changed topology,
+                          positions take 12 bytes per point, more than sparse or quantized weights
+    :param quantizeBits: int, optional, save weights as 8 or 16 bit fixed point values, loaded weights are normalized
+    :return: str, filePath with extension ('/dir1/dir2/dir3/body_geo.skinwb'), None if object is not skinned
+    '''
+    
+    # check file
+    
+    filePathname, fileextension = os.path.splitext( filePath )
+    if not fileextension: filePath += skinWeightsFile.binaryExt
+    
+    skinClusterNode = skinCluster.getRelated( skinMesh )
+    
+    if not skinClusterNode:
+        
+        print '# "{}" has no skinCluster, skipping weights save'.format( skinMesh )
+        return
+    
+    influences, weightsArray = skinCluster.getWeightsArray( skinClusterNode )
     
-    for idx, wvalue in valuesDt.items():
+    skinWeights = skinWeightsFile.SkinWeights( name.removeNamespace( skinMesh ), influences, weightsArray )
+    
+    if savePositions:
+        
+        skinWeights.positions, skinWeights.topologyHash = skinCluster.getRestInfo( skinClusterNode )
+    
+    if skinWeightsFile.isJournalFile( filePath ):
+        
+        skinWeightsFile.writeJournal( filePath, [ skinWeights ] )
+        
+    else:
+        
+        deviationReport = {}
+        skinWeightsFile.writeBinary( filePath, [ skinWeights ], sparse = sparse, quantizeBits = quantizeBits, deviationReport = deviationReport )
+        
+        if quantizeBits:
+            
+            print '# "{}" weights quantized to {} bits, max deviation: {}'.format( skinMesh, quantizeBits, deviationReport[ skinWeights.objectName ] )
+    
+    return filePath
+
+def loadSkinClusterWeights( filePath, skinMesh = '' ):
+    
+    '''
+    load skinCluster weights from binary (dense or sparse), journal or text weights file,
+    skinCluster is made if needed and missing influences are added to existing skinCluster
+    
+    :param filePath: str, name of file path made of folder and filename, if no extension, default one will be used ('/dir1/dir2/dir3/body_geo')
+    :param skinMesh: str, optional, object to load weights on (name is written in the file, but this can work as override)
+    :return: list( str ), names of skinClusters with loaded weights
+    '''
+    
+    # check file
+    filePathname, fileextension = os.path.splitext( filePath )
+    if not fileextension: filePath += skinWeightsFile.binaryExt
+    
+    loadedSkinClusters = []
+    
+    for skinWeights in skinWeightsFile.read( filePath ):
+        
+        targetObj = skinMesh if skinMesh else skinWeights.objectName
+        
+        if not mc.objExists( targetObj ):
+            
+            print '# could not find "{}". skipping this load'.format( targetObj )
+            continue
+        
+        missingInfs = [ inf for inf in skinWeights.influences if not mc.objExists( inf ) ]
+        
+        if missingInfs:
+            
+            printMissingInfs_printonly( missingInfs )
+            continue
+        
+        skinClusterNode = skinCluster.getRelated( targetObj )
+        
+        if not skinClusterNode:
+            
+            scName = name.removeNamespace( targetObj ) + '_skc'
+            skinClusterNode = mc.skinCluster( skinWeights.influences, targetObj, tsb = 1, n = scName )[0]
         
-        idxInt = int( idx )
-        mc.setAttr( '%s.blendWeights[%d]' % ( deformerNode, idxInt ), wvalue )
+        if _setSkinClusterWeights( skinClusterNode, skinWeights ):
+            
+            loadedSkinClusters.append( skinClusterNode )
+    
+    return loadedSkinClusters
+
+def _setSkinClusterWeights( skinClusterNode, skinWeights ):
+    
+    '''
+    add influences missing on skinCluster and set all weights with single API call
+    
+    :param skinClusterNode: str, name of skinCluster
+    :param skinWeights: skinWeightsFile.SkinWeights, weights to set
+    :return: bool, True if weights were set
+    '''
+    
+    sceneInfs = skinCluster.getInfluenceNames( skinClusterNode )
+    addInfs = [ inf for inf in skinWeights.influences if inf not in sceneInfs ]
+    
+    if addInfs:
         
+        mc.skinCluster( skinClusterNode, e = 1, addInfluence = addInfs, weight = 0 )
+        sceneInfs = skinCluster.getInfluenceNames( skinClusterNode )
+    
+    influenceIndices = [ sceneInfs.index( inf ) for inf in skinWeights.influences ]
+    
+    return skinCluster.setWeightsArray( skinClusterNode, influenceIndices, skinWeights.weights, skinWeights.positions, skinWeights.topologyHash )
+
 def saveNgSkinWeights( filePath, skinMesh ):
     """
     Save NG skin weights using ngSkinTools.importExport API 
@@ -169,18 +291,17 @@ def saveNgSkinWeights( filePath, skinMesh ):
 def saveParallelWeights( filePath, skinMesh = '' ):
     
     """
-    Save parallel skin clusters into given file path
-    NOTE:  NG  export API only exports the first skin cluster in the deformation order so
-    it the script should be looping through all the skin clusters changing the deformation
-    order and then exporting it individually 
-    
-    :param filePath: str, file path including file name and extension to save the skin info
-    :param skinMesh: pyNode, mesh with the NG skinning info attached
-    :return None 
+    Save all parallel skin clusters of the mesh into one binary weights file,
+    weights of each skin cluster are read directly with single API call so deformation order
+    doesn't need to be changed, skin clusters are written in their deformation order
+    NOTE: only skin weights are saved, NG skin layers are not part of this file
+    
+    :param filePath: str, folder path to save the skin info, file name is made from skinMesh name
+    :param skinMesh: pyNode, mesh with the parallel skin clusters attached
+    :return str, saved file path, None if mesh has no skin clusters
     """
-    # check if skinMesh is "mesh" type , NG only works with mesh
-    if skinMesh.getShapes( noIntermediate = True )[0].nodeType() != 'mesh':
-        pm.error( '# "{}" must be a transform with "mesh" type object shape'.format( skinMesh ) )
+    
+    skinMesh = pm.PyNode( skinMesh )
     
     # get all the skin clusters attached to the mesh
     skinClusters = skinCluster.getMultipleRelated( skinMesh )
@@ -189,44 +310,22 @@ def saveParallelWeights( filePath, skinMesh = '' ):
         print '# No skin clusters attached to "{}".Skipping'.format( skinMesh )
         return
     
-    # directory to hold all the skin clusters info
-    infoDt = {}
-    skcFullPathList = []
-        
-    # loop through each skin cluster changing the deformation order to proper export
+    skinWeightsList = []
     
-    for i, skc in enumerate(skinClusters):
-        
-        # create skin file name and extend it to the file path
-        fileName = skc.name() + jsonExt
-        skcFullPath = filePath + fileName
-        
-        # update skcFullPath
-        skcFullPathList.append( skcFullPath )
+    for skc in skinClusters:
         
-        # make current skin the first one in the deformation order
-        # create a new copy of the original skin cluster list
-        skinClustersCopy = skinClusters[:] # creates a copy of the skinCluster list without being linked 
-        currentSkc = skinClustersCopy.pop(i)
+        influences, weightsArray = skinCluster.getWeightsArray( skc.name() )
         
-        for idx in range( len( skinClustersCopy ) ):
-            pm.reorderDeformers( currentSkc.name(), skinClustersCopy[idx].name(), skinMesh.getShapes()[0].name() )
+        skinWeights = skinWeightsFile.SkinWeights( skinMesh.name(), influences, weightsArray )
+        skinWeights.deformerName = skc.name()
+        skinWeightsList.append( skinWeights )
     
-        saveNgSkinWeights( skcFullPath, skinMesh )
+    parallelPath = '{}{}_parallelSkin{}'.format( filePath, skinMesh.name(), skinWeightsFile.binaryExt )
+    skinWeightsFile.writeBinary( parallelPath, skinWeightsList, sparse = True )
     
-    # create info file wich will be holding the skin clusters deformation order
-    # and associated skin clusters to the skinMesh
-    infoPath = '{}{}_parallelSkin{}'.format( filePath, skinMesh.name(), parallelInfoExt )
+    print '# parallel skin weights of {} for "{}" saved in:\n    {}'.format( [ skc.name() for skc in skinClusters ], skinMesh, parallelPath )
     
-    infoDt['skcDeformOrder'] = [skc.name() for skc in skinClusters]
-    infoDt['skcFullPath'] = skcFullPathList
-    infoDt['skinMesh'] = skinMesh.name()
-    
-    # save info file
-    fileObj = open( infoPath, mode = 'w' )
-    json.dump( infoDt, fileObj )
-    fileObj.close()
-    print infoDt
+    return parallelPath
 
 def loadNgSkinWeights( filePath ):
     '''
@@ -262,15 +361,74 @@ def loadNgSkinWeights( filePath ):
     print '# NG skin weights and data assigned to "{}"'.format( skinMesh )
         
 def loadParallelWeights( filePath ):
+    
+    '''
+    load parallel skin clusters weights from one binary file saved with saveParallelWeights(),
+    missing skin clusters are made from last to first in saved deformation order so no reordering is needed,
+    weights of each skin cluster are set directly with single API call
+    
+    NOTE: older info files (.info) with NG skin files per skin cluster are still loaded with NG skin api
+    
+    :param filePath: str, file path, if no extension, binary weights file is used
+    :return: list( str ), names of skin clusters with loaded weights
+    '''
+    
+    # check file
+    filePathname, fileextension = os.path.splitext( filePath )
+    if not fileextension: filePath += skinWeightsFile.binaryExt
+    
+    if filePath.endswith( parallelInfoExt ):
+        
+        return _loadParallelNgWeights( filePath )
+    
+    skinWeightsList = skinWeightsFile.readBinary( filePath )
+    skinMesh = skinWeightsList[0].objectName
+    skcDeformOrder = [ skinWeights.deformerName for skinWeights in skinWeightsList ]
+    
+    # check if the target mesh exists , if not just skip this load
+    if not mc.objExists( skinMesh ):
+        print '# could not find "{}". skipping this load'.format( skinMesh )
+        return []
+    
+    missingInfs = [ inf for skinWeights in skinWeightsList for inf in skinWeights.influences if not mc.objExists( inf ) ]
+    
+    if missingInfs:
+        printMissingInfs_printonly( sorted( set( missingInfs ) ) )
+        return []
+    
+    existingSkinClusters = [ skc.name() for skc in skinCluster.getMultipleRelated( pm.PyNode( skinMesh ) ) or [] ]
+    
+    # new parallel skin cluster is made first in deformation order, so making them from the last one keeps saved order
+    for skinWeights in reversed( skinWeightsList ):
+        
+        if skinWeights.deformerName not in existingSkinClusters:
+            
+            skinCluster.createParallelSkinCluster( pm.PyNode( skinMesh ), skinWeights.deformerName, skinWeights.influences )
+    
+    loadedSkinClusters = []
+    
+    for skinWeights in skinWeightsList:
+        
+        if _setSkinClusterWeights( skinWeights.deformerName, skinWeights ):
+            
+            loadedSkinClusters.append( skinWeights.deformerName )
+    
+    sceneDeformOrder = [ skc.name() for skc in skinCluster.getMultipleRelated( pm.PyNode( skinMesh ) ) if skc.name() in skcDeformOrder ]
+    
+    if sceneDeformOrder != skcDeformOrder:
+        print '# skin clusters deformation order of "{}" is {}, saved order was {}'.format( skinMesh, sceneDeformOrder, skcDeformOrder )
+    
+    print '# parallel skin weights loaded for "{}": {}'.format( skinMesh, loadedSkinClusters )
+    
+    return loadedSkinClusters
+
+def _loadParallelNgWeights( filePath ):
     '''
-    loads parallel weights using Ng skin api which also initialize by default the Ng layers
+    loads parallel weights saved as info file and NG skin files using Ng skin api which also initialize by default the Ng layers
     NOTE:  NG  export API only imports the first skin cluster in the deformation order so
     it the script should be looping through all the skin clusters changing the deformation
     order and then importing it individually 
     '''
-    # check file
-    filePathname, fileextension = os.path.splitext( filePath )
-    if not fileextension: filePath += parallelInfoExt
     
     # read from file
     fileobj = open( filePath, mode = 'rb' )
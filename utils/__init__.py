@@ -6,10 +6,17 @@ import attribute
 import connect
 import anim
 import shape
+import shapeMirror
 import skinCluster
+import skinWeightsFile
+import weightsRemap
+import weightsConditioner
 import surface
 import vector
 import constraint
 import blendShape
 import apiwrap
+import buildProfiler
+import buildSession
+import dagIndex
 import matrix
\ No newline at end of file
@@ -4,6 +4,8 @@ advancedSkeleton @ utils
 import maya.cmds as mc
 import maya.mel as mm
 
+import shapeMirror
+
 def fixCtrlColors():
 
     """
@@ -64,35 +66,30 @@ def fixCtrlColors():
 
     print 'color changed!'
 
-def mirrorCvPositions( cvs, mode = 'x' ):
+def _getMirrorName( objName ):
     """
+    get name of object on opposite side using AdvancedSkeleton "_L" and "_R" suffixes, e.g. 'FKShoulder_LShape' -> 'FKShoulder_RShape'
 
-    :param cvs: list of vertex usually take it from mc.ls(sl = 1, fl = 1)
-    :param mode: mirror axis , 'x' by default
-    :return: none
+    :param objName: str, name of object or shape
+    :return: str, name of object on opposite side, None if name has no side suffix
     """
 
-    for cv in cvs:
-
-        strName = str( cv ).split( '|' )[-1]
-        cvShortLeft = str( cv ).split( '.' )[-2]
-        cvNumber = str( cv ).split( '.' )[-1]
-        prefixName = cvShortLeft.split('_')[-2]
-        cvShortRight = ''
-
-        if cvShortLeft.endswith( '_LShape' ): cvShortRight = prefixName +  '_RShape' +  '.'  + cvNumber
-        elif cvShortLeft.endswith( '_RShape' ): cvShortRight = prefixName +  '_LShape' +  '.'  + cvNumber
+    for sideSuffix, mirrorSuffix in [ ( '_L', '_R' ), ( '_R', '_L' ) ]:
 
+        for end in [ 'Shape', '' ]:
 
-        else:
+            if objName.endswith( sideSuffix + end ):
 
-            mm.eval( 'warning("advancedSkeleton.mirrorCvPositions: cannot find mirror for ' + strName + ', doesn`t endswith with _L or _R")' )
-            continue
+                return objName[ :-len( sideSuffix + end ) ] + mirrorSuffix + end
 
-        pos = mc.xform( strName, q = 1, ws = 1, t = 1 )
+    return None
 
+def mirrorCvPositions( cvs, mode = 'x' ):
+    """
 
-        if mode == 'x': mc.xform( cvShortRight, ws = 1, t = [ pos[0] * ( -1 ), pos[1], pos[2] ] )
-        if mode == 'z': mc.xform( cvShortRight, ws = 1, t = [ pos[0], pos[1], pos[2] * ( -1 ) ] )
-
+    :param cvs: list of vertex usually take it from mc.ls(sl = 1, fl = 1)
+    :param mode: mirror axis , 'x' by default
+    :return: dict, report from shapeMirror.mirrorComponents()
+    """
 
+    return shapeMirror.mirrorComponents( cvs, axis = mode, mirrorNameFunction = _getMirrorName )
@@ -8,6 +8,7 @@ NOTE: !! functions returning new Python API 2.0 must have prefix "api2_" to prev
 '''
 
 import maya.OpenMaya as om
+import maya.api.OpenMaya as om2
 
 def getMFnMesh( objectname ):
 	
@@ -56,3 +57,31 @@ def getMObject( objectname ):
 	msel.getDependNode( 0, mObject )
 	
 	return mObject
+
+def api2_getDagPath( objectname ):
+	
+	'''
+	get Python API 2.0 dagpath from object`s name
+	
+	:param objectname:str, name of object (short or long)
+	:return: maya.api.OpenMaya.MDagPath object
+	'''
+	
+	msel = om2.MSelectionList()
+	msel.add( objectname )
+	
+	return msel.getDagPath( 0 )
+
+def api2_getMObject( objectname ):
+	
+	'''
+	get Python API 2.0 MObject from object`s name
+	
+	:param objectname:str, name of object
+	:return: maya.api.OpenMaya.MObject object
+	'''
+	
+	msel = om2.MSelectionList()
+	msel.add( objectname )
+	
+	return msel.getDependNode( 0 )
@@ -0,0 +1,360 @@
+"""
+module to profile rig builds with nested spans
+@category rigging @subcategory utils
+@tags profile build time nodes commands chrome trace flame graph
+
+each span records wall time, number of created nodes and number of issued Maya commands,
+spans can be nested and are used as context manager or decorator,
+spans are only recorded while profiler is started, otherwise they do nothing
+
+example:
+
+    buildProfiler.start( 'build' )
+
+    with buildProfiler.span( 'import files' ):
+        mc.file( modelPath, i = True )
+
+    profiler = buildProfiler.stop()
+    profiler.exportChromeTrace( tracePath )
+"""
+
+import os
+import json
+import time
+import functools
+from contextlib import contextmanager
+
+import maya.api.OpenMaya as om2
+
+# profiler of running build
+_activeProfiler = None
+
+class Span( object ):
+
+    '''
+    one profiled part of build
+    '''
+
+    def __init__( self, name, parent = None ):
+
+        self.name = name
+        self.parent = parent
+        self.children = []
+
+        self.startTime = 0.0
+        self.endTime = 0.0
+        self.nodes = 0
+        self.commands = 0
+
+    def getPath( self ):
+
+        '''
+        :return: str, names of span and its parents separated by "/"
+        '''
+
+        if self.parent:
+
+            return self.parent.getPath() + '/' + self.name
+
+        return self.name
+
+    def getDuration( self ):
+
+        return self.endTime - self.startTime
+
+class BuildProfiler( object ):
+
+    '''
+    profiler with tree of spans, created nodes and issued commands are counted using API callbacks
+    '''
+
+    def __init__( self, name = 'build' ):
+
+        self.root = Span( name )
+        self._openSpans = []
+        self._callbackIds = []
+
+        self.nodesCount = 0
+        self.commandsCount = 0
+
+    def _nodeAdded( self, node, clientData ):
+
+        self.nodesCount += 1
+
+    def _commandIssued( self, message, clientData ):
+
+        self.commandsCount += 1
+
+    def start( self ):
+
+        self._callbackIds = [
+                            om2.MDGMessage.addNodeAddedCallback( self._nodeAdded, 'dependNode' ),
+                            om2.MCommandMessage.addCommandCallback( self._commandIssued )
+                            ]
+
+        self.openSpan( self.root )
+
+    def stop( self ):
+
+        while self._openSpans:
+
+            self.closeSpan()
+
+        for callbackId in self._callbackIds:
+
+            om2.MMessage.removeCallback( callbackId )
+
+        self._callbackIds = []
+
+    def openSpan( self, span ):
+
+        if self._openSpans and span is not self.root:
+
+            span.parent = self._openSpans[-1]
+            span.parent.children.append( span )
+
+        span.startTime = time.time()
+        span.nodes = self.nodesCount
+        span.commands = self.commandsCount
+
+        self._openSpans.append( span )
+
+    def closeSpan( self ):
+
+        span = self._openSpans.pop()
+        span.endTime = time.time()
+        span.nodes = self.nodesCount - span.nodes
+        span.commands = self.commandsCount - span.commands
+
+    def getSpans( self ):
+
+        '''
+        :return: list( Span ), all spans, parents before their children
+        '''
+
+        spans = []
+        toVisit = [ self.root ]
+
+        while toVisit:
+
+            span = toVisit.pop( 0 )
+            spans.append( span )
+            toVisit.extend( span.children )
+
+        return spans
+
+    def report( self, minDuration = 0.0 ):
+
+        '''
+        print tree of spans with their times, created nodes and issued commands
+
+        :param minDuration: float, spans shorter than this number of seconds are not printed
+        :return: None
+        '''
+
+        def printSpan( span, depth ):
+
+            if span.getDuration() < minDuration:
+
+                return
+
+            print '# %s%-*s %9.3f s %8d nodes %9d commands' % ( '  ' * depth, 50 - depth * 2, span.name, span.getDuration(), span.nodes, span.commands )
+
+            for child in span.children:
+
+                printSpan( child, depth + 1 )
+
+        printSpan( self.root, 0 )
+
+    def exportChromeTrace( self, filePath ):
+
+        '''
+        save spans as Chrome trace events, file can be opened in chrome://tracing or compared with compareTraces()
+
+        :param filePath: str, path of JSON file
+        :return: None
+        '''
+
+        events = []
+
+        for span in self.getSpans():
+
+            events.append( {
+                            'name': span.name,
+                            'ph': 'X',
+                            'ts': int( ( span.startTime - self.root.startTime ) * 1e6 ),
+                            'dur': int( span.getDuration() * 1e6 ),
+                            'pid': 1,
+                            'tid': 1,
+                            'args': { 'path': span.getPath(), 'nodes': span.nodes, 'commands': span.commands }
+                            } )
+
+        _writeJson( filePath, { 'traceEvents': events, 'displayTimeUnit': 'ms' } )
+
+    def exportFlameGraph( self, filePath ):
+
+        '''
+        save spans as nested flame graph JSON with 'name', 'value' (milliseconds) and 'children' keys
+
+        :param filePath: str, path of JSON file
+        :return: None
+        '''
+
+        def spanToDict( span ):
+
+            return {
+                    'name': span.name,
+                    'value': span.getDuration() * 1000.0,
+                    'nodes': span.nodes,
+                    'commands': span.commands,
+                    'children': [ spanToDict( c ) for c in span.children ]
+                    }
+
+        _writeJson( filePath, spanToDict( self.root ) )
+
+def _writeJson( filePath, data ):
+
+    fileDir = os.path.dirname( filePath )
+
+    if fileDir and not os.path.exists( fileDir ):
+
+        os.makedirs( fileDir )
+
+    fileobj = open( filePath, 'w' )
+    json.dump( data, fileobj, indent = 1 )
+    fileobj.close()
+
+def start( name = 'build' ):
+
+    '''
+    start profiling, spans are recorded until stop() is called
+
+    :param name: str, name of root span
+    :return: BuildProfiler
+    '''
+
+    global _activeProfiler
+
+    if _activeProfiler:
+
+        _activeProfiler.stop()
+
+    _activeProfiler = BuildProfiler( name )
+    _activeProfiler.start()
+
+    return _activeProfiler
+
+def stop():
+
+    '''
+    stop profiling
+
+    :return: BuildProfiler, stopped profiler with recorded spans, None if profiler was not started
+    '''
+
+    global _activeProfiler
+
+    profiler = _activeProfiler
+    _activeProfiler = None
+
+    if profiler:
+
+        profiler.stop()
+
+    return profiler
+
+@contextmanager
+def span( name ):
+
+    '''
+    context manager recording one span of running profiler
+
+    :param name: str, name of span
+    '''
+
+    profiler = _activeProfiler
+
+    if not profiler:
+
+        yield
+        return
+
+    profiler.openSpan( Span( name ) )
+
+    try:
+
+        yield
+
+    finally:
+
+        profiler.closeSpan()
+
+def profile( name = None ):
+
+    '''
+    decorator recording each function call as span of running profiler
+
+    :param name: str, name of span, function module and name are used by default
+    '''
+
+    def decorator( function ):
+
+        spanName = name or '%s.%s' % ( function.__module__, function.__name__ )
+
+        @functools.wraps( function )
+        def wrapper( *args, **kwargs ):
+
+            if not _activeProfiler:
+
+                return function( *args, **kwargs )
+
+            with span( spanName ):
+
+                return function( *args, **kwargs )
+
+        # original function is kept for tools reading its code, e.g. base.buildCheckpoints
+        wrapper.__wrapped__ = function
+
+        return wrapper
+
+    return decorator
+
+def compareTraces( oldFilePath, newFilePath, count = 20 ):
+
+    '''
+    compare two Chrome trace files from exportChromeTrace() by span paths and print biggest time changes,
+    times of spans with the same path are summed
+
+    :param oldFilePath: str, path of older trace file
+    :param newFilePath: str, path of newer trace file
+    :param count: int, number of printed spans
+    :return: list( tuple ), ( path, old seconds, new seconds ) sorted by biggest time change
+    '''
+
+    def readTimes( filePath ):
+
+        fileobj = open( filePath, 'r' )
+        events = json.load( fileobj )['traceEvents']
+        fileobj.close()
+
+        timesDt = {}
+
+        for event in events:
+
+            path = event['args']['path']
+            timesDt[ path ] = timesDt.get( path, 0.0 ) + event['dur'] / 1e6
+
+        return timesDt
+
+    oldTimes = readTimes( oldFilePath )
+    newTimes = readTimes( newFilePath )
+
+    paths = set( oldTimes.keys() ) | set( newTimes.keys() )
+    changes = [ ( p, oldTimes.get( p, 0.0 ), newTimes.get( p, 0.0 ) ) for p in paths ]
+    changes.sort( key = lambda c: abs( c[2] - c[1] ), reverse = True )
+
+    for path, oldTime, newTime in changes[:count]:
+
+        print '# %-70s %9.3f -> %9.3f s (%+.3f)' % ( path, oldTime, newTime, newTime - oldTime )
+
+    return changes
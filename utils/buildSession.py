@@ -0,0 +1,305 @@
+"""
+module with build session suspending scene evaluation while rig is built
+@category rigging @subcategory utils
+@tags build evaluation undo refresh envelope speed
+
+build session turns off evaluation manager (new nodes and connections do not rebuild its graph),
+cycle checking of each connection, undo recording, viewport refresh and skinCluster envelopes,
+all settings are restored when session ends, also when build fails
+
+example:
+
+    with buildSession.BuildSession( 'hero build', timingsPath = timingsPath ):
+        buildRig()
+"""
+
+import os
+import sys
+import json
+import time
+
+import maya.cmds as mc
+
+# session of running build
+_activeSession = None
+
+class BuildSession( object ):
+
+    '''
+    context manager suspending evaluation during build, nested sessions do nothing
+    '''
+
+    def __init__( self, name = 'build', enabled = True, timingsPath = None, verbose = True ):
+
+        '''
+        :param name: str, name of build, used to store timings
+        :param enabled: bool, if False, only build time is measured, use to get time of build without session
+        :param timingsPath: str, optional, JSON file with build times with and without session to report saved time
+        :param verbose: bool, print build time and saved time
+        '''
+
+        self.name = name
+        self.enabled = enabled
+        self.timingsPath = timingsPath
+        self.verbose = verbose
+
+        self.duration = 0.0
+        self._startTime = 0.0
+        self._active = False
+        self._settings = {}
+        self._envelopes = {}
+
+    def __enter__( self ):
+
+        global _activeSession
+
+        if _activeSession:
+
+            return self
+
+        self._active = True
+        self._startTime = time.time()
+        _activeSession = self
+
+        if not self.enabled:
+
+            return self
+
+        try:
+
+            self._suspend()
+
+        except:
+
+            # settings changed before failure are restored, __exit__ is not called when __enter__ fails
+            excInfo = sys.exc_info()
+
+            _activeSession = None
+            self._active = False
+            self._restore()
+
+            raise excInfo[0], excInfo[1], excInfo[2]
+
+        return self
+
+    def __exit__( self, *args ):
+
+        global _activeSession
+
+        if not self._active:
+
+            return False
+
+        _activeSession = None
+        self._active = False
+
+        try:
+
+            if self.enabled:
+
+                self._restore()
+
+        finally:
+
+            self.duration = time.time() - self._startTime
+
+            # saved time is only reported for successful builds
+            if not args[0]:
+
+                self._reportTime()
+
+        return False
+
+    def _suspend( self ):
+
+        self._settings['undo'] = mc.undoInfo( q = True, state = True )
+        mc.undoInfo( stateWithoutFlush = False )
+
+        self._settings['cycleCheck'] = mc.cycleCheck( q = True, evaluation = True )
+        mc.cycleCheck( evaluation = False )
+
+        try:
+
+            self._settings['evaluationMode'] = mc.evaluationManager( q = True, mode = True )[0]
+            mc.evaluationManager( mode = 'off' )
+
+        except ( AttributeError, RuntimeError, TypeError ):
+
+            # no evaluation manager before Maya 2016
+            pass
+
+        if not mc.about( batch = True ):
+
+            mc.refresh( suspend = True )
+            self._settings['refresh'] = True
+
+        for skinClusterNode in mc.ls( type = 'skinCluster' ):
+
+            self.deferEnvelope( skinClusterNode )
+
+    def _restore( self ):
+
+        # each setting is restored even if other fails, only settings which were suspended are restored
+
+        restoreCalls = [ self.restoreEnvelopes ]
+
+        if 'refresh' in self._settings:
+
+            restoreCalls.append( lambda: mc.refresh( suspend = False ) )
+
+        if 'evaluationMode' in self._settings:
+
+            restoreCalls.append( lambda: mc.evaluationManager( mode = self._settings['evaluationMode'] ) )
+
+        if 'cycleCheck' in self._settings:
+
+            restoreCalls.append( lambda: mc.cycleCheck( evaluation = self._settings['cycleCheck'] ) )
+
+        if 'undo' in self._settings:
+
+            restoreCalls.append( lambda: mc.undoInfo( stateWithoutFlush = self._settings['undo'] ) )
+
+        errors = []
+
+        for restoreCall in restoreCalls:
+
+            try:
+
+                restoreCall()
+
+            except Exception, e:
+
+                errors.append( e )
+
+        self._settings = {}
+
+        if errors:
+
+            print '# buildSession: some settings could not be restored: %s' % errors
+
+    def deferEnvelope( self, deformer ):
+
+        '''
+        turn envelope of deformer off until session ends
+
+        :param deformer: str, name of deformer, e.g. skinCluster
+        :return: None
+        '''
+
+        # deformers are kept by UUID, so envelopes are restored also when deformers are renamed later in build
+        uuids = mc.ls( deformer, uuid = True )
+
+        if not uuids or uuids[0] in self._envelopes:
+
+            return
+
+        try:
+
+            envelope = mc.getAttr( deformer + '.envelope' )
+            mc.setAttr( deformer + '.envelope', 0 )
+
+        except RuntimeError:
+
+            # locked or connected envelope
+            return
+
+        self._envelopes[ uuids[0] ] = envelope
+
+    def restoreEnvelopes( self ):
+
+        '''
+        restore envelopes of all deferred deformers, e.g. before scene is saved
+
+        :return: list( str ), current names of restored deformers
+        '''
+
+        deformers = []
+
+        for uuid, envelope in self._envelopes.items():
+
+            # deleted deformers are skipped
+            deformerNames = mc.ls( uuid )
+
+            if deformerNames:
+
+                mc.setAttr( deformerNames[0] + '.envelope', envelope )
+                deformers.append( deformerNames[0] )
+
+        self._envelopes = {}
+
+        return deformers
+
+    def _reportTime( self ):
+
+        mode = 'suspended' if self.enabled else 'unsuspended'
+        message = '# buildSession: %s took %.2f s (%s)' % ( self.name, self.duration, mode )
+
+        if self.timingsPath:
+
+            timingsDt = {}
+
+            if os.path.exists( self.timingsPath ):
+
+                fileobj = open( self.timingsPath, 'r' )
+                timingsDt = json.load( fileobj )
+                fileobj.close()
+
+            buildTimes = timingsDt.setdefault( self.name, {} )
+            buildTimes[ mode ] = self.duration
+
+            if 'suspended' in buildTimes and 'unsuspended' in buildTimes:
+
+                message += ', saved %.2f s against last build without session' % ( buildTimes['unsuspended'] - buildTimes['suspended'] )
+
+            timingsDir = os.path.dirname( self.timingsPath )
+
+            if timingsDir and not os.path.exists( timingsDir ):
+
+                os.makedirs( timingsDir )
+
+            fileobj = open( self.timingsPath, 'w' )
+            json.dump( timingsDt, fileobj, indent = 1 )
+            fileobj.close()
+
+        if self.verbose:
+
+            print message
+
+def isActive():
+
+    '''
+    :return: bool, True if build session is running
+    '''
+
+    return _activeSession is not None
+
+def deferEnvelope( deformer ):
+
+    '''
+    turn envelope of deformer off until running build session ends
+
+    :param deformer: str, name of deformer
+    :return: bool, True if envelope is restored by build session, False if no session is running
+    '''
+
+    if not _activeSession or not _activeSession.enabled:
+
+        return False
+
+    _activeSession.deferEnvelope( deformer )
+
+    return True
+
+def restoreEnvelopes():
+
+    '''
+    restore deferred envelopes of running build session
+
+    :return: list( str ), restored deformers, empty list if no session is running
+    '''
+
+    if not _activeSession:
+
+        return []
+
+    return _activeSession.restoreEnvelopes()
@@ -0,0 +1,263 @@
+"""
+cached index of DAG hierarchy for fast parent and children queries
+@category rigging @subcategory utils
+@tags dag hierarchy parent children joints cache index
+
+index is snapshot of whole DAG taken with one ls command (long names and node types),
+parents, children and descendants are then dictionary lookups instead of listRelatives calls,
+shared index is invalidated by API callbacks when DAG nodes are added, removed, reparented or renamed
+and it is taken again on next query, use it for many queries between scene edits, e.g. in loops over joints
+
+example:
+
+    index = dagIndex.get()
+    joints = index.getDescendants( 'root1_jnt', nodeType = 'joint' )
+    parent = index.getParent( 'l_hand1_jnt' )
+"""
+
+import maya.cmds as mc
+import maya.api.OpenMaya as om2
+
+# index shared by utils functions
+_sharedIndex = None
+
+class DagIndex( object ):
+
+    '''
+    snapshot of DAG hierarchy with parent and children maps of long names and node types
+    '''
+
+    def __init__( self ):
+
+        self.parents = {}
+        self.children = {}
+        self.types = {}
+
+        self._shortNames = {}
+        self._valid = False
+        self._callbackIds = []
+
+    def refresh( self ):
+
+        '''
+        take new snapshot of DAG hierarchy
+
+        :return: None
+        '''
+
+        # long names and types of all DAG nodes in depth first order with one command
+        namesAndTypes = mc.ls( dag = True, l = True, st = True ) or []
+
+        self.parents = {}
+        self.children = {}
+        self.types = {}
+        self._shortNames = {}
+
+        for longName, nodeType in zip( namesAndTypes[::2], namesAndTypes[1::2] ):
+
+            parent, shortName = longName.rsplit( '|', 1 )
+
+            self.parents[ longName ] = parent
+            self.types[ longName ] = nodeType
+            self.children.setdefault( longName, [] )
+            self.children.setdefault( parent, [] ).append( longName )
+            self._shortNames.setdefault( shortName, [] ).append( longName )
+
+        self._valid = True
+
+    def invalidate( self, *args ):
+
+        self._valid = False
+
+    def isValid( self ):
+
+        return self._valid
+
+    def track( self ):
+
+        '''
+        invalidate index when DAG changes, callbacks are kept until untrack() is called
+
+        :return: None
+        '''
+
+        if self._callbackIds:
+
+            return
+
+        self._callbackIds = [
+                            om2.MDGMessage.addNodeAddedCallback( self.invalidate, 'dagNode' ),
+                            om2.MDGMessage.addNodeRemovedCallback( self.invalidate, 'dagNode' ),
+                            om2.MDagMessage.addParentAddedCallback( self.invalidate ),
+                            om2.MDagMessage.addParentRemovedCallback( self.invalidate ),
+                            om2.MNodeMessage.addNameChangedCallback( om2.MObject.kNullObj, self._nameChanged ),
+                            om2.MSceneMessage.addCallback( om2.MSceneMessage.kAfterNew, self.invalidate ),
+                            om2.MSceneMessage.addCallback( om2.MSceneMessage.kAfterOpen, self.invalidate )
+                            ]
+
+    def untrack( self ):
+
+        for callbackId in self._callbackIds:
+
+            om2.MMessage.removeCallback( callbackId )
+
+        self._callbackIds = []
+
+    def _nameChanged( self, node, previousName, clientData ):
+
+        if node.hasFn( om2.MFn.kDagNode ):
+
+            self._valid = False
+
+    def getLongName( self, node ):
+
+        '''
+        :param node: str, short, partial or long name of DAG node
+        :return: str, long name, None if node does not exist, ValueError is raised when name is not unique like in Maya commands
+        '''
+
+        if not node:
+
+            return None
+
+        if node in self.parents:
+
+            return node
+
+        longNames = self._shortNames.get( node.split( '|' )[-1], [] )
+
+        if '|' in node:
+
+            # partial path
+            longNames = [ n for n in longNames if n.endswith( '|' + node ) ]
+
+        if len( longNames ) > 1:
+
+            raise ValueError( 'More than one object matches name: %s' % node )
+
+        return longNames[0] if longNames else None
+
+    def getShortName( self, longName ):
+
+        '''
+        :param longName: str, long name of indexed DAG node
+        :return: str, shortest partial path which is unique in scene, same as names returned by ls
+        '''
+
+        nameParts = longName.split( '|' )
+        sameNames = self._shortNames.get( nameParts[-1], [] )
+
+        for i in range( len( nameParts ) - 1, 0, -1 ):
+
+            partialName = '|'.join( nameParts[i:] )
+
+            if len( [ n for n in sameNames if n.endswith( '|' + partialName ) ] ) == 1:
+
+                return partialName
+
+        return longName
+
+    def getType( self, node ):
+
+        '''
+        :param node: str, name of DAG node
+        :return: str, node type, None if node is not indexed
+        '''
+
+        return self.types.get( self.getLongName( node ) )
+
+    def getParent( self, node, longNames = False ):
+
+        '''
+        :param node: str, name of DAG node
+        :param longNames: bool, return long name
+        :return: str, parent, None if node is child of world or it is not indexed
+        '''
+
+        parent = self.parents.get( self.getLongName( node ) )
+
+        if not parent:
+
+            return None
+
+        return parent if longNames else self.getShortName( parent )
+
+    def getChildren( self, node, nodeType = None, longNames = False ):
+
+        '''
+        :param node: str, name of DAG node
+        :param nodeType: str, optional, type of returned children, inherited types like 'shape' are not supported
+        :param longNames: bool, return long names
+        :return: list( str ), children in hierarchy order
+        '''
+
+        children = self.children.get( self.getLongName( node ), [] )
+
+        return self._filter( children, nodeType, longNames )
+
+    def getDescendants( self, node, nodeType = None, longNames = False ):
+
+        '''
+        :param node: str, name of DAG node
+        :param nodeType: str, optional, type of returned descendants
+        :param longNames: bool, return long names
+        :return: list( str ), descendants in depth first order, parents are before their children
+        '''
+
+        descendants = []
+        toVisit = list( reversed( self.children.get( self.getLongName( node ), [] ) ) )
+
+        while toVisit:
+
+            longName = toVisit.pop()
+            descendants.append( longName )
+            toVisit.extend( reversed( self.children[ longName ] ) )
+
+        return self._filter( descendants, nodeType, longNames )
+
+    def _filter( self, longNames, nodeType, returnLongNames ):
+
+        if nodeType:
+
+            longNames = [ n for n in longNames if self.types[ n ] == nodeType ]
+
+        if returnLongNames:
+
+            return list( longNames )
+
+        return [ self.getShortName( n ) for n in longNames ]
+
+def get():
+
+    '''
+    get shared index, new snapshot is taken if DAG changed since last query
+
+    :return: DagIndex
+    '''
+
+    global _sharedIndex
+
+    if not _sharedIndex:
+
+        _sharedIndex = DagIndex()
+        _sharedIndex.track()
+
+    if not _sharedIndex.isValid():
+
+        _sharedIndex.refresh()
+
+    return _sharedIndex
+
+def release():
+
+    '''
+    remove callbacks and data of shared index
+    '''
+
+    global _sharedIndex
+
+    if _sharedIndex:
+
+        _sharedIndex.untrack()
+
+    _sharedIndex = None
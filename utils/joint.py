@@ -13,17 +13,30 @@ import attribute
 import transform
 import vector
 import apiwrap
+import dagIndex
 
 
-def listHierarchy( topJoint, withEndJoints = True ):
+def listHierarchy( topJoint, withEndJoints = True, useIndex = False ):
 
     """
     List joint hierarchy starting with top joint
     :param topJoint: str, joint to get listed with its joint hierarchy
     :param withEndJoints: bool, list hierarchy including end joints
+    :param useIndex: bool, read hierarchy from cached DAG index instead of scene, see utils.dagIndex
     :return: list( str ), listed joints starting with top joint
     """
 
+    if useIndex:
+
+        index = dagIndex.get()
+        listedJoints = [ topJoint ] + index.getDescendants( topJoint, nodeType = 'joint' )
+
+        if withEndJoints:
+
+            return listedJoints
+
+        return [ j for j in listedJoints if index.getChildren( j, nodeType = 'joint' ) ]
+
     listedJoints = mc.listRelatives( topJoint, type = 'joint', ad = True )
     listedJoints.append( topJoint )
     listedJoints.reverse()
@@ -109,7 +122,7 @@ def label(joints, optionalLeftPrefix = '', optionalRightPrefix = ''):
         mc.setAttr( j + '.type', 18 )
         mc.setAttr( j + '.otherType', base, typ = 'string' )
 
-def listChainStartToEnd( topJoint, lowestJoint ):
+def listChainStartToEnd( topJoint, lowestJoint, useIndex = False ):
     
     """
     return a list of joints from top joint to lowest joint
@@ -117,10 +130,17 @@ def listChainStartToEnd( topJoint, lowestJoint ):
     
     :param topJoint: str, top joint of the chain
     :param lowestJoint: str, lowest joint of the chain
+    :param useIndex: bool, read long name from cached DAG index instead of scene, see utils.dagIndex
     :return list ( str ), list of joints from topJoint to lowestJoint
     """
     
-    lowestJointLong = mc.ls( lowestJoint, l = True )[0]
+    if useIndex:
+        
+        lowestJointLong = dagIndex.get().getLongName( lowestJoint )
+    
+    else:
+        
+        lowestJointLong = mc.ls( lowestJoint, l = True )[0]
     lowestJointNameParts = lowestJointLong.split( '|' )
     
     jointsList = []
@@ -994,7 +1014,7 @@ def jointsMaxIncrementWithRemainder( joints, numplaces ):
     
     return [ indeces, increments ]
 
-def getlist( topjnt, listend = True, listfirst = True, longNames = False ):
+def getlist( topjnt, listend = True, listfirst = True, longNames = False, useIndex = False ):
 
   '''
   list joint hierachy starting with top joint
@@ -1003,11 +1023,19 @@ def getlist( topjnt, listend = True, listfirst = True, longNames = False ):
   :param listfirst: bool, include top joint in the returned list (being first in list)
   :param listend: bool, list end (leaf) joints of top joint`s hierarchy
   :param longNames: bool, list joint names with full scene path for cases where we cannot prevent clashing names
+  :param useIndex: bool, read hierarchy from cached DAG index instead of scene, see utils.dagIndex
   :return: list(str), list of joints
   '''
   
-  joints = mc.listRelatives( topjnt, ad = 1, typ = 'joint', fullPath = longNames )
-  joints.reverse()
+  if useIndex:
+      
+      index = dagIndex.get()
+      joints = index.getDescendants( topjnt, nodeType = 'joint', longNames = longNames )
+  
+  else:
+      
+      joints = mc.listRelatives( topjnt, ad = 1, typ = 'joint', fullPath = longNames )
+      joints.reverse()
   
   allJoints = joints
   if listfirst: allJoints = [topjnt] + allJoints
@@ -1015,6 +1043,12 @@ def getlist( topjnt, listend = True, listfirst = True, longNames = False ):
   
   if not listend:
       
-      jointsedit = [ j for j in allJoints if mc.listRelatives( j, c = 1, typ = 'joint' ) ]
+      if useIndex:
+          
+          jointsedit = [ j for j in allJoints if index.getChildren( j, nodeType = 'joint' ) ]
+      
+      else:
+          
+          jointsedit = [ j for j in allJoints if mc.listRelatives( j, c = 1, typ = 'joint' ) ]
   
   return jointsedit
\ No newline at end of file
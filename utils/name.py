@@ -45,6 +45,22 @@ def getSide( name ):
     
     return ''
 
+def getMirrorName( name ):
+    """
+    Get name of object on the opposite side, 'l_' and 'r_' side prefixes are swapped keeping their case
+    
+    :param name: str, object name, only short name is used
+    :return str, name with opposite side, None if name has no side
+    """
+    
+    edit = name.split('|')[-1]
+    
+    if not getSide( edit ): return None
+    
+    mirrorSides = { 'l': 'r', 'L': 'R', 'r': 'l', 'R': 'L' }
+    
+    return mirrorSides[ edit[0] ] + edit[1:]
+
 def checkClashingNames():
     
     """
@@ -3,9 +3,14 @@ module to work with shape functions
 :author: Pablo Diaz Burgos
 """
 
+import hashlib
+
 import maya.cmds as mc
+import maya.api.OpenMaya as om2
+import numpy as np
 
 import name
+import apiwrap
 
 def getShape( object, useLongName = False, noIntermediate = True, shapeTypes = [] ):
     """
@@ -141,7 +146,157 @@ def fixShapesName(shapeTransform):
         newShapeNames.append( renamed )
 
     return newShapeNames
-        
+
+class ShapeNameTracker( object ):
+    """
+    record shapes made or reparented and transforms renamed while tracker runs and fix names
+    of their shapes at the end, so only new nodes are fixed instead of all scene transforms
+
+    example:
+
+        with shape.ShapeNameTracker( 'control stage' ) as tracker:
+            buildControlRig()
+
+        print tracker.renamed, tracker.failed
+    """
+
+    def __init__( self, label = '', verbose = True ):
+        """
+        :param label: str, name of tracked build part used in report
+        :param verbose: bool, print number of fixed shapes
+        """
+
+        self.label = label
+        self.verbose = verbose
+        self.renamed = []
+        self.failed = []
+
+        self._handles = {}
+        self._callbackIds = []
+
+    def __enter__( self ):
+
+        self.start()
+
+        return self
+
+    def __exit__( self, *args ):
+
+        # names are not fixed when build part failed
+        if args[0]:
+
+            self.stop()
+            return False
+
+        self.fix()
+
+        return False
+
+    def _record( self, node ):
+
+        handle = om2.MObjectHandle( node )
+        self._handles[ handle.hashCode() ] = handle
+
+    def _nodeAdded( self, node, clientData ):
+
+        self._record( node )
+
+    def _parentAdded( self, child, parent, clientData ):
+
+        if child.node().hasFn( om2.MFn.kShape ):
+
+            self._record( child.node() )
+
+    def _nameChanged( self, node, previousName, clientData ):
+
+        if node.hasFn( om2.MFn.kTransform ):
+
+            self._record( node )
+
+    def start( self ):
+
+        self._handles = {}
+        self._callbackIds = [
+                            om2.MDGMessage.addNodeAddedCallback( self._nodeAdded, 'shape' ),
+                            om2.MDagMessage.addParentAddedCallback( self._parentAdded ),
+                            om2.MNodeMessage.addNameChangedCallback( om2.MObject.kNullObj, self._nameChanged )
+                            ]
+
+    def stop( self ):
+
+        for callbackId in self._callbackIds:
+
+            om2.MMessage.removeCallback( callbackId )
+
+        self._callbackIds = []
+
+    def fix( self ):
+        """
+        stop tracking and fix shape names of recorded transforms, transforms with correct shape names are skipped,
+        transforms with shapes which can't be renamed (e.g. referenced or locked) are reported in self.failed
+
+        :return list (str), renamed shapes
+        """
+
+        self.stop()
+
+        # recorded shapes are replaced by their transforms
+
+        transforms = {}
+
+        for handle in self._handles.values():
+
+            if not handle.isAlive() or not handle.isValid(): continue
+
+            node = handle.object()
+
+            if node.hasFn( om2.MFn.kShape ):
+
+                node = om2.MFnDagNode( node ).parent( 0 )
+
+                if not node.hasFn( om2.MFn.kTransform ): continue
+
+            transformHandle = om2.MObjectHandle( node )
+            transforms[ transformHandle.hashCode() ] = node
+
+        self._handles = {}
+        self.renamed = []
+        self.failed = []
+
+        for node in transforms.values():
+
+            transformFn = om2.MFnDagNode( node )
+            shapeNodes = [ transformFn.child( i ) for i in range( transformFn.childCount() ) ]
+            shapeNames = [ om2.MFnDependencyNode( s ).name() for s in shapeNodes if s.hasFn( om2.MFn.kShape ) ]
+
+            transformShort = transformFn.name()
+            fixedNames = [ transformShort + 'Shape' + ( str( i ) if i > 0 else '' ) for i in range( len( shapeNames ) ) ]
+
+            if shapeNames == fixedNames: continue
+
+            transformPath = transformFn.fullPathName()
+
+            try:
+
+                self.renamed.extend( fixShapesName( transformPath ) )
+
+            except Exception, e:
+
+                self.failed.append( ( transformPath, str( e ) ) )
+
+        label = self.label or 'tracked build part'
+
+        if self.verbose:
+
+            print '# fixed names of %d shapes made in %s' % ( len( self.renamed ), label )
+
+        # failures are reported also when not verbose
+        for transformPath, error in self.failed:
+
+            print '# could not fix shape names of %s made in %s: %s' % ( transformPath, label, error.strip() )
+
+        return self.renamed
+
 def translateRotate( shapeTransform, pos = [0, 0, 0], rot = [0, 0, 0], localSpace = False, relative = True, deleteHistory = True ):
     
     '''
@@ -256,4 +411,98 @@ def getAllComponentsList( objShapes, compmask ):
         compList = list(set(compList + components))
         
     return compList    
-    
\ No newline at end of file
+    
+
+def getTopologyHash( object ):
+    
+    '''
+    get hash of shape topology, it changes with points count and connectivity but not with points positions
+    
+    :param object: str, transform or shape (mesh, nurbsCurve or nurbsSurface)
+    :return: str, hex digest of topology hash
+    '''
+    
+    objShape = getShape( object, useLongName = True )[0]
+    shapePath = apiwrap.api2_getDagPath( objShape )
+    
+    topologyHash = hashlib.sha1( mc.nodeType( objShape ).encode( 'utf-8' ) )
+    
+    if shapePath.apiType() == om2.MFn.kMesh:
+        
+        polyCounts, polyVertices = om2.MFnMesh( shapePath ).getVertices()
+        topologyHash.update( np.array( polyCounts, dtype = np.int32 ).tobytes() )
+        topologyHash.update( np.array( polyVertices, dtype = np.int32 ).tobytes() )
+    
+    elif shapePath.apiType() == om2.MFn.kNurbsCurve:
+        
+        fnCurve = om2.MFnNurbsCurve( shapePath )
+        topologyHash.update( str( ( fnCurve.numCVs, fnCurve.degree, fnCurve.form ) ).encode( 'utf-8' ) )
+    
+    elif shapePath.apiType() == om2.MFn.kNurbsSurface:
+        
+        fnSurface = om2.MFnNurbsSurface( shapePath )
+        surfaceInfo = ( fnSurface.numCVsInU, fnSurface.numCVsInV, fnSurface.degreeInU, fnSurface.degreeInV, fnSurface.formInU, fnSurface.formInV )
+        topologyHash.update( str( surfaceInfo ).encode( 'utf-8' ) )
+    
+    else:
+        
+        topologyHash.update( str( om2.MItGeometry( shapePath ).count() ).encode( 'utf-8' ) )
+    
+    return topologyHash.hexdigest()
+
+def setPointPositions( objShape, positions, indices = None, undoable = None ):
+    
+    '''
+    set world positions of shape points (CVs, vertices), with undo queue on all points are set in object space
+    with one undoable setAttr so interactive tools can be undone, otherwise all points are set with one API call,
+    e.g. during rig builds where undo is suspended by utils.buildSession
+    
+    :param objShape: str, shape name
+    :param positions: list( list( float ) ) or numpy.ndarray, (points x 3) world positions
+    :param indices: list( int ), optional, indices of points with given positions, by default positions start at first point
+    :param undoable: bool, optional, use undoable setAttr or API call, by default undoable when undo queue is on
+    :return: None
+    '''
+    
+    positions = np.asarray( positions, dtype = np.float64 ).reshape( -1, 3 )
+    indices = np.arange( positions.shape[0] ) if indices is None else np.asarray( indices, dtype = np.int64 )
+    
+    if undoable is None:
+        
+        undoable = mc.undoInfo( q = True, state = True )
+    
+    if undoable:
+        
+        # world positions are moved to object space with one matrix
+        inverseMatrix = np.array( mc.getAttr( objShape + '.worldInverseMatrix[0]' ), dtype = np.float64 ).reshape( 4, 4 )
+        localTargets = np.hstack( [ positions, np.ones( ( positions.shape[0], 1 ) ) ] ).dot( inverseMatrix )[:, :3]
+        
+        localPositions = mc.xform( '%s.%s[*]' % ( objShape, getComponentAttribute( objShape ) ), q = True, os = True, t = True )
+        localPositions = np.array( localPositions, dtype = np.float64 ).reshape( -1, 3 )
+        pointCount = localPositions.shape[0]
+        
+        newPositions = localPositions.copy()
+        newPositions[ indices ] = localTargets
+        pointsAttr = 'controlPoints'
+        
+        if mc.nodeType( objShape ) == 'mesh':
+            
+            # mesh points attribute keeps tweaks added to vertices
+            pointsAttr = 'pnts'
+            tweaks = np.array( mc.getAttr( '%s.pnts[0:%d]' % ( objShape, pointCount - 1 ) ), dtype = np.float64 ).reshape( -1, 3 )
+            newPositions = tweaks + newPositions - localPositions
+        
+        mc.setAttr( '%s.%s[0:%d]' % ( objShape, pointsAttr, pointCount - 1 ), *newPositions.ravel().tolist(), size = pointCount )
+        
+        return
+    
+    shapePath = apiwrap.api2_getDagPath( objShape )
+    geoIt = om2.MItGeometry( shapePath )
+    points = geoIt.allPositions( om2.MSpace.kWorld )
+    
+    for i, pos in zip( indices.tolist(), positions.tolist() ):
+        
+        points[i] = om2.MPoint( pos[0], pos[1], pos[2] )
+    
+    geoIt.setAllPositions( points, om2.MSpace.kWorld )
+    mc.dgdirty( shapePath.fullPathName() )
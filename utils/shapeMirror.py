@@ -0,0 +1,299 @@
+"""
+module to mirror shapes of left and right side objects, mostly control curves
+@category rigging @subcategory utils
+@tags mirror control shapes cvs left right numpy
+
+objects are paired by side names once, points of all source shapes are taken
+with one API call per shape, mirrored with one array operation and set back with shape.setPointPositions(),
+which is undoable in interactive use and one API call per shape when undo is off
+"""
+
+import re
+
+import maya.cmds as mc
+import maya.api.OpenMaya as om2
+import numpy as np
+
+import name
+import shape
+import apiwrap
+
+mirrorAxes = { 'x': [1, 0, 0], 'y': [0, 1, 0], 'z': [0, 0, 1] }
+
+def mirrorPoints( points, axis = 'x', origin = [0, 0, 0] ):
+
+    '''
+    mirror points across plane given by its normal and point on the plane
+
+    :param points: numpy.ndarray, (points x 3) positions
+    :param axis: str or list( float ), 'x', 'y', 'z' or normal vector of mirror plane, 'x' mirrors over YZ plane
+    :param origin: list( float ), point on mirror plane
+    :return: numpy.ndarray, (points x 3) mirrored positions
+    '''
+
+    normal = np.asarray( mirrorAxes[ axis ] if isinstance( axis, basestring ) else axis, dtype = np.float64 )
+    normal = normal / np.linalg.norm( normal )
+
+    points = np.asarray( points, dtype = np.float64 ).reshape( -1, 3 )
+    distances = ( points - np.asarray( origin, dtype = np.float64 ) ).dot( normal )
+
+    return points - 2.0 * distances[:, np.newaxis] * normal
+
+def getShapePositions( objShape ):
+
+    '''
+    get world positions of all points of shape with one API call
+
+    :param objShape: str, shape name
+    :return: numpy.ndarray, (points x 3) positions
+    '''
+
+    points = om2.MItGeometry( apiwrap.api2_getDagPath( objShape ) ).allPositions( om2.MSpace.kWorld )
+
+    return np.array( [ ( p.x, p.y, p.z ) for p in points ], dtype = np.float64 ).reshape( -1, 3 )
+
+def setShapePositions( objShape, positions, indices = None ):
+
+    '''
+    set world positions of points of shape, undoable when undo queue is on, see shape.setPointPositions()
+
+    :param objShape: str, shape name
+    :param positions: numpy.ndarray, (points x 3) positions, same number as shape points or as indices
+    :param indices: list( int ), optional, indices of points with given positions
+    :return: None
+    '''
+
+    shape.setPointPositions( objShape, positions, indices )
+
+def buildMirrorMap( objects = [], sourceSide = 'l', mirrorNameFunction = name.getMirrorName ):
+
+    '''
+    pair objects of source side with objects on opposite side, names are paired using side conventions
+
+    :param objects: list( str ), objects to pair, if empty, all transforms of nurbs curves in scene are used
+    :param sourceSide: str, 'l' or 'r', side of objects with shapes to mirror
+    :param mirrorNameFunction: function, returns name of object on opposite side or None
+    :return: list( list, list ), 0- list of ( source object, target object ) pairs, 1- source objects without opposite object
+    '''
+
+    if not objects:
+
+        curveShapes = mc.ls( type = 'nurbsCurve', ni = 1 )
+        objects = mc.listRelatives( curveShapes, p = 1 ) or [] if curveShapes else []
+
+    # one scene query for all objects and their mirror names
+    mirrorNames = [ mirrorNameFunction( name.short( o ) ) for o in objects ]
+    sceneObjects = set( mc.ls( [ n for n in mirrorNames if n ], tr = 1 ) )
+
+    pairs = []
+    unmatched = []
+
+    for obj in sorted( set( [ name.short( o ) for o in objects ] ) ):
+
+        if name.getSide( obj ) != sourceSide:
+
+            continue
+
+        mirrorObj = mirrorNameFunction( obj )
+
+        if not mirrorObj or not mirrorObj in sceneObjects:
+
+            unmatched.append( obj )
+            continue
+
+        pairs.append( ( obj, mirrorObj ) )
+
+    return [ pairs, unmatched ]
+
+def mirrorShapePairs( pairs, axis = 'x', origin = [0, 0, 0] ):
+
+    '''
+    mirror shapes of source objects to target objects, shapes are paired by their order under the objects
+
+    :param pairs: list( tuple( str ) ), ( source object, target object ) pairs, objects can be transforms or shapes
+    :param axis: str or list( float ), mirror axis, see mirrorPoints()
+    :param origin: list( float ), point on mirror plane
+    :return: dict, report with 'mirrored' pairs and 'cvMismatch' list of ( source shape, target shape, source count, target count )
+    '''
+
+    reportDt = { 'mirrored': [], 'cvMismatch': [] }
+
+    shapePairs = []
+    sourcePoints = []
+
+    for sourceObj, targetObj in pairs:
+
+        sourceShapes = shape.getShape( sourceObj, useLongName = True )
+        targetShapes = shape.getShape( targetObj, useLongName = True )
+
+        if len( sourceShapes ) != len( targetShapes ):
+
+            reportDt['cvMismatch'].append( ( sourceObj, targetObj, len( sourceShapes ), len( targetShapes ) ) )
+            continue
+
+        pointsMatch = True
+
+        for sourceShape, targetShape in zip( sourceShapes, targetShapes ):
+
+            positions = getShapePositions( sourceShape )
+            targetCount = om2.MItGeometry( apiwrap.api2_getDagPath( targetShape ) ).count()
+
+            if positions.shape[0] != targetCount:
+
+                reportDt['cvMismatch'].append( ( name.short( sourceShape ), name.short( targetShape ), positions.shape[0], targetCount ) )
+                pointsMatch = False
+                continue
+
+            shapePairs.append( ( sourceShape, targetShape ) )
+            sourcePoints.append( positions )
+
+        if pointsMatch:
+
+            reportDt['mirrored'].append( ( sourceObj, targetObj ) )
+
+    if not sourcePoints:
+
+        return reportDt
+
+    # all points are mirrored at once and split back by shapes
+
+    mirroredPoints = mirrorPoints( np.concatenate( sourcePoints ), axis, origin )
+    splitIndices = np.cumsum( [ p.shape[0] for p in sourcePoints ] )[:-1]
+
+    for ( sourceShape, targetShape ), positions in zip( shapePairs, np.split( mirroredPoints, splitIndices ) ):
+
+        setShapePositions( targetShape, positions )
+
+    return reportDt
+
+def mirrorShapes( objects = [], sourceSide = 'l', axis = 'x', origin = [0, 0, 0], verbose = True ):
+
+    '''
+    mirror shapes of objects from one side to the other, e.g. all control shapes of rig from left to right
+
+    :param objects: list( str ), objects to mirror, if empty, all transforms of nurbs curves in scene are used
+    :param sourceSide: str, 'l' or 'r', side of objects with shapes to mirror
+    :param axis: str or list( float ), mirror axis, see mirrorPoints()
+    :param origin: list( float ), point on mirror plane
+    :param verbose: bool, print unmatched objects and shapes with different number of CVs
+    :return: dict, report with 'mirrored', 'unmatched' and 'cvMismatch' lists
+    '''
+
+    pairs, unmatched = buildMirrorMap( objects, sourceSide )
+    reportDt = mirrorShapePairs( pairs, axis, origin )
+    reportDt['unmatched'] = unmatched
+
+    if verbose:
+
+        _printReport( reportDt )
+
+    return reportDt
+
+def mirrorComponents( components, axis = 'x', origin = [0, 0, 0], mirrorNameFunction = name.getMirrorName, verbose = True ):
+
+    '''
+    mirror positions of given components (CVs, vertices) to components with the same index on opposite side object
+
+    :param components: list( str ), components like 'l_arm_ctl.cv[3]', usually from mc.ls( sl = 1 )
+    :param axis: str or list( float ), mirror axis, see mirrorPoints()
+    :param origin: list( float ), point on mirror plane
+    :param mirrorNameFunction: function, returns name of object on opposite side or None
+    :param verbose: bool, print unmatched objects and components missing on opposite side
+    :return: dict, report with 'mirrored', 'unmatched', 'cvMismatch' and 'skipped' (not point components) lists
+    '''
+
+    reportDt = { 'mirrored': [], 'unmatched': [], 'cvMismatch': [], 'skipped': [] }
+
+    # group component indices by object, ranges are flattened to single components,
+    # two indices of surface CVs (cv[u][v]) are converted to point index
+
+    componentIndices = {}
+    componentPattern = re.compile( r'^(.+)\.(\w+)\[(\d+)\](?:\[(\d+)\])?$' )
+    pointTypes = [ 'cv', 'vtx', 'pt' ]
+
+    for component in mc.ls( components, fl = 1 ):
+
+        match = componentPattern.match( component )
+
+        if not match or match.group( 2 ) not in pointTypes:
+
+            reportDt['skipped'].append( component )
+            continue
+
+        obj, index, indexV = match.group( 1 ), int( match.group( 3 ) ), match.group( 4 )
+
+        if indexV is not None:
+
+            index = index * _getSurfaceCVsInV( obj ) + int( indexV )
+
+        componentIndices.setdefault( obj, [] ).append( index )
+
+    # skipped components are always reported, they would be left unmirrored silently otherwise
+
+    if reportDt['skipped']:
+
+        print '# shapeMirror: skipped %d components which are not points: %s' % ( len( reportDt['skipped'] ), reportDt['skipped'] )
+
+    targetShapes = []
+    targetIndices = []
+    sourcePoints = []
+
+    for obj in sorted( componentIndices.keys() ):
+
+        mirrorObj = mirrorNameFunction( name.short( obj ) )
+
+        if not mirrorObj or not mc.objExists( mirrorObj ):
+
+            reportDt['unmatched'].append( obj )
+            continue
+
+        sourceShape = shape.getShape( obj, useLongName = True )[0]
+        targetShape = shape.getShape( mirrorObj, useLongName = True )[0]
+
+        indices = np.array( componentIndices[ obj ], dtype = np.int64 )
+        targetCount = om2.MItGeometry( apiwrap.api2_getDagPath( targetShape ) ).count()
+
+        if indices.max() >= targetCount:
+
+            reportDt['cvMismatch'].append( ( obj, mirrorObj, int( indices.max() ) + 1, targetCount ) )
+            continue
+
+        targetShapes.append( targetShape )
+        targetIndices.append( indices )
+        sourcePoints.append( getShapePositions( sourceShape )[ indices ] )
+        reportDt['mirrored'].append( ( obj, mirrorObj ) )
+
+    if sourcePoints:
+
+        # all positions are taken before any is set, so left and right components can be swapped at once
+
+        mirroredPoints = mirrorPoints( np.concatenate( sourcePoints ), axis, origin )
+        splitIndices = np.cumsum( [ p.shape[0] for p in sourcePoints ] )[:-1]
+
+        for targetShape, indices, positions in zip( targetShapes, targetIndices, np.split( mirroredPoints, splitIndices ) ):
+
+            setShapePositions( targetShape, positions, indices )
+
+    if verbose:
+
+        _printReport( reportDt )
+
+    return reportDt
+
+def _getSurfaceCVsInV( obj ):
+
+    surfaceShape = shape.getShape( obj, useLongName = True )[0]
+
+    return om2.MFnNurbsSurface( apiwrap.api2_getDagPath( surfaceShape ) ).numCVsInV
+
+def _printReport( reportDt ):
+
+    for obj in reportDt['unmatched']:
+
+        print '# shapeMirror: cannot find mirror object for %s' % obj
+
+    for sourceObj, targetObj, sourceCount, targetCount in reportDt['cvMismatch']:
+
+        print '# shapeMirror: %s has %d points, %s has %d points, skipped' % ( sourceObj, sourceCount, targetObj, targetCount )
+
+    print '# shapeMirror: mirrored %d objects' % len( reportDt['mirrored'] )
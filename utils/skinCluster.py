@@ -5,18 +5,29 @@ module to work with skin clusters
 """
 
 import os
+import hashlib
 from string import atoi
 from string import atof
 
 import logging
 _logger = logging.getLogger( __name__ )
 
+weightsCacheKeyAttr = 'weightsCacheKey'
+
 import maya.cmds as mc
 import maya.mel as mm
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as oma2
 import pymel.core as pm
+import numpy as np
 
 import name
 import shape
+import apiwrap
+import weightsRemap
+import weightsConditioner
+import skinWeightsFile
+import buildSession
 
 def getRelated( shapeObj ):
     
@@ -77,10 +88,14 @@ def makeSkinClusterAddInfluences( shapeObj, influences, verbose = False, useComp
         mc.setAttr( skincldef + '.maintainMaxInfluences', 0, l = 1 )
     
     # turn off skinCluster envelope before adding influences
-    # to minimize evaluations
+    # to minimize evaluations, running build session keeps it off until build ends
+    
+    envelopeDeferred = buildSession.deferEnvelope( skincldef )
     
-    try: mc.setAttr( skincldef + '.en', 0 )
-    except: pass
+    if not envelopeDeferred:
+        
+        try: mc.setAttr( skincldef + '.en', 0 )
+        except: pass
     
     # add skin cluster influences if skinCluster had to be created
     
@@ -108,8 +123,10 @@ def makeSkinClusterAddInfluences( shapeObj, influences, verbose = False, useComp
     
     # turn skinCluster node back on
     
-    try: mc.setAttr( skincldef + '.en', 1 )
-    except: pass
+    if not envelopeDeferred:
+        
+        try: mc.setAttr( skincldef + '.en', 1 )
+        except: pass
     
     
     return [ skincldef, scInfluences, createdSkinCluster ]
@@ -318,4 +335,276 @@ def getJointMatrixIndex(skinnedJoint, skinClusterTarget):
     wmPlugIdx = plugAttr.split('[')[-1]
     wmPlugIdx = wmPlugIdx.split(']')[0]
     
-    return int(wmPlugIdx)
\ No newline at end of file
+    return int(wmPlugIdx)
+
+def getAllComponents( shapePath ):
+    
+    '''
+    get components for all points of skinned shape, points are in the same order as with MItGeometry
+    
+    :param shapePath: maya.api.OpenMaya.MDagPath, path of skinned shape (mesh, nurbsSurface or nurbsCurve)
+    :return: maya.api.OpenMaya.MObject, components object
+    '''
+    
+    if shapePath.apiType() == om2.MFn.kNurbsSurface:
+        
+        fnSurface = om2.MFnNurbsSurface( shapePath )
+        cvsU = fnSurface.numCVsInU
+        cvsV = fnSurface.numCVsInV
+        
+        # periodic surfaces have overlapping CVs
+        if fnSurface.formInU == om2.MFnNurbsSurface.kPeriodic: cvsU -= fnSurface.degreeInU
+        if fnSurface.formInV == om2.MFnNurbsSurface.kPeriodic: cvsV -= fnSurface.degreeInV
+        
+        fnComponents = om2.MFnDoubleIndexedComponent()
+        components = fnComponents.create( om2.MFn.kSurfaceCVComponent )
+        fnComponents.addElements( [ [ u, v ] for u in range( cvsU ) for v in range( cvsV ) ] )
+        
+        return components
+    
+    componentType = om2.MFn.kMeshVertComponent
+    
+    if shapePath.apiType() == om2.MFn.kNurbsCurve:
+        
+        componentType = om2.MFn.kCurveCVComponent
+    
+    fnComponents = om2.MFnSingleIndexedComponent()
+    components = fnComponents.create( componentType )
+    fnComponents.setCompleteData( om2.MItGeometry( shapePath ).count() )
+    
+    return components
+
+def getInfluenceNames( skinClusterNode ):
+    
+    '''
+    get skinCluster influence names in order of influence indices, without DAG path and namespace
+    
+    :param skinClusterNode: str, name of skinCluster
+    :return: list( str )
+    '''
+    
+    fnSkinCluster = oma2.MFnSkinCluster( apiwrap.api2_getMObject( skinClusterNode ) )
+    
+    return [ name.removeNamespace( infPath.partialPathName().split( '|' )[-1] ) for infPath in fnSkinCluster.influenceObjects() ]
+
+def getWeightsArray( skinClusterNode ):
+    
+    '''
+    get all weights of skinCluster with single API call
+    
+    :param skinClusterNode: str, name of skinCluster
+    :return: list( list( str ), numpy.ndarray ), 0- influence names, 1- (vertices x influences) weights array
+    '''
+    
+    fnSkinCluster = oma2.MFnSkinCluster( apiwrap.api2_getMObject( skinClusterNode ) )
+    shapePath = fnSkinCluster.getPathAtIndex( 0 )
+    
+    weightValues, infCount = fnSkinCluster.getWeights( shapePath, getAllComponents( shapePath ) )
+    weightsArray = np.array( weightValues, dtype = np.float64 ).reshape( -1, infCount )
+    
+    return [ getInfluenceNames( skinClusterNode ), weightsArray ]
+
+def getPointPositions( shapePath ):
+    
+    '''
+    get object space positions of all shape points
+    
+    :param shapePath: maya.api.OpenMaya.MDagPath, path of shape
+    :return: numpy.ndarray, (points x 3) positions
+    '''
+    
+    points = om2.MItGeometry( shapePath ).allPositions()
+    
+    return np.array( [ [ p.x, p.y, p.z ] for p in points ], dtype = np.float64 ).reshape( -1, 3 )
+
+def getRestInfo( skinClusterNode ):
+    
+    '''
+    get point positions and topology hash of skinned shape, they are saved with weights
+    so weights can be remapped later to shape with changed topology
+    
+    NOTE: positions are taken from current shape, so weights should be saved in bind pose
+    
+    :param skinClusterNode: str, name of skinCluster
+    :return: list( numpy.ndarray, str ), 0- (points x 3) positions, 1- topology hash
+    '''
+    
+    fnSkinCluster = oma2.MFnSkinCluster( apiwrap.api2_getMObject( skinClusterNode ) )
+    shapePath = fnSkinCluster.getPathAtIndex( 0 )
+    
+    return [ getPointPositions( shapePath ), shape.getTopologyHash( shapePath.fullPathName() ) ]
+
+def setWeightsArray( skinClusterNode, influenceIndices, weightsArray, positions = None, topologyHash = None ):
+    
+    '''
+    set all weights of skinCluster with single API call,
+    if points positions are given and points count or topology are different from skinned shape,
+    weights are remapped by closest points positions
+    
+    :param skinClusterNode: str, name of skinCluster
+    :param influenceIndices: list( int ), skinCluster influence index for each column of weights array
+    :param weightsArray: numpy.ndarray, (vertices x influences) weights array
+    :param positions: numpy.ndarray, optional, (vertices x 3) points positions the weights were saved with
+    :param topologyHash: str, optional, topology hash of shape the weights were saved from
+    :return: bool, True if weights were set
+    '''
+    
+    # skinCluster does not deform while weights are set in running build session
+    buildSession.deferEnvelope( skinClusterNode )
+    
+    fnSkinCluster = oma2.MFnSkinCluster( apiwrap.api2_getMObject( skinClusterNode ) )
+    shapePath = fnSkinCluster.getPathAtIndex( fnSkinCluster.indexForOutputConnection( 0 ) )
+    vertexCount = om2.MItGeometry( shapePath ).count()
+    
+    topologyChanged = weightsArray.shape[0] != vertexCount
+    
+    if not topologyChanged and topologyHash and positions is not None:
+        
+        topologyChanged = topologyHash != shape.getTopologyHash( shapePath.fullPathName() )
+    
+    if topologyChanged and positions is not None:
+        
+        _logger.info( 'topology changed for {}, remapping weights by points positions'.format( skinClusterNode ) )
+        weightsArray = weightsRemap.remapWeights( positions, weightsArray, getPointPositions( shapePath ) )
+    
+    elif weightsArray.shape[0] != vertexCount:
+        
+        _logger.warning( 'vertex counts don\'t match ({} in weights, {} in scene) for {}, result might be bad'.format( weightsArray.shape[0], vertexCount, skinClusterNode ) )
+        
+        if weightsArray.shape[0] < vertexCount:
+            
+            _logger.warning( '{} weights can`t be set, not enough weights'.format( skinClusterNode ) )
+            return False
+        
+        weightsArray = weightsArray[:vertexCount]
+    
+    weightValues = om2.MDoubleArray( np.ravel( weightsArray ).astype( np.float64 ).tolist() )
+    fnSkinCluster.setWeights( shapePath, getAllComponents( shapePath ), om2.MIntArray( influenceIndices ), weightValues, False )
+    
+    return True
+
+def getWeightsCacheKey( shapeObj, weightsHash, influences ):
+    
+    '''
+    get key of applied skin weights, key changes with weights file content, shape topology or influences list
+    
+    :param shapeObj: str, skinned shape or its transform
+    :param weightsHash: str, hash of weights file content
+    :param influences: list( str ), influences names from weights file
+    :return: str, cache key
+    '''
+    
+    keyHash = hashlib.sha1( weightsHash.encode( 'utf-8' ) )
+    keyHash.update( shape.getTopologyHash( shapeObj ).encode( 'utf-8' ) )
+    keyHash.update( '|'.join( influences ).encode( 'utf-8' ) )
+    
+    return keyHash.hexdigest()
+
+def getStoredCacheKey( skinClusterNode ):
+    
+    '''
+    get weights cache key stored on skinCluster when its weights were loaded
+    
+    :param skinClusterNode: str, name of skinCluster
+    :return: str, cache key, None if skinCluster has no key
+    '''
+    
+    if not mc.attributeQuery( weightsCacheKeyAttr, n = skinClusterNode, exists = True ):
+        
+        return None
+    
+    return mc.getAttr( skinClusterNode + '.' + weightsCacheKeyAttr )
+
+def storeCacheKey( skinClusterNode, cacheKey ):
+    
+    '''
+    store weights cache key on skinCluster, so loading the same weights again can be skipped
+    
+    :param skinClusterNode: str, name of skinCluster
+    :param cacheKey: str, key from getWeightsCacheKey()
+    :return: None
+    '''
+    
+    if not mc.attributeQuery( weightsCacheKeyAttr, n = skinClusterNode, exists = True ):
+        
+        mc.addAttr( skinClusterNode, ln = weightsCacheKeyAttr, dt = 'string' )
+    
+    mc.setAttr( skinClusterNode + '.' + weightsCacheKeyAttr, cacheKey, type = 'string' )
+
+def getBlendWeightsArray( skinClusterNode ):
+    
+    '''
+    get all skinCluster blend weights (dual quaternion amount per vertex) with single API call
+    
+    :param skinClusterNode: str, name of skinCluster
+    :return: numpy.ndarray, blend weight for each vertex
+    '''
+    
+    fnSkinCluster = oma2.MFnSkinCluster( apiwrap.api2_getMObject( skinClusterNode ) )
+    shapePath = fnSkinCluster.getPathAtIndex( 0 )
+    
+    return np.array( fnSkinCluster.getBlendWeights( shapePath, getAllComponents( shapePath ) ), dtype = np.float64 )
+
+def setBlendWeightsArray( skinClusterNode, values, indices = None ):
+    
+    '''
+    set skinCluster blend weights (dual quaternion amount per vertex) with single API call
+    
+    :param skinClusterNode: str, name of skinCluster
+    :param values: numpy.ndarray or sequence, blend weight for each vertex or for each of given indices
+    :param indices: list( int ), optional, vertex indices of given values, other vertices keep their blend weights
+    :return: None
+    '''
+    
+    fnSkinCluster = oma2.MFnSkinCluster( apiwrap.api2_getMObject( skinClusterNode ) )
+    shapePath = fnSkinCluster.getPathAtIndex( fnSkinCluster.indexForOutputConnection( 0 ) )
+    
+    if indices is not None:
+        
+        allValues = getBlendWeightsArray( skinClusterNode )
+        allValues[ np.asarray( indices, dtype = np.int64 ) ] = values
+        values = allValues
+    
+    blendValues = om2.MDoubleArray( np.ravel( values ).astype( np.float64 ).tolist() )
+    fnSkinCluster.setBlendWeights( shapePath, getAllComponents( shapePath ), blendValues )
+
+def conditionWeights( skinClusterNode, maxInfluences = 4, epsilon = 0.001, removeUnused = True ):
+    
+    '''
+    prune weights below epsilon, keep only maxInfluences biggest weights per vertex and normalize them,
+    weights are read and set with single API calls and influences left without weights are removed from skinCluster
+    
+    :param skinClusterNode: str, name of skinCluster
+    :param maxInfluences: int, maximum number of influences per vertex, skinCluster max influences are set to it too
+    :param epsilon: float, weights below this value are removed
+    :param removeUnused: bool, remove influences without any weight from skinCluster
+    :return: dict, conditioning statistics, see weightsConditioner.conditionSkinWeights()
+    '''
+    
+    influences, weightsArray = getWeightsArray( skinClusterNode )
+    skinWeights = skinWeightsFile.SkinWeights( skinClusterNode, influences, weightsArray )
+    
+    conditionedWeights, statsDt = weightsConditioner.conditionSkinWeights( skinWeights, maxInfluences, epsilon, removeUnused = False )
+    conditionedArray = conditionedWeights.weights
+    
+    setWeightsArray( skinClusterNode, range( len( influences ) ), conditionedArray )
+    
+    mc.setAttr( skinClusterNode + '.maxInfluences', maxInfluences )
+    mc.setAttr( skinClusterNode + '.maintainMaxInfluences', 1 )
+    
+    # influences are removed after their weights are zero so other weights are not changed
+    unusedColumns = np.nonzero( ~np.any( conditionedArray > 0.0, axis = 0 ) )[0]
+    
+    if removeUnused and 0 < unusedColumns.size < len( influences ):
+        
+        fnSkinCluster = oma2.MFnSkinCluster( apiwrap.api2_getMObject( skinClusterNode ) )
+        influencePaths = fnSkinCluster.influenceObjects()
+        unusedInfluences = [ influencePaths[ i ].fullPathName() for i in unusedColumns ]
+        
+        mc.skinCluster( skinClusterNode, e = True, ri = unusedInfluences )
+        
+        statsDt['removedInfluences'] = [ influences[ i ] for i in unusedColumns ]
+    
+    statsDt['influencesAfter'] = len( influences ) - len( statsDt['removedInfluences'] )
+    
+    return statsDt
@@ -0,0 +1,1095 @@
+"""
+module to read and write skin weights files
+@category rigging @subcategory utils
+@tags skinCluster skin weights file binary numpy
+
+NOTE: this module doesn't use Maya, weights files can be read and written from any Python process
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+import numpy as np
+
+textExt = '.skinwt'
+binaryExt = '.skinwb'
+journalExt = '.skinwj'
+blendWeightsBinaryExt = '.wtsb'
+
+binaryMagic = b'SKWB'
+binaryVersion = 3
+journalMagic = b'SKWJ'
+journalVersion = 1
+blendWeightsMagic = b'SKBW'
+blendWeightsVersion = 1
+binaryWeightsDtype = np.float32
+binaryOffsetsDtype = np.uint32
+binaryPositionsDtype = np.float32
+
+quantizeBitsOptions = [ 8, 16 ]
+
+denseEncoding = 'dense'
+sparseEncoding = 'sparse'
+
+journalBaseRecord = 'base'
+journalDeltaRecord = 'delta'
+journalCompactRatio = 0.5
+journalTolerance = 1e-6
+
+_fileHeaderStruct = struct.Struct( '<4sI' )
+_recordHeaderStruct = struct.Struct( '<I' )
+
+class SkinWeights( object ):
+
+    '''
+    skin weights of one skinned object
+
+    weights can be given as dense (vertices x influences) array or in sparse (CSR) form:
+    per vertex offsets into influence indices and weight values, with non-zero weights only
+
+    optional rest positions (vertices x 3) and topology hash of the shape
+    are used to remap weights when loaded on shape with different topology,
+    optional deformer name keeps skinCluster name when object has more (parallel) skinClusters
+    '''
+
+    def __init__( self, objectName, influences, weights = None, sparse = None, positions = None, topologyHash = None ):
+
+        '''
+        :param objectName: str, name of skinned object
+        :param influences: list( str ), influence names in skinCluster order
+        :param weights: numpy.ndarray or sequence, optional, weights values, flat or (vertices x influences)
+        :param sparse: tuple( numpy.ndarray ), optional, ( offsets, influenceIndices, values ) with vertices count + 1 offsets
+        :param positions: numpy.ndarray, optional, (vertices x 3) rest positions of shape points
+        :param topologyHash: str, optional, topology hash of shape the weights were saved from
+        '''
+
+        self.objectName = objectName
+        self.influences = list( influences )
+        self.positions = None if positions is None else np.asarray( positions ).reshape( -1, 3 )
+        self.topologyHash = topologyHash
+        self.deformerName = None
+        self.fileHash = None
+        self._weights = None
+        self._sparse = None
+
+        if weights is not None:
+
+            self._weights = np.asarray( weights ).reshape( -1, len( self.influences ) )
+
+        elif sparse is not None:
+
+            offsets, indices, values = sparse
+            self._sparse = ( np.asarray( offsets ), np.asarray( indices ), np.asarray( values ) )
+
+        else:
+
+            raise Exception( '# weights or sparse weights need to be given for %s' % objectName )
+
+    @property
+    def weights( self ):
+
+        '''
+        dense (vertices x influences) weights array, expanded from sparse weights in one step if needed
+        '''
+
+        if self._weights is None:
+
+            offsets, indices, values = self._sparse
+            vertexRows = np.repeat( np.arange( offsets.size - 1 ), np.diff( offsets.astype( np.int64 ) ) )
+
+            self._weights = np.zeros( ( offsets.size - 1, len( self.influences ) ), dtype = values.dtype )
+            self._weights[ vertexRows, indices ] = values
+
+        return self._weights
+
+    @property
+    def sparse( self ):
+
+        '''
+        sparse weights ( offsets, influenceIndices, values ), made from dense weights if needed
+        '''
+
+        if self._sparse is None:
+
+            vertexRows, indices = np.nonzero( self._weights )
+            offsets = np.zeros( self._weights.shape[0] + 1, dtype = binaryOffsetsDtype )
+            offsets[1:] = np.cumsum( np.bincount( vertexRows, minlength = self._weights.shape[0] ) )
+
+            self._sparse = ( offsets, indices, self._weights[ vertexRows, indices ] )
+
+        return self._sparse
+
+    @property
+    def vertexCount( self ):
+
+        if self._weights is None:
+
+            return self._sparse[0].size - 1
+
+        return self._weights.shape[0]
+
+    @property
+    def influenceCount( self ):
+
+        return len( self.influences )
+
+def isBinaryFile( filePath ):
+
+    '''
+    check if given weights file path uses binary format extension
+
+    :param filePath: str, weights file path
+    :return: bool
+    '''
+
+    return filePath.lower().endswith( binaryExt )
+
+def isJournalFile( filePath ):
+
+    '''
+    check if given weights file path uses journal format extension
+
+    :param filePath: str, weights file path
+    :return: bool
+    '''
+
+    return filePath.lower().endswith( journalExt )
+
+def _getIndicesDtype( influenceCount ):
+
+    if influenceCount <= np.iinfo( np.uint16 ).max:
+
+        return np.dtype( np.uint16 )
+
+    return np.dtype( np.uint32 )
+
+def _getQuantizedDtype( quantizeBits ):
+
+    if quantizeBits not in quantizeBitsOptions:
+
+        raise Exception( '# quantized weights can use %s bits, not %s' % ( quantizeBitsOptions, quantizeBits ) )
+
+    return np.dtype( 'u%d' % ( quantizeBits // 8 ) )
+
+def _getSparseRows( offsets ):
+
+    offsets = np.asarray( offsets, dtype = np.int64 )
+
+    return np.repeat( np.arange( offsets.size - 1 ), np.diff( offsets ) )
+
+def quantizeSparseWeights( sparseWeights, quantizeBits ):
+
+    '''
+    convert sparse weights values to fixed point integers, each vertex keeps its weights sum in whole steps
+    (largest remainder rounding) so every weight differs by less than one step (1 / (2 ** quantizeBits - 1))
+
+    :param sparseWeights: tuple( numpy.ndarray ), ( offsets, influenceIndices, values ) with vertices count + 1 offsets
+    :param quantizeBits: int, 8 or 16 bits per weight
+    :return: numpy.ndarray, quantized values
+    '''
+
+    offsets, indices, values = sparseWeights
+    steps = 2 ** quantizeBits - 1
+    vertexCount = np.asarray( offsets ).size - 1
+    vertexRows = _getSparseRows( offsets )
+
+    scaled = np.clip( np.asarray( values, dtype = np.float64 ), 0.0, 1.0 ) * steps
+    quantized = np.floor( scaled )
+    remainders = scaled - quantized
+
+    # steps lost by rounding down are given back to weights with biggest remainders of each vertex
+    rowTargets = np.round( np.bincount( vertexRows, weights = scaled, minlength = vertexCount ) )
+    rowDeficits = rowTargets - np.bincount( vertexRows, weights = quantized, minlength = vertexCount )
+
+    order = np.lexsort( ( -remainders, vertexRows ) )
+    ranks = np.empty( quantized.size, dtype = np.int64 )
+    ranks[ order ] = np.arange( quantized.size ) - np.asarray( offsets, dtype = np.int64 )[ vertexRows[ order ] ]
+
+    quantized[ ranks < rowDeficits[ vertexRows ] ] += 1
+
+    return np.minimum( quantized, steps ).astype( _getQuantizedDtype( quantizeBits ) )
+
+def dequantizeSparseWeights( offsets, quantizedValues ):
+
+    '''
+    convert quantized sparse weights values back to floats, weights of each vertex are normalized to sum 1.0
+
+    :param offsets: numpy.ndarray, vertices count + 1 offsets of sparse weights
+    :param quantizedValues: numpy.ndarray, quantized values
+    :return: numpy.ndarray, values
+    '''
+
+    values = np.asarray( quantizedValues, dtype = np.float64 )
+    vertexRows = _getSparseRows( offsets )
+
+    rowSums = np.bincount( vertexRows, weights = values, minlength = np.asarray( offsets ).size - 1 )
+    rowSums[ rowSums == 0.0 ] = 1.0
+
+    return values / rowSums[ vertexRows ]
+
+def _getRecordArrays( skinWeights, sparse, quantizeBits = None ):
+
+    '''
+    get encoding name, list of ( name, array ) to be written for one object
+    and biggest weight difference made by quantization
+    '''
+
+    maxDeviation = 0.0
+
+    if quantizeBits:
+
+        offsets, indices, values = skinWeights.sparse
+        quantizedValues = quantizeSparseWeights( skinWeights.sparse, quantizeBits )
+
+        if values.size:
+
+            maxDeviation = float( np.abs( dequantizeSparseWeights( offsets, quantizedValues ) - values ).max() )
+
+    if not sparse and not quantizeBits:
+
+        encoding = denseEncoding
+        recordArrays = [ ( 'weights', np.ascontiguousarray( skinWeights.weights, dtype = binaryWeightsDtype ) ) ]
+
+    elif not sparse:
+
+        # zero weights are part of quantized dense array
+        quantizedWeights = np.zeros( ( skinWeights.vertexCount, skinWeights.influenceCount ), dtype = quantizedValues.dtype )
+        quantizedWeights[ _getSparseRows( offsets ), indices ] = quantizedValues
+
+        encoding = denseEncoding
+        recordArrays = [ ( 'weights', quantizedWeights ) ]
+
+    else:
+
+        offsets, indices, values = skinWeights.sparse
+
+        encoding = sparseEncoding
+        recordArrays = [
+                        ( 'offsets', np.ascontiguousarray( offsets, dtype = binaryOffsetsDtype ) ),
+                        ( 'indices', np.ascontiguousarray( indices, dtype = _getIndicesDtype( skinWeights.influenceCount ) ) ),
+                        ( 'values', quantizedValues if quantizeBits else np.ascontiguousarray( values, dtype = binaryWeightsDtype ) )
+                        ]
+
+    if skinWeights.positions is not None:
+
+        recordArrays.append( ( 'positions', np.ascontiguousarray( skinWeights.positions, dtype = binaryPositionsDtype ) ) )
+
+    return encoding, recordArrays, maxDeviation
+
+def _writeRecord( fileobj, headerDt, recordArrays ):
+
+    '''
+    write one record: header size, JSON header with arrays description and arrays data
+    '''
+
+    headerDt['arrays'] = [ { 'name': arrayName, 'dtype': array.dtype.str, 'count': array.size } for arrayName, array in recordArrays ]
+    headerStr = json.dumps( headerDt ).encode( 'utf-8' )
+
+    fileobj.write( _recordHeaderStruct.pack( len( headerStr ) ) )
+    fileobj.write( headerStr )
+
+    for arrayName, array in recordArrays:
+
+        fileobj.write( array.tobytes() )
+
+def _readFileBuffer( filePath, magic, version ):
+
+    '''
+    read whole binary file in one call and check its magic and version
+
+    :return: list( str, str ), 0- file buffer, 1- file content hash
+    '''
+
+    fileobj = open( filePath, mode = 'rb' )
+    fileBuffer = fileobj.read()
+    fileobj.close()
+
+    fileMagic, fileVersion = _fileHeaderStruct.unpack_from( fileBuffer, 0 )
+
+    if fileMagic != magic:
+
+        raise Exception( '# file %s is not a binary %s file' % ( filePath, 'skin weights' if magic == binaryMagic else 'blend weights' ) )
+
+    if fileVersion > version:
+
+        raise Exception( '# file %s was saved with newer version %d of binary weights format' % ( filePath, fileVersion ) )
+
+    return [ fileBuffer, hashlib.sha1( fileBuffer ).hexdigest() ]
+
+def _readRecord( fileBuffer, offset, defaultArraysInfo = None ):
+
+    '''
+    read one record from file buffer, arrays are mapped from the buffer without copying
+
+    :return: list( dict, dict, int ), 0- header, 1- arrays by name, 2- offset after the record
+    '''
+
+    headerSize = _recordHeaderStruct.unpack_from( fileBuffer, offset )[0]
+    offset += _recordHeaderStruct.size
+
+    headerDt = json.loads( fileBuffer[ offset:offset + headerSize ].decode( 'utf-8' ) )
+    offset += headerSize
+
+    arraysInfo = headerDt.get( 'arrays' ) or defaultArraysInfo( headerDt )
+    arraysDt = {}
+
+    for arrayInfo in arraysInfo:
+
+        dtype = np.dtype( str( arrayInfo['dtype'] ) )
+        arraysDt[ arrayInfo['name'] ] = np.frombuffer( fileBuffer, dtype = dtype, count = arrayInfo['count'], offset = offset )
+        offset += arrayInfo['count'] * dtype.itemsize
+
+    return [ headerDt, arraysDt, offset ]
+
+def _getVersion1ArraysInfo( headerDt ):
+
+    # version 1 files have only dense weights
+    return [ { 'name': 'weights', 'dtype': headerDt.get( 'dtype' ), 'count': headerDt['vertexCount'] * len( headerDt['influences'] ) } ]
+
+def writeBinary( filePath, skinWeightsList, sparse = False, quantizeBits = None, deviationReport = None ):
+
+    '''
+    write skin weights of one or more objects into binary weights file
+
+    :param filePath: str, file path with extension ('/dir1/dir2/body_geo.skinwb')
+    :param skinWeightsList: list( SkinWeights ), weights of skinned objects
+    :param sparse: bool, store only non-zero weights with their influence indices, file size will scale with non-zero weights
+    :param quantizeBits: int, optional, store weights as 8 or 16 bit fixed point values,
+                        each weight differs by less than 1 / (2 ** quantizeBits - 1) and loaded weights are normalized
+    :param deviationReport: dict, optional, filled with biggest weight difference made by quantization for each object name
+    :return: str, filePath
+
+    NOTE: rest positions, topology hash and deformer name of objects are written if they are set,
+    records are written in given order so one file can keep more skinClusters of one object in their deformation order
+    '''
+
+    if quantizeBits:
+
+        _getQuantizedDtype( quantizeBits )
+
+    fileobj = open( filePath, mode = 'wb' )
+    fileobj.write( _fileHeaderStruct.pack( binaryMagic, binaryVersion ) )
+
+    for skinWeights in skinWeightsList:
+
+        encoding, recordArrays, maxDeviation = _getRecordArrays( skinWeights, sparse, quantizeBits )
+        headerDt = _getSkinWeightsHeader( skinWeights, encoding )
+
+        if quantizeBits:
+
+            headerDt['quantizeBits'] = quantizeBits
+            headerDt['maxDeviation'] = maxDeviation
+
+        if deviationReport is not None:
+
+            deviationReport[ skinWeights.objectName ] = maxDeviation
+
+        _writeRecord( fileobj, headerDt, recordArrays )
+
+    fileobj.close()
+
+    return filePath
+
+def readBinary( filePath ):
+
+    '''
+    read binary weights file, file is read in one call and weights are mapped from its buffer
+
+    :param filePath: str, file path with extension ('/dir1/dir2/body_geo.skinwb')
+    :return: list( SkinWeights )
+    '''
+
+    fileBuffer, fileHash = _readFileBuffer( filePath, binaryMagic, binaryVersion )
+
+    skinWeightsList = []
+    offset = _fileHeaderStruct.size
+
+    while offset < len( fileBuffer ):
+
+        headerDt, arraysDt, offset = _readRecord( fileBuffer, offset, _getVersion1ArraysInfo )
+        quantized = bool( headerDt.get( 'quantizeBits' ) )
+
+        if headerDt.get( 'encoding', denseEncoding ) == sparseEncoding:
+
+            values = arraysDt['values']
+
+            if quantized:
+
+                values = dequantizeSparseWeights( arraysDt['offsets'], values )
+
+            sparseWeights = ( arraysDt['offsets'], arraysDt['indices'], values )
+            skinWeights = SkinWeights( headerDt['objectName'], headerDt['influences'], sparse = sparseWeights )
+
+        else:
+
+            weights = arraysDt['weights']
+
+            if quantized:
+
+                weights = weights.reshape( -1, len( headerDt['influences'] ) ).astype( np.float64 )
+                rowSums = weights.sum( axis = 1 )
+                rowSums[ rowSums == 0.0 ] = 1.0
+                weights /= rowSums[:, np.newaxis]
+
+            skinWeights = SkinWeights( headerDt['objectName'], headerDt['influences'], weights = weights )
+
+        skinWeights.positions = arraysDt.get( 'positions' )
+        skinWeights.topologyHash = headerDt.get( 'topologyHash' )
+        skinWeights.deformerName = headerDt.get( 'deformerName' )
+
+        if skinWeights.positions is not None:
+
+            skinWeights.positions = skinWeights.positions.reshape( -1, 3 )
+
+        skinWeights.fileHash = fileHash
+        skinWeightsList.append( skinWeights )
+
+    return skinWeightsList
+
+def _getSkinWeightsHeader( skinWeights, encoding ):
+
+    headerDt = {
+                'objectName': skinWeights.objectName,
+                'influences': skinWeights.influences,
+                'vertexCount': skinWeights.vertexCount,
+                'encoding': encoding,
+                'topologyHash': skinWeights.topologyHash
+                }
+
+    if skinWeights.deformerName:
+
+        headerDt['deformerName'] = skinWeights.deformerName
+
+    return headerDt
+
+def _writeJournalBase( filePath, skinWeightsList ):
+
+    '''
+    write new journal file with base snapshot of all objects, any previous deltas are dropped
+    '''
+
+    fileobj = open( filePath, mode = 'wb' )
+    fileobj.write( _fileHeaderStruct.pack( journalMagic, journalVersion ) )
+
+    for skinWeights in skinWeightsList:
+
+        encoding, recordArrays, maxDeviation = _getRecordArrays( skinWeights, True )
+
+        headerDt = _getSkinWeightsHeader( skinWeights, encoding )
+        headerDt['record'] = journalBaseRecord
+        headerDt['save'] = 0
+
+        _writeRecord( fileobj, headerDt, recordArrays )
+
+    fileobj.close()
+
+def _replayJournal( filePath, lastSave = None ):
+
+    '''
+    read journal file and apply its deltas to base weights
+
+    :return: list( list( SkinWeights ), int, int ), 0- weights of objects, 1- size of base snapshot in bytes, 2- number of last replayed save
+    '''
+
+    fileBuffer, fileHash = _readFileBuffer( filePath, journalMagic, journalVersion )
+
+    skinWeightsList = []
+    skinWeightsDt = {}
+    baseSize = _fileHeaderStruct.size
+    saveNumber = 0
+    offset = _fileHeaderStruct.size
+
+    while offset < len( fileBuffer ):
+
+        headerDt, arraysDt, offset = _readRecord( fileBuffer, offset )
+
+        if headerDt['record'] == journalBaseRecord:
+
+            sparseWeights = ( arraysDt['offsets'], arraysDt['indices'], arraysDt['values'] )
+            skinWeights = SkinWeights( headerDt['objectName'], headerDt['influences'], sparse = sparseWeights )
+
+            # dense weights are copied from read-only file buffer so deltas can be written into them
+            skinWeights = SkinWeights( skinWeights.objectName, skinWeights.influences, weights = skinWeights.weights.astype( np.float64 ) )
+            skinWeights.positions = arraysDt.get( 'positions' )
+            skinWeights.topologyHash = headerDt.get( 'topologyHash' )
+            skinWeights.deformerName = headerDt.get( 'deformerName' )
+            skinWeights.fileHash = fileHash
+
+            if skinWeights.positions is not None:
+
+                skinWeights.positions = skinWeights.positions.reshape( -1, 3 )
+
+            skinWeightsList.append( skinWeights )
+            skinWeightsDt[ skinWeights.objectName ] = skinWeights
+            baseSize = offset
+            continue
+
+        if lastSave is not None and headerDt['save'] > lastSave:
+
+            break
+
+        # delta rows replace whole weights rows of changed vertices
+        skinWeights = skinWeightsDt[ headerDt['objectName'] ]
+        deltaWeights = SkinWeights( skinWeights.objectName, skinWeights.influences, sparse = ( arraysDt['offsets'], arraysDt['indices'], arraysDt['values'] ) )
+
+        skinWeights.weights[ arraysDt['vertices'] ] = deltaWeights.weights
+        saveNumber = headerDt['save']
+
+    return [ skinWeightsList, baseSize, saveNumber ]
+
+def readJournal( filePath, lastSave = None ):
+
+    '''
+    read journal weights file, base snapshot and all deltas are replayed into one weights array per object
+
+    :param filePath: str, file path with extension ('/dir1/dir2/body_geo.skinwj')
+    :param lastSave: int, optional, replay deltas only up to this save number to get earlier weights, 0 is base snapshot
+    :return: list( SkinWeights )
+    '''
+
+    return _replayJournal( filePath, lastSave )[0]
+
+def writeJournal( filePath, skinWeightsList, compactRatio = journalCompactRatio, tolerance = journalTolerance ):
+
+    '''
+    save skin weights into journal file, only rows of vertices with changed weights since last save are appended,
+    journal is compacted into new base snapshot when deltas get bigger than compactRatio of base size
+    or when objects, influences or topology changed
+
+    :param filePath: str, file path with extension ('/dir1/dir2/body_geo.skinwj')
+    :param skinWeightsList: list( SkinWeights ), weights of skinned objects
+    :param compactRatio: float, deltas size relative to base snapshot size which triggers compaction
+    :param tolerance: float, smallest weight difference counted as change
+    :return: dict, number of changed vertices for each object name, all vertices are counted if base snapshot was written
+    '''
+
+    if not os.path.exists( filePath ):
+
+        _writeJournalBase( filePath, skinWeightsList )
+
+        return dict( [ ( skinWeights.objectName, skinWeights.vertexCount ) for skinWeights in skinWeightsList ] )
+
+    savedWeightsList, baseSize, saveNumber = _replayJournal( filePath )
+    savedWeightsDt = dict( [ ( skinWeights.objectName, skinWeights ) for skinWeights in savedWeightsList ] )
+
+    compact = len( savedWeightsDt ) != len( skinWeightsList )
+    deltaRecords = []
+    changesDt = {}
+
+    for skinWeights in skinWeightsList:
+
+        savedWeights = savedWeightsDt.get( skinWeights.objectName )
+
+        if ( savedWeights is None or savedWeights.influences != skinWeights.influences
+            or savedWeights.vertexCount != skinWeights.vertexCount or savedWeights.topologyHash != skinWeights.topologyHash ):
+
+            compact = True
+            break
+
+        changedVertices = np.nonzero( np.any( np.abs( skinWeights.weights - savedWeights.weights ) > tolerance, axis = 1 ) )[0]
+        changesDt[ skinWeights.objectName ] = changedVertices.size
+
+        if not changedVertices.size:
+
+            continue
+
+        deltaWeights = SkinWeights( skinWeights.objectName, skinWeights.influences, weights = skinWeights.weights[ changedVertices ] )
+        encoding, recordArrays, maxDeviation = _getRecordArrays( deltaWeights, True )
+        recordArrays.insert( 0, ( 'vertices', np.ascontiguousarray( changedVertices, dtype = binaryOffsetsDtype ) ) )
+
+        headerDt = { 'record': journalDeltaRecord, 'objectName': skinWeights.objectName, 'save': saveNumber + 1, 'encoding': encoding }
+        deltaRecords.append( ( headerDt, recordArrays ) )
+
+    deltasSize = os.path.getsize( filePath ) - baseSize + sum( [ array.nbytes for headerDt, recordArrays in deltaRecords for arrayName, array in recordArrays ] )
+
+    if compact or deltasSize > baseSize * compactRatio:
+
+        _writeJournalBase( filePath, skinWeightsList )
+
+        return dict( [ ( skinWeights.objectName, skinWeights.vertexCount ) for skinWeights in skinWeightsList ] )
+
+    if deltaRecords:
+
+        fileobj = open( filePath, mode = 'ab' )
+
+        for headerDt, recordArrays in deltaRecords:
+
+            _writeRecord( fileobj, headerDt, recordArrays )
+
+        fileobj.close()
+
+    return changesDt
+
+def compactJournal( filePath ):
+
+    '''
+    replay journal file and write it again as base snapshot without deltas
+
+    :param filePath: str, file path with extension ('/dir1/dir2/body_geo.skinwj')
+    :return: str, filePath
+    '''
+
+    _writeJournalBase( filePath, readJournal( filePath ) )
+
+    return filePath
+
+def writeBlendWeights( filePath, deformerName, values, deformerType = 'skinCluster' ):
+
+    '''
+    write skinCluster blend weights (dual quaternion amount per vertex) into binary file,
+    only non-zero values are stored with their vertex indices
+
+    :param filePath: str, file path with extension ('/dir1/dir2/bodySkinBlend.wtsb')
+    :param deformerName: str, name of deformer node
+    :param values: numpy.ndarray or sequence, blend weight for each vertex
+    :param deformerType: str, type of deformer node
+    :return: str, filePath
+    '''
+
+    values = np.asarray( values ).ravel()
+    indices = np.nonzero( values )[0]
+
+    headerDt = { 'deformerName': deformerName, 'deformerType': deformerType, 'vertexCount': values.size }
+    recordArrays = [
+                    ( 'indices', np.ascontiguousarray( indices, dtype = binaryOffsetsDtype ) ),
+                    ( 'values', np.ascontiguousarray( values[ indices ], dtype = binaryWeightsDtype ) )
+                    ]
+
+    fileobj = open( filePath, mode = 'wb' )
+    fileobj.write( _fileHeaderStruct.pack( blendWeightsMagic, blendWeightsVersion ) )
+    _writeRecord( fileobj, headerDt, recordArrays )
+    fileobj.close()
+
+    return filePath
+
+def readBlendWeights( filePath ):
+
+    '''
+    read binary blend weights file
+
+    :param filePath: str, file path with extension ('/dir1/dir2/bodySkinBlend.wtsb')
+    :return: list( dict, numpy.ndarray ), 0- header with 'deformerName', 'deformerType' and 'vertexCount', 1- blend weight for each vertex
+    '''
+
+    fileBuffer, fileHash = _readFileBuffer( filePath, blendWeightsMagic, blendWeightsVersion )
+    headerDt, arraysDt, offset = _readRecord( fileBuffer, _fileHeaderStruct.size )
+
+    values = np.zeros( headerDt['vertexCount'], dtype = np.float64 )
+    values[ arraysDt['indices'] ] = arraysDt['values']
+
+    return [ headerDt, values ]
+
+def parseTextWeights( weightLines, influenceCount ):
+
+    '''
+    convert weight lines of text weights file into (vertices x influences) array
+
+    :param weightLines: list( str ), lines with weights separated by space, one line per vertex
+    :param influenceCount: int, number of influences per line
+    :return: numpy.ndarray
+    '''
+
+    weightsArray = np.array( ' '.join( weightLines ).split(), dtype = np.float64 )
+
+    return weightsArray.reshape( -1, influenceCount )
+
+def writeText( filePath, skinWeightsList ):
+
+    '''
+    write text weights file (.skinwt) in the same format as bSkinSaver writes from scene
+
+    :param filePath: str, file path with extension ('/dir1/dir2/body_geo.skinwt')
+    :param skinWeightsList: list( SkinWeights ), weights of skinned objects
+    '''
+
+    lines = []
+
+    for skinWeights in skinWeightsList:
+
+        lines.append( skinWeights.objectName )
+        lines.extend( skinWeights.influences )
+        lines.append( '============' )
+
+        for row in skinWeights.weights.tolist():
+
+            lines.append( ''.join( [ str( w ) + ' ' for w in row ] ) )
+
+        lines.append( '' )
+
+    fileobj = open( filePath, 'w' )
+    fileobj.write( '\n'.join( lines ) + '\n' )
+    fileobj.close()
+
+def readText( filePath ):
+
+    '''
+    read text weights file (.skinwt) written by bSkinSaver
+
+    :param filePath: str, file path with extension ('/dir1/dir2/body_geo.skinwt')
+    :return: list( SkinWeights )
+    '''
+
+    skinWeightsList = []
+
+    objectName = None
+    influences = []
+    weightLines = []
+    readingWeights = False
+
+    fileobj = open( filePath, mode = 'rb' )
+    fileBuffer = fileobj.read()
+    fileobj.close()
+
+    for line in fileBuffer.decode( 'utf-8' ).splitlines():
+
+        line = line.strip()
+
+        if objectName is None:
+
+            if line:
+
+                objectName = line
+
+            continue
+
+        if not readingWeights:
+
+            if line.startswith( '============' ):
+
+                readingWeights = True
+
+            else:
+
+                influences.append( line )
+
+            continue
+
+        if line:
+
+            weightLines.append( line )
+            continue
+
+        # empty line closes object record
+        skinWeightsList.append( SkinWeights( objectName, influences, parseTextWeights( weightLines, len( influences ) ) ) )
+
+        objectName = None
+        influences = []
+        weightLines = []
+        readingWeights = False
+
+    if objectName is not None and weightLines:
+
+        skinWeightsList.append( SkinWeights( objectName, influences, parseTextWeights( weightLines, len( influences ) ) ) )
+
+    fileHash = hashlib.sha1( fileBuffer ).hexdigest()
+
+    for skinWeights in skinWeightsList:
+
+        skinWeights.fileHash = fileHash
+
+    return skinWeightsList
+
+def read( filePath ):
+
+    '''
+    read weights file using its extension to pick the format
+
+    :param filePath: str, weights file path
+    :return: list( SkinWeights )
+    '''
+
+    if isBinaryFile( filePath ):
+
+        return readBinary( filePath )
+
+    if isJournalFile( filePath ):
+
+        return readJournal( filePath )
+
+    return readText( filePath )
+
+def listWeightFiles( folderPath ):
+
+    '''
+    list weights files in folder, if object has weights in more formats then the newest file is used,
+    files saved at the same time are used in order journal file, binary file and text file,
+    note is printed when newer file is used instead of file in format with higher priority
+
+    :param folderPath: str, folder with weights files
+    :return: list( str ), weights files paths
+    '''
+
+    extensionPriorities = { journalExt: 0, binaryExt: 1, textExt: 2 }
+    filesDt = {}
+
+    for fileName in sorted( os.listdir( folderPath ) ):
+
+        baseName, extension = os.path.splitext( fileName )
+
+        if extension not in extensionPriorities:
+
+            continue
+
+        filePath = os.path.join( folderPath, fileName )
+        filesDt.setdefault( baseName, [] ).append( ( os.path.getmtime( filePath ), -extensionPriorities[ extension ], filePath ) )
+
+    weightFiles = []
+
+    for baseName in sorted( filesDt ):
+
+        objectFiles = sorted( filesDt[ baseName ] )
+        newestFile = objectFiles[-1][2]
+        priorityFile = max( objectFiles, key = lambda f: f[1] )[2]
+
+        if newestFile != priorityFile:
+
+            print '# skinWeightsFile: using newer %s instead of %s' % ( os.path.basename( newestFile ), os.path.basename( priorityFile ) )
+
+        weightFiles.append( newestFile )
+
+    return weightFiles
+
+def validate( skinWeights ):
+
+    '''
+    check weights data of one object, raise exception with description of found problem
+
+    :param skinWeights: SkinWeights, weights to check
+    :return: None
+    '''
+
+    if not skinWeights.objectName:
+
+        raise Exception( '# weights without object name' )
+
+    if not skinWeights.influences:
+
+        raise Exception( '# no influences for %s' % skinWeights.objectName )
+
+    if skinWeights._sparse is not None:
+
+        offsets, indices, values = skinWeights._sparse
+
+        if offsets[0] != 0 or offsets[-1] != values.size or np.any( np.diff( offsets.astype( np.int64 ) ) < 0 ):
+
+            raise Exception( '# broken sparse weights offsets for %s' % skinWeights.objectName )
+
+        if indices.size and indices.max() >= skinWeights.influenceCount:
+
+            raise Exception( '# sparse weights of %s use influence index out of range' % skinWeights.objectName )
+
+        checkValues = values
+
+    else:
+
+        checkValues = skinWeights._weights
+
+    if not np.all( np.isfinite( checkValues ) ):
+
+        raise Exception( '# weights of %s have invalid values' % skinWeights.objectName )
+
+def _readFileWorker( filePath ):
+
+    '''
+    read and validate weights file, errors are returned instead of raised
+    so one broken file doesn't stop other files
+    '''
+
+    try:
+
+        skinWeightsList = read( filePath )
+
+        for skinWeights in skinWeightsList:
+
+            validate( skinWeights )
+
+        return filePath, skinWeightsList, None
+
+    except Exception as e:
+
+        return filePath, None, str( e )
+
+def _isMayaGui():
+
+    '''
+    check if this process is Maya GUI, its executable is maya (maya.bin, maya.exe), not mayapy or python
+    '''
+
+    executableName = os.path.basename( sys.executable ).lower()
+
+    return executableName.startswith( 'maya' ) and not executableName.startswith( 'mayapy' )
+
+def _getPythonExecutable():
+
+    '''
+    get Python interpreter for worker processes, inside Maya GUI sys.executable is Maya itself
+    so mayapy from the same folder is used instead
+    '''
+
+    if _isMayaGui():
+
+        return os.path.join( os.path.dirname( sys.executable ), 'mayapy' + ( '.exe' if sys.platform == 'win32' else '' ) )
+
+    return sys.executable
+
+def _runWorker( resultsDir, fileIndices, filePaths ):
+
+    '''
+    worker process: read and validate weights files, weights of each file are pickled into resultsDir
+    and one JSON line [ file index, pickle path, error ] is printed as soon as the file is done
+
+    NOTE: attributes of SkinWeights are pickled instead of instances, worker runs this module as __main__
+    '''
+
+    for fileIndex, filePath in zip( fileIndices, filePaths ):
+
+        filePath, skinWeightsList, error = _readFileWorker( filePath )
+        picklePath = None
+
+        if skinWeightsList is not None:
+
+            picklePath = os.path.join( resultsDir, '%d.pickle' % fileIndex )
+
+            fileobj = open( picklePath, 'wb' )
+            pickle.dump( [ skinWeights.__dict__ for skinWeights in skinWeightsList ], fileobj, pickle.HIGHEST_PROTOCOL )
+            fileobj.close()
+
+        sys.stdout.write( json.dumps( [ fileIndex, picklePath, error ] ) + '\n' )
+        sys.stdout.flush()
+
+def _loadWorkerResult( picklePath ):
+
+    fileobj = open( picklePath, 'rb' )
+    attrsList = pickle.load( fileobj )
+    fileobj.close()
+    os.remove( picklePath )
+
+    skinWeightsList = []
+
+    for attrsDt in attrsList:
+
+        skinWeights = SkinWeights.__new__( SkinWeights )
+        skinWeights.__dict__.update( attrsDt )
+        skinWeightsList.append( skinWeights )
+
+    return skinWeightsList
+
+def _readWorkerOutput( workerIndex, process, resultsQueue ):
+
+    for line in iter( process.stdout.readline, b'' ):
+
+        resultsQueue.put( ( workerIndex, line ) )
+
+    # end of worker output
+    resultsQueue.put( ( workerIndex, None ) )
+
+def readFilesParallel( filePaths, processes = None, interpreter = None ):
+
+    '''
+    read and validate weights files in parallel worker processes,
+    results are given in order of finished files so they can be applied while other files are still read
+
+    workers are new Python processes started with given interpreter (mayapy next to Maya by default),
+    running Maya process is never forked, inside Maya GUI files are read in this process by default
+
+    :param filePaths: list( str ), weights files paths
+    :param processes: int, optional, number of worker processes, by default number of CPUs (1 inside Maya GUI), 1 reads files in this process
+    :param interpreter: str, optional, Python executable of workers, it needs NumPy
+    :return: generator of tuple( str, list( SkinWeights ), str ), file path, weights (None if reading failed) and error message
+    '''
+
+    filePaths = list( filePaths )
+
+    if processes is None:
+
+        processes = 1 if _isMayaGui() else multiprocessing.cpu_count()
+
+    processes = min( processes, len( filePaths ) )
+
+    if processes <= 1:
+
+        for filePath in filePaths:
+
+            yield _readFileWorker( filePath )
+
+        return
+
+    resultsDir = tempfile.mkdtemp( prefix = 'skinWeightsRead_' )
+    resultsQueue = queue.Queue()
+    workerScript = os.path.splitext( os.path.abspath( __file__ ) )[0] + '.py'
+
+    # files are dealt to workers in turns, each worker gets file indices and paths
+    workerFiles = [ range( len( filePaths ) )[ i::processes ] for i in range( processes ) ]
+    workers = []
+
+    try:
+
+        for i, fileIndices in enumerate( workerFiles ):
+
+            command = [ interpreter or _getPythonExecutable(), workerScript, '--worker', resultsDir ]
+            command += [ ','.join( [ str( f ) for f in fileIndices ] ) ] + [ filePaths[ f ] for f in fileIndices ]
+            process = subprocess.Popen( command, stdout = subprocess.PIPE )
+
+            readerThread = threading.Thread( target = _readWorkerOutput, args = ( i, process, resultsQueue ) )
+            readerThread.daemon = True
+            readerThread.start()
+
+            workers.append( process )
+
+        pendingFiles = [ list( files ) for files in workerFiles ]
+        runningWorkers = len( workers )
+
+        while runningWorkers:
+
+            workerIndex, line = resultsQueue.get()
+
+            if line is None:
+
+                runningWorkers -= 1
+
+                # files not reported by crashed worker
+                for fileIndex in pendingFiles[ workerIndex ]:
+
+                    yield filePaths[ fileIndex ], None, 'weights reading process stopped with exit code %s' % workers[ workerIndex ].wait()
+
+                continue
+
+            fileIndex, picklePath, error = json.loads( line.decode( 'utf-8' ) )
+            pendingFiles[ workerIndex ].remove( fileIndex )
+
+            if error:
+
+                yield filePaths[ fileIndex ], None, error
+                continue
+
+            yield filePaths[ fileIndex ], _loadWorkerResult( picklePath ), None
+
+    finally:
+
+        for process in workers:
+
+            if process.poll() is None:
+
+                process.kill()
+
+            process.wait()
+
+        shutil.rmtree( resultsDir, ignore_errors = True )
+
+if __name__ == '__main__' and len( sys.argv ) > 2 and sys.argv[1] == '--worker':
+
+    _runWorker( sys.argv[2], [ int( f ) for f in sys.argv[3].split( ',' ) ], sys.argv[4:] )
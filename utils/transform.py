@@ -11,6 +11,7 @@ import maya.OpenMaya as om
 
 import name
 import vector
+import dagIndex
 
 def makeOffsetGrp( obj, prefix = '', suffix = 'Offset', inOrigin = False ):
     
@@ -313,7 +314,7 @@ def parent( objects, parentObj, objectNames = [], relative = False, world = Fals
             
             mc.rename( o, n )
             
-def getParentList( obj, ascending = True, verbose = False, longNames = False ):
+def getParentList( obj, ascending = True, verbose = False, longNames = False, useIndex = False ):
     
     '''
     get list of object parents
@@ -323,11 +324,20 @@ def getParentList( obj, ascending = True, verbose = False, longNames = False ):
     :param fullNames: bool, return parent full names, will return short names by default
     :param verbose: bool, prints function results
     :param longNames: bool, return long names
+    :param useIndex: bool, read parent from cached DAG index instead of scene, see utils.dagIndex
     :return: list(str), list of parents in order starting from closest parent to top parent
     '''
     
     parents = []
-    parentList = mc.listRelatives( obj, f = True, p = True )
+    
+    if useIndex:
+        
+        parent = dagIndex.get().getParent( obj, longNames = True )
+        parentList = [ parent ] if parent else None
+    
+    else:
+        
+        parentList = mc.listRelatives( obj, f = True, p = True )
     
     
     # check if parent is the world
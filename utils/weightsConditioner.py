@@ -0,0 +1,139 @@
+"""
+module to condition skin weights for game engines: prune tiny weights, cap influences per vertex and drop unused influences
+@category rigging @subcategory utils
+@tags skin weights prune max influences game export numpy
+
+NOTE: this module doesn't use Maya, it works only with weights arrays
+"""
+
+import numpy as np
+
+from skinWeightsFile import SkinWeights
+
+def conditionSparseWeights( sparseWeights, maxInfluences = 4, epsilon = 0.001 ):
+
+    '''
+    prune and cap sparse (CSR) weights, all vertices are done at once with sorting by vertex and weight value
+
+    each vertex keeps its maxInfluences biggest weights which are not below epsilon and kept weights are normalized,
+    vertex with all weights below epsilon keeps its biggest weight
+
+    :param sparseWeights: tuple( numpy.ndarray ), ( offsets, influenceIndices, values ) with vertices count + 1 offsets
+    :param maxInfluences: int, maximum number of influences per vertex
+    :param epsilon: float, weights below this value are removed
+    :return: list( tuple( numpy.ndarray ), dict ), 0- conditioned sparse weights, 1- statistics
+    '''
+
+    if int( maxInfluences ) != maxInfluences or maxInfluences < 1:
+
+        raise Exception( '# max influences need to be whole number bigger than 0, not %s' % maxInfluences )
+
+    if epsilon < 0:
+
+        raise Exception( '# prune epsilon cannot be negative, got %s' % epsilon )
+
+    offsets, indices, values = sparseWeights
+    offsets = np.asarray( offsets, dtype = np.int64 )
+    indices = np.asarray( indices )
+    values = np.asarray( values, dtype = np.float64 )
+
+    vertexCount = offsets.size - 1
+    rowCounts = np.diff( offsets )
+    vertexRows = np.repeat( np.arange( vertexCount ), rowCounts )
+
+    # zero weights in sparse input are not counted as influences
+    nonZero = values != 0.0
+    vertexRows, indices, values = vertexRows[ nonZero ], indices[ nonZero ], values[ nonZero ]
+    nonZeroCounts = np.bincount( vertexRows, minlength = vertexCount )
+
+    # sort weights of each vertex from biggest, rank is position of weight inside its vertex
+    order = np.lexsort( ( -values, vertexRows ) )
+    vertexRows, indices, values = vertexRows[ order ], indices[ order ], values[ order ]
+
+    rowStarts = np.zeros( vertexCount, dtype = np.int64 )
+    rowStarts[1:] = np.cumsum( nonZeroCounts )[:-1]
+    ranks = np.arange( values.size ) - rowStarts[ vertexRows ]
+
+    keep = ( ranks < maxInfluences ) & ( ( values >= epsilon ) | ( ranks == 0 ) )
+
+    keptRows, keptIndices, keptValues = vertexRows[ keep ], indices[ keep ], values[ keep ]
+    keptCounts = np.bincount( keptRows, minlength = vertexCount )
+
+    # normalize kept weights so each vertex weights sum is 1.0
+    rowSums = np.bincount( keptRows, weights = keptValues, minlength = vertexCount )
+    keptValues = keptValues / rowSums[ keptRows ]
+
+    # kept weights are back in influence order inside each vertex
+    order = np.lexsort( ( keptIndices, keptRows ) )
+    keptIndices, keptValues = keptIndices[ order ], keptValues[ order ]
+
+    newOffsets = np.zeros( vertexCount + 1, dtype = np.uint32 )
+    newOffsets[1:] = np.cumsum( keptCounts )
+
+    statsDt = {
+                'vertexCount': vertexCount,
+                'maxInfluencesBefore': int( nonZeroCounts.max() ) if vertexCount else 0,
+                'maxInfluencesAfter': int( keptCounts.max() ) if vertexCount else 0,
+                'prunedWeights': int( np.count_nonzero( ( values < epsilon ) & ( ranks > 0 ) ) ),
+                'cappedVertices': int( np.count_nonzero( np.bincount( vertexRows[ values >= epsilon ], minlength = vertexCount ) > maxInfluences ) ),
+                'removedWeights': int( values.size - keptValues.size )
+                }
+
+    return [ ( newOffsets, keptIndices, keptValues ), statsDt ]
+
+def conditionSkinWeights( skinWeights, maxInfluences = 4, epsilon = 0.001, removeUnused = True ):
+
+    '''
+    prune and cap weights of one skinned object, dense weights are converted to sparse form first
+
+    :param skinWeights: SkinWeights, weights of skinned object
+    :param maxInfluences: int, maximum number of influences per vertex
+    :param epsilon: float, weights below this value are removed
+    :param removeUnused: bool, remove influences without any weight after conditioning
+    :return: list( SkinWeights, dict ), 0- conditioned weights, 1- statistics with 'removedInfluences' names
+    '''
+
+    sparseWeights, statsDt = conditionSparseWeights( skinWeights.sparse, maxInfluences, epsilon )
+    offsets, indices, values = sparseWeights
+    influences = skinWeights.influences
+
+    statsDt['influencesBefore'] = len( influences )
+    statsDt['removedInfluences'] = []
+
+    if removeUnused:
+
+        usedIndices = np.unique( indices )
+
+        # keep at least one influence so weights stay valid for skinCluster
+        if not usedIndices.size:
+
+            usedIndices = np.array( [0] )
+
+        indexMap = np.zeros( len( influences ), dtype = np.int64 )
+        indexMap[ usedIndices ] = np.arange( usedIndices.size )
+
+        usedSet = set( usedIndices.tolist() )
+        statsDt['removedInfluences'] = [ inf for i, inf in enumerate( influences ) if i not in usedSet ]
+        influences = [ influences[ i ] for i in usedIndices ]
+        indices = indexMap[ indices ]
+
+    statsDt['influencesAfter'] = len( influences )
+
+    conditionedWeights = SkinWeights( skinWeights.objectName, influences, sparse = ( offsets, indices, values ),
+                                      positions = skinWeights.positions, topologyHash = skinWeights.topologyHash )
+
+    return [ conditionedWeights, statsDt ]
+
+def formatStats( objectName, statsDt ):
+
+    '''
+    get one line description of conditioning statistics
+
+    :param objectName: str, name of conditioned object
+    :param statsDt: dict, statistics from conditionSkinWeights()
+    :return: str
+    '''
+
+    return '# %s: %d vertices, max influences %d -> %d, %d capped vertices, %d pruned weights, influences %d -> %d' % (
+            objectName, statsDt['vertexCount'], statsDt['maxInfluencesBefore'], statsDt['maxInfluencesAfter'],
+            statsDt['cappedVertices'], statsDt['prunedWeights'], statsDt['influencesBefore'], statsDt['influencesAfter'] )
@@ -0,0 +1,193 @@
+"""
+module to remap per point weights between shapes with different topology
+@category rigging @subcategory utils
+@tags skin weights remap transfer closest points numpy
+
+NOTE: this module doesn't use Maya, it works only with point positions and weights arrays
+"""
+
+import numpy as np
+
+class PointGrid( object ):
+
+    '''
+    spatial index of points in uniform grid cells, finds nearest points for many query points at once
+
+    points are sorted by their cell so each cell is a continuous range of sorted points,
+    queries check neighbour cells with vectorized passes and only query points
+    without certain result are compared with all points
+    '''
+
+    def __init__( self, points, pointsPerCell = 4 ):
+
+        '''
+        :param points: numpy.ndarray, (points x 3) positions
+        :param pointsPerCell: int, average number of points per cell used to pick the cell size
+        '''
+
+        self.points = np.asarray( points, dtype = np.float64 ).reshape( -1, 3 )
+
+        self._minCorner = self.points.min( axis = 0 )
+        bboxSize = np.maximum( self.points.max( axis = 0 ) - self._minCorner, 1e-6 )
+
+        # cell size giving about pointsPerCell points per cell, flat sides of bounding box are skipped
+        # so points of planar shapes are not spread into too many cells
+        cellsCount = max( 1.0, self.points.shape[0] / float( pointsPerCell ) )
+        spanSizes = bboxSize[ bboxSize > bboxSize.max() * 1e-3 ]
+        self.cellSize = max( ( np.prod( spanSizes ) / cellsCount ) ** ( 1.0 / spanSizes.size ), bboxSize.max() / 1000.0 )
+
+        # mesh points lie on surfaces and fill only some of the cells,
+        # so cells are made smaller until occupied cells have about pointsPerCell points
+        for i in range( 4 ):
+
+            self._buildCells( bboxSize )
+            occupiedCellsCount = np.count_nonzero( np.diff( self._sortedCellIds ) ) + 1
+            meanOccupancy = self.points.shape[0] / float( occupiedCellsCount )
+
+            if meanOccupancy < pointsPerCell * 2 or self.cellSize <= bboxSize.max() / 1000.0:
+
+                break
+
+            self.cellSize = max( self.cellSize * np.sqrt( pointsPerCell / meanOccupancy ), bboxSize.max() / 1000.0 )
+
+    def _buildCells( self, bboxSize ):
+
+        self._gridDims = np.floor( bboxSize / self.cellSize ).astype( np.int64 ) + 1
+
+        cellIds = self._getCellIds( self._getCellCoords( self.points ) )
+        self._order = np.argsort( cellIds, kind = 'mergesort' )
+        self._sortedCellIds = cellIds[ self._order ]
+
+    def _getCellCoords( self, points ):
+
+        cellCoords = np.floor( ( points - self._minCorner ) / self.cellSize ).astype( np.int64 )
+
+        return cellCoords
+
+    def _getCellIds( self, cellCoords ):
+
+        return ( cellCoords[:, 0] * self._gridDims[1] + cellCoords[:, 1] ) * self._gridDims[2] + cellCoords[:, 2]
+
+    def _bruteForceQuery( self, queryPoints, count ):
+
+        '''
+        nearest points comparing each query point with all points, used for points far from grid points
+        '''
+
+        chunkSize = max( 1, 2 ** 22 // self.points.shape[0] )
+        indices = np.zeros( ( queryPoints.shape[0], count ), dtype = np.int64 )
+        distances = np.zeros( ( queryPoints.shape[0], count ) )
+
+        for start in range( 0, queryPoints.shape[0], chunkSize ):
+
+            chunk = queryPoints[ start:start + chunkSize ]
+            chunkDistances = np.sqrt( ( ( chunk[:, np.newaxis, :] - self.points[np.newaxis, :, :] ) ** 2 ).sum( axis = 2 ) )
+            nearest = np.argsort( chunkDistances, axis = 1 )[:, :count]
+
+            indices[ start:start + chunkSize ] = nearest
+            distances[ start:start + chunkSize ] = chunkDistances[ np.arange( chunk.shape[0] )[:, np.newaxis], nearest ]
+
+        return indices, distances
+
+    def query( self, queryPoints, count = 1 ):
+
+        '''
+        find nearest points
+
+        :param queryPoints: numpy.ndarray, (query points x 3) positions
+        :param count: int, number of nearest points to find for each query point
+        :return: list( numpy.ndarray, numpy.ndarray ), 0- (query points x count) indices of points, 1- their distances, both sorted by distance
+        '''
+
+        queryPoints = np.asarray( queryPoints, dtype = np.float64 ).reshape( -1, 3 )
+        count = min( count, self.points.shape[0] )
+        queryCount = queryPoints.shape[0]
+        queryRange = np.arange( queryCount )
+
+        bestIndices = np.zeros( ( queryCount, count ), dtype = np.int64 )
+        bestDistances = np.full( ( queryCount, count ), np.inf )
+
+        queryCells = self._getCellCoords( queryPoints )
+
+        for offset in np.array( np.meshgrid( [-1, 0, 1], [-1, 0, 1], [-1, 0, 1] ) ).reshape( 3, -1 ).T:
+
+            cellCoords = queryCells + offset
+            inGrid = np.all( ( cellCoords >= 0 ) & ( cellCoords < self._gridDims ), axis = 1 )
+            cellIds = self._getCellIds( np.clip( cellCoords, 0, self._gridDims - 1 ) )
+
+            sortedIdx = np.searchsorted( self._sortedCellIds, cellIds, side = 'left' )
+            rangeEnds = np.searchsorted( self._sortedCellIds, cellIds, side = 'right' )
+
+            # one vectorized pass for each point position inside the cell ranges,
+            # query points leave the pass when their cell range is done
+            active = np.where( inGrid & ( sortedIdx < rangeEnds ) )[0]
+
+            while active.size:
+
+                candidates = self._order[ sortedIdx[ active ] ]
+                candidateDistances = np.sqrt( ( ( self.points[ candidates ] - queryPoints[ active ] ) ** 2 ).sum( axis = 1 ) )
+
+                # replace worst of current best points if candidate is closer
+                worstColumn = bestDistances[ active ].argmax( axis = 1 )
+                replace = candidateDistances < bestDistances[ active, worstColumn ]
+
+                bestIndices[ active[ replace ], worstColumn[ replace ] ] = candidates[ replace ]
+                bestDistances[ active[ replace ], worstColumn[ replace ] ] = candidateDistances[ replace ]
+
+                sortedIdx[ active ] += 1
+                active = active[ sortedIdx[ active ] < rangeEnds[ active ] ]
+
+        # points further than one cell might be closer than found ones
+        uncertain = np.where( bestDistances.max( axis = 1 ) > self.cellSize )[0]
+
+        if uncertain.size:
+
+            bestIndices[ uncertain ], bestDistances[ uncertain ] = self._bruteForceQuery( queryPoints[ uncertain ], count )
+
+        sortOrder = np.argsort( bestDistances, axis = 1 )
+        rows = queryRange[:, np.newaxis]
+
+        return bestIndices[ rows, sortOrder ], bestDistances[ rows, sortOrder ]
+
+def remapWeights( sourcePoints, sourceWeights, targetPoints, neighbours = 4, chunkSize = 20000 ):
+
+    '''
+    remap per point weights to new points using inverse distance interpolation of nearest source points,
+    remapped weights are normalized so each point weights sum is the same as on source
+
+    :param sourcePoints: numpy.ndarray, (source points x 3) positions of points with weights
+    :param sourceWeights: numpy.ndarray, (source points x influences) weights
+    :param targetPoints: numpy.ndarray, (target points x 3) positions of points to get weights for
+    :param neighbours: int, number of nearest source points to interpolate
+    :param chunkSize: int, number of target points interpolated at once, limits memory use
+    :return: numpy.ndarray, (target points x influences) weights
+    '''
+
+    sourceWeights = np.asarray( sourceWeights, dtype = np.float64 )
+    pointGrid = PointGrid( sourcePoints )
+    nearestIndices, nearestDistances = pointGrid.query( targetPoints, neighbours )
+
+    # points at the same position as source point take its weights
+    inverseDistances = 1.0 / np.maximum( nearestDistances, 1e-10 )
+    exactMatch = nearestDistances[:, 0] < 1e-6
+    inverseDistances[ exactMatch ] = 0.0
+    inverseDistances[ exactMatch, 0 ] = 1.0
+
+    interpWeights = inverseDistances / inverseDistances.sum( axis = 1 )[:, np.newaxis]
+
+    targetWeights = np.zeros( ( nearestIndices.shape[0], sourceWeights.shape[1] ) )
+
+    for start in range( 0, nearestIndices.shape[0], chunkSize ):
+
+        chunk = slice( start, start + chunkSize )
+        targetWeights[ chunk ] = ( sourceWeights[ nearestIndices[ chunk ] ] * interpWeights[ chunk, :, np.newaxis ] ).sum( axis = 1 )
+
+    # keep weight sums, mostly 1.0 for normalized skin weights
+    sourceSums = sourceWeights.sum( axis = 1 )
+    targetSums = targetWeights.sum( axis = 1 )
+    wantedSums = ( sourceSums[ nearestIndices ] * interpWeights ).sum( axis = 1 )
+    nonZero = targetSums > 0
+
+    targetWeights[ nonZero ] *= ( wantedSums[ nonZero ] / targetSums[ nonZero ] )[:, np.newaxis]
+
+    return targetWeights